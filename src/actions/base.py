@@ -3,6 +3,8 @@ import typing as T
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
+from providers.trace_provider import TraceProvider
+
 IT = T.TypeVar("IT")
 OT = T.TypeVar("OT")
 
@@ -51,7 +53,19 @@ class ActionConnector(ABC, T.Generic[OT]):
         pass
 
     def tick(self) -> None:
-        time.sleep(60)
+        self.sleep(60)
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Sleep in a tick, without counting the sleep in the tick span.
+
+        Parameters
+        ----------
+        seconds : float
+            The time to sleep.
+        """
+        with TraceProvider().idle():
+            time.sleep(seconds)
 
 
 @dataclass
@@ -1,5 +1,4 @@
 import logging
-import time
 
 from actions.base import ActionConfig, ActionConnector
 from actions.emotion.interface import EmotionInput
@@ -54,5 +53,5 @@ class EmotionUnitreeConnector(ActionConnector[EmotionInput]):
         logging.info(f"SendThisToUTClient: {output_interface.action}")
 
     def tick(self) -> None:
-        time.sleep(5)
+        self.sleep(5)
         # logging.info("MoveUnitreeSDKConnector Tick")
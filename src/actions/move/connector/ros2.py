@@ -1,5 +1,4 @@
 import logging
-import time
 
 from actions.base import ActionConfig, ActionConnector
 from actions.move.interface import MoveInput
@@ -40,5 +39,5 @@ class MoveUnitreeSDKConnector(ActionConnector[MoveInput]):
         logging.info(f"SendThisToROS2: {new_msg}")
 
     def tick(self) -> None:
-        time.sleep(0.1)
+        self.sleep(0.1)
         # logging.info("MoveUnitreeSDKConnector Tick")
@@ -1,6 +1,5 @@
 import logging
 import threading
-import time
 
 from actions.base import ActionConfig, ActionConnector
 from actions.move_game_controller.interface import IDLEInput
@@ -249,7 +248,7 @@ class Go2GameControllerConnector(ActionConnector[IDLEInput]):
         -------
         None
         """
-        time.sleep(0.05)
+        self.sleep(0.05)
         logging.debug("Gamepad tick")
 
         data = None
@@ -1,12 +1,11 @@
 import logging
 import math
-import random
-import time
 from queue import Queue
 from typing import List, Optional
 
 from actions.base import ActionConfig, ActionConnector, MoveCommand
 from actions.move_go2_autonomy.interface import MoveInput
+from providers.obstacle_fusion_provider import ObstacleFusionProvider
 from providers.odom_provider import OdomProvider, RobotState
 from providers.rplidar_provider import RPLidarProvider
 from providers.unitree_go2_state_provider import UnitreeGo2StateProvider
@@ -31,6 +30,7 @@ class MoveUnitreeSDKConnector(ActionConnector[MoveInput]):
         self.gap_previous = 0
 
         self.lidar = RPLidarProvider()
+        self.obstacles = ObstacleFusionProvider()
         self.unitree_go2_state = UnitreeGo2StateProvider()
 
         # create sport client
@@ -161,19 +161,19 @@ class MoveUnitreeSDKConnector(ActionConnector[MoveInput]):
 
         if self.odom is None:
             logging.info("Waiting for odom data = self.odom is None")
-            time.sleep(0.5)
+            self.sleep(0.5)
             return
 
         if self.odom.position["odom_x"] == 0.0:
             # this value is never precisely zero except while
             # booting and waiting for data to arrive
             logging.info("Waiting for odom data, x == 0.0")
-            time.sleep(0.5)
+            self.sleep(0.5)
             return
 
         if self.odom.position["body_attitude"] != RobotState.STANDING:
             logging.info("Cannot move - dog is sitting")
-            time.sleep(0.5)
+            self.sleep(0.5)
             return
 
         # if we got to this point, we have good data and we are able to
@@ -252,14 +252,14 @@ class MoveUnitreeSDKConnector(ActionConnector[MoveInput]):
                     logging.info(f"Phase 2 - Forward/retreat GAP delta: {progress}m")
 
                 if goal_dx > 0:
-                    if 4 not in self.lidar.advance:
+                    if not self.obstacles.is_path_clear(4):
                         logging.warning("Cannot advance due to barrier")
                         self.clean_abort()
                         return
                     fb = 1
 
                 if goal_dx < 0:
-                    if not self.lidar.retreat:
+                    if not self.obstacles.is_path_clear(9):
                         logging.warning("Cannot retreat due to barrier")
                         self.clean_abort()
                         return
@@ -281,7 +281,7 @@ class MoveUnitreeSDKConnector(ActionConnector[MoveInput]):
                     )
                     self.clean_abort()
 
-        time.sleep(0.1)
+        self.sleep(0.1)
 
     def _process_turn_left(self):
         """
@@ -291,8 +291,7 @@ class MoveUnitreeSDKConnector(ActionConnector[MoveInput]):
             logging.warning("Cannot turn left due to barrier")
             return
 
-        path = random.choice(self.lidar.turn_left)
-        path_angle = self.lidar.path_angles[path]
+        path_angle = self.lidar.best_heading(self.lidar.turn_left)
 
         target_yaw = self._normalize_angle(
             -1 * self.odom.position["odom_yaw_m180_p180"] + path_angle
@@ -315,8 +314,7 @@ class MoveUnitreeSDKConnector(ActionConnector[MoveInput]):
             logging.warning("Cannot turn right due to barrier")
             return
 
-        path = random.choice(self.lidar.turn_right)
-        path_angle = self.lidar.path_angles[path]
+        path_angle = self.lidar.best_heading(self.lidar.turn_right)
 
         target_yaw = self._normalize_angle(
             -1 * self.odom.position["odom_yaw_m180_p180"] + path_angle
@@ -339,8 +337,7 @@ class MoveUnitreeSDKConnector(ActionConnector[MoveInput]):
             logging.warning("Cannot advance due to barrier")
             return
 
-        path = random.choice(self.lidar.advance)
-        path_angle = self.lidar.path_angles[path]
+        path_angle = self.lidar.best_heading(self.lidar.advance)
 
         target_yaw = self._normalize_angle(
             -1 * self.odom.position["odom_yaw_m180_p180"] + path_angle
@@ -1,5 +1,4 @@
 import logging
-import time
 
 import serial
 
@@ -51,5 +50,5 @@ class MoveSerialConnector(ActionConnector[MoveInput]):
             logging.info(f"SerialNotOpen - Simulating transmit: {message}")
 
     def tick(self) -> None:
-        time.sleep(0.1)
+        self.sleep(0.1)
         # logging.info("Connector Tick")
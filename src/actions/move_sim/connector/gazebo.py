@@ -1,6 +1,5 @@
 import logging
 import subprocess
-import time
 from dataclasses import dataclass
 
 from actions.base import ActionConfig, ActionConnector
@@ -119,4 +118,4 @@ class GazeboConnector(ActionConnector[MoveInput]):
             logging.error(f"Error sending velocity command: {e}")
 
     def tick(self) -> None:
-        time.sleep(0.1)
+        self.sleep(0.1)
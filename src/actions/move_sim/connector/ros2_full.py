@@ -1,5 +1,4 @@
 import logging
-import time
 
 from actions.base import ActionConfig, ActionConnector
 from actions.move.interface import MoveInput
@@ -63,4 +62,4 @@ class ROS2Connector(ActionConnector[MoveInput]):
         self.publisher.add_pending_message(new_msg)
 
     def tick(self) -> None:
-        time.sleep(0.1)
+        self.sleep(0.1)
@@ -1,7 +1,6 @@
 import logging
 import math
 import random
-import time
 from queue import Queue
 from typing import List, Optional
 
@@ -9,9 +8,13 @@ import zenoh
 
 from actions.base import ActionConfig, ActionConnector, MoveCommand
 from actions.move_turtle.interface import MoveInput
+from providers.obstacle_fusion_provider import (
+    HAZARD_BUMP,
+    HazardEvent,
+    ObstacleFusionProvider,
+)
 from providers.odom_provider import OdomProvider
-from providers.rplidar_provider import RPLidarProvider
-from zenoh_idl import geometry_msgs, sensor_msgs
+from zenoh_idl import geometry_msgs
 
 
 class MoveZenohConnector(ActionConnector[MoveInput]):
@@ -43,49 +46,46 @@ class MoveZenohConnector(ActionConnector[MoveInput]):
         try:
             self.session = zenoh.open(zenoh.Config())
             logging.info(f"Zenoh move client opened {self.session}")
-            logging.info(f"TurtleBot4 hazard listener starting with URID: {URID}")
-            self.session.declare_subscriber(
-                f"{URID}/c3/hazard_detection", self.listen_hazard
-            )
         except Exception as e:
             logging.error(f"Error opening Zenoh client: {e}")
 
-        self.lidar = RPLidarProvider()
+        logging.info(f"TurtleBot4 hazard listener starting with URID: {URID}")
+        self.obstacles = ObstacleFusionProvider()
+        self.obstacles.subscribe_hazards(URID)
+        self.obstacles.register_hazard_callback(self.listen_hazard)
         self.odom = OdomProvider(URID=URID, use_zenoh=True)
 
-    def listen_hazard(self, data: zenoh.Sample) -> None:
+    def listen_hazard(self, hazards: List[HazardEvent]) -> None:
         """
-        Callback for Zenoh hazard detection messages.
-        This method is called when a hazard detection message is received.
+        Callback for the hazards reported by the robot base.
 
         Parameters
         ----------
-        data : zenoh.Sample
-            The Zenoh sample containing the hazard detection data.
+        hazards : List[HazardEvent]
+            The hazards of the latest hazard report.
         """
-        self.hazard = sensor_msgs.HazardDetectionVector.deserialize(
-            data.payload.to_bytes()
-        )
-        if (
-            self.hazard is not None
-            and self.hazard.detections
-            and len(self.hazard.detections) > 0
-        ):
-            for haz in self.hazard.detections:
-                if haz.type == 1:
-                    logging.info(
-                        f"Hazard Type:{haz.type} direction:{haz.header.frame_id}"
-                    )
-                    if "right" in haz.header.frame_id:
-                        self.hazard = "TURN_LEFT"
-                    elif "left" in haz.header.frame_id:
-                        self.hazard = "TURN_RIGHT"
-                    elif "center" in haz.header.frame_id:
-                        if random.randint(1, 2) == 1:
-                            self.hazard = "TURN_LEFT"
-                        else:
-                            self.hazard = "TURN_RIGHT"
-                    logging.info(f"Hazard decision: {self.hazard}")
+        for haz in hazards:
+            if haz.type != HAZARD_BUMP:
+                continue
+            if haz.bearing > 0:
+                self.hazard = "TURN_LEFT"
+            elif haz.bearing < 0:
+                self.hazard = "TURN_RIGHT"
+            else:
+                # turn towards the side with more room
+                left = self.obstacles.nearest_obstacle(-90.0, tolerance=45.0)
+                right = self.obstacles.nearest_obstacle(90.0, tolerance=45.0)
+                left = float("inf") if left is None else left
+                right = float("inf") if right is None else right
+                if left > right:
+                    self.hazard = "TURN_LEFT"
+                elif right > left:
+                    self.hazard = "TURN_RIGHT"
+                elif random.randint(1, 2) == 1:
+                    self.hazard = "TURN_LEFT"
+                else:
+                    self.hazard = "TURN_RIGHT"
+            logging.info(f"Hazard decision: {self.hazard}")
 
     def move(self, vx, vyaw):
         """
@@ -124,17 +124,9 @@ class MoveZenohConnector(ActionConnector[MoveInput]):
 
         # reconfirm possible paths
         # this is needed due to the 2s latency of the LLMs
-        possible_paths = self.lidar.valid_paths
-
-        advance_danger = True
-        retreat_danger = True
-
-        if possible_paths:
-            logging.info(f"Action - Valid paths: {possible_paths}")
-            if 4 in possible_paths:
-                advance_danger = False
-            if 9 in possible_paths:
-                retreat_danger = False
+        logging.info(f"Action - Clear paths: {self.obstacles.clear_paths}")
+        advance_danger = not self.obstacles.is_path_clear(4)
+        retreat_danger = not self.obstacles.is_path_clear(9)
 
         if output_interface.action == "turn left":
             # turn 90 Deg to the left (CCW)
@@ -184,7 +176,7 @@ class MoveZenohConnector(ActionConnector[MoveInput]):
 
     def tick(self) -> None:
 
-        time.sleep(0.1)
+        self.sleep(0.1)
 
         logging.debug("Move tick")
 
@@ -192,7 +184,7 @@ class MoveZenohConnector(ActionConnector[MoveInput]):
             # this value is never precisely zero except while
             # booting and waiting for data to arrive
             logging.info("Waiting for odom data")
-            time.sleep(0.5)
+            self.sleep(0.5)
             return
 
         # physical collision event ALWAYS takes precedence
@@ -299,9 +291,7 @@ class MoveZenohConnector(ActionConnector[MoveInput]):
                     self.pending_movements.get()
             else:
                 # reconfirm possible paths
-                pp = self.lidar.valid_paths
-
-                logging.debug(f"Action - Valid paths: {pp}")
+                logging.debug(f"Action - Clear paths: {self.obstacles.clear_paths}")
 
                 s_x = current_target.start_x
                 s_y = current_target.start_y
@@ -312,9 +302,9 @@ class MoveZenohConnector(ActionConnector[MoveInput]):
                 logging.info(f"remaining advance GAP: {round(remaining,2)}")
 
                 fb = 0
-                if "advance" in direction and 4 in pp:
+                if "advance" in direction and self.obstacles.is_path_clear(4):
                     fb = 1
-                elif "retreat" in direction and 9 in pp:
+                elif "retreat" in direction and self.obstacles.is_path_clear(9):
                     fb = -1
                 else:
                     logging.info("danger, pop 1 off queue")
@@ -1,7 +1,6 @@
 import concurrent.futures
 import logging
 import threading
-import time
 from dataclasses import asdict, dataclass, field
 
 from actions.base import ActionConfig, ActionConnector
@@ -235,4 +234,4 @@ class MoveRos2Connector(ActionConnector[MoveInput]):
 
     def tick(self) -> None:
 
-        time.sleep(0.1)
+        self.sleep(0.1)
@@ -6,6 +6,7 @@ from concurrent.futures import ThreadPoolExecutor
 
 from actions.base import AgentAction
 from llm.output_model import Action
+from providers.trace_provider import TraceProvider
 from runtime.config import RuntimeConfig
 
 
@@ -34,6 +35,7 @@ class ActionOrchestrator:
         )
         self._submitted_connectors = set()
         self._stop_event = threading.Event()
+        self._trace_provider = TraceProvider()
 
     def start(self):
         """
@@ -56,7 +58,10 @@ class ActionOrchestrator:
         """
         while not self._stop_event.is_set():
             try:
-                action.connector.tick()
+                with self._trace_provider.span(
+                    f"tick:{action.llm_label}", category="connector"
+                ):
+                    action.connector.tick()
             except Exception as e:
                 logging.error(f"Error in connector {action.llm_label}: {e}")
 
@@ -123,7 +128,10 @@ class ActionOrchestrator:
         input_interface = T.get_type_hints(agent_action.interface)["input"](
             **{"action": action.value}
         )
-        await agent_action.connector.connect(input_interface)
+        with self._trace_provider.span(
+            f"connect:{agent_action.llm_label}", category="action", value=action.value
+        ):
+            await agent_action.connector.connect(input_interface)
         return input_interface
 
     def stop(self):
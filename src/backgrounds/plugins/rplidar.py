@@ -44,6 +44,15 @@ class RPLidar(Background):
             "multicast_address": getattr(config, "multicast_address", ""),
             "machine_type": getattr(config, "machine_type", "go2"),
             "log_file": getattr(config, "log_file", False),
+            "path_lookup_table": getattr(config, "path_lookup_table", False),
+            "path_lookup_table_file": getattr(config, "path_lookup_table_file", None),
+            "use_occupancy_grid": getattr(config, "use_occupancy_grid", False),
+            "occupancy_grid_resolution": getattr(
+                config, "occupancy_grid_resolution", 0.05
+            ),
+            "occupancy_grid_scans": getattr(config, "occupancy_grid_scans", 5),
+            "candidate_paths": getattr(config, "candidate_paths", 0),
+            "candidate_path_length": getattr(config, "candidate_path_length", 1.0),
         }
 
         return lidar_config
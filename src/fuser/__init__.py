@@ -1,12 +1,19 @@
 import logging
+import re
 import time
 import typing as T
+from collections import deque
 
 from actions import describe_action
 from inputs.base import Sensor
+from llm.output_model import Action
 from providers.io_provider import IOProvider
+from providers.memory_index import MemoryIndex
 from runtime.config import RuntimeConfig
 
+# the markers around the data of each input, see `inputs.base.Sensor`
+INPUT_MARKER_PATTERN = re.compile(r"\s*(?:INPUT:|// START|// END)\s*")
+
 
 class Fuser:
     """
@@ -26,6 +33,17 @@ class Fuser:
         Runtime configuration settings.
     io_provider : IOProvider
         Provider for handling I/O data and timing.
+
+    Notes
+    -----
+    The system prompt and the action descriptions only depend on the runtime
+    configuration and on whether the governance input provides the laws, so
+    they are cached between ticks and only rebuilt when one of those changes.
+    Only the inputs block is rendered on every tick.
+
+    If the runtime configuration has a `memory` section, every turn that
+    reached the actions is added to a local `MemoryIndex`, and the turns most
+    similar to the current inputs are recalled into the prompt.
     """
 
     def __init__(self, config: RuntimeConfig):
@@ -40,6 +58,142 @@ class Fuser:
         self.config = config
         self.io_provider = IOProvider()
 
+        # cached static prompt sections and the keys they were built from
+        self._system_prompt_key: T.Optional[T.Tuple] = None
+        self._system_prompt: str = ""
+        self._actions_key: T.Optional[T.Tuple] = None
+        self._actions_fused: str = ""
+
+        # local semantic memory of past turns
+        self.memory: T.Optional[MemoryIndex] = None
+        memory_config = getattr(self.config, "memory", None)
+        if isinstance(memory_config, dict):
+            memory_config = dict(memory_config)
+            # the turns still in the LLM history are not recalled again
+            llm_config = getattr(
+                getattr(self.config, "cortex_llm", None), "_config", None
+            )
+            history_length = getattr(llm_config, "history_length", None)
+            if isinstance(history_length, int) and history_length > 0:
+                memory_config.setdefault("exclude_recent", (history_length + 1) // 2)
+            self.memory = MemoryIndex(**memory_config)
+        # the inputs of the recent prompts, until their actions are known
+        self._recent_inputs: T.Deque[T.Tuple[str, str]] = deque(maxlen=16)
+
+    def _build_system_prompt(self, include_laws: bool) -> str:
+        """
+        Get the system prompt, rebuilding it only if the configuration changed.
+
+        Parameters
+        ----------
+        include_laws : bool
+            Whether the locally stored laws should be part of the system prompt.
+
+        Returns
+        -------
+        str
+            The system prompt section.
+        """
+        key = (
+            self.config.system_prompt_base,
+            self.config.system_governance,
+            self.config.system_prompt_examples,
+            include_laws,
+        )
+        if key == self._system_prompt_key:
+            return self._system_prompt
+
+        system_prompt = "\nBASIC CONTEXT:\n" + self.config.system_prompt_base + "\n"
+
+        if include_laws:
+            system_prompt += "\nLAWS:\n" + self.config.system_governance
+
+        if self.config.system_prompt_examples:
+            system_prompt += "\n\nEXAMPLES:\n" + self.config.system_prompt_examples
+
+        self._system_prompt_key = key
+        self._system_prompt = system_prompt
+        return system_prompt
+
+    def _build_actions(self) -> str:
+        """
+        Get the action descriptions, rebuilding them only if the actions changed.
+
+        Returns
+        -------
+        str
+            The descriptions of all available actions.
+        """
+        key = tuple(
+            (action.name, action.llm_label, action.exclude_from_prompt)
+            for action in self.config.agent_actions
+        )
+        if key == self._actions_key:
+            return self._actions_fused
+
+        actions_fused = ""
+        for action in self.config.agent_actions:
+            desc = describe_action(
+                action.name, action.llm_label, action.exclude_from_prompt
+            )
+            if desc:
+                actions_fused += desc + "\n\n"
+
+        self._actions_key = key
+        self._actions_fused = actions_fused
+        return actions_fused
+
+    def _recall(self, inputs_fused: str) -> str:
+        """
+        Recall the past turns most relevant to the current inputs.
+
+        Parameters
+        ----------
+        inputs_fused : str
+            The inputs of this tick.
+
+        Returns
+        -------
+        str
+            The memories section, empty if nothing relevant is remembered.
+        """
+        if self.memory is None or not inputs_fused:
+            return ""
+        memories = self.memory.recall(INPUT_MARKER_PATTERN.sub(" ", inputs_fused))
+        if not memories:
+            return ""
+        lines = [
+            f"- {time.strftime('%H:%M:%S', time.localtime(m.timestamp))} {m.text}"
+            for m in memories
+        ]
+        return "RELEVANT MEMORIES:\n" + "\n".join(lines) + "\n\n"
+
+    def remember(self, prompt: str, actions: T.List[Action]) -> None:
+        """
+        Add a turn, the inputs of a prompt and the actions taken, to memory.
+
+        Parameters
+        ----------
+        prompt : str
+            The fused prompt, as returned by `fuse`.
+        actions : List[Action]
+            The actions the LLM chose for the prompt.
+        """
+        if self.memory is None:
+            return
+        inputs_fused = next(
+            (inputs for fused, inputs in self._recent_inputs if fused == prompt),
+            None,
+        )
+        if not inputs_fused:
+            return
+        # the markers are left out, they are the same in every turn
+        inputs_text = INPUT_MARKER_PATTERN.sub(" ", inputs_fused).strip()
+        actions_text = " | ".join(
+            f"{action.type}: {action.value}" for action in actions if action.value
+        )
+        self.memory.add(f"{inputs_text} -> {actions_text}")
+
     def fuse(self, inputs: list[Sensor], finished_promises: list[T.Any]) -> str:
         """
         Combine all inputs into a single formatted prompt string.
@@ -65,29 +219,20 @@ class Fuser:
         input_strings = [input.formatted_latest_buffer() for input in inputs]
         logging.debug(f"InputMessageArray: {input_strings}")
 
-        # Combine all inputs, memories, and configurations into a single prompt
-        system_prompt = "\nBASIC CONTEXT:\n" + self.config.system_prompt_base + "\n"
-
         inputs_fused = " ".join([s for s in input_strings if s is not None])
 
         # if we provide laws from blockchain, these override the locally stored rules
         # the rules are not provided in the system prompt, but as a separate INPUT,
         # since they are flowing from the outside world
-        if "Universal Laws" not in inputs_fused:
-            system_prompt += "\nLAWS:\n" + self.config.system_governance
-
-        if self.config.system_prompt_examples:
-            system_prompt += "\n\nEXAMPLES:\n" + self.config.system_prompt_examples
+        system_prompt = self._build_system_prompt(
+            include_laws="Universal Laws" not in inputs_fused
+        )
 
         # descriptions of possible actions
-        actions_fused = ""
+        actions_fused = self._build_actions()
 
-        for action in self.config.agent_actions:
-            desc = describe_action(
-                action.name, action.llm_label, action.exclude_from_prompt
-            )
-            if desc:
-                actions_fused += desc + "\n\n"
+        # past turns similar to this one
+        memories_fused = self._recall(inputs_fused)
 
         question_prompt = "What will you do? Actions:"
 
@@ -96,17 +241,28 @@ class Fuser:
         # (2) all the inputs (vision, sound, etc.)
         # (3) a (typically) fixed list of available actions
         # (4) a (typically) fixed system prompt requesting commands to be generated
-        fused_prompt = f"{system_prompt}\n\nAVAILABLE INPUTS:\n{inputs_fused}\nAVAILABLE ACTIONS:\n\n{actions_fused}\n\n{question_prompt}"
+        fused_prompt = f"{system_prompt}\n\n{memories_fused}AVAILABLE INPUTS:\n{inputs_fused}\nAVAILABLE ACTIONS:\n\n{actions_fused}\n\n{question_prompt}"
 
         logging.debug(f"FINAL PROMPT: {fused_prompt}")
 
         # Record the global prompt, actions and inputs
         self.io_provider.set_fuser_system_prompt(f"{system_prompt}")
-        self.io_provider.set_fuser_inputs(inputs_fused)
+        self.io_provider.set_fuser_inputs(f"{memories_fused}{inputs_fused}")
         self.io_provider.set_fuser_available_actions(
             f"AVAILABLE ACTIONS:\n{actions_fused}\n\n{question_prompt}"
         )
 
+        # the same content split into a stable prefix and a volatile suffix,
+        # used by the LLM plugins for provider-side prompt caching
+        self.io_provider.set_fuser_prompt_sections(
+            fused_prompt,
+            f"{system_prompt}\n\nAVAILABLE ACTIONS:\n\n{actions_fused}",
+            f"{memories_fused}AVAILABLE INPUTS:\n{inputs_fused}\n\n{question_prompt}",
+        )
+
+        if self.memory is not None:
+            self._recent_inputs.append((fused_prompt, inputs_fused))
+
         # Record the timestamp of the output
         self.io_provider.fuser_end_time = time.time()
 
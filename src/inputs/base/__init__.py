@@ -3,6 +3,11 @@ from dataclasses import dataclass
 
 R = T.TypeVar("R")
 
+# tick priorities of sensor events in the event-driven cortex loop
+PRIORITY_PASSIVE = 0  # never triggers a tick, read at the next tick only
+PRIORITY_NORMAL = 1  # triggers a tick once the minimum tick interval has passed
+PRIORITY_URGENT = 2  # triggers a tick right away
+
 
 @dataclass
 class SensorConfig:
@@ -29,14 +34,25 @@ class Sensor(T.Generic[R]):
     --------------
     R
         The raw input type that this agent handles
+
+    Notes
+    -----
+    In the event-driven cortex loop, new events of a sensor trigger a tick
+    according to its `priority`. Events that arrive within `debounce` seconds
+    of the previous notification are coalesced into one. Both can be
+    overridden in the sensor config.
     """
 
+    priority: int = PRIORITY_NORMAL
+    debounce: float = 0.0
+
     def __init__(self, config: SensorConfig):
         """
         Initialize an Sensor instance.
         """
         self.config = config
-        pass
+        self.priority = getattr(config, "priority", self.priority)
+        self.debounce = getattr(config, "debounce", self.debounce)
 
     async def _raw_to_text(self, raw_input: R) -> str:
         """
@@ -91,6 +107,17 @@ class Sensor(T.Generic[R]):
         """
         raise NotImplementedError
 
+    def pending_text(self) -> str | None:
+        """
+        Get the text received but not fused into a prompt yet.
+
+        Returns
+        -------
+        str or None
+            The text, or None if the sensor does not buffer text.
+        """
+        return None
+
     async def listen(self) -> T.AsyncIterator[R]:
         """
         Create an asynchronous iterator that yields raw input events.
@@ -1,6 +1,10 @@
 import asyncio
+import time
+import typing as T
 
-from inputs.base import Sensor
+from inputs.base import PRIORITY_NORMAL, PRIORITY_PASSIVE, Sensor
+from providers.io_provider import IOProvider
+from providers.trace_provider import TraceProvider
 
 
 class InputOrchestrator:
@@ -23,6 +27,12 @@ class InputOrchestrator:
         Initialize InputOrchestrator instance with input sources.
         """
         self.inputs = inputs
+        self.io_provider = IOProvider()
+        self.trace_provider = TraceProvider()
+
+        # debounce state, keyed by input name
+        self._last_notified: T.Dict[str, float] = {}
+        self._pending_notifications: T.Dict[str, asyncio.TimerHandle] = {}
 
     async def listen(self) -> None:
         """
@@ -44,5 +54,96 @@ class InputOrchestrator:
         input : Sensor
             Input source to listen to
         """
+        key = self._input_key(input)
+        self.io_provider.set_input_priority(key, self._input_priority(input))
+
+        last_event = None
+        poll_start = time.time()
         async for event in input.listen():
-            await input.raw_to_text(event)
+            self.trace_provider.record(f"poll:{key}", "input", poll_start, time.time())
+            with self.trace_provider.span(f"raw_to_text:{key}", category="input"):
+                await input.raw_to_text(event)
+            poll_start = time.time()
+            if event is not None and self._event_changed(event, last_event):
+                self._notify(input)
+            last_event = event
+
+    def _notify(self, input: Sensor) -> None:
+        """
+        Notify the cortex of a new event, honoring the input debounce window.
+
+        Events that arrive within `debounce` seconds of the previous
+        notification are coalesced into one notification that is sent at the
+        end of the window.
+
+        Parameters
+        ----------
+        input : Sensor
+            The input source that produced the event.
+        """
+        priority = self._input_priority(input)
+        if priority <= PRIORITY_PASSIVE:
+            return
+
+        key = self._input_key(input)
+        # the listeners may act on the new text before it is fused
+        self.io_provider.set_pending_input(key, input.pending_text())
+        if key in self._pending_notifications:
+            return
+
+        debounce = getattr(input, "debounce", 0.0) or 0.0
+        last_notified = self._last_notified.get(key)
+        delay = 0.0
+        if last_notified is not None:
+            delay = last_notified + debounce - time.time()
+
+        if delay <= 0:
+            self._send_notification(key, priority)
+        else:
+            self._pending_notifications[key] = asyncio.get_running_loop().call_later(
+                delay, self._send_notification, key, priority
+            )
+
+    def _send_notification(self, key: str, priority: int) -> None:
+        """
+        Send an input notification through the IOProvider.
+
+        Parameters
+        ----------
+        key : str
+            The input name.
+        priority : int
+            The tick priority of the event.
+        """
+        self._pending_notifications.pop(key, None)
+        self._last_notified[key] = time.time()
+        self.io_provider.notify_input(key, priority)
+
+    @staticmethod
+    def _input_key(input: Sensor) -> str:
+        """
+        Get the name under which an input is reported.
+        """
+        return getattr(input, "descriptor_for_LLM", None) or type(input).__name__
+
+    @staticmethod
+    def _input_priority(input: Sensor) -> int:
+        """
+        Get the tick priority of an input.
+        """
+        priority = getattr(input, "priority", PRIORITY_NORMAL)
+        return priority if isinstance(priority, int) else PRIORITY_NORMAL
+
+    @staticmethod
+    def _event_changed(event: T.Any, last_event: T.Any) -> bool:
+        """
+        Check whether an event differs from the previous event of the input.
+
+        Events that cannot be compared, such as arrays, count as changed.
+        """
+        if last_event is None:
+            return True
+        try:
+            return bool(event != last_event)
+        except Exception:
+            return True
@@ -5,7 +5,7 @@ import time
 from queue import Empty, Queue
 from typing import Dict, List, Optional
 
-from inputs.base import SensorConfig
+from inputs.base import PRIORITY_URGENT, SensorConfig
 from inputs.base.loop import FuserInput
 from providers.asr_provider import ASRProvider
 from providers.io_provider import IOProvider
@@ -20,6 +20,9 @@ class RivaASRInput(FuserInput[str]):
     and providing text conversion capabilities.
     """
 
+    # new speech wakes the cortex right away
+    priority = PRIORITY_URGENT
+
     def __init__(self, config: SensorConfig = SensorConfig()):
         """
         Initialize ASRInput instance.
@@ -137,6 +140,17 @@ class RivaASRInput(FuserInput[str]):
             else:
                 self.messages[-1] = f"{self.messages[-1]} {pending_message}"
 
+    def pending_text(self) -> Optional[str]:
+        """
+        Get the transcribed speech not fused into a prompt yet.
+
+        Returns
+        -------
+        Optional[str]
+            The latest buffered message, or None if the buffer is empty
+        """
+        return self.messages[-1] if self.messages else None
+
     def formatted_latest_buffer(self) -> Optional[str]:
         """
         Format and clear the latest buffer contents.
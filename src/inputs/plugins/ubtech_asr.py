@@ -4,7 +4,7 @@ import time
 from queue import Empty, Queue
 from typing import List, Optional
 
-from inputs.base import SensorConfig
+from inputs.base import PRIORITY_URGENT, SensorConfig
 from inputs.base.loop import FuserInput
 from providers.io_provider import IOProvider
 from providers.sleep_ticker_provider import SleepTickerProvider
@@ -22,6 +22,9 @@ class UbtechASRInput(FuserInput[str]):
     Ubtech Robot ASR input handler that uses the UbtechASRProvider.
     """
 
+    # new speech wakes the cortex right away
+    priority = PRIORITY_URGENT
+
     def __init__(self, config: SensorConfig = SensorConfig()):
         super().__init__(config)
         self.messages: List[str] = []
@@ -107,6 +110,17 @@ class UbtechASRInput(FuserInput[str]):
             else:
                 self.messages[-1] = f"{self.messages[-1]} {pending_message}"
 
+    def pending_text(self) -> Optional[str]:
+        """
+        Get the transcribed speech not fused into a prompt yet.
+
+        Returns
+        -------
+        Optional[str]
+            The latest buffered message, or None if the buffer is empty
+        """
+        return self.messages[-1] if self.messages else None
+
     def formatted_latest_buffer(self) -> Optional[str]:
         if len(self.messages) == 0:
             return None
@@ -7,7 +7,7 @@ from typing import List, Optional
 
 import zenoh
 
-from inputs.base import SensorConfig
+from inputs.base import PRIORITY_URGENT, SensorConfig
 from inputs.base.loop import FuserInput
 from providers.io_provider import IOProvider
 from providers.sleep_ticker_provider import SleepTickerProvider
@@ -22,6 +22,9 @@ class ZenohListener(FuserInput[str]):
     and providing text conversion capabilities.
     """
 
+    # new messages wake the cortex right away
+    priority = PRIORITY_URGENT
+
     def __init__(self, config: SensorConfig = SensorConfig()):
         """
         Initialize the ZenohListener instance.
@@ -1,14 +1,20 @@
 import importlib
 import inspect
+import logging
 import os
 import typing as T
 
+import aiohttp
 from pydantic import BaseModel, ConfigDict, Field
 
+from llm.output_model import Action
+from llm.stream_parser import ActionStreamParser
 from providers.io_provider import IOProvider
 
 R = T.TypeVar("R")
 
+ActionCallback = T.Callable[[Action], T.Awaitable[None]]
+
 
 class LLMConfig(BaseModel):
     """
@@ -24,6 +30,19 @@ class LLMConfig(BaseModel):
         Name of the LLM model to use
     history_length : int, optional
         Number of interactions to store in the history buffer
+    history_token_budget : int, optional
+        If set, keep the history within this many estimated tokens instead
+        of `history_length` messages, rolling the oldest turns into the
+        running summary
+    history_file : str, optional
+        Path of a log the history is persisted to, and restored from when
+        the agent starts
+    prompt_cache : bool, optional
+        Send the stable part of the fused prompt as a leading system message
+        so that provider-side prompt caching can be used
+    stream_actions : bool, optional
+        Stream the response and hand each action to the caller as soon as it
+        has been generated, for plugins that support it
     extra_params : dict, optional
         Additional parameters for the LLM API request
     """
@@ -36,6 +55,10 @@ class LLMConfig(BaseModel):
     timeout: T.Optional[int] = 10
     agent_name: T.Optional[str] = "IRIS"
     history_length: T.Optional[int] = 0
+    history_token_budget: T.Optional[int] = 0
+    history_file: T.Optional[str] = None
+    prompt_cache: T.Optional[bool] = False
+    stream_actions: T.Optional[bool] = False
     extra_params: T.Dict[str, T.Any] = Field(default_factory=dict)
 
     def __getitem__(self, item: str) -> T.Any:
@@ -89,6 +112,9 @@ class LLM(T.Generic[R]):
 
     """
 
+    # Whether the plugin's ask accepts an `on_action` streaming callback
+    _supports_action_stream: bool = False
+
     def __init__(self, output_model: T.Type[R], config: LLMConfig = LLMConfig()):
         # Set up the LLM configuration
         self._config = config
@@ -99,7 +125,12 @@ class LLM(T.Generic[R]):
         # Set up the IO provider
         self.io_provider = IOProvider()
 
-    async def ask(self, prompt: str, messages: T.List[T.Dict[str, str]] = []) -> R:
+    async def ask(
+        self,
+        prompt: str,
+        messages: T.List[T.Dict[str, str]] = [],
+        on_action: T.Optional[ActionCallback] = None,
+    ) -> R:
         """
         Send a prompt to the LLM and receive a typed response.
 
@@ -109,6 +140,9 @@ class LLM(T.Generic[R]):
             Input text to send to the model
         messages : List[Dict[str, str]]
             List of message dictionaries to send to the model.
+        on_action : Callable[[Action], Awaitable[None]], optional
+            Called with each action as soon as it has been generated, for
+            plugins that stream their response (see `streams_actions`).
 
         Returns
         -------
@@ -122,6 +156,153 @@ class LLM(T.Generic[R]):
         """
         raise NotImplementedError
 
+    @property
+    def streams_actions(self) -> bool:
+        """
+        Whether actions are streamed to the `on_action` callback of `ask`.
+
+        Returns
+        -------
+        bool
+            True if the plugin supports streaming and it is enabled in the
+            configuration.
+        """
+        return (
+            self._supports_action_stream
+            and self._config is not None
+            and bool(self._config.stream_actions)
+        )
+
+    async def _stream_actions(
+        self, deltas: T.AsyncIterator[str], on_action: ActionCallback
+    ) -> str:
+        """
+        Consume a streamed response, handing each completed action to a callback.
+
+        Parameters
+        ----------
+        deltas : AsyncIterator[str]
+            The text deltas of the streamed response.
+        on_action : Callable[[Action], Awaitable[None]]
+            Called with each action as soon as it is complete.
+
+        Returns
+        -------
+        str
+            The complete response text.
+        """
+        parser = ActionStreamParser()
+        content = ""
+        async for delta in deltas:
+            content += delta
+            for action in parser.feed(delta):
+                logging.debug(f"Streamed action: {action}")
+                await on_action(action)
+        return content
+
+    def _prompt_messages(
+        self, prompt: str, messages: T.List[T.Dict[str, str]]
+    ) -> T.List[T.Dict[str, str]]:
+        """
+        Build the chat messages for a prompt.
+
+        With `prompt_cache` enabled, the stable prefix recorded by the Fuser
+        (system prompt, laws, examples and actions) is sent as a leading system
+        message and only the inputs are sent as the trailing user message, so
+        that the provider can reuse its cache for the prefix across ticks.
+
+        Parameters
+        ----------
+        prompt : str
+            The fused prompt.
+        messages : List[Dict[str, str]]
+            Message history to place between the prefix and the prompt.
+
+        Returns
+        -------
+        List[Dict[str, str]]
+            The messages to send to the model.
+        """
+        sections = None
+        if self._config.prompt_cache:
+            sections = self.io_provider.get_fuser_prompt_sections(prompt)
+
+        if sections is None:
+            return [*messages, {"role": "user", "content": prompt}]
+
+        prefix, suffix = sections
+        return [
+            {"role": "system", "content": prefix},
+            *messages,
+            {"role": "user", "content": suffix},
+        ]
+
+    def _record_prompt_cache_usage(self, response: T.Any) -> None:
+        """
+        Record the provider-side prompt cache usage of a completion response.
+
+        Parameters
+        ----------
+        response : Any
+            The chat completion response. OpenAI-style `prompt_tokens_details`
+            and DeepSeek-style `prompt_cache_hit_tokens` usage fields are read.
+        """
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        if not isinstance(prompt_tokens, int):
+            return
+
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None)
+        if not isinstance(cached_tokens, int):
+            cached_tokens = getattr(usage, "prompt_cache_hit_tokens", None)
+        if not isinstance(cached_tokens, int):
+            cached_tokens = 0
+
+        self.io_provider.llm_prompt_tokens = prompt_tokens
+        self.io_provider.llm_cached_tokens = cached_tokens
+        logging.debug(
+            f"LLM prompt cache: {cached_tokens}/{prompt_tokens} prompt tokens cached"
+        )
+
+
+class PooledSessionMixin:
+    """
+    Mixin for LLM plugins that send their requests with a pooled aiohttp
+    session.
+
+    The session keeps its connections alive between ticks, so the TLS
+    handshake is not repeated for every request. The plugin must list the
+    mixin before `LLM` in its bases.
+    """
+
+    _config: LLMConfig
+    session: T.Optional[aiohttp.ClientSession] = None
+
+    async def _init_session(self) -> aiohttp.ClientSession:
+        """
+        Initialize the pooled aiohttp session if not exists.
+
+        Returns
+        -------
+        aiohttp.ClientSession
+            The shared HTTP session.
+        """
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self._config.timeout),
+                connector=aiohttp.TCPConnector(keepalive_timeout=60),
+            )
+        return self.session
+
+    async def close(self) -> None:
+        """
+        Close the session when done.
+        """
+        if self.session:
+            await self.session.close()
+            self.session = None
+
 
 def load_llm(llm_name: str) -> T.Type[LLM]:
     """
@@ -5,7 +5,7 @@ import typing as T
 import openai
 from pydantic import BaseModel
 
-from llm import LLM, LLMConfig
+from llm import LLM, ActionCallback, LLMConfig
 from providers.llm_history_manager import LLMHistoryManager
 
 R = T.TypeVar("R", bound=BaseModel)
@@ -54,7 +54,12 @@ class DeepSeekLLM(LLM[R]):
         self.history_manager = LLMHistoryManager(self._config, self._client)
 
     @LLMHistoryManager.update_history()
-    async def ask(self, prompt: str, messages: T.List[T.Dict[str, str]]) -> R | None:
+    async def ask(
+        self,
+        prompt: str,
+        messages: T.List[T.Dict[str, str]],
+        on_action: T.Optional[ActionCallback] = None,
+    ) -> R | None:
         """
         Send a prompt to the DeepSeek API and get a structured response.
 
@@ -64,6 +69,8 @@ class DeepSeekLLM(LLM[R]):
             The input prompt to send to the model.
         messages : List[Dict[str, str]]
             List of message dictionaries to send to the model.
+        on_action : Callable[[Action], Awaitable[None]], optional
+            Not used, this plugin does not stream its response.
 
         Returns
         -------
@@ -83,8 +90,7 @@ class DeepSeekLLM(LLM[R]):
                     "role": "system",
                     "content": f"You must respond with valid JSON matching this schema: {self._output_model.model_json_schema()}",
                 },
-                *messages,
-                {"role": "user", "content": prompt},
+                *self._prompt_messages(prompt, messages),
             ]
 
             parsed_response = self._client.chat.completions.create(
@@ -95,6 +101,7 @@ class DeepSeekLLM(LLM[R]):
 
             message_content = parsed_response.choices[0].message.content
             self.io_provider.llm_end_time = time.time()
+            self._record_prompt_cache_usage(parsed_response)
 
             try:
                 parsed_response = self._output_model.model_validate_json(
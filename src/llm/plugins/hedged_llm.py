@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import time
+import typing as T
+from collections import deque
+
+import numpy as np
+from pydantic import BaseModel
+
+from llm import LLM, ActionCallback, LLMConfig, load_llm
+
+R = T.TypeVar("R", bound=BaseModel)
+
+# configuration keys that the backends inherit from the hedged LLM config
+INHERITED_CONFIG_KEYS = ["api_key", "URID", "unitree_ethernet", "agent_name"]
+
+
+class HedgedLLM(LLM[R]):
+    """
+    Composite LLM that hedges requests across several LLM backends.
+
+    The prompt is first sent to the primary backend, the one with the lowest
+    median latency over its recent requests. If no valid response has arrived
+    once the primary exceeds its `hedge_percentile` latency, the same prompt
+    is sent to the next backend. The first valid response wins and the
+    remaining requests are cancelled.
+
+    Parameters
+    ----------
+    output_model : Type[R]
+        A Pydantic BaseModel subclass defining the expected response structure.
+    config : LLMConfig
+        Configuration object. The `backends` entry lists the wrapped LLMs, each
+        as `{"type": ..., "config": {...}}`. Optional entries are
+        `hedge_percentile` (default 95), `hedge_delay` (seconds, used until
+        enough latency samples exist, default 2.0), `latency_window`
+        (number of latency samples kept per backend, default 50) and
+        `failure_latency` (seconds recorded for a failed request, default
+        30.0).
+    """
+
+    # minimum number of latency samples before the percentile is trusted
+    MIN_LATENCY_SAMPLES = 5
+
+    def __init__(self, output_model: T.Type[R], config: LLMConfig = LLMConfig()):
+        """
+        Initialize the HedgedLLM instance and its backends.
+
+        Parameters
+        ----------
+        output_model : Type[R]
+            Pydantic model class for response validation.
+        config : LLMConfig, optional
+            Configuration settings for the LLM.
+        """
+        super().__init__(output_model, config)
+
+        self.hedge_percentile: float = getattr(config, "hedge_percentile", 95)
+        self.hedge_delay: float = getattr(config, "hedge_delay", 2.0)
+        self.failure_latency: float = getattr(config, "failure_latency", 30.0)
+        latency_window: int = getattr(config, "latency_window", 50)
+
+        self.backends: T.List[LLM[R]] = []
+        for backend in getattr(config, "backends", []):
+            backend_config = dict(backend.get("config", {}))
+            for key in INHERITED_CONFIG_KEYS:
+                value = getattr(config, key, None)
+                if key not in backend_config and value is not None:
+                    backend_config[key] = value
+
+            self.backends.append(
+                load_llm(backend["type"])(
+                    output_model=output_model, config=LLMConfig(**backend_config)
+                )
+            )
+
+        if not self.backends:
+            logging.error("HedgedLLM config has no backends")
+
+        self.latencies: T.List[T.Deque[float]] = [
+            deque(maxlen=latency_window) for _ in self.backends
+        ]
+
+    def _backend_name(self, index: int) -> str:
+        return f"{type(self.backends[index]).__name__}[{index}]"
+
+    def _rank_backends(self) -> T.List[int]:
+        """
+        Order the backends by their median latency.
+
+        Backends without latency samples are tried first, so that every
+        backend is measured.
+
+        Returns
+        -------
+        List[int]
+            Backend indices, fastest first.
+        """
+        return sorted(
+            range(len(self.backends)),
+            key=lambda i: (
+                float(np.median(self.latencies[i])) if self.latencies[i] else 0.0
+            ),
+        )
+
+    def _hedge_delay(self, index: int) -> float:
+        """
+        Get how long to wait for a backend before hedging.
+
+        Parameters
+        ----------
+        index : int
+            The backend index.
+
+        Returns
+        -------
+        float
+            The `hedge_percentile` latency of the backend in seconds, or the
+            configured `hedge_delay` if there are not enough samples yet.
+        """
+        samples = self.latencies[index]
+        if len(samples) < self.MIN_LATENCY_SAMPLES:
+            return self.hedge_delay
+        return float(np.percentile(samples, self.hedge_percentile))
+
+    def latency_percentiles(self) -> T.Dict[str, T.Dict[str, float]]:
+        """
+        Get the p50/p95/p99 latency of each backend.
+
+        Returns
+        -------
+        Dict[str, Dict[str, float]]
+            Latency percentiles in seconds, keyed by backend name.
+        """
+        return {
+            self._backend_name(i): {
+                f"p{p}": float(np.percentile(samples, p)) for p in (50, 95, 99)
+            }
+            for i, samples in enumerate(self.latencies)
+            if samples
+        }
+
+    async def _timed_ask(self, index: int, prompt: str) -> R | None:
+        """
+        Ask a backend and record its latency.
+
+        Cancelled requests are recorded with the time they had been running,
+        which is a lower bound of their latency and keeps slow backends from
+        being chosen as primary. Failed requests, including invalid
+        responses, are recorded as `failure_latency`, so a backend that
+        fails fast is not chosen as primary either.
+
+        Parameters
+        ----------
+        index : int
+            The backend index.
+        prompt : str
+            The input prompt to send to the model.
+
+        Returns
+        -------
+        R or None
+            The backend response.
+        """
+        start_time = time.time()
+        latency = self.failure_latency
+        try:
+            result = await self.backends[index].ask(prompt)
+            if result is not None:
+                latency = time.time() - start_time
+            return result
+        except asyncio.CancelledError:
+            latency = time.time() - start_time
+            raise
+        finally:
+            self.latencies[index].append(latency)
+
+    async def ask(
+        self,
+        prompt: str,
+        messages: T.List[T.Dict[str, str]] = [],
+        on_action: T.Optional[ActionCallback] = None,
+    ) -> R | None:
+        """
+        Send a prompt to the backends and return the first valid response.
+
+        Parameters
+        ----------
+        prompt : str
+            The input prompt to send to the model.
+        messages : List[Dict[str, str]]
+            Not used, each backend manages its own history.
+        on_action : Callable[[Action], Awaitable[None]], optional
+            Not used, hedged requests are not streamed.
+
+        Returns
+        -------
+        R or None
+            The first valid response, or None if all backends fail.
+        """
+        if not self.backends:
+            return None
+
+        order = self._rank_backends()
+        tasks: T.Dict[asyncio.Task, int] = {}
+
+        def launch(index: int) -> asyncio.Task:
+            logging.debug(f"HedgedLLM sending request to {self._backend_name(index)}")
+            task = asyncio.create_task(self._timed_ask(index, prompt))
+            tasks[task] = index
+            return task
+
+        pending = {launch(order[0])}
+        next_backend = 1
+
+        try:
+            while pending:
+                timeout = None
+                if next_backend < len(order):
+                    timeout = self._hedge_delay(order[next_backend - 1])
+
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for task in done:
+                    if task.exception() is None and task.result() is not None:
+                        logging.info(
+                            f"HedgedLLM response from {self._backend_name(tasks[task])}"
+                        )
+                        return task.result()
+                    logging.warning(
+                        f"HedgedLLM backend {self._backend_name(tasks[task])} failed"
+                    )
+
+                # the request is late or failed - hedge to the next backend
+                if next_backend < len(order):
+                    pending.add(launch(order[next_backend]))
+                    next_backend += 1
+
+            logging.error("HedgedLLM: all backends failed")
+            return None
+        finally:
+            for task in pending:
+                task.cancel()
+            logging.debug(f"HedgedLLM latencies: {self.latency_percentiles()}")
@@ -2,15 +2,14 @@ import logging
 import time
 import typing as T
 
-import requests
 from pydantic import BaseModel
 
-from llm import LLM, LLMConfig
+from llm import LLM, ActionCallback, LLMConfig, PooledSessionMixin
 
 R = T.TypeVar("R", bound=BaseModel)
 
 
-class MultiLLM(LLM[R]):
+class MultiLLM(PooledSessionMixin, LLM[R]):
     """
     MultiLLM implementation that sends requests to the robotic team endpoint.
 
@@ -48,7 +47,10 @@ class MultiLLM(LLM[R]):
         self.endpoint = "https://api.openmind.org/api/core/agent"
 
     async def ask(
-        self, prompt: str, messages: T.List[T.Dict[str, str]] = []
+        self,
+        prompt: str,
+        messages: T.List[T.Dict[str, str]] = [],
+        on_action: T.Optional[ActionCallback] = None,
     ) -> R | None:
         """
         Send a prompt to the appropriate endpoint and get a structured response.
@@ -60,6 +62,8 @@ class MultiLLM(LLM[R]):
             The input prompt to send to the model.
         messages : List[Dict[str, str]]
             Message history to provide context.
+        on_action : Callable[[Action], Awaitable[None]], optional
+            Not used, this plugin does not stream its response.
 
         Returns
         -------
@@ -89,13 +93,13 @@ class MultiLLM(LLM[R]):
             logging.debug(f"MultiLLM inputs: {request['inputs']}")
             logging.debug(f"MultiLLM available_actions: {request['available_actions']}")
 
-            response = requests.post(
+            session = await self._init_session()
+            async with session.post(
                 self.endpoint,
                 json=request,
                 headers=headers,
-            )
-
-            response_json = response.json()
+            ) as response:
+                response_json = await response.json(content_type=None)
             self.io_provider.llm_end_time = time.time()
             logging.info(f"Raw response: {response_json}")
 
@@ -111,9 +115,3 @@ class MultiLLM(LLM[R]):
         except Exception as e:
             logging.error(f"Error during API request: {str(e)}")
             return None
-
-    async def close(self):
-        """Close the session when done."""
-        if self.session:
-            await self.session.close()
-            self.session = None
@@ -2,15 +2,14 @@ import logging
 import time
 import typing as T
 
-import requests
 from pydantic import BaseModel
 
-from llm import LLM, LLMConfig
+from llm import LLM, ActionCallback, LLMConfig, PooledSessionMixin
 
 R = T.TypeVar("R", bound=BaseModel)
 
 
-class MultiLLMHealthy(LLM[R]):
+class MultiLLMHealthy(PooledSessionMixin, LLM[R]):
     """
     MultiLLMHealthy implementation that sends requests to the medical agent endpoint.
 
@@ -48,7 +47,10 @@ class MultiLLMHealthy(LLM[R]):
         self.endpoint = "https://api.openmind.org/api/core/agent/medical"
 
     async def ask(
-        self, prompt: str, messages: T.List[T.Dict[str, str]] = []
+        self,
+        prompt: str,
+        messages: T.List[T.Dict[str, str]] = [],
+        on_action: T.Optional[ActionCallback] = None,
     ) -> R | None:
         """
         Send a prompt to the medical agent endpoint and get a structured response.
@@ -59,6 +61,8 @@ class MultiLLMHealthy(LLM[R]):
             The input prompt to send to the model.
         messages : List[Dict[str, str]]
             Message history to provide context.
+        on_action : Callable[[Action], Awaitable[None]], optional
+            Not used, this plugin does not stream its response.
 
         Returns
         -------
@@ -97,19 +101,19 @@ class MultiLLMHealthy(LLM[R]):
                 f"MultiLLMHealthy available_actions: {request['available_actions']}"
             )
 
-            response = requests.post(
+            session = await self._init_session()
+            async with session.post(
                 self.endpoint,
                 json=request,
                 headers=headers,
-            )
-
-            if response.status_code != 200:
-                logging.error(
-                    f"API request failed with status {response.status_code}: {response.text}"
-                )
-                return None
+            ) as response:
+                if response.status != 200:
+                    logging.error(
+                        f"API request failed with status {response.status}: {await response.text()}"
+                    )
+                    return None
 
-            response_json = response.json()
+                response_json = await response.json(content_type=None)
 
             if "extra" in response_json and "question_states" in response_json["extra"]:
                 new_qs = response_json["extra"].get("question_states")
@@ -137,9 +141,3 @@ class MultiLLMHealthy(LLM[R]):
         except Exception as e:
             logging.error(f"Error during API request: {str(e)}")
             return None
-
-    async def close(self):
-        """Close the session when done."""
-        if self.session:
-            await self.session.close()
-            self.session = None
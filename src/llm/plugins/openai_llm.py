@@ -5,7 +5,7 @@ import typing as T
 import openai
 from pydantic import BaseModel
 
-from llm import LLM, LLMConfig
+from llm import LLM, ActionCallback, LLMConfig
 from providers.llm_history_manager import LLMHistoryManager
 
 R = T.TypeVar("R", bound=BaseModel)
@@ -27,6 +27,8 @@ class OpenAILLM(LLM[R]):
         will be used.
     """
 
+    _supports_action_stream = True
+
     def __init__(self, output_model: T.Type[R], config: LLMConfig = LLMConfig()):
         """
         Initialize the OpenAI LLM instance.
@@ -55,7 +57,10 @@ class OpenAILLM(LLM[R]):
 
     @LLMHistoryManager.update_history()
     async def ask(
-        self, prompt: str, messages: T.List[T.Dict[str, str]] = []
+        self,
+        prompt: str,
+        messages: T.List[T.Dict[str, str]] = [],
+        on_action: T.Optional[ActionCallback] = None,
     ) -> R | None:
         """
         Send a prompt to the OpenAI API and get a structured response.
@@ -66,6 +71,9 @@ class OpenAILLM(LLM[R]):
             The input prompt to send to the model.
         messages : List[Dict[str, str]]
             List of message dictionaries to send to the model.
+        on_action : Callable[[Action], Awaitable[None]], optional
+            If given and `stream_actions` is enabled, the response is streamed
+            and each action is passed to this callback as soon as it is complete.
 
         Returns
         -------
@@ -83,15 +91,33 @@ class OpenAILLM(LLM[R]):
             # this saves all the input information
             self.io_provider.set_llm_prompt(prompt)
 
-            response = await self._client.beta.chat.completions.parse(
-                model=self._config.model,
-                messages=[*messages, {"role": "user", "content": prompt}],
-                response_format=self._output_model,
-                timeout=self._config.timeout,
-            )
+            if on_action is not None and self.streams_actions:
+                async with self._client.beta.chat.completions.stream(
+                    model=self._config.model,
+                    messages=self._prompt_messages(prompt, messages),
+                    response_format=self._output_model,
+                    timeout=self._config.timeout,
+                ) as stream:
+                    message_content = await self._stream_actions(
+                        (
+                            event.delta
+                            async for event in stream
+                            if event.type == "content.delta"
+                        ),
+                        on_action,
+                    )
+                    response = await stream.get_final_completion()
+            else:
+                response = await self._client.beta.chat.completions.parse(
+                    model=self._config.model,
+                    messages=self._prompt_messages(prompt, messages),
+                    response_format=self._output_model,
+                    timeout=self._config.timeout,
+                )
+                message_content = response.choices[0].message.content
 
-            message_content = response.choices[0].message.content
             self.io_provider.llm_end_time = time.time()
+            self._record_prompt_cache_usage(response)
 
             try:
                 parsed_response = self._output_model.model_validate_json(
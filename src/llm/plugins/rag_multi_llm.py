@@ -1,22 +1,29 @@
+import asyncio
 import logging
 import time
 import typing as T
 
-import requests
+import aiohttp
 from pydantic import BaseModel
 
-from llm import LLM, LLMConfig
+from llm import LLM, ActionCallback, LLMConfig, PooledSessionMixin
+from llm.rag_cache import RagCache, RagResult
 
 R = T.TypeVar("R", bound=BaseModel)
 
 
-class RagMultiLLM(LLM[R]):
+class RagMultiLLM(PooledSessionMixin, LLM[R]):
     """
     RagMultiLLM implementation that sends requests to the robotic team endpoint.
 
     This plugin maintains the same output structure as other LLM plugins
     while routing requests through the agent-based robotic team.
 
+    If `rag_cache` is set in the configuration, the knowledge base results
+    are cached (see `llm.rag_cache.RagCache`), and new voice input is sent
+    to the knowledge base as soon as it arrives, so that its context is
+    usually ready by the time the prompt is fused.
+
     Parameters
     ----------
     output_model : Type[R]
@@ -50,8 +57,154 @@ class RagMultiLLM(LLM[R]):
 
         self.use_rag = hasattr(self._config, "use_rag") and self._config.use_rag
 
+        # upper bound on how long the agent call waits for the RAG context
+        self.rag_timeout = getattr(self._config, "rag_timeout", 3.0)
+
+        # knowledge base cache and voice input prefetch
+        self.rag_cache: T.Optional[RagCache] = None
+        rag_cache_config = getattr(self._config, "rag_cache", None)
+        if self.use_rag and isinstance(rag_cache_config, dict):
+            self.rag_cache = RagCache(**rag_cache_config)
+            self.io_provider.add_input_listener(self._on_input)
+        self._loop: T.Optional[asyncio.AbstractEventLoop] = None
+
+    def _headers(self) -> T.Dict[str, str]:
+        """
+        Get the request headers.
+        """
+        return {
+            "Authorization": f"Bearer {self._config.api_key}",
+            "Content-Type": "application/json",
+        }
+
+    async def _fetch_rag(self, query: str) -> RagResult:
+        """
+        Query the knowledge base with the shared session.
+
+        Parameters
+        ----------
+        query : str
+            The query.
+
+        Returns
+        -------
+        RagResult
+            The knowledge base context and the tools summary.
+        """
+        session = await self._init_session()
+        return await self._query_rag(session, query, self._headers())
+
+    def _on_input(self, key: str, priority: int) -> None:
+        """
+        Prefetch the knowledge base context of new voice input.
+
+        The input orchestrator notifies new speech before it is fused, so
+        the text is read from the pending input, and otherwise from the
+        updated input. May be called from any thread.
+
+        Parameters
+        ----------
+        key : str
+            The input identifier.
+        priority : int
+            The tick priority of the new data.
+        """
+        if key != "Voice":
+            return
+        text = self.io_provider.pending_input(key)
+        if text is None:
+            voice = self.io_provider.inputs.get(key, None)
+            text = voice.input if voice is not None else None
+        if not text:
+            return
+
+        try:
+            # notifications of the input orchestrator run on the event loop
+            self._loop = asyncio.get_running_loop()
+        except RuntimeError:
+            if self._loop is None or self._loop.is_closed():
+                return
+            self._loop.call_soon_threadsafe(self._prefetch_voice, text)
+            return
+        self._prefetch_voice(text)
+
+    def _prefetch_voice(self, text: str) -> None:
+        """
+        Start fetching the knowledge base context of voice input.
+
+        Parameters
+        ----------
+        text : str
+            The transcribed speech.
+        """
+        if self.rag_cache is not None:
+            self.rag_cache.prefetch(text, self._fetch_rag)
+
+    async def _query_rag(
+        self, session: aiohttp.ClientSession, query: str, headers: T.Dict[str, str]
+    ) -> RagResult:
+        """
+        Query the knowledge base.
+
+        Parameters
+        ----------
+        session : aiohttp.ClientSession
+            The shared HTTP session.
+        query : str
+            The query, typically the most recent voice input.
+        headers : Dict[str, str]
+            The request headers.
+
+        Returns
+        -------
+        Tuple[str, str]
+            The knowledge base context and a summary of the tools used to
+            gather it, both empty if the query fails.
+        """
+        rag_context = ""
+        tools_summary = ""
+        try:
+            rag_request = {"query": query, "skip_cache": False}
+
+            logging.debug(f"Sending RAG request to {self.rag_endpoint}")
+            async with session.post(
+                self.rag_endpoint,
+                json=rag_request,
+                headers=headers,
+            ) as rag_response:
+                logging.debug(f"RAG response status: {rag_response.status}")
+                if rag_response.status == 200:
+                    rag_data = await rag_response.json(content_type=None)
+                    logging.debug(f"RAG response data: {rag_data}")
+                    if rag_data.get("success") and "data" in rag_data:
+                        rag_content = rag_data["data"].get("content", "")
+                        rag_tools = rag_data["data"].get("tools", [])
+
+                        if rag_tools:
+                            logging.info(f"RAG tools data: {rag_tools}")
+                            tools_lines = [
+                                "\n\nThe following tools were used to gather this information:"
+                            ]
+                            tools_lines += [
+                                f"- {tool.get('tool_name', 'Unknown tool')}"
+                                for tool in rag_tools
+                            ]
+                            tools_summary = "\n".join(tools_lines)
+
+                        if rag_content:
+                            rag_context = rag_content.strip()
+                            logging.info(f"RAG context added: {rag_context}")
+
+        except Exception as e:
+            logging.error(f"Error querying RAG endpoint: {str(e)}")
+
+        return rag_context, tools_summary
+
     async def ask(
-        self, prompt: str, messages: T.List[T.Dict[str, str]] = []
+        self,
+        prompt: str,
+        messages: T.List[T.Dict[str, str]] = [],
+        on_action: T.Optional[ActionCallback] = None,
     ) -> R | None:
         """
         Send a prompt to the appropriate endpoint and get a structured response.
@@ -63,6 +216,8 @@ class RagMultiLLM(LLM[R]):
             The input prompt to send to the model.
         messages : List[Dict[str, str]]
             Message history to provide context.
+        on_action : Callable[[Action], Awaitable[None]], optional
+            Not used, this plugin does not stream its response.
 
         Returns
         -------
@@ -74,53 +229,25 @@ class RagMultiLLM(LLM[R]):
             self.io_provider.llm_start_time = time.time()
             self.io_provider.set_llm_prompt(prompt)
 
-            headers = {
-                "Authorization": f"Bearer {self._config.api_key}",
-                "Content-Type": "application/json",
-            }
+            headers = self._headers()
+            # the loop the prefetches of voice input from other threads run on
+            self._loop = asyncio.get_running_loop()
 
             recent_voice = ""
-            rag_context = ""
-            tools_summary = ""
             if self.io_provider.inputs.get("Voice", None):
                 recent_voice = self.io_provider.inputs["Voice"].input
 
-            if self.use_rag and recent_voice:
-                try:
-                    rag_request = {"query": recent_voice, "skip_cache": False}
+            session = await self._init_session()
 
-                    logging.debug(f"Sending RAG request to {self.rag_endpoint}")
-                    rag_response = requests.post(
-                        self.rag_endpoint,
-                        json=rag_request,
-                        headers=headers,
-                    )
-
-                    logging.debug(f"RAG response status: {rag_response.status_code}")
-                    if rag_response.status_code == 200:
-                        rag_data = rag_response.json()
-                        logging.debug(f"RAG response data: {rag_data}")
-                        if rag_data.get("success") and "data" in rag_data:
-                            rag_content = rag_data["data"].get("content", "")
-                            rag_tools = rag_data["data"].get("tools", [])
-
-                            if rag_tools:
-                                logging.info(f"RAG tools data: {rag_tools}")
-                                tools_lines = [
-                                    "\n\nThe following tools were used to gather this information:"
-                                ]
-                                tools_lines += [
-                                    f"- {tool.get('tool_name', 'Unknown tool')}"
-                                    for tool in rag_tools
-                                ]
-                                tools_summary = "\n".join(tools_lines)
-
-                            if rag_content:
-                                rag_context = rag_content.strip()
-                                logging.info(f"RAG context added: {rag_context}")
-
-                except Exception as e:
-                    logging.error(f"Error querying RAG endpoint: {str(e)}")
+            # start the knowledge base query right away, so that it runs while
+            # the agent request is being assembled
+            rag_task = None
+            if self.use_rag and recent_voice and self.rag_cache is not None:
+                rag_task = self.rag_cache.fetch(recent_voice, self._fetch_rag)
+            elif self.use_rag and recent_voice:
+                rag_task = asyncio.create_task(
+                    self._query_rag(session, recent_voice, headers)
+                )
 
             request = {
                 "system_prompt": self.io_provider.fuser_system_prompt,
@@ -131,6 +258,18 @@ class RagMultiLLM(LLM[R]):
                 "structured_outputs": True,
             }
 
+            rag_context = ""
+            tools_summary = ""
+            if rag_task is not None:
+                try:
+                    rag_context, tools_summary = await asyncio.wait_for(
+                        rag_task, timeout=self.rag_timeout
+                    )
+                except asyncio.TimeoutError:
+                    logging.warning(
+                        f"RAG query exceeded {self.rag_timeout}s, continuing without it"
+                    )
+
             if rag_context:
                 kb_block = (
                     "\n\n--- KNOWLEDGE BASE CONTEXT ---\n" f"{rag_context}\n" "---\n"
@@ -153,13 +292,12 @@ class RagMultiLLM(LLM[R]):
             logging.debug(f"MultiLLM inputs: {request['inputs']}")
             logging.debug(f"MultiLLM available_actions: {request['available_actions']}")
 
-            response = requests.post(
+            async with session.post(
                 self.endpoint,
                 json=request,
                 headers=headers,
-            )
-
-            response_json = response.json()
+            ) as response:
+                response_json = await response.json(content_type=None)
             self.io_provider.llm_end_time = time.time()
             logging.info(f"Raw response: {response_json}")
 
@@ -178,6 +316,6 @@ class RagMultiLLM(LLM[R]):
 
     async def close(self):
         """Close the session when done."""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        if self.rag_cache is not None:
+            self.io_provider.remove_input_listener(self._on_input)
+        await super().close()
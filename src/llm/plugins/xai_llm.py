@@ -5,7 +5,7 @@ import typing as T
 import openai
 from pydantic import BaseModel
 
-from llm import LLM, LLMConfig
+from llm import LLM, ActionCallback, LLMConfig
 from providers.llm_history_manager import LLMHistoryManager
 
 R = T.TypeVar("R", bound=BaseModel)
@@ -26,6 +26,8 @@ class XAILLM(LLM[R]):
         will be used.
     """
 
+    _supports_action_stream = True
+
     def __init__(self, output_model: T.Type[R], config: LLMConfig = LLMConfig()):
         """
         Initialize the DeepSeek LLM instance.
@@ -53,7 +55,12 @@ class XAILLM(LLM[R]):
         self.history_manager = LLMHistoryManager(self._config, self._client)
 
     @LLMHistoryManager.update_history()
-    async def ask(self, prompt: str, messages: T.List[T.Dict[str, str]]) -> R | None:
+    async def ask(
+        self,
+        prompt: str,
+        messages: T.List[T.Dict[str, str]],
+        on_action: T.Optional[ActionCallback] = None,
+    ) -> R | None:
         """
         Execute LLM query and parse response
 
@@ -63,6 +70,9 @@ class XAILLM(LLM[R]):
             The input prompt to send to the model.
         messages : List[Dict[str, str]]
             List of message dictionaries to send to the model.
+        on_action : Callable[[Action], Awaitable[None]], optional
+            If given and `stream_actions` is enabled, the response is streamed
+            and each action is passed to this callback as soon as it is complete.
 
         Returns
         -------
@@ -82,21 +92,35 @@ class XAILLM(LLM[R]):
                     "role": "system",
                     "content": f"Respond with valid JSON matching this schema: {self._output_model.model_json_schema()}",
                 },
-                *messages,
-                {
-                    "role": "user",
-                    "content": prompt,
-                },
+                *self._prompt_messages(prompt, messages),
             ]
 
-            response = await self._client.chat.completions.create(
-                model=self._config.model,
-                messages=messages,
-                response_format={"type": "json_object"},
-            )
+            if on_action is not None and self.streams_actions:
+                stream = await self._client.chat.completions.create(
+                    model=self._config.model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    stream=True,
+                )
+                message_content = await self._stream_actions(
+                    (
+                        chunk.choices[0].delta.content or ""
+                        async for chunk in stream
+                        if chunk.choices
+                    ),
+                    on_action,
+                )
+                response = None
+            else:
+                response = await self._client.chat.completions.create(
+                    model=self._config.model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                )
+                message_content = response.choices[0].message.content
 
-            message_content = response.choices[0].message.content
             self.io_provider.llm_end_time = time.time()
+            self._record_prompt_cache_usage(response)
 
             try:
                 parsed_response = self._output_model.model_validate_json(
@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import re
+import time
+import typing as T
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from providers.memory_index import EmbeddingFunction, hashing_embedding, load_embedding
+
+# the knowledge base context and the summary of the tools used to gather it
+RagResult = T.Tuple[str, str]
+RagFetch = T.Callable[[str], T.Awaitable[RagResult]]
+
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for use as a cache key.
+
+    Parameters
+    ----------
+    query : str
+        The query, typically a transcribed utterance.
+
+    Returns
+    -------
+    str
+        The query in lower case, without punctuation and with single spaces,
+        so "What's your name?" and "whats your name" share a key.
+    """
+    query = PUNCTUATION_PATTERN.sub("", query.lower())
+    return WHITESPACE_PATTERN.sub(" ", query).strip()
+
+
+@dataclass
+class RagEntry:
+    """
+    A cached knowledge base result.
+
+    Parameters
+    ----------
+    result : RagResult
+        The knowledge base context and the tools summary.
+    timestamp : float
+        The monotonic time the result was fetched.
+    vector : np.ndarray, optional
+        The embedding of the normalized query, if similarity matching is on.
+    """
+
+    result: RagResult
+    timestamp: float
+    vector: T.Optional[np.ndarray] = None
+
+
+class RagCache:
+    """
+    Cache of knowledge base results keyed on the normalized query.
+
+    A result is fresh for `ttl` seconds. After that, and up to `stale_ttl`
+    seconds, it is still served right away while a refresh runs in the
+    background (stale-while-revalidate). Concurrent requests for the same
+    query share one fetch. Optionally, a query without an exact match is
+    served the result of the most similar cached query.
+
+    Parameters
+    ----------
+    ttl : float
+        Seconds a result is fresh, defaults to 30.0.
+    stale_ttl : float
+        Seconds a result may be served while it is refreshed, defaults to
+        300.0.
+    max_entries : int
+        Maximum number of cached results, the least recently used is
+        evicted first. Defaults to 128.
+    similarity : float
+        Minimum cosine similarity of the embeddings of two queries for them
+        to share a result, 0 to only match equal queries. Defaults to 0.
+    embedding : str, optional
+        The embedding function as "module:function", see
+        `providers.memory_index.MemoryIndex`. Defaults to the hashing
+        embedding.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        stale_ttl: float = 300.0,
+        max_entries: int = 128,
+        similarity: float = 0.0,
+        embedding: T.Optional[str] = None,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.embedding: EmbeddingFunction = (
+            load_embedding(embedding) if embedding else hashing_embedding
+        )
+
+        self._entries: "OrderedDict[str, RagEntry]" = OrderedDict()
+        self._pending: T.Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def _embed(self, key: str) -> T.Optional[np.ndarray]:
+        """
+        Embed a normalized query, if similarity matching is on.
+        """
+        if self.similarity <= 0:
+            return None
+        vector = np.asarray(self.embedding([key]), dtype=np.float32)[0]
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _lookup(self, key: str) -> T.Tuple[T.Optional[str], T.Optional[RagEntry]]:
+        """
+        Find the entry of a normalized query, dropping expired entries.
+
+        Returns
+        -------
+        Tuple[Optional[str], Optional[RagEntry]]
+            The key the entry is stored under and the entry, or None and None.
+        """
+        now = time.monotonic()
+        for expired in [
+            k for k, e in self._entries.items() if now - e.timestamp > self.stale_ttl
+        ]:
+            del self._entries[expired]
+
+        if key in self._entries:
+            return key, self._entries[key]
+
+        vector = self._embed(key)
+        candidates = [(k, e) for k, e in self._entries.items() if e.vector is not None]
+        if vector is None or not candidates:
+            return None, None
+        scores = np.stack([e.vector for _, e in candidates]) @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity:
+            return None, None
+        return candidates[best]
+
+    def get(self, query: str) -> T.Tuple[T.Optional[RagResult], bool]:
+        """
+        Get the cached result of a query.
+
+        Parameters
+        ----------
+        query : str
+            The query.
+
+        Returns
+        -------
+        Tuple[Optional[RagResult], bool]
+            The result, or None if nothing is cached, and whether it is fresh.
+        """
+        stored_key, entry = self._lookup(normalize_query(query))
+        if entry is None:
+            return None, False
+        self._entries.move_to_end(stored_key)
+        return entry.result, time.monotonic() - entry.timestamp <= self.ttl
+
+    def put(self, query: str, result: RagResult) -> None:
+        """
+        Cache the result of a query.
+
+        Parameters
+        ----------
+        query : str
+            The query.
+        result : RagResult
+            The knowledge base context and the tools summary.
+        """
+        key = normalize_query(query)
+        self._entries[key] = RagEntry(
+            result=result, timestamp=time.monotonic(), vector=self._embed(key)
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _fetch(self, query: str, fetch: RagFetch) -> asyncio.Task:
+        """
+        Start fetching a query, or join the fetch already in flight.
+        """
+        key = normalize_query(query)
+        task = self._pending.get(key)
+        if task is not None:
+            return task
+
+        async def run() -> RagResult:
+            try:
+                result = await fetch(query)
+                # an empty result may be a failed request, it is not cached
+                if any(result):
+                    self.put(query, result)
+                return result
+            finally:
+                self._pending.pop(key, None)
+
+        task = asyncio.create_task(run())
+        self._pending[key] = task
+        return task
+
+    def prefetch(self, query: str, fetch: RagFetch) -> None:
+        """
+        Fetch a query in the background, unless a fresh result is cached.
+
+        Parameters
+        ----------
+        query : str
+            The query.
+        fetch : Callable[[str], Awaitable[RagResult]]
+            Queries the knowledge base.
+        """
+        if not normalize_query(query):
+            return
+        result, fresh = self.get(query)
+        if result is None or not fresh:
+            logging.debug(f"Prefetching RAG context for: {query}")
+            self._fetch(query, fetch)
+
+    def fetch(self, query: str, fetch: RagFetch) -> T.Awaitable[RagResult]:
+        """
+        Get the result of a query, from the cache if possible.
+
+        A fresh result is returned right away. A stale result is returned
+        right away and refreshed in the background. Otherwise the query is
+        fetched, sharing the fetch already in flight if there is one.
+
+        Parameters
+        ----------
+        query : str
+            The query.
+        fetch : Callable[[str], Awaitable[RagResult]]
+            Queries the knowledge base.
+
+        Returns
+        -------
+        Awaitable[RagResult]
+            The result. Cancelling it does not cancel the fetch, so a late
+            result is still cached.
+        """
+        result, fresh = self.get(query)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        if result is not None:
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._fetch(query, fetch)
+            future.set_result(result)
+            return future
+
+        self.misses += 1
+        return asyncio.shield(self._fetch(query, fetch))
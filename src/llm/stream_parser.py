@@ -0,0 +1,125 @@
+import json
+import logging
+import re
+import typing as T
+
+from llm.output_model import Action
+
+ACTIONS_ARRAY_PATTERN = re.compile(r'"actions"\s*:\s*\[')
+
+
+class ActionStreamParser:
+    """
+    Incremental parser for the `actions` array of a streamed LLM response.
+
+    The LLM response is fed chunk by chunk as it arrives. Each `Action`
+    object inside the `actions` array is returned as soon as its closing
+    brace has been received, so that actions can be dispatched before the
+    rest of the response is generated.
+    """
+
+    def __init__(self):
+        """
+        Initialize the parser with an empty buffer.
+        """
+        self._buffer: str = ""
+        self._pos: int = 0
+
+        self._in_actions: bool = False
+        self._done: bool = False
+
+        self._depth: int = 0
+        self._in_string: bool = False
+        self._escape: bool = False
+        self._object_start: T.Optional[int] = None
+
+        self.actions: T.List[Action] = []
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether the closing bracket of the `actions` array has been received.
+        """
+        return self._done
+
+    def feed(self, chunk: str) -> T.List[Action]:
+        """
+        Feed the next chunk of the response.
+
+        Parameters
+        ----------
+        chunk : str
+            The next piece of the streamed response text.
+
+        Returns
+        -------
+        List[Action]
+            The actions completed by this chunk, in order.
+        """
+        if self._done or not chunk:
+            return []
+
+        self._buffer += chunk
+
+        if not self._in_actions:
+            match = ACTIONS_ARRAY_PATTERN.search(self._buffer)
+            if match is None:
+                return []
+            self._in_actions = True
+            self._pos = match.end()
+
+        completed = []
+        buffer = self._buffer
+        for i in range(self._pos, len(buffer)):
+            char = buffer[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._object_start = i
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # the end of the actions array
+                    self._done = True
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._object_start is not None:
+                    action = self._parse_action(buffer[self._object_start : i + 1])
+                    self._object_start = None
+                    if action is not None:
+                        completed.append(action)
+
+        self._pos = len(buffer)
+        self.actions.extend(completed)
+        return completed
+
+    def _parse_action(self, text: str) -> T.Optional[Action]:
+        """
+        Parse a single completed action object.
+
+        Parameters
+        ----------
+        text : str
+            The JSON text of the action object.
+
+        Returns
+        -------
+        Action or None
+            The parsed action, or None if the object is not a valid action.
+        """
+        try:
+            return Action.model_validate(json.loads(text))
+        except Exception as e:
+            logging.error(f"Error parsing streamed action {text}: {e}")
+            return None
@@ -0,0 +1,339 @@
+import logging
+import os
+import queue
+import struct
+import threading
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+MAGIC = b"OMHIST01"
+
+# payload length, crc32 of the kind and the payload, kind
+RECORD_HEADER = struct.Struct("<IIB")
+
+RECORD_MESSAGE = 1
+RECORD_SUMMARY = 2
+RECORD_DROP = 3
+RECORD_FRAME = 4
+
+# a history message as (role, content)
+LoggedMessage = Tuple[str, str]
+
+
+def _encode_message(message: LoggedMessage) -> bytes:
+    role, content = message
+    role_bytes = role.encode()
+    return bytes([len(role_bytes)]) + role_bytes + content.encode()
+
+
+def _decode_message(payload: bytes) -> LoggedMessage:
+    role_length = payload[0]
+    role = payload[1 : 1 + role_length].decode()
+    return role, payload[1 + role_length :].decode()
+
+
+def encode_record(kind: int, payload: bytes) -> bytes:
+    """
+    Encode a length prefixed, checksummed record.
+
+    Parameters
+    ----------
+    kind : int
+        The record kind, such as `RECORD_MESSAGE`.
+    payload : bytes
+        The payload.
+
+    Returns
+    -------
+    bytes
+        The record.
+    """
+    crc = zlib.crc32(payload, zlib.crc32(bytes([kind])))
+    return RECORD_HEADER.pack(len(payload), crc, kind) + payload
+
+
+@dataclass
+class HistoryState:
+    """
+    The history of an LLMHistoryManager, as rebuilt from its log.
+
+    Parameters
+    ----------
+    summary : LoggedMessage, optional
+        The running summary.
+    history : List[LoggedMessage]
+        The messages that are not part of the summary yet.
+    frame_index : int
+        The index of the last frame.
+    """
+
+    summary: Optional[LoggedMessage] = None
+    history: List[LoggedMessage] = field(default_factory=list)
+    frame_index: int = 0
+
+    def apply(self, kind: int, payload: bytes) -> None:
+        """
+        Apply a record to the state.
+
+        Parameters
+        ----------
+        kind : int
+            The record kind.
+        payload : bytes
+            The payload.
+        """
+        if kind == RECORD_MESSAGE:
+            self.history.append(_decode_message(payload))
+        elif kind == RECORD_SUMMARY:
+            (count,) = struct.unpack_from("<I", payload)
+            del self.history[:count]
+            self.summary = _decode_message(payload[4:])
+        elif kind == RECORD_DROP:
+            start, count = struct.unpack("<II", payload)
+            del self.history[start : start + count]
+        elif kind == RECORD_FRAME:
+            (self.frame_index,) = struct.unpack("<Q", payload)
+        else:
+            logging.warning(f"Unknown history record kind {kind}")
+
+    def records(self) -> Iterator[bytes]:
+        """
+        Get the records that rebuild this state.
+
+        Returns
+        -------
+        Iterator[bytes]
+            The encoded records.
+        """
+        yield encode_record(RECORD_FRAME, struct.pack("<Q", self.frame_index))
+        if self.summary is not None:
+            yield encode_record(
+                RECORD_SUMMARY, struct.pack("<I", 0) + _encode_message(self.summary)
+            )
+        for message in self.history:
+            yield encode_record(RECORD_MESSAGE, _encode_message(message))
+
+
+def read_history_log(path: str) -> Tuple[HistoryState, int]:
+    """
+    Rebuild the history from a log file.
+
+    Parameters
+    ----------
+    path : str
+        The path of the log.
+
+    Returns
+    -------
+    Tuple[HistoryState, int]
+        The state, empty if the file does not exist, and the size of the
+        valid part of the file. A record cut off by a crash, and anything
+        after it, is ignored.
+    """
+    state = HistoryState()
+    if not os.path.exists(path):
+        return state, 0
+
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[: len(MAGIC)] != MAGIC:
+        logging.error(f"{path} is not a history log, starting without history")
+        return state, 0
+
+    offset = len(MAGIC)
+    while offset + RECORD_HEADER.size <= len(data):
+        length, crc, kind = RECORD_HEADER.unpack_from(data, offset)
+        start = offset + RECORD_HEADER.size
+        payload = data[start : start + length]
+        if (
+            len(payload) < length
+            or zlib.crc32(payload, zlib.crc32(bytes([kind]))) != crc
+        ):
+            logging.warning(f"History log {path} is truncated at byte {offset}")
+            break
+        try:
+            state.apply(kind, payload)
+        except (struct.error, IndexError, UnicodeDecodeError) as e:
+            logging.warning(f"Invalid record in history log {path}: {e}")
+            break
+        offset = start + length
+    return state, offset
+
+
+class HistoryLog:
+    """
+    Append-only binary log of an LLMHistoryManager history.
+
+    Every change of the history is appended as a length prefixed,
+    checksummed record: a new message, a summary that replaces the oldest
+    messages, dropped messages, and the frame index. The records are
+    written by a background thread, so logging never touches the disk on
+    the caller's thread. Once `compact_bytes` of records have been appended,
+    whatever their kind, the log is compacted into the latest summary, the
+    remaining messages and the frame index, written to a new file that
+    atomically replaces the old one.
+
+    The history found in the file when it is opened is available as
+    `loaded`.
+
+    Parameters
+    ----------
+    path : str
+        The path of the log file.
+    compact_bytes : int
+        Bytes the log may grow by before it is compacted, defaults to 1 MiB.
+    fsync : bool
+        Whether to fsync after writing, defaults to False.
+    """
+
+    def __init__(self, path: str, compact_bytes: int = 1 << 20, fsync: bool = False):
+        self.path = path
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # the writer keeps its own copy of the state for compaction
+        self._state, valid_size = read_history_log(path)
+        self.loaded = HistoryState(
+            summary=self._state.summary,
+            history=list(self._state.history),
+            frame_index=self._state.frame_index,
+        )
+        if valid_size == 0 and os.path.exists(path) and os.path.getsize(path) > 0:
+            # keep a file that is not a history log, rather than overwrite it
+            os.replace(path, f"{path}.invalid")
+        self._file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        if valid_size == 0:
+            self._file.truncate(0)
+            self._file.write(MAGIC)
+            valid_size = len(MAGIC)
+        else:
+            self._file.truncate(valid_size)
+        self._file.seek(valid_size)
+        self._appended = valid_size - len(MAGIC)
+
+        self._queue: "queue.SimpleQueue[Optional[Tuple[int, bytes]]]" = (
+            queue.SimpleQueue()
+        )
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def _write_loop(self) -> None:
+        """
+        Write the queued records until the log is closed.
+        """
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # write everything that is queued with one flush
+            while item is not None:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+
+            compact = False
+            try:
+                for record in batch:
+                    if record is None:
+                        break
+                    kind, payload = record
+                    self._state.apply(kind, payload)
+                    encoded = encode_record(kind, payload)
+                    self._file.write(encoded)
+                    self._appended += len(encoded)
+                    if self._appended >= self.compact_bytes:
+                        compact = True
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+                if compact:
+                    self._compact()
+            except Exception as e:
+                logging.error(f"Error writing the history log {self.path}: {e}")
+
+            if batch[-1] is None:
+                return
+
+    def _compact(self) -> None:
+        """
+        Replace the log by the records of the current state.
+        """
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            for encoded in self._state.records():
+                f.write(encoded)
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "ab")
+        self._appended = 0
+        logging.info(f"Compacted the history log {self.path}")
+
+    def _put(self, kind: int, payload: bytes) -> None:
+        self._queue.put((kind, payload))
+
+    def append_message(self, message: LoggedMessage) -> None:
+        """
+        Log a new message.
+
+        Parameters
+        ----------
+        message : LoggedMessage
+            The message as (role, content).
+        """
+        self._put(RECORD_MESSAGE, _encode_message(message))
+
+    def append_summary(self, count: int, summary: LoggedMessage) -> None:
+        """
+        Log a summary that replaces the oldest messages.
+
+        Parameters
+        ----------
+        count : int
+            The number of messages the summary replaces.
+        summary : LoggedMessage
+            The summary as (role, content).
+        """
+        self._put(RECORD_SUMMARY, struct.pack("<I", count) + _encode_message(summary))
+
+    def append_drop(self, start: int, count: int) -> None:
+        """
+        Log dropped messages.
+
+        Parameters
+        ----------
+        start : int
+            The index of the first dropped message.
+        count : int
+            The number of dropped messages.
+        """
+        self._put(RECORD_DROP, struct.pack("<II", start, count))
+
+    def append_frame(self, frame_index: int) -> None:
+        """
+        Log the frame index.
+
+        Parameters
+        ----------
+        frame_index : int
+            The index of the last frame.
+        """
+        self._put(RECORD_FRAME, struct.pack("<Q", frame_index))
+
+    def close(self) -> None:
+        """
+        Write the queued records and close the log.
+        """
+        if not self._thread.is_alive():
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
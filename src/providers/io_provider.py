@@ -1,11 +1,12 @@
 import threading
-from dataclasses import dataclass
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 
 from .singleton import singleton
 
 
-@dataclass
+@dataclass(frozen=True)
 class Input:
     """
     A dataclass representing an input with an optional timestamp.
@@ -22,13 +23,204 @@ class Input:
     timestamp: Optional[float] = None
 
 
+EMPTY_MAPPING: Mapping = MappingProxyType({})
+
+
+@dataclass(frozen=True)
+class InputSnapshot:
+    """
+    An immutable view of all inputs at one version of the input store.
+
+    Parameters
+    ----------
+    version : int
+        The version of the store this snapshot was taken at.
+    inputs : Mapping[str, Input]
+        The inputs, keyed by input identifier.
+    timestamps : Mapping[str, float]
+        The input timestamps, including timestamps of keys without an input.
+    versions : Mapping[str, int]
+        The version at which each key was last written or removed.
+    removed : Mapping[str, int]
+        The version at which removed keys were removed.
+    """
+
+    version: int = 0
+    inputs: Mapping[str, Input] = field(default=EMPTY_MAPPING)
+    timestamps: Mapping[str, float] = field(default=EMPTY_MAPPING)
+    versions: Mapping[str, int] = field(default=EMPTY_MAPPING)
+    removed: Mapping[str, int] = field(default=EMPTY_MAPPING)
+
+    def changed_since(self, version: int) -> Dict[str, Optional[Input]]:
+        """
+        Get the inputs that changed after a version.
+
+        Parameters
+        ----------
+        version : int
+            A version returned by an earlier snapshot.
+
+        Returns
+        -------
+        Dict[str, Optional[Input]]
+            The changed inputs, with None for inputs that were removed.
+        """
+        return {
+            key: self.inputs.get(key)
+            for key, key_version in self.versions.items()
+            if key_version > version and (key in self.inputs or key in self.removed)
+        }
+
+
+class InputStore:
+    """
+    A versioned, copy-on-write store of the inputs.
+
+    Every write publishes a new immutable `InputSnapshot`. Readers only load
+    the reference of the current snapshot and never take a lock, so they do
+    not contend with the input threads. Writers are serialized by a lock and
+    copy the (small) mappings they modify.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty input store.
+        """
+        self._write_lock: threading.Lock = threading.Lock()
+        self._snapshot: InputSnapshot = InputSnapshot()
+
+    @property
+    def snapshot(self) -> InputSnapshot:
+        """
+        Get the current snapshot, without locking.
+        """
+        return self._snapshot
+
+    def _publish(
+        self,
+        key: str,
+        inputs: Mapping[str, Input],
+        timestamps: Mapping[str, float],
+        removed: bool = False,
+    ) -> None:
+        """
+        Publish a new snapshot with `key` marked as changed.
+
+        Must be called with the write lock held.
+        """
+        current = self._snapshot
+        version = current.version + 1
+
+        versions = dict(current.versions)
+        versions[key] = version
+
+        removed_keys = dict(current.removed)
+        if removed:
+            removed_keys[key] = version
+        else:
+            removed_keys.pop(key, None)
+
+        self._snapshot = InputSnapshot(
+            version=version,
+            inputs=MappingProxyType(dict(inputs)),
+            timestamps=MappingProxyType(dict(timestamps)),
+            versions=MappingProxyType(versions),
+            removed=MappingProxyType(removed_keys),
+        )
+
+    def put(self, key: str, value: str, timestamp: Optional[float]) -> bool:
+        """
+        Write an input.
+
+        Parameters
+        ----------
+        key : str
+            The input identifier.
+        value : str
+            The input value.
+        timestamp : float, optional
+            The timestamp of the input. If None, the previous timestamp is kept.
+
+        Returns
+        -------
+        bool
+            Whether the value of the input changed.
+        """
+        with self._write_lock:
+            current = self._snapshot
+            previous = current.inputs.get(key)
+
+            timestamps = dict(current.timestamps)
+            if timestamp is not None:
+                timestamps[key] = timestamp
+
+            inputs = dict(current.inputs)
+            inputs[key] = Input(input=value, timestamp=timestamps.get(key))
+
+            self._publish(key, inputs, timestamps)
+            return previous is None or previous.input != value
+
+    def put_timestamp(self, key: str, timestamp: float) -> None:
+        """
+        Write the timestamp of an input.
+
+        Parameters
+        ----------
+        key : str
+            The input identifier.
+        timestamp : float
+            The timestamp of the input.
+        """
+        with self._write_lock:
+            current = self._snapshot
+
+            timestamps = dict(current.timestamps)
+            timestamps[key] = timestamp
+
+            inputs = current.inputs
+            if key in inputs:
+                inputs = dict(inputs)
+                inputs[key] = Input(input=inputs[key].input, timestamp=timestamp)
+
+            self._publish(key, inputs, timestamps)
+
+    def remove(self, key: str) -> None:
+        """
+        Remove an input and its timestamp.
+
+        Parameters
+        ----------
+        key : str
+            The input identifier.
+        """
+        with self._write_lock:
+            current = self._snapshot
+            if key not in current.inputs and key not in current.timestamps:
+                return
+
+            inputs = dict(current.inputs)
+            inputs.pop(key, None)
+            timestamps = dict(current.timestamps)
+            timestamps.pop(key, None)
+
+            self._publish(key, inputs, timestamps, removed=True)
+
+    def clear(self) -> None:
+        """
+        Remove all inputs, starting over at version 0.
+        """
+        with self._write_lock:
+            self._snapshot = InputSnapshot()
+
+
 @singleton
 class IOProvider:
     """
     A thread-safe singleton class for managing inputs, timestamps, and LLM-related data.
 
     This class provides synchronized access to input storage and various timing metrics
-    using thread locks for safe concurrent access.
+    using thread locks for safe concurrent access. The inputs are kept in a
+    versioned copy-on-write `InputStore`, so reading them never blocks.
     """
 
     def __init__(self):
@@ -37,8 +229,7 @@ class IOProvider:
         """
         self._lock: threading.Lock = threading.Lock()
 
-        self._inputs: Dict[str, str] = {}
-        self._input_timestamps: Dict[str, float] = {}
+        self._input_store: InputStore = InputStore()
 
         self._fuser_system_prompt: Optional[str] = None
         self._fuser_inputs: Optional[str] = None
@@ -46,32 +237,84 @@ class IOProvider:
         self._fuser_start_time: Optional[float] = None
         self._fuser_end_time: Optional[float] = None
 
+        # stable prefix / volatile suffix of the latest fused prompt
+        self._fuser_prompt: Optional[str] = None
+        self._fuser_prompt_prefix: Optional[str] = None
+        self._fuser_prompt_suffix: Optional[str] = None
+
         self._llm_prompt: Optional[str] = None
         self._llm_start_time: Optional[float] = None
         self._llm_end_time: Optional[float] = None
 
+        # provider-side prompt cache usage of the latest LLM call
+        self._llm_prompt_tokens: Optional[int] = None
+        self._llm_cached_tokens: Optional[int] = None
+
+        # decision cache lookups of the cortex
+        self._decision_cache_hits: int = 0
+        self._decision_cache_misses: int = 0
+
         # Additional variables storage
         self._variables: Dict[str, Any] = {}
 
+        # listeners notified of new input data, and the tick priority of inputs
+        self._input_listeners: List[Callable[[str, int], None]] = []
+        self._input_priorities: Dict[str, int] = {}
+        # text announced by the inputs before it is fused into a prompt
+        self._pending_inputs: Dict[str, str] = {}
+
     @property
-    def inputs(self) -> Dict[str, Input]:
+    def inputs(self) -> Mapping[str, Input]:
         """
         Get all inputs with their timestamps.
 
         Returns
         -------
-        Dict[str, Input]
-            Dictionary mapping input keys to Input objects.
+        Mapping[str, Input]
+            Read-only mapping of input keys to Input objects, taken from the
+            current snapshot.
         """
-        with self._lock:
-            result = {}
-            for name, value in self._inputs.items():
-                timestamp = self._input_timestamps.get(name)
-                if timestamp is not None:
-                    result[name] = Input(input=value, timestamp=timestamp)
-                else:
-                    result[name] = Input(input=value)
-            return result
+        return self._input_store.snapshot.inputs
+
+    @property
+    def input_snapshot(self) -> InputSnapshot:
+        """
+        Get an immutable snapshot of all inputs.
+
+        Returns
+        -------
+        InputSnapshot
+            The current snapshot, which does not change when inputs are added.
+        """
+        return self._input_store.snapshot
+
+    @property
+    def inputs_version(self) -> int:
+        """
+        Get the current version of the inputs.
+
+        Returns
+        -------
+        int
+            A number that increases with every write to the inputs.
+        """
+        return self._input_store.snapshot.version
+
+    def changed_since(self, version: int) -> Dict[str, Optional[Input]]:
+        """
+        Get the inputs that changed after a version.
+
+        Parameters
+        ----------
+        version : int
+            A version returned by `inputs_version` or `input_snapshot`.
+
+        Returns
+        -------
+        Dict[str, Optional[Input]]
+            The changed inputs, with None for inputs that were removed.
+        """
+        return self._input_store.snapshot.changed_since(version)
 
     def add_input(self, key: str, value: str, timestamp: Optional[float]) -> None:
         """
@@ -87,9 +330,108 @@ class IOProvider:
             The timestamp for the input.
         """
         with self._lock:
-            self._inputs[key] = value
-            if timestamp is not None:
-                self._input_timestamps[key] = timestamp
+            self._pending_inputs.pop(key, None)
+        if self._input_store.put(key, value, timestamp):
+            self.notify_input(key)
+
+    def set_pending_input(self, key: str, value: Optional[str]) -> None:
+        """
+        Announce the text of an input that is not fused into a prompt yet.
+
+        Listeners notified of the input can read it with `pending_input`
+        before the input itself is updated.
+
+        Parameters
+        ----------
+        key : str
+            The input identifier.
+        value : str, optional
+            The pending text, or None to clear it.
+        """
+        with self._lock:
+            if value is None:
+                self._pending_inputs.pop(key, None)
+            else:
+                self._pending_inputs[key] = value
+
+    def pending_input(self, key: str) -> Optional[str]:
+        """
+        Get the text of an input that is not fused into a prompt yet.
+
+        Parameters
+        ----------
+        key : str
+            The input identifier.
+
+        Returns
+        -------
+        str or None
+            The pending text, or None if none was announced since the input
+            was last updated.
+        """
+        with self._lock:
+            return self._pending_inputs.get(key)
+
+    def add_input_listener(self, listener: Callable[[str, int], None]) -> None:
+        """
+        Register a listener that is notified of new input data.
+
+        Parameters
+        ----------
+        listener : Callable[[str, int], None]
+            Called with the input identifier and its tick priority. It may be
+            called from any thread.
+        """
+        with self._lock:
+            if listener not in self._input_listeners:
+                self._input_listeners.append(listener)
+
+    def remove_input_listener(self, listener: Callable[[str, int], None]) -> None:
+        """
+        Unregister an input listener.
+
+        Parameters
+        ----------
+        listener : Callable[[str, int], None]
+            The listener to remove.
+        """
+        with self._lock:
+            if listener in self._input_listeners:
+                self._input_listeners.remove(listener)
+
+    def set_input_priority(self, key: str, priority: int) -> None:
+        """
+        Set the tick priority of an input.
+
+        Parameters
+        ----------
+        key : str
+            The input identifier.
+        priority : int
+            The tick priority, see `inputs.base.Sensor`.
+        """
+        with self._lock:
+            self._input_priorities[key] = priority
+
+    def notify_input(self, key: str, priority: Optional[int] = None) -> None:
+        """
+        Notify the input listeners of new input data.
+
+        Parameters
+        ----------
+        key : str
+            The input identifier.
+        priority : int, optional
+            The tick priority of the data. Defaults to the priority set for
+            the input, or 1 (normal) if none was set.
+        """
+        with self._lock:
+            if priority is None:
+                priority = self._input_priorities.get(key, 1)
+            listeners = list(self._input_listeners)
+
+        for listener in listeners:
+            listener(key, priority)
 
     def remove_input(self, key: str) -> None:
         """
@@ -100,9 +442,7 @@ class IOProvider:
         key : str
             The input identifier to remove.
         """
-        with self._lock:
-            self._inputs.pop(key, None)
-            self._input_timestamps.pop(key, None)
+        self._input_store.remove(key)
 
     def add_input_timestamp(self, key: str, timestamp: float) -> None:
         """
@@ -115,8 +455,7 @@ class IOProvider:
         timestamp : float
             The timestamp to add.
         """
-        with self._lock:
-            self._input_timestamps[key] = timestamp
+        self._input_store.put_timestamp(key, timestamp)
 
     def get_input_timestamp(self, key: str) -> Optional[float]:
         """
@@ -132,8 +471,7 @@ class IOProvider:
         float or None
             The timestamp if it exists, None otherwise.
         """
-        with self._lock:
-            return self._input_timestamps.get(key)
+        return self._input_store.snapshot.timestamps.get(key)
 
     @property
     def fuser_system_prompt(self) -> Optional[str]:
@@ -250,6 +588,45 @@ class IOProvider:
         with self._lock:
             self._fuser_end_time = value
 
+    def set_fuser_prompt_sections(self, prompt: str, prefix: str, suffix: str) -> None:
+        """
+        Record the stable prefix and the volatile suffix of a fused prompt.
+
+        Parameters
+        ----------
+        prompt : str
+            The complete fused prompt.
+        prefix : str
+            The part of the prompt that rarely changes between ticks
+            (system prompt, laws, examples and available actions).
+        suffix : str
+            The part of the prompt that changes every tick (the inputs).
+        """
+        with self._lock:
+            self._fuser_prompt = prompt
+            self._fuser_prompt_prefix = prefix
+            self._fuser_prompt_suffix = suffix
+
+    def get_fuser_prompt_sections(self, prompt: str) -> Optional[Tuple[str, str]]:
+        """
+        Get the stable prefix and the volatile suffix of a fused prompt.
+
+        Parameters
+        ----------
+        prompt : str
+            The fused prompt to look up.
+
+        Returns
+        -------
+        Tuple[str, str] or None
+            The (prefix, suffix) pair if the prompt is the latest fused prompt,
+            None otherwise.
+        """
+        with self._lock:
+            if self._fuser_prompt is None or prompt != self._fuser_prompt:
+                return None
+            return self._fuser_prompt_prefix, self._fuser_prompt_suffix
+
     @property
     def llm_prompt(self) -> Optional[str]:
         """
@@ -319,6 +696,85 @@ class IOProvider:
         with self._lock:
             self._llm_end_time = value
 
+    @property
+    def llm_prompt_tokens(self) -> Optional[int]:
+        """
+        Get the number of prompt tokens of the latest LLM call.
+        """
+        with self._lock:
+            return self._llm_prompt_tokens
+
+    @llm_prompt_tokens.setter
+    def llm_prompt_tokens(self, value: Optional[int]) -> None:
+        """
+        Set the number of prompt tokens of the latest LLM call.
+        """
+        with self._lock:
+            self._llm_prompt_tokens = value
+
+    @property
+    def llm_cached_tokens(self) -> Optional[int]:
+        """
+        Get the number of prompt tokens served from the provider cache.
+        """
+        with self._lock:
+            return self._llm_cached_tokens
+
+    @llm_cached_tokens.setter
+    def llm_cached_tokens(self, value: Optional[int]) -> None:
+        """
+        Set the number of prompt tokens served from the provider cache.
+        """
+        with self._lock:
+            self._llm_cached_tokens = value
+
+    def record_decision_cache_lookup(self, hit: bool) -> None:
+        """
+        Count a lookup of the cortex decision cache.
+
+        Parameters
+        ----------
+        hit : bool
+            Whether a cached decision was used instead of calling the LLM.
+        """
+        with self._lock:
+            if hit:
+                self._decision_cache_hits += 1
+            else:
+                self._decision_cache_misses += 1
+
+    @property
+    def decision_cache_hits(self) -> int:
+        """
+        Get the number of ticks that used a cached decision.
+        """
+        with self._lock:
+            return self._decision_cache_hits
+
+    @property
+    def decision_cache_misses(self) -> int:
+        """
+        Get the number of ticks that called the LLM despite the decision cache.
+        """
+        with self._lock:
+            return self._decision_cache_misses
+
+    @property
+    def decision_cache_hit_rate(self) -> Optional[float]:
+        """
+        Get the share of decision cache lookups that were hits.
+
+        Returns
+        -------
+        float or None
+            The hit rate, or None if there was no lookup yet.
+        """
+        with self._lock:
+            lookups = self._decision_cache_hits + self._decision_cache_misses
+            if lookups == 0:
+                return None
+            return self._decision_cache_hits / lookups
+
     def add_dynamic_variable(self, key: str, value: Any) -> None:
         """
         Add a dynamic variable to the provider.
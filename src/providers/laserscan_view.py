@@ -0,0 +1,142 @@
+import struct
+from dataclasses import dataclass
+from typing import Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+# CDR encapsulation identifiers, big and little endian
+CDR_BE = b"\x00\x00"
+CDR_LE = b"\x00\x01"
+
+ENCAPSULATION_SIZE = 4
+
+
+@dataclass
+class LaserScanView:
+    """
+    A sensor_msgs LaserScan read in place from its CDR serialization.
+
+    Only the fields needed for path planning are decoded. The ranges are a
+    read-only float32 view over the message buffer, so no per range Python
+    objects are created.
+
+    Parameters
+    ----------
+    stamp_sec : int
+        The header stamp seconds.
+    stamp_nanosec : int
+        The header stamp nanoseconds.
+    frame_id : str
+        The header frame id.
+    angle_min : float
+        The start angle of the scan in rad.
+    angle_max : float
+        The end angle of the scan in rad.
+    angle_increment : float
+        The angular distance between measurements in rad.
+    range_min : float
+        The minimum range value in m.
+    range_max : float
+        The maximum range value in m.
+    ranges : NDArray
+        The range data in m, a float32 view over the message buffer.
+    """
+
+    stamp_sec: int
+    stamp_nanosec: int
+    frame_id: str
+    angle_min: float
+    angle_max: float
+    angle_increment: float
+    range_min: float
+    range_max: float
+    ranges: NDArray
+
+
+def _align(offset: int, size: int) -> int:
+    """
+    Round a body offset up to the CDR alignment of a primitive.
+    """
+    return (offset + size - 1) & ~(size - 1)
+
+
+def parse_laserscan(buffer: Union[bytes, bytearray, memoryview]) -> LaserScanView:
+    """
+    Parse a CDR serialized sensor_msgs LaserScan without copying the ranges.
+
+    Parameters
+    ----------
+    buffer : bytes-like
+        The serialized message, starting with the 4 byte CDR encapsulation
+        header.
+
+    Returns
+    -------
+    LaserScanView
+        The scan, with the ranges viewing `buffer`.
+
+    Raises
+    ------
+    ValueError
+        If the buffer is not a CDR encoded LaserScan.
+    """
+    view = memoryview(buffer)
+    if len(view) < ENCAPSULATION_SIZE:
+        raise ValueError("LaserScan buffer is too short")
+
+    encapsulation = bytes(view[:2])
+    if encapsulation == CDR_LE:
+        order = "<"
+    elif encapsulation == CDR_BE:
+        order = ">"
+    else:
+        raise ValueError(f"Unsupported CDR encapsulation {encapsulation.hex()}")
+
+    # alignment is relative to the start of the body, after the encapsulation
+    body = view[ENCAPSULATION_SIZE:]
+    try:
+        stamp_sec, stamp_nanosec, frame_id_length = struct.unpack_from(
+            f"{order}iII", body, 0
+        )
+        offset = 12
+        frame_id = bytes(body[offset : offset + frame_id_length]).rstrip(b"\x00")
+        offset = _align(offset + frame_id_length, 4)
+
+        (
+            angle_min,
+            angle_max,
+            angle_increment,
+            _time_increment,
+            _scan_time,
+            range_min,
+            range_max,
+            num_ranges,
+        ) = struct.unpack_from(f"{order}7fI", body, offset)
+        offset += 32
+    except struct.error as e:
+        raise ValueError(f"Truncated LaserScan buffer: {e}") from e
+
+    if offset + 4 * num_ranges > len(body):
+        raise ValueError(
+            f"LaserScan declares {num_ranges} ranges but the buffer is too short"
+        )
+
+    ranges = np.frombuffer(
+        body,
+        dtype=np.dtype(np.float32).newbyteorder(order),
+        count=num_ranges,
+        offset=offset,
+    )
+
+    return LaserScanView(
+        stamp_sec=stamp_sec,
+        stamp_nanosec=stamp_nanosec,
+        frame_id=frame_id.decode("utf-8", errors="replace"),
+        angle_min=angle_min,
+        angle_max=angle_max,
+        angle_increment=angle_increment,
+        range_min=range_min,
+        range_max=range_max,
+        ranges=ranges,
+    )
@@ -1,6 +1,9 @@
 import asyncio
+import atexit
+import contextvars
 import functools
 import logging
+import math
 from dataclasses import dataclass
 from typing import Any, Awaitable, Callable, List, Optional, TypeVar, Union
 
@@ -8,10 +11,18 @@ import openai
 
 from llm import LLMConfig
 
+from .history_log import HistoryLog
 from .io_provider import IOProvider
 
 R = TypeVar("R")
 
+# if set, the turns of the requests made by the current task are collected
+# here instead of being added to the history, so that the caller can add
+# them once it knows the response is used; inherited by the tasks it creates
+deferred_turns: contextvars.ContextVar[Optional[List[Callable[[], None]]]] = (
+    contextvars.ContextVar("deferred_turns", default=None)
+)
+
 
 @dataclass
 class ChatMessage:
@@ -19,6 +30,54 @@ class ChatMessage:
     content: str
 
 
+# rough token estimate, as tokenizers differ between models
+CHARS_PER_TOKEN = 4
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def estimate_tokens(message: ChatMessage) -> int:
+    """
+    Estimate the number of prompt tokens of a message.
+
+    Parameters
+    ----------
+    message : ChatMessage
+        The message.
+
+    Returns
+    -------
+    int
+        The estimated tokens of the content, plus the per message overhead
+        of the chat format.
+    """
+    return MESSAGE_TOKEN_OVERHEAD + math.ceil(len(message.content) / CHARS_PER_TOKEN)
+
+
+def truncate_to_tokens(message: ChatMessage, max_tokens: int) -> ChatMessage:
+    """
+    Shorten a message to fit within a token estimate.
+
+    Parameters
+    ----------
+    message : ChatMessage
+        The message.
+    max_tokens : int
+        The maximum estimated tokens of the message.
+
+    Returns
+    -------
+    ChatMessage
+        The message itself if it fits, otherwise a copy with the content
+        cut at the end.
+    """
+    if estimate_tokens(message) <= max_tokens:
+        return message
+    max_chars = max(max_tokens - MESSAGE_TOKEN_OVERHEAD, 0) * CHARS_PER_TOKEN
+    return ChatMessage(
+        role=message.role, content=message.content[: max_chars - 3] + "..."
+    )
+
+
 ACTION_MAP = {
     "emotion": "**** felt: {}.",
     "speak": "**** said: {}",
@@ -33,6 +92,7 @@ class LLMHistoryManager:
         client: Union[openai.AsyncClient, openai.OpenAI],
         system_prompt: str = "You are a helpful assistant that summarizes a succession of events and interactions accurately and concisely. You are watching a robot named **** interact with people and the world. Your goal is to help **** remember what the robot felt, saw, and heard, and how the robot responded to those inputs.",
         summary_command: str = "\nConsidering the new information, write an updated summary of the situation for ****. Emphasize information that **** needs to know to respond to people and situations in the best possible and most compelling way.",
+        max_pending: int = 200,
     ):
         self.client = client
 
@@ -51,13 +111,81 @@ class LLMHistoryManager:
         # history buffer
         self.history: List[ChatMessage] = []
 
+        # token budget of the summary and the history, 0 to limit the
+        # history by history_length instead
+        self.token_budget: int = getattr(config, "history_token_budget", 0) or 0
+        self.summary_token_budget = self.token_budget // 4
+        self.summary: Optional[ChatMessage] = None
+
+        # the summary task in flight covers history[:_summary_end]
+        self._summary_end = 0
+        self._summary_requested = False
+        # backpressure while the summarizer is slow
+        self.max_pending = max_pending
+        self.dropped_messages = 0
+
         # io provider
         self.io_provider = IOProvider()
 
-    async def summarize_messages(self, messages: List[ChatMessage]) -> ChatMessage:
+        # persistent log, the history is restored from it at startup
+        self.history_log: Optional[HistoryLog] = None
+        history_file = getattr(config, "history_file", None)
+        if isinstance(history_file, str) and history_file:
+            self._restore_history(history_file)
+
+    def _restore_history(self, history_file: str) -> None:
+        """
+        Open the history log and restore the history it holds.
+
+        Parameters
+        ----------
+        history_file : str
+            The path of the log.
+        """
+        try:
+            self.history_log = HistoryLog(history_file)
+        except OSError as e:
+            logging.error(f"Cannot open the history log {history_file}: {e}")
+            return
+        # the writer thread is a daemon, the queued records are written at
+        # exit unless the runtime closed the log before
+        atexit.register(self.close)
+
+        loaded = self.history_log.loaded
+        if loaded.summary is not None:
+            self.summary = ChatMessage(*loaded.summary)
+        self.history = [ChatMessage(*message) for message in loaded.history]
+        self.frame_index = loaded.frame_index
+        logging.info(
+            f"Restored {len(self.history)} messages and frame {self.frame_index} "
+            f"from {history_file}"
+        )
+
+    def advance_frame(self) -> None:
+        """
+        Advance the frame index.
+        """
+        self.frame_index += 1
+        if self.history_log is not None:
+            self.history_log.append_frame(self.frame_index)
+
+    def close(self) -> None:
+        """
+        Write the pending history records and close the history log.
+        """
+        if self.history_log is not None:
+            self.history_log.close()
+            self.history_log = None
+            atexit.unregister(self.close)
+
+    async def summarize_messages(
+        self, messages: List[ChatMessage], previous: Optional[ChatMessage] = None
+    ) -> ChatMessage:
         """
         Summarize a list of messages using the OpenAI API.
         Returns a new message containing the summary.
+
+        If a previous summary is given, it is updated with all the messages.
         """
         try:
             if not messages:
@@ -68,20 +196,19 @@ class LLMHistoryManager:
 
             summary_prompt = ""
 
-            if len(messages) == 4:
-                # the normal case - previous summary and new data
-                # the previous summary
-                summary_prompt += f"{messages[0].content}\n"
-                # actions - already part of the summary - no need to add
-                # summary_prompt += f"{messages[1].content}\n"
+            if previous is not None:
+                summary_prompt += f"{previous.content}\n"
                 summary_prompt += "\nNow, the following new information has arrived. "
-                summary_prompt += f"{messages[2].content}\n"
-                summary_prompt += f"{messages[3].content}\n"
+                for msg in messages:
+                    summary_prompt += f"{msg.content}\n"
             else:
                 for msg in messages:
                     summary_prompt += f"{msg.content}\n"
 
             summary_prompt += self.summary_command
+            if self.summary_token_budget:
+                words = self.summary_token_budget * 3 // 4
+                summary_prompt += f" Use at most {words} words."
 
             # insert actual robot name
             summary_prompt = summary_prompt.replace("****", self.agent_name)
@@ -130,69 +257,235 @@ class LLMHistoryManager:
             logging.error(f"Error summarizing messages: {type(e).__name__}: {e}")
             return ChatMessage(role="system", content="Error summarizing state")
 
-    async def start_summary_task(self, messages: List[ChatMessage]):
+    @property
+    def summary_running(self) -> bool:
         """
-        Start a new task to summarize the messages.
+        Whether a summary task is in flight.
         """
-        if not messages:
-            logging.warning("No messages to summarize in start_summary_task")
-            return
+        return self._summary_task is not None and not self._summary_task.done()
 
-        try:
-            if self._summary_task and not self._summary_task.done():
-                logging.info("Previous summary task still running")
-                return
+    def add_message(self, message: ChatMessage) -> None:
+        """
+        Append a message to the history.
+
+        With a token budget, a message that would not fit in the history on
+        its own is shortened. If the summarizer has fallen so far behind
+        that the history exceeds `max_pending` messages, the oldest messages
+        that are not being summarized are dropped.
 
-            messages_copy = messages.copy()
-            self._summary_task = asyncio.create_task(
-                self.summarize_messages(messages_copy)
+        Parameters
+        ----------
+        message : ChatMessage
+            The message.
+        """
+        message = self._fit(message)
+        self.history.append(message)
+        if self.history_log is not None:
+            self.history_log.append_message((message.role, message.content))
+
+        excess = len(self.history) - self.max_pending
+        if excess > 0:
+            # the snapshot in flight stays in place, so it can be merged
+            start = self._summary_end
+            del self.history[start : start + excess]
+            self.dropped_messages += excess
+            if self.history_log is not None:
+                self.history_log.append_drop(start, excess)
+            logging.warning(
+                f"Summarizer behind, dropped {excess} unsummarized messages"
             )
 
-            def callback(task):
-                try:
-                    if task.cancelled():
-                        logging.warning("Summary task was cancelled")
-                        return
-
-                    summary_message = task.result()
-                    if summary_message.role == "assistant":
-                        messages.clear()
-                        messages.append(summary_message)
-                        logging.info("Successfully summarized the state")
-                    elif (
-                        summary_message.role == "system"
-                        and "Error" in summary_message.content
-                    ):
-                        logging.error(
-                            f"Summarization failed: {summary_message.content}"
-                        )
-                        messages.pop(0) if messages else None
-                        messages.pop(0) if messages else None
-                    else:
-                        logging.warning(f"Unexpected summary result: {summary_message}")
-                except asyncio.CancelledError:
-                    logging.warning("Summary task callback cancelled")
-                except Exception as e:
-                    logging.error(
-                        f"Error in summary task callback: {type(e).__name__}: {e}"
+    def add_turn(
+        self, inputs: ChatMessage, actions: Optional[ChatMessage] = None
+    ) -> None:
+        """
+        Append the inputs and the actions of a turn together.
+
+        Concurrent requests do not interleave their messages, as nothing is
+        awaited between the two.
+
+        Parameters
+        ----------
+        inputs : ChatMessage
+            The inputs sent with the prompt.
+        actions : ChatMessage, optional
+            The actions taken in response, None if there was no response.
+        """
+        self.add_message(inputs)
+        if actions is not None:
+            self.add_message(actions)
+            self.request_summary()
+
+    def _fit(self, message: ChatMessage) -> ChatMessage:
+        """
+        Shorten a message that would not fit in the history on its own.
+        """
+        if self.token_budget:
+            return truncate_to_tokens(message, max(self.window_budget // 2, 1))
+        return message
+
+    @property
+    def window_budget(self) -> int:
+        """
+        Get the tokens available to the recent messages, the token budget
+        minus the summary.
+        """
+        summary = estimate_tokens(self.summary) if self.summary else 0
+        return max(self.token_budget - summary, 1)
+
+    def _window_start(self, history: Optional[List[ChatMessage]] = None) -> int:
+        """
+        Get the index of the oldest history message sent with the prompt.
+        """
+        history = self.history if history is None else history
+        if self.token_budget:
+            budget = self.window_budget
+            start = len(history)
+            tokens = 0
+            while start > 0:
+                tokens += estimate_tokens(history[start - 1])
+                if tokens > budget and len(history) - start >= 2:
+                    break
+                start -= 1
+            return start
+        history_length = self.config.history_length or 0
+        return max(len(history) - history_length, 0)
+
+    def history_tokens(self) -> int:
+        """
+        Get the estimated tokens of the messages sent with the prompt.
+        """
+        messages = self._prompt_history()
+        return sum(estimate_tokens(msg) for msg in messages)
+
+    def _prompt_history(
+        self, pending: Optional[ChatMessage] = None
+    ) -> List[ChatMessage]:
+        """
+        Get the summary and the recent messages sent with the prompt, as if
+        the pending message had been added.
+        """
+        history = self.history
+        if pending is not None:
+            history = [*history, self._fit(pending)]
+        window = history[self._window_start(history) :]
+        return window if self.summary is None else [self.summary, *window]
+
+    def _summary_range(self) -> int:
+        """
+        Get the number of leading history messages due to be summarized.
+        """
+        if self.token_budget:
+            # roll the messages that no longer fit into the summary
+            return self._window_start()
+        history_length = self.config.history_length or 0
+        if history_length > 0 and len(self.history) > history_length:
+            return len(self.history)
+        return 0
+
+    def request_summary(self) -> None:
+        """
+        Summarize the messages that are due, without waiting for it.
+
+        If a summary task is already in flight, the request is coalesced
+        into one follow-up task that starts when it completes.
+        """
+        if self.summary_running:
+            self._summary_requested = True
+            return
+        self._summary_requested = False
+
+        end = self._summary_range()
+        if end == 0:
+            return
+
+        # snapshot the leading range, later messages are not touched
+        snapshot = self.history[:end]
+        self._summary_end = end
+        self._summary_task = asyncio.create_task(
+            self.summarize_messages(snapshot, previous=self.summary)
+        )
+        self._summary_task.add_done_callback(self._merge_summary)
+
+    def _merge_summary(self, task: asyncio.Task) -> None:
+        """
+        Replace the summarized range of the history with its summary.
+        """
+        end = self._summary_end
+        self._summary_end = 0
+        try:
+            if task.cancelled():
+                logging.warning("Summary task was cancelled")
+                return
+            summary_message = task.result()
+            if summary_message.role == "assistant":
+                if self.token_budget:
+                    summary_message = truncate_to_tokens(
+                        summary_message, self.summary_token_budget
+                    )
+                # the range is still the head of the history, as messages
+                # are only appended or dropped after it meanwhile
+                del self.history[:end]
+                self.summary = summary_message
+                if self.history_log is not None:
+                    self.history_log.append_summary(
+                        end, (summary_message.role, summary_message.content)
                     )
-                    messages.pop(0) if messages else None
-                    messages.pop(0) if messages else None
+                logging.info("Successfully summarized the state")
+            else:
+                logging.error(f"Summarization failed: {summary_message.content}")
+                self._trim_unsummarized(end)
+        except Exception as e:
+            logging.error(f"Error in summary task callback: {type(e).__name__}: {e}")
+        finally:
+            if self._summary_requested:
+                self.request_summary()
 
-            self._summary_task.add_done_callback(callback)
+    def _trim_unsummarized(self, end: int) -> None:
+        """
+        Trim the history to `history_length` messages after a failed summary.
+
+        Only in count mode, where the whole history is summarized at once and
+        would otherwise keep growing while the summarizer fails. The oldest
+        messages of the summarized range are dropped. With a token budget, the
+        messages outside the prompt window are kept and summarized on the
+        next attempt.
+        """
+        if self.token_budget:
+            return
+        history_length = self.config.history_length or 0
+        count = min(end, len(self.history) - history_length)
+        if count <= 0:
+            return
+        del self.history[:count]
+        self.dropped_messages += count
+        if self.history_log is not None:
+            self.history_log.append_drop(0, count)
+        logging.warning(f"Dropped {count} messages that could not be summarized")
 
-        except asyncio.CancelledError:
-            logging.warning("Summary task creation cancelled")
+    async def start_summary_task(self):
+        """
+        Start a task to summarize the messages that are due.
+        """
+        try:
+            self.request_summary()
         except Exception as e:
             logging.error(f"Error starting summary task: {type(e).__name__}: {e}")
-            messages.pop(0) if messages else None
-            messages.pop(0) if messages else None
 
-    def get_messages(self) -> List[dict]:
+    def get_messages(self, pending: Optional[ChatMessage] = None) -> List[dict]:
         """
         Get messages in format required by OpenAI API.
+
+        Parameters
+        ----------
+        pending : ChatMessage, optional
+            A message sent with the prompt that is not added to the history
+            yet.
         """
-        return [{"role": msg.role, "content": msg.content} for msg in self.history]
+        return [
+            {"role": msg.role, "content": msg.content}
+            for msg in self._prompt_history(pending)
+        ]
 
     @staticmethod
     def update_history():
@@ -200,9 +493,12 @@ class LLMHistoryManager:
             @functools.wraps(func)
             async def wrapper(self: Any, prompt: str, *args, **kwargs) -> R:
 
-                if self._config.history_length == 0:
+                if (
+                    self._config.history_length == 0
+                    and not self.history_manager.token_budget
+                ):
                     response = await func(self, prompt, [], *args, **kwargs)
-                    self.history_manager.frame_index += 1
+                    self.history_manager.advance_frame()
                     return response
 
                 self.agent_name = self._config.agent_name
@@ -224,17 +520,15 @@ class LLMHistoryManager:
                 inputs = ChatMessage(role="user", content=formatted_inputs)
 
                 logging.debug(f"Inputs: {inputs}")
-                self.history_manager.history.append(inputs)
-
-                messages = self.history_manager.get_messages()
+                messages = self.history_manager.get_messages(pending=inputs)
                 logging.debug(f"messages:\n{messages}")
-                # this advances the frame index
                 response = await func(self, prompt, messages, *args, **kwargs)
                 logging.debug(f"Response to parse:\n{response}")
 
+                action_message = None
                 if response is not None:
 
-                    action_message = (
+                    action_text = (
                         "Given that information, **** took these actions: "
                         + (
                             " | ".join(
@@ -247,22 +541,21 @@ class LLMHistoryManager:
                         )
                     )
 
-                    action_message = action_message.replace("****", self.agent_name)
-
-                    self.history_manager.history.append(
-                        ChatMessage(role="user", content=action_message)
+                    action_message = ChatMessage(
+                        role="user",
+                        content=action_text.replace("****", self.agent_name),
                     )
 
-                    if (
-                        self.history_manager.config.history_length > 0
-                        and len(self.history_manager.history)
-                        > self.history_manager.config.history_length
-                    ):
-                        await self.history_manager.start_summary_task(
-                            self.history_manager.history
-                        )
+                add_turn = functools.partial(
+                    self.history_manager.add_turn, inputs, action_message
+                )
+                turns = deferred_turns.get()
+                if turns is not None:
+                    turns.append(add_turn)
+                else:
+                    add_turn()
 
-                self.history_manager.frame_index += 1
+                self.history_manager.advance_frame()
 
                 return response
 
@@ -0,0 +1,513 @@
+import importlib
+import itertools
+import logging
+import math
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .llm_history_manager import CHARS_PER_TOKEN, MESSAGE_TOKEN_OVERHEAD
+
+# maps a batch of texts to a (len(texts), dim) float32 array
+EmbeddingFunction = Callable[[Sequence[str]], NDArray]
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def hashing_embedding(texts: Sequence[str], dim: int = 256) -> NDArray:
+    """
+    Embed texts by hashing their words and character trigrams.
+
+    A dependency free, CPU only embedding. Texts sharing words, or parts of
+    words, get similar vectors, which is enough to recall the turns about
+    the same person, object or place.
+
+    Parameters
+    ----------
+    texts : Sequence[str]
+        The texts.
+    dim : int
+        The dimension of the vectors, defaults to 256.
+
+    Returns
+    -------
+    NDArray
+        The unit length vectors, a (len(texts), dim) float32 array. The
+        vector of a text without words is zero.
+    """
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in TOKEN_PATTERN.findall(text.lower()):
+            features = [word]
+            padded = f"#{word}#"
+            features += [padded[i : i + 3] for i in range(len(padded) - 2)]
+            for feature in features:
+                # crc32 is stable across processes, unlike hash()
+                h = zlib.crc32(feature.encode())
+                vectors[row, h % dim] += 1.0 if h & 0x80000000 else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def load_embedding(name: str) -> EmbeddingFunction:
+    """
+    Load an embedding function by name.
+
+    Parameters
+    ----------
+    name : str
+        The function as "module:function", such as
+        "my_models.embeddings:embed".
+
+    Returns
+    -------
+    EmbeddingFunction
+        The function.
+
+    Raises
+    ------
+    ValueError
+        If the name is not of the form "module:function".
+    """
+    module_name, _, function_name = name.partition(":")
+    if not module_name or not function_name:
+        raise ValueError(f"Embedding {name} must be given as module:function")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+@dataclass
+class Memory:
+    """
+    A memory recalled from the index.
+
+    Parameters
+    ----------
+    text : str
+        The remembered text.
+    timestamp : float
+        The unix time the memory was added.
+    score : float
+        The cosine similarity to the query.
+    """
+
+    text: str
+    timestamp: float
+    score: float
+
+
+class MemoryIndex:
+    """
+    On-device semantic memory of past turns.
+
+    Texts are embedded with a local embedding function and appended to a
+    NumPy matrix that grows by doubling, so adding is amortized constant
+    time. A text at least `dedup_score` similar to a memory is not added
+    again, and once the index holds more than `max_memories` memories, the
+    oldest ones are evicted. Small indexes are searched exactly. Once the
+    index holds more than `exact_below` memories, it is searched
+    approximately with an inverted file: the memories are clustered around
+    about sqrt(n) centroids, and only the memories of the `num_probes`
+    clusters closest to the query are scored. The clustering runs on a
+    background thread, and is redone whenever as many memories have been
+    added as the index held when it was last clustered.
+
+    Parameters
+    ----------
+    dim : int
+        The dimension of the embeddings, defaults to 256.
+    embedding : Union[str, EmbeddingFunction], optional
+        The embedding function, or its name as "module:function". It is
+        called with a list of texts and must return a (len(texts), dim)
+        array. Defaults to `hashing_embedding`.
+    top_k : int
+        The number of memories recalled per query, defaults to 3.
+    token_budget : int
+        The estimated tokens of the recalled memories, defaults to 200.
+    min_score : float
+        The minimum cosine similarity of a recalled memory, defaults to 0.3.
+    max_memory_tokens : int
+        Longer memories are shortened to this many estimated tokens when
+        they are added, defaults to 100.
+    dedup_score : float
+        A text at least this similar to a memory is not added, defaults to
+        0.95.
+    exclude_recent : int
+        The number of newest memories left out of searches, typically the
+        turns still in the LLM history, defaults to 0.
+    max_memories : int
+        The maximum number of memories. Beyond it, the oldest eighth of the
+        memories is evicted. Defaults to 100000.
+    num_probes : int
+        The number of clusters searched per query, defaults to 8.
+    exact_below : int
+        Indexes up to this size are searched exactly, defaults to 2048.
+    seed : int
+        The seed of the clustering, defaults to 0.
+    """
+
+    def __init__(
+        self,
+        dim: int = 256,
+        embedding: Optional[Union[str, EmbeddingFunction]] = None,
+        top_k: int = 3,
+        token_budget: int = 200,
+        min_score: float = 0.3,
+        max_memory_tokens: int = 100,
+        dedup_score: float = 0.95,
+        exclude_recent: int = 0,
+        max_memories: int = 100000,
+        num_probes: int = 8,
+        exact_below: int = 2048,
+        seed: int = 0,
+    ):
+        if isinstance(embedding, str):
+            embedding = load_embedding(embedding)
+        if embedding is None:
+
+            def embedding(texts: Sequence[str]) -> NDArray:
+                return hashing_embedding(texts, dim)
+
+        self.dim = dim
+        self.embedding: EmbeddingFunction = embedding
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.min_score = min_score
+        self.max_memory_tokens = max_memory_tokens
+        self.dedup_score = dedup_score
+        self.exclude_recent = exclude_recent
+        self.max_memories = max(max_memories, 1)
+        self.num_probes = num_probes
+        self.exact_below = exact_below
+
+        self._vectors = np.zeros((64, dim), dtype=np.float32)
+        self._timestamps = np.zeros(64, dtype=np.float64)
+        self._size = 0
+        self.texts: List[str] = []
+        self.evicted = 0
+
+        # inverted file, the indices of the memories of each cluster
+        self._rng = np.random.default_rng(seed)
+        self._centroids: Optional[NDArray] = None
+        self._lists: List[List[int]] = []
+        self._added_since_training = 0
+        self._trained_size = 0
+
+        # the clustering running on a background thread, and its result as
+        # (evicted when it started, centroids, cluster of each memory)
+        self._training_thread: Optional[threading.Thread] = None
+        self._training_result: Optional[Tuple[int, NDArray, NDArray]] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> NDArray:
+        """
+        Get the embeddings of all memories, a read only (len(self), dim) view.
+        """
+        view = self._vectors[: self._size]
+        view.flags.writeable = False
+        return view
+
+    def _embed(self, texts: Sequence[str]) -> NDArray:
+        """
+        Embed texts and normalize the vectors to unit length.
+        """
+        vectors = np.asarray(self.embedding(list(texts)), dtype=np.float32)
+        if vectors.shape != (len(texts), self.dim):
+            raise ValueError(
+                f"Embedding returned shape {vectors.shape}, "
+                f"expected {(len(texts), self.dim)}"
+            )
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def _cluster(self, vectors: NDArray, evicted: int, iterations: int = 8) -> None:
+        """
+        Cluster memories with spherical k-means and assign each to its
+        closest centroid. Runs on the training thread, the rows of
+        `vectors` are never written while it runs.
+        """
+        size = len(vectors)
+        num_clusters = max(int(math.sqrt(size)), 1)
+        # a sample of the memories is enough to place the centroids
+        sample_size = min(size, 32 * num_clusters)
+        sample = vectors[self._rng.choice(size, sample_size, replace=False)]
+        centroids = sample[:num_clusters].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # empty clusters keep their centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+
+        clusters = np.argmax(vectors @ centroids.T, axis=1)
+        self._training_result = (evicted, centroids, clusters)
+        logging.debug(f"Memory index trained with {num_clusters} clusters")
+
+    def _start_training(self) -> None:
+        """
+        Start clustering the memories on a background thread.
+        """
+        if self._training_thread is not None:
+            return
+        # rows are only appended after the size, and eviction copies the
+        # remaining rows to a new array, so this view stays valid
+        vectors = self._vectors[: self._size]
+        self._added_since_training = 0
+        self._trained_size = self._size
+        self._training_thread = threading.Thread(
+            target=self._cluster, args=(vectors, self.evicted), daemon=True
+        )
+        self._training_thread.start()
+
+    def _apply_training(self) -> None:
+        """
+        Switch to the clusters of a finished training.
+        """
+        if self._training_thread is None or self._training_thread.is_alive():
+            return
+        self._training_thread = None
+        result, self._training_result = self._training_result, None
+        if result is None:
+            return
+
+        evicted, centroids, clusters = result
+        # memories evicted while the training ran are left out
+        shift = self.evicted - evicted
+        self._centroids = centroids
+        self._lists = [[] for _ in range(len(centroids))]
+        trained = max(len(clusters) - shift, 0)
+        for index, cluster in enumerate(clusters[shift:].tolist()):
+            self._lists[cluster].append(index)
+        if trained < self._size:
+            self._assign(trained, self._size)
+
+    def wait_for_training(self) -> None:
+        """
+        Wait for the clustering running in the background, if any, and
+        switch to its clusters.
+        """
+        if self._training_thread is not None:
+            self._training_thread.join()
+        self._apply_training()
+
+    def _evict(self) -> None:
+        """
+        Evict the oldest eighth of the memories.
+        """
+        count = min(self._size, max(self.max_memories // 8, 1))
+        remaining = self._size - count
+        # a new array, the training thread may be reading the old one
+        vectors = np.zeros_like(self._vectors)
+        vectors[:remaining] = self._vectors[count : self._size]
+        self._vectors = vectors
+        self._timestamps = np.concatenate(
+            [
+                self._timestamps[count : self._size],
+                np.zeros(len(self._timestamps) - remaining),
+            ]
+        )
+        del self.texts[:count]
+        self._size = remaining
+        self.evicted += count
+        self._lists = [[i - count for i in lst if i >= count] for lst in self._lists]
+        logging.debug(f"Evicted the {count} oldest memories")
+
+    def _best_scores(self, vectors: NDArray) -> NDArray:
+        """
+        Get the similarity of each vector to its closest memory.
+        """
+        if self._size == 0:
+            return np.full(len(vectors), -np.inf, dtype=np.float32)
+        best = []
+        for vector in vectors:
+            candidates = self._candidates(vector, 1)
+            stored = (
+                self._vectors[: self._size]
+                if candidates is None
+                else self._vectors[candidates]
+            )
+            best.append(float(np.max(stored @ vector)))
+        return np.asarray(best, dtype=np.float32)
+
+    def add(self, texts: Union[str, Sequence[str]], timestamp: Optional[float] = None):
+        """
+        Add memories.
+
+        Parameters
+        ----------
+        texts : Union[str, Sequence[str]]
+            The text, or texts, to remember. A text at least `dedup_score`
+            similar to a memory, or to an earlier text of the batch, is
+            skipped.
+        timestamp : float, optional
+            The unix time of the memories, defaults to now.
+        """
+        self._apply_training()
+        if isinstance(texts, str):
+            texts = [texts]
+        max_chars = self.max_memory_tokens * CHARS_PER_TOKEN
+        texts = [
+            t if len(t) <= max_chars else t[: max_chars - 3] + "..." for t in texts
+        ]
+        if not texts:
+            return
+
+        vectors = self._embed(texts)
+        duplicate = self._best_scores(vectors) >= self.dedup_score
+        if len(texts) > 1:
+            within = np.triu(vectors @ vectors.T, k=1) >= self.dedup_score
+            duplicate |= within.any(axis=0)
+        if duplicate.any():
+            logging.debug(f"Skipping {int(duplicate.sum())} duplicate memories")
+            vectors = vectors[~duplicate]
+            texts = [t for t, d in zip(texts, duplicate.tolist()) if not d]
+            if not texts:
+                return
+
+        while self._size and self._size + len(texts) > self.max_memories:
+            self._evict()
+        start, end = self._size, self._size + len(texts)
+        if end > len(self._vectors):
+            capacity = max(end, 2 * len(self._vectors))
+            self._vectors = np.resize(self._vectors, (capacity, self.dim))
+            self._timestamps = np.resize(self._timestamps, capacity)
+        self._vectors[start:end] = vectors
+        self._timestamps[start:end] = time.time() if timestamp is None else timestamp
+        self.texts.extend(texts)
+        self._size = end
+        self._added_since_training += len(texts)
+
+        if self._centroids is not None:
+            self._assign(start, end)
+        if (
+            self._size > self.exact_below
+            and self._added_since_training >= self._trained_size
+        ):
+            self._start_training()
+
+    def _assign(self, start: int, end: int) -> None:
+        """
+        Add the memories from `start` to `end` to the list of their closest
+        centroid.
+        """
+        assert self._centroids is not None
+        clusters = np.argmax(self._vectors[start:end] @ self._centroids.T, axis=1)
+        for index, cluster in enumerate(clusters.tolist(), start):
+            self._lists[cluster].append(index)
+
+    def _candidates(
+        self, query: NDArray, k: int, limit: Optional[int] = None
+    ) -> Optional[NDArray]:
+        """
+        Get the indices, below `limit`, of the memories in the clusters
+        closest to the query.
+
+        Returns
+        -------
+        Optional[NDArray]
+            The candidates, or None to search exactly.
+        """
+        if self._size <= self.exact_below or self._centroids is None:
+            return None
+        scores = self._centroids @ query
+        num_probes = min(self.num_probes, len(scores))
+        probes = np.argpartition(-scores, num_probes - 1)[:num_probes]
+        candidates = np.fromiter(
+            itertools.chain.from_iterable(self._lists[p] for p in probes.tolist()),
+            dtype=np.int64,
+        )
+        if limit is not None:
+            candidates = candidates[candidates < limit]
+        if len(candidates) < k:
+            return None
+        return candidates
+
+    def search(
+        self, query: str, k: Optional[int] = None, min_score: Optional[float] = None
+    ) -> List[Memory]:
+        """
+        Find the memories most similar to a query.
+
+        Parameters
+        ----------
+        query : str
+            The query.
+        k : int, optional
+            The maximum number of memories, defaults to `top_k`.
+        min_score : float, optional
+            The minimum cosine similarity, defaults to `min_score`.
+
+        Returns
+        -------
+        List[Memory]
+            The memories, most similar first. The `exclude_recent` newest
+            memories are left out.
+        """
+        self._apply_training()
+        k = self.top_k if k is None else k
+        min_score = self.min_score if min_score is None else min_score
+        limit = self._size - self.exclude_recent
+        if limit <= 0 or k <= 0:
+            return []
+
+        vector = self._embed([query])[0]
+        candidates = self._candidates(vector, k, limit)
+        if candidates is None:
+            scores = self._vectors[:limit] @ vector
+            indices = np.arange(limit)
+        else:
+            scores = self._vectors[candidates] @ vector
+            indices = candidates
+
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            scores, indices = scores[top], indices[top]
+        order = np.argsort(-scores, kind="stable")
+        return [
+            Memory(
+                text=self.texts[i],
+                timestamp=float(self._timestamps[i]),
+                score=float(s),
+            )
+            for s, i in zip(scores[order].tolist(), indices[order].tolist())
+            if s >= min_score
+        ]
+
+    def recall(self, query: str, token_budget: Optional[int] = None) -> List[Memory]:
+        """
+        Recall the memories most relevant to a query within a token budget.
+
+        Parameters
+        ----------
+        query : str
+            The query, typically the current inputs.
+        token_budget : int, optional
+            The estimated tokens of the memories, defaults to `token_budget`.
+
+        Returns
+        -------
+        List[Memory]
+            The memories, most similar first. A memory that does not fit is
+            skipped in favour of shorter, less similar ones.
+        """
+        budget = self.token_budget if token_budget is None else token_budget
+        recalled = []
+        for memory in self.search(query):
+            tokens = MESSAGE_TOKEN_OVERHEAD + math.ceil(
+                len(memory.text) / CHARS_PER_TOKEN
+            )
+            if tokens > budget:
+                continue
+            budget -= tokens
+            recalled.append(memory)
+        logging.debug(f"Recalled {len(recalled)} memories")
+        return recalled
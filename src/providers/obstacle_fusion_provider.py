@@ -0,0 +1,453 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+import zenoh
+from numpy.typing import NDArray
+
+from zenoh_idl import sensor_msgs
+
+from .rplidar_provider import RPLidarProvider
+from .singleton import singleton
+
+
+class ObstacleSource(Enum):
+    LIDAR = 0
+    HAZARD = 1
+    VISION = 2
+
+
+# sensor_msgs.HazardDetection types
+HAZARD_BACKUP_LIMIT = 0
+HAZARD_BUMP = 1
+HAZARD_CLIFF = 2
+HAZARD_STALL = 3
+HAZARD_WHEEL_DROP = 4
+HAZARD_OBJECT_PROXIMITY = 5
+
+# the hazards that block paths by default: the robot has hit something or is
+# at an edge. The IR proximity reports and the backup limit only inform.
+BLOCKING_HAZARDS = (HAZARD_BUMP, HAZARD_CLIFF, HAZARD_WHEEL_DROP)
+
+
+def hazard_bearing(hazard_type: int, frame_id: str) -> float:
+    """
+    Get the bearing of a TurtleBot4 hazard from the frame it was detected in.
+
+    Parameters
+    ----------
+    hazard_type : int
+        The HazardDetection type.
+    frame_id : str
+        The frame of the detection, such as "bump_front_left".
+
+    Returns
+    -------
+    float
+        The bearing in degrees, positive to the right. Hazards without a
+        direction are straight ahead, except the backup limit, which is
+        behind the robot.
+    """
+    if hazard_type == HAZARD_BACKUP_LIMIT:
+        return 180.0
+    if "center" in frame_id:
+        return 0.0
+    side = 0.0
+    if "left" in frame_id:
+        side = -1.0
+    elif "right" in frame_id:
+        side = 1.0
+    return side * (45.0 if "front" in frame_id else 90.0)
+
+
+@dataclass
+class HazardEvent:
+    """
+    A hazard reported by the robot base.
+
+    Parameters
+    ----------
+    timestamp : float
+        The unix time the hazard was received.
+    type : int
+        The HazardDetection type, such as `HAZARD_BUMP`.
+    frame_id : str
+        The frame the hazard was detected in.
+    bearing : float
+        The bearing of the hazard in degrees, positive to the right.
+    """
+
+    timestamp: float
+    type: int
+    frame_id: str
+    bearing: float
+
+
+@dataclass
+class SafetyState:
+    """
+    Fused safety state of the robot at one point in time.
+
+    Parameters
+    ----------
+    timestamp : float
+        The unix time the state was computed.
+    scan_timestamp : float
+        The unix time of the lidar scan the state is based on, 0.0 if none.
+    clear_paths : Tuple[int, ...]
+        The lidar paths that are clear of every source of obstacles.
+    obstacles : NDArray
+        All current obstacles, as rows of [bearing, distance] in degrees,
+        positive to the right, and m.
+    sources : NDArray
+        The `ObstacleSource` value of each obstacle.
+    hazards : List[HazardEvent]
+        The active hazards.
+    """
+
+    timestamp: float
+    scan_timestamp: float
+    clear_paths: Tuple[int, ...]
+    obstacles: NDArray
+    sources: NDArray
+    hazards: List[HazardEvent] = field(default_factory=list)
+
+
+@singleton
+class ObstacleFusionProvider:
+    """
+    Fuses the lidar, the hazards of the robot base and optional vision or
+    depth detections into one safety state shared by the move connectors.
+
+    The lidar path check is done once per scan by `RPLidarProvider`. Hazards
+    of the `blocking_hazards` types block the paths within `hazard_sector`
+    degrees of their bearing, and
+    detections block the paths that pass within the robot's half width of
+    them. The fused state is computed on the first query after any source
+    changes and then served from cache, so connectors polling it on their
+    own threads do not repeat the work.
+
+    The hazards of a TurtleBot4 base are only received after
+    `subscribe_hazards` has been called with the robot's URID.
+
+    Parameters
+    ----------
+    hazard_ttl : float
+        Seconds a hazard stays active after it was last reported, defaults
+        to 2.0.
+    hazard_sector : float
+        Half width in degrees of the sector of paths a hazard blocks,
+        defaults to 60.0.
+    blocking_hazards : Iterable[int]
+        The HazardDetection types that block paths, defaults to bumps,
+        cliffs and wheel drops. Other hazards are reported, but do not
+        block any path.
+    detection_ttl : float
+        Seconds a detection stays active by default, defaults to 1.0.
+    max_scan_age : float, optional
+        If set, no path is clear when the last lidar scan is older than this
+        many seconds.
+    """
+
+    def __init__(
+        self,
+        hazard_ttl: float = 2.0,
+        hazard_sector: float = 60.0,
+        blocking_hazards: Iterable[int] = BLOCKING_HAZARDS,
+        detection_ttl: float = 1.0,
+        max_scan_age: Optional[float] = None,
+    ):
+        self.hazard_ttl = hazard_ttl
+        self.hazard_sector = hazard_sector
+        self.blocking_hazards = frozenset(blocking_hazards)
+        self.detection_ttl = detection_ttl
+        self.max_scan_age = max_scan_age
+
+        self.lidar = RPLidarProvider()
+
+        self._lock = threading.Lock()
+        self._hazards: List[HazardEvent] = []
+        # rows of [bearing, distance, expiry]
+        self._detections = np.empty((0, 3))
+        self._hazard_callbacks: List[Callable[[List[HazardEvent]], None]] = []
+
+        self._version = 0
+        self._state: Optional[SafetyState] = None
+        self._state_key: Optional[tuple] = None
+        self._state_expiry = float("inf")
+
+        self.session = None
+        self._hazard_urid: Optional[str] = None
+
+    def subscribe_hazards(self, URID: str) -> None:
+        """
+        Subscribe to the hazards of a TurtleBot4 base over Zenoh.
+
+        The provider is shared, so only the first URID is subscribed to.
+        Later calls with the same URID do nothing.
+
+        Parameters
+        ----------
+        URID : str
+            The URID of the robot.
+        """
+        with self._lock:
+            if self._hazard_urid is not None:
+                if URID != self._hazard_urid:
+                    logging.warning(
+                        f"Obstacle fusion already listens to the hazards of "
+                        f"{self._hazard_urid}, ignoring URID {URID}"
+                    )
+                return
+            self._hazard_urid = URID
+
+        try:
+            self.session = zenoh.open(zenoh.Config())
+            self.session.declare_subscriber(
+                f"{URID}/c3/hazard_detection", self.listen_hazard
+            )
+            logging.info(f"Obstacle fusion hazard listener using URID: {URID}")
+        except Exception as e:
+            logging.error(f"Error opening Zenoh client: {e}")
+
+    def register_hazard_callback(
+        self, hazard_callback: Callable[[List[HazardEvent]], None]
+    ):
+        """
+        Register a callback for new hazards.
+
+        Parameters
+        ----------
+        hazard_callback : Callable[[List[HazardEvent]], None]
+            Called with the hazards of every hazard report that has any.
+        """
+        self._hazard_callbacks.append(hazard_callback)
+
+    def listen_hazard(self, data: zenoh.Sample) -> None:
+        """
+        Zenoh hazard detection handler.
+
+        Parameters
+        ----------
+        data : zenoh.Sample
+            The Zenoh sample containing the HazardDetectionVector.
+        """
+        try:
+            vector = sensor_msgs.HazardDetectionVector.deserialize(
+                data.payload.to_bytes()
+            )
+        except Exception as e:
+            logging.error(f"Error parsing hazard detection: {e}")
+            return
+        self.add_hazards(vector)
+
+    def add_hazards(self, vector: sensor_msgs.HazardDetectionVector) -> None:
+        """
+        Add the hazards of a HazardDetectionVector report.
+
+        Parameters
+        ----------
+        vector : sensor_msgs.HazardDetectionVector
+            The hazard report of the robot base.
+        """
+        now = time.time()
+        events = [
+            HazardEvent(
+                timestamp=now,
+                type=haz.type,
+                frame_id=haz.header.frame_id,
+                bearing=hazard_bearing(haz.type, haz.header.frame_id),
+            )
+            for haz in vector.detections or []
+        ]
+        if not events:
+            return
+
+        with self._lock:
+            # a hazard reported again replaces the previous report
+            reported = {(e.type, e.frame_id) for e in events}
+            self._hazards = [
+                h for h in self._hazards if (h.type, h.frame_id) not in reported
+            ] + events
+            self._version += 1
+
+        for event in events:
+            logging.info(f"Hazard Type:{event.type} direction:{event.frame_id}")
+        for callback in self._hazard_callbacks:
+            try:
+                callback(events)
+            except Exception as e:
+                logging.error(f"Error in hazard callback: {e}")
+
+    def add_detection(
+        self, bearing: float, distance: float, ttl: Optional[float] = None
+    ) -> None:
+        """
+        Add an obstacle detected by a camera or depth sensor.
+
+        Parameters
+        ----------
+        bearing : float
+            The bearing of the obstacle in degrees, positive to the right.
+        distance : float
+            The distance to the obstacle in m.
+        ttl : float, optional
+            Seconds the detection stays active, defaults to `detection_ttl`.
+        """
+        expiry = time.time() + (self.detection_ttl if ttl is None else ttl)
+        with self._lock:
+            self._detections = np.vstack(
+                (self._detections, [bearing, distance, expiry])
+            )
+            self._version += 1
+
+    @property
+    def state(self) -> SafetyState:
+        """
+        Get the current fused safety state.
+
+        Returns
+        -------
+        SafetyState
+            The state, computed at most once per change of its sources.
+        """
+        now = time.time()
+        key = (self._version, self.lidar.scan_timestamp)
+        with self._lock:
+            if (
+                self._state is None
+                or key != self._state_key
+                or now >= self._state_expiry
+            ):
+                self._state = self._fuse(now)
+                self._state_key = key
+            return self._state
+
+    def _fuse(self, now: float) -> SafetyState:
+        """
+        Compute the safety state from the current sources.
+        """
+        self._hazards = [
+            h for h in self._hazards if now - h.timestamp < self.hazard_ttl
+        ]
+        self._detections = self._detections[self._detections[:, 2] > now]
+
+        scan_timestamp = self.lidar.scan_timestamp
+        clear = np.array(self.lidar.valid_paths or [], dtype=np.int64)
+        if self.max_scan_age is not None and now - scan_timestamp > self.max_scan_age:
+            clear = clear[:0]
+
+        blocking = [h for h in self._hazards if h.type in self.blocking_hazards]
+        path_angles = np.asarray(self.lidar.path_angles, dtype=np.float64)
+        for hazard in blocking:
+            offset = _wrap(path_angles[clear] - hazard.bearing)
+            clear = clear[np.abs(offset) > self.hazard_sector]
+
+        if len(self._detections) and len(clear):
+            radians = np.radians(self._detections[:, 0])
+            distance = self._detections[:, 1]
+            engine = self.lidar.path_engine
+            points = engine.points_from_xy(
+                distance * np.sin(radians), distance * np.cos(radians)
+            )
+            blocked = engine.blocked_paths(points)
+            clear = clear[~blocked[clear]]
+
+        obstacles = [self._detections[:, :2]]
+        sources = [np.full(len(self._detections), ObstacleSource.VISION.value)]
+        if blocking:
+            obstacles.append(
+                [[h.bearing, self.lidar.half_width_robot] for h in blocking]
+            )
+            sources.append(np.full(len(blocking), ObstacleSource.HAZARD.value))
+        lidar_obstacles = self.lidar.obstacles
+        if lidar_obstacles is not None and len(lidar_obstacles):
+            obstacles.append(lidar_obstacles[:, 2:4])
+            sources.append(np.full(len(lidar_obstacles), ObstacleSource.LIDAR.value))
+
+        # recompute when the first hazard or detection expires
+        self._state_expiry = min(
+            [h.timestamp + self.hazard_ttl for h in self._hazards]
+            + self._detections[:, 2].tolist()
+            + [float("inf")]
+        )
+
+        return SafetyState(
+            timestamp=now,
+            scan_timestamp=scan_timestamp,
+            clear_paths=tuple(clear.tolist()),
+            obstacles=np.vstack(obstacles).astype(np.float64),
+            sources=np.concatenate(sources).astype(np.int8),
+            hazards=list(self._hazards),
+        )
+
+    @property
+    def clear_paths(self) -> Tuple[int, ...]:
+        """
+        Get the paths that are clear of every source of obstacles.
+        """
+        return self.state.clear_paths
+
+    def is_path_clear(self, path_id: int) -> bool:
+        """
+        Check whether a lidar path is clear of every source of obstacles.
+
+        Parameters
+        ----------
+        path_id : int
+            The index of the path, 0 to 9, such as 4 for straight ahead and
+            9 for backwards.
+
+        Returns
+        -------
+        bool
+            True if the path is clear.
+        """
+        return path_id in self.state.clear_paths
+
+    def nearest_obstacle(
+        self, bearing: float, tolerance: float = 15.0
+    ) -> Optional[float]:
+        """
+        Get the distance to the nearest obstacle around a bearing.
+
+        Parameters
+        ----------
+        bearing : float
+            The bearing in degrees, positive to the right.
+        tolerance : float
+            Half width in degrees of the sector around the bearing, defaults
+            to 15.0.
+
+        Returns
+        -------
+        Optional[float]
+            The distance in m, or None if there is no obstacle in the
+            sector.
+        """
+        state = self.state
+        if len(state.obstacles) == 0:
+            return None
+        in_sector = np.abs(_wrap(state.obstacles[:, 0] - bearing)) <= tolerance
+        if not in_sector.any():
+            return None
+        return float(state.obstacles[in_sector, 1].min())
+
+    def stop(self):
+        """
+        Stop the obstacle fusion provider.
+        """
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+
+def _wrap(angles: NDArray) -> NDArray:
+    """
+    Wrap angle differences to -180 to 180 degrees.
+    """
+    return (angles + 180.0) % 360.0 - 180.0
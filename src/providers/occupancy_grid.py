@@ -0,0 +1,231 @@
+import math
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+# (x, y, yaw) of the robot in the odom frame, in m and deg, yaw counterclockwise
+Pose = Tuple[float, float, float]
+
+
+class OccupancyGrid:
+    """
+    Robot-centric rolling occupancy grid fused from lidar scans and odometry.
+
+    The grid is a fixed size square of log-odds cells aligned with the odom
+    frame and centered on the cell of the robot. When the robot moves to
+    another cell the contents are shifted, so memory stays bounded and the
+    evidence of previous scans stays in place in the world.
+
+    Each scan adds `log_odds_hit` to the cells of its returns and
+    `log_odds_miss` to the cells its rays pass through, as vectorized
+    scatter updates with every cell updated at most once per scan. Before
+    each update the grid decays towards unknown, so an obstacle that is no
+    longer seen drops below the occupied threshold after `memory_scans`
+    scans. A return that is missed for a scan or two therefore does not
+    make the obstacle disappear.
+
+    Points are in the robot frame of `PathFeasibilityEngine`, with x to the
+    right and y forwards.
+
+    Parameters
+    ----------
+    resolution : float
+        The cell size in m, defaults to 0.05.
+    size : float
+        The side length of the grid in m, defaults to 3.0.
+    memory_scans : int
+        Number of scans after which a saturated cell that is no longer seen
+        is no longer occupied, defaults to 5.
+    log_odds_hit : float
+        Log-odds added to the cell of a return, defaults to 0.85.
+    log_odds_miss : float
+        Log-odds added to the cells a ray passes through, defaults to -0.4.
+    log_odds_min : float
+        Lower clamp of the log-odds, defaults to -2.0.
+    log_odds_max : float
+        Upper clamp of the log-odds, defaults to 3.5.
+    occupied_threshold : float
+        Log-odds above which a cell is occupied, defaults to 0.5.
+    """
+
+    def __init__(
+        self,
+        resolution: float = 0.05,
+        size: float = 3.0,
+        memory_scans: int = 5,
+        log_odds_hit: float = 0.85,
+        log_odds_miss: float = -0.4,
+        log_odds_min: float = -2.0,
+        log_odds_max: float = 3.5,
+        occupied_threshold: float = 0.5,
+    ):
+        self.resolution = resolution
+        self.log_odds_hit = log_odds_hit
+        self.log_odds_miss = log_odds_miss
+        self.log_odds_min = log_odds_min
+        self.log_odds_max = log_odds_max
+        self.occupied_threshold = occupied_threshold
+        self.decay = (occupied_threshold / log_odds_max) ** (1.0 / max(memory_scans, 1))
+
+        # odd, so the robot is in the center cell
+        self.num_cells = int(math.ceil(size / resolution)) | 1
+        self._center = self.num_cells // 2
+        self.log_odds = np.zeros((self.num_cells, self.num_cells), dtype=np.float32)
+
+        # odom frame cell of the center of the grid
+        self._origin = np.zeros(2, dtype=np.int64)
+        self.pose: Pose = (0.0, 0.0, 0.0)
+        self.num_scans = 0
+
+        self._lock = threading.Lock()
+
+    def _to_odom(self, x: NDArray, y: NDArray, pose: Pose) -> Tuple[NDArray, NDArray]:
+        """
+        Convert robot-frame points to the odom frame.
+        """
+        yaw = math.radians(pose[2])
+        cos, sin = math.cos(yaw), math.sin(yaw)
+        # odom convention: forwards is x, left is y
+        forward, left = y, -x
+        return (
+            pose[0] + forward * cos - left * sin,
+            pose[1] + forward * sin + left * cos,
+        )
+
+    def _to_robot(self, x: NDArray, y: NDArray, pose: Pose) -> Tuple[NDArray, NDArray]:
+        """
+        Convert odom-frame points to the robot frame.
+        """
+        yaw = math.radians(pose[2])
+        cos, sin = math.cos(yaw), math.sin(yaw)
+        dx, dy = x - pose[0], y - pose[1]
+        forward = dx * cos + dy * sin
+        left = -dx * sin + dy * cos
+        return -left, forward
+
+    def _cell_indices(self, x: NDArray, y: NDArray) -> NDArray:
+        """
+        Get the flat grid indices of odom-frame points, dropping points
+        outside the grid.
+        """
+        ix = np.floor(x / self.resolution).astype(np.int64) - self._origin[0]
+        iy = np.floor(y / self.resolution).astype(np.int64) - self._origin[1]
+        ix += self._center
+        iy += self._center
+        inside = (ix >= 0) & (ix < self.num_cells) & (iy >= 0) & (iy < self.num_cells)
+        return ix[inside] * self.num_cells + iy[inside]
+
+    def _recenter(self, pose: Pose) -> None:
+        """
+        Shift the grid so the robot is in its center cell.
+        """
+        origin = np.floor(np.array(pose[:2]) / self.resolution).astype(np.int64)
+        shift = origin - self._origin
+        self._origin = origin
+        if not shift.any():
+            return
+
+        n = self.num_cells
+        shifted = np.zeros_like(self.log_odds)
+        if abs(shift[0]) < n and abs(shift[1]) < n:
+            src_x = slice(max(shift[0], 0), n + min(shift[0], 0))
+            dst_x = slice(max(-shift[0], 0), n + min(-shift[0], 0))
+            src_y = slice(max(shift[1], 0), n + min(shift[1], 0))
+            dst_y = slice(max(-shift[1], 0), n + min(-shift[1], 0))
+            shifted[dst_x, dst_y] = self.log_odds[src_x, src_y]
+        self.log_odds = shifted
+
+    def update(self, points: NDArray, pose: Optional[Pose] = None) -> None:
+        """
+        Fuse one scan into the grid.
+
+        Parameters
+        ----------
+        points : NDArray
+            The returns of the scan as rows of [x, y, ...] in the robot
+            frame, such as `ScanResult.points`.
+        pose : Pose, optional
+            The robot pose when the scan was taken. If None, the robot is
+            assumed not to have moved.
+        """
+        points = np.asarray(points, dtype=np.float64)
+
+        with self._lock:
+            if pose is not None:
+                self.pose = pose
+            self._recenter(self.pose)
+            self.log_odds *= self.decay
+
+            if len(points) > 0:
+                hit_x, hit_y = self._to_odom(points[:, 0], points[:, 1], self.pose)
+                hits = np.unique(self._cell_indices(hit_x, hit_y))
+
+                # sample each ray at half the cell size, stopping a cell short
+                # of the return
+                robot_x, robot_y = self.pose[0], self.pose[1]
+                ray_x, ray_y = hit_x - robot_x, hit_y - robot_y
+                length = np.hypot(ray_x, ray_y)
+                steps = np.arange(0.0, float(length.max()), self.resolution / 2)
+                free = steps[None, :] < (length[:, None] - self.resolution)
+                fraction = steps[None, :] / np.maximum(length[:, None], 1e-9)
+                free_x = (robot_x + fraction * ray_x[:, None])[free]
+                free_y = (robot_y + fraction * ray_y[:, None])[free]
+                misses = np.setdiff1d(
+                    self._cell_indices(free_x, free_y), hits, assume_unique=False
+                )
+
+                flat = self.log_odds.reshape(-1)
+                flat[misses] += self.log_odds_miss
+                flat[hits] += self.log_odds_hit
+
+            np.clip(
+                self.log_odds, self.log_odds_min, self.log_odds_max, out=self.log_odds
+            )
+            self.num_scans += 1
+
+    def occupied_points(self, pose: Optional[Pose] = None) -> NDArray:
+        """
+        Get the centers of the occupied cells in the robot frame.
+
+        Parameters
+        ----------
+        pose : Pose, optional
+            The robot pose, defaults to the pose of the last update.
+
+        Returns
+        -------
+        NDArray
+            The cell centers as rows of [x, y].
+        """
+        with self._lock:
+            pose = self.pose if pose is None else pose
+            ix, iy = np.nonzero(self.log_odds > self.occupied_threshold)
+            x = (ix - self._center + self._origin[0] + 0.5) * self.resolution
+            y = (iy - self._center + self._origin[1] + 0.5) * self.resolution
+
+        robot_x, robot_y = self._to_robot(x, y, pose)
+        return np.column_stack((robot_x, robot_y))
+
+    def probabilities(self) -> NDArray:
+        """
+        Get the occupancy probability of every cell.
+
+        Returns
+        -------
+        NDArray
+            The probabilities, indexed [x, y] in the odom frame with the
+            robot in the center cell.
+        """
+        with self._lock:
+            log_odds = self.log_odds.copy()
+        return 1.0 / (1.0 + np.exp(-log_odds))
+
+    def clear(self) -> None:
+        """
+        Reset every cell to unknown.
+        """
+        with self._lock:
+            self.log_odds[:] = 0.0
+            self.num_scans = 0
@@ -30,6 +30,7 @@ import sys
 import time
 from collections import namedtuple
 
+import numpy as np
 import serial
 
 # Protocol constants
@@ -542,6 +543,73 @@ class RPDriver(object):
             if distance > 0 and distance < max_distance_mm:
                 scan_list.append((angle, distance))
 
+    def iter_express_scan_arrays(
+        self, max_buf_meas=3000, min_len=5, max_distance_mm=2000
+    ):
+        """Iterate over express scans, decoding the packets in bulk.
+
+        Every read drains all complete packets waiting in the serial buffer,
+        which are then decoded at once with `ExpressScanDecoder`, so the
+        consumer keeps up with the sensor instead of handling one measure
+        at a time.
+
+        Parameters
+        ----------
+        max_buf_meas : int or False if you want unlimited buffer
+            Maximum number of bytes to be stored inside the buffer. Once
+            number exceeds this limit buffer will be emptied out.
+        min_len : int
+            Minimum number of measures in the scan for it to be returned.
+        max_distance_mm : float
+            Measures at or beyond this distance are dropped.
+
+        Yields
+        ------
+        scan : np.ndarray
+            Array of the measurements, one row of (angle, distance) per
+            measurement. For values description please refer to
+            `iter_measures` method's documentation.
+        """
+        self.start_motor()
+        if not self.scanning[0]:
+            self.start("express")
+
+        decoder = ExpressScanDecoder(min_len, max_distance_mm)
+        while True:
+            data_in_buf = self._serial.inWaiting()
+            if max_buf_meas and data_in_buf > max_buf_meas:
+                self.logger.warning(
+                    "Too many bytes in the input buffer: %d/%d. Cleaning buffer...",
+                    data_in_buf,
+                    max_buf_meas,
+                )
+                self.stop()
+                self.start("express")
+                decoder.reset()
+                continue
+
+            # block for at least one packet, then take everything available
+            size = max(EXPRESS_PACKET_SIZE, data_in_buf)
+            size -= size % EXPRESS_PACKET_SIZE
+            while self._serial.inWaiting() < size:
+                time.sleep(0.001)
+            raw_data = self._serial.read(size)
+
+            try:
+                scans = decoder.feed(raw_data)
+            except ValueError as e:
+                self.logger.warning("Error while processing express scan: %s", e)
+                decoder.reset()
+                self.stop()
+                time.sleep(0.1)
+                self.clean_input()
+                time.sleep(0.1)
+                self.start("express")
+                continue
+
+            for scan in scans:
+                yield scan
+
 
 class ExpressPacket(
     namedtuple("express_packet", "distance angle new_scan start_angle")
@@ -581,3 +649,165 @@ class ExpressPacket(
                 * cls.sign[(packet[i + 6] & 0b00000010) >> 1],
             )
         return cls(d, a, new_scan, start_angle)
+
+
+EXPRESS_PACKET_SIZE = _SCAN_TYPE["express"]["size"]
+EXPRESS_MEASURES_PER_PACKET = 32
+
+
+def decode_express_packets(data):
+    """Decode a run of consecutive express packets in bulk.
+
+    Parameters
+    ----------
+    data : bytes-like
+        The packets, a multiple of `EXPRESS_PACKET_SIZE` bytes.
+
+    Returns
+    -------
+    valid : np.ndarray
+        Boolean mask of the packets with a valid checksum, shape (N,).
+    start_angle : np.ndarray
+        The start angle of each packet in degrees, shape (N,).
+    distance : np.ndarray
+        The 32 distances of each packet in millimeters, shape (N, 32).
+    angle : np.ndarray
+        The 32 angle compensations of each packet in degrees, shape (N, 32).
+
+    Raises
+    ------
+    ValueError
+        If the sync nibbles of a packet are wrong, which means the stream is
+        no longer aligned to the packets.
+    """
+    packets = np.frombuffer(data, dtype=np.uint8).reshape(-1, EXPRESS_PACKET_SIZE)
+
+    if np.any(packets[:, 0] >> 4 != ExpressPacket.sync1) or np.any(
+        packets[:, 1] >> 4 != ExpressPacket.sync2
+    ):
+        raise ValueError("trying to parse corrupted data (sync mismatch)")
+
+    checksum = (packets[:, 0] & 0b00001111) | ((packets[:, 1] & 0b00001111) << 4)
+    valid = np.bitwise_xor.reduce(packets[:, 2:], axis=1) == checksum
+
+    start_angle = (
+        packets[:, 2].astype(np.uint16)
+        | ((packets[:, 3].astype(np.uint16) & 0b01111111) << 8)
+    ) / 64
+
+    # 16 cabins of [distance 1, distance 2, angle offsets], each distance
+    # carrying the offset's sign and high bit in its two low bits
+    cabins = packets[:, 4:].reshape(-1, 16, 5).astype(np.uint16)
+    low = cabins[:, :, [0, 2]]
+    high = cabins[:, :, [1, 3]]
+    offsets = cabins[:, :, 4:5]
+
+    distance = (low >> 2) | (high << 6)
+    offset = np.concatenate((offsets & 0b00001111, offsets >> 4), axis=2) | (
+        (low & 0b00000001) << 4
+    )
+    sign = 1.0 - 2.0 * ((low & 0b00000010) >> 1)
+    angle = offset / 8 * sign
+
+    return (
+        valid,
+        start_angle,
+        distance.reshape(-1, EXPRESS_MEASURES_PER_PACKET).astype(np.float64),
+        angle.reshape(-1, EXPRESS_MEASURES_PER_PACKET),
+    )
+
+
+class ExpressScanDecoder(object):
+    """Assembles whole scans from a stream of express packets.
+
+    The measurements of a packet are interpolated between its start angle
+    and the start angle of the next packet, so each packet is held back
+    until the next one arrives. Packets with a bad checksum are dropped,
+    together with the measurements that depend on them.
+
+    Parameters
+    ----------
+    min_len : int
+        Minimum number of measures in the scan for it to be returned.
+    max_distance_mm : float
+        Measures at or beyond this distance are dropped.
+    """
+
+    def __init__(self, min_len=5, max_distance_mm=2000):
+        self.min_len = min_len
+        self.max_distance_mm = max_distance_mm
+        self.reset()
+
+    def reset(self):
+        """Forget the held back packet and the partial scan"""
+        self._pending = b""
+        self._last = None
+        self._scan = []
+
+    def feed(self, data):
+        """Decode packets and return the scans they complete.
+
+        Parameters
+        ----------
+        data : bytes
+            Raw bytes from the serial port, aligned to the packet stream.
+            An incomplete trailing packet is kept for the next call.
+
+        Returns
+        -------
+        scans : list of np.ndarray
+            The completed scans, each an array of [angle, distance] rows
+            with the angle in degrees [0, 360) and the distance in mm.
+        """
+        data = self._pending + bytes(data)
+        usable = len(data) - len(data) % EXPRESS_PACKET_SIZE
+        self._pending = data[usable:]
+        if usable == 0:
+            return []
+
+        valid, start_angle, distance, angle = decode_express_packets(data[:usable])
+
+        if self._last is not None:
+            valid = np.concatenate(([True], valid))
+            start_angle = np.concatenate(([self._last[0]], start_angle))
+            distance = np.vstack((self._last[1], distance))
+            angle = np.vstack((self._last[2], angle))
+
+        self._last = (start_angle[-1], distance[-1], angle[-1]) if valid[-1] else None
+
+        # measurements of packet i need the start angle of packet i + 1
+        pairs = valid[:-1] & valid[1:]
+        if not np.any(pairs):
+            return []
+        old_angle = start_angle[:-1][pairs]
+        new_angle = start_angle[1:][pairs]
+        distance = distance[:-1][pairs]
+        angle = angle[:-1][pairs]
+
+        trame = np.arange(1, EXPRESS_MEASURES_PER_PACKET + 1)
+        step = ((new_angle - old_angle) % 360) / EXPRESS_MEASURES_PER_PACKET
+        angles = (old_angle[:, None] + step[:, None] * trame[None, :] - angle) % 360
+        new_scan = np.zeros(distance.shape, dtype=bool)
+        new_scan[:, 0] = new_angle < old_angle
+
+        return self._split_scans(angles.ravel(), distance.ravel(), new_scan.ravel())
+
+    def _split_scans(self, angles, distances, new_scan):
+        """Split decoded measurements into scans at the new scan flags"""
+        keep = (distances > 0) & (distances < self.max_distance_mm)
+        measures = np.column_stack((angles, distances))
+        # position of every new scan flag among the kept measurements
+        boundaries = np.cumsum(keep)[new_scan] - keep[new_scan]
+        measures = measures[keep]
+
+        scans = []
+        start = 0
+        for boundary in boundaries:
+            self._scan.append(measures[start:boundary])
+            scan = np.concatenate(self._scan)
+            if len(scan) > self.min_len:
+                scans.append(scan)
+            self._scan = []
+            start = boundary
+        self._scan.append(measures[start:])
+        return scans
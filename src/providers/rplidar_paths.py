@@ -0,0 +1,782 @@
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+@dataclass
+class ScanResult:
+    """
+    Result of the path feasibility check of one scan.
+
+    Parameters
+    ----------
+    points : NDArray
+        The relevant points, one row of [x, y, angle, distance] per point,
+        sorted by angle. x runs backwards to forwards, y runs left to right,
+        angle runs from -180 to +180 deg.
+    raw : NDArray
+        All points of the scan, one row of [angle, distance] per point, with
+        the angle oriented to the robot zero and rounded to 0.01 deg.
+    blocked : NDArray
+        Boolean mask of the paths that have an obstacle within the robot's
+        half width.
+    possible_paths : NDArray
+        Indices of the candidate paths that are not blocked.
+    clearance : Optional[NDArray]
+        The distance from each possible path to the nearest relevant point
+        in m, capped at the relevant distance max, and 0 for the other
+        paths. None if the paths were checked with the lookup table, see
+        `PathFeasibilityEngine.clearance`.
+    """
+
+    points: NDArray
+    raw: NDArray
+    blocked: NDArray
+    possible_paths: NDArray
+    clearance: Optional[NDArray]
+
+
+class PathBlockingTable:
+    """
+    Precomputed lookup table of the paths blocked by a lidar return.
+
+    The paths, the robot half width and the relevant distances are fixed, so
+    for every (angle bin, range bin) it is known ahead of time which paths a
+    return in that bin blocks. The table stores this as a bitmask per bin,
+    with bit i set if path i is blocked. Checking a scan then reduces to
+    quantizing the points and OR-ing their bitmasks.
+
+    The blocking of each bin is evaluated at its center with the robot half
+    width increased by half the bin diagonal, so a bin is blocked if any
+    return in it could block the path. The table errs toward blocked: it
+    never reports a path clear that the exact check reports blocked, but may
+    block a path for returns within a bin diagonal of the robot's corridor.
+
+    Parameters
+    ----------
+    table : NDArray
+        The bitmasks, shape (angle bins, range bins).
+    angle_resolution : float
+        The angle bin size in deg, with bins starting at 0 deg of the
+        robot-frame angle in [0, 360).
+    range_resolution : float
+        The range bin size in m, with bins starting at `range_min`.
+    range_min : float
+        The smallest relevant range in m.
+    num_paths : int
+        The number of paths.
+    key : str
+        Hash of the parameters the table was built from.
+    """
+
+    def __init__(
+        self,
+        table: NDArray,
+        angle_resolution: float,
+        range_resolution: float,
+        range_min: float,
+        num_paths: int,
+        key: str,
+    ):
+        self.table = table
+        self.angle_resolution = angle_resolution
+        self.range_resolution = range_resolution
+        self.range_min = range_min
+        self.num_paths = num_paths
+        self.key = key
+        self._path_bits = np.uint64(1) << np.arange(num_paths, dtype=np.uint64)
+
+    @staticmethod
+    def parameters_key(
+        engine: "PathFeasibilityEngine",
+        angle_resolution: float,
+        range_resolution: float,
+    ) -> str:
+        """
+        Hash the parameters a table depends on.
+
+        Parameters
+        ----------
+        engine : PathFeasibilityEngine
+            The engine with the paths and the robot dimensions.
+        angle_resolution : float
+            The angle bin size in deg.
+        range_resolution : float
+            The range bin size in m.
+
+        Returns
+        -------
+        str
+            A hex digest identifying the table.
+        """
+        digest = hashlib.sha256()
+        for array in (engine._start_x, engine._start_y, engine._dx, engine._dy):
+            digest.update(np.ascontiguousarray(array, dtype=np.float64).tobytes())
+        digest.update(
+            np.array(
+                [
+                    engine.half_width_robot,
+                    engine.relevant_distance_min,
+                    engine.relevant_distance_max,
+                    angle_resolution,
+                    range_resolution,
+                ],
+                dtype=np.float64,
+            ).tobytes()
+        )
+        return digest.hexdigest()
+
+    @classmethod
+    def build(
+        cls,
+        engine: "PathFeasibilityEngine",
+        angle_resolution: float = 0.5,
+        range_resolution: float = 0.01,
+    ) -> "PathBlockingTable":
+        """
+        Build the table for the paths of an engine.
+
+        Parameters
+        ----------
+        engine : PathFeasibilityEngine
+            The engine with the paths and the robot dimensions.
+        angle_resolution : float
+            The angle bin size in deg, defaults to 0.5.
+        range_resolution : float
+            The range bin size in m, defaults to 0.01.
+
+        Returns
+        -------
+        PathBlockingTable
+            The lookup table.
+        """
+        if engine.num_paths > 64:
+            raise ValueError("PathBlockingTable supports at most 64 paths")
+
+        num_angles = int(np.ceil(360.0 / angle_resolution))
+        range_span = engine.relevant_distance_max - engine.relevant_distance_min
+        num_ranges = max(1, int(np.ceil(range_span / range_resolution)) + 1)
+
+        # the centers of all bins, in the robot frame
+        angles = np.radians((np.arange(num_angles) + 0.5) * angle_resolution)
+        ranges = engine.relevant_distance_min + (np.arange(num_ranges) + 0.5) * (
+            range_resolution
+        )
+        a, r = np.meshgrid(angles, ranges, indexing="ij")
+        x = (-r * np.sin(a)).ravel()
+        y = (-r * np.cos(a)).ravel()
+
+        # half the bin diagonal, the distance from the center of a bin to its
+        # outer corners, bounds how much closer to a path any return in the
+        # bin can be
+        outer = ranges + 0.5 * range_resolution
+        half_angle = np.radians(0.5 * angle_resolution)
+        half_diagonal = np.sqrt(
+            outer**2 + ranges**2 - 2.0 * outer * ranges * np.cos(half_angle)
+        )
+        margin = np.broadcast_to(half_diagonal, (num_angles, num_ranges)).ravel()
+
+        blocked = engine.distances(x, y) < engine.half_width_robot + margin[:, None]
+        bits = np.uint64(1) << np.arange(engine.num_paths, dtype=np.uint64)
+        table = np.bitwise_or.reduce(
+            np.where(blocked, bits[None, :], np.uint64(0)), axis=1
+        ).reshape(num_angles, num_ranges)
+
+        return cls(
+            table=table,
+            angle_resolution=angle_resolution,
+            range_resolution=range_resolution,
+            range_min=engine.relevant_distance_min,
+            num_paths=engine.num_paths,
+            key=cls.parameters_key(engine, angle_resolution, range_resolution),
+        )
+
+    def save(self, path: str) -> None:
+        """
+        Write the table to disk.
+
+        Parameters
+        ----------
+        path : str
+            The .npz file to write.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                table=self.table,
+                angle_resolution=self.angle_resolution,
+                range_resolution=self.range_resolution,
+                range_min=self.range_min,
+                num_paths=self.num_paths,
+                key=self.key,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "PathBlockingTable":
+        """
+        Read a table from disk.
+
+        Parameters
+        ----------
+        path : str
+            The .npz file written by `save`.
+
+        Returns
+        -------
+        PathBlockingTable
+            The lookup table.
+        """
+        with np.load(path) as data:
+            return cls(
+                table=data["table"],
+                angle_resolution=float(data["angle_resolution"]),
+                range_resolution=float(data["range_resolution"]),
+                range_min=float(data["range_min"]),
+                num_paths=int(data["num_paths"]),
+                key=str(data["key"]),
+            )
+
+    @classmethod
+    def load_or_build(
+        cls,
+        engine: "PathFeasibilityEngine",
+        path: Optional[str] = None,
+        angle_resolution: float = 0.5,
+        range_resolution: float = 0.01,
+    ) -> "PathBlockingTable":
+        """
+        Load the table from disk, or build and save it if it is missing or stale.
+
+        Parameters
+        ----------
+        engine : PathFeasibilityEngine
+            The engine with the paths and the robot dimensions.
+        path : str, optional
+            The .npz file the table is cached in. If None, the table is
+            built without caching.
+        angle_resolution : float
+            The angle bin size in deg, defaults to 0.5.
+        range_resolution : float
+            The range bin size in m, defaults to 0.01.
+
+        Returns
+        -------
+        PathBlockingTable
+            The lookup table.
+        """
+        key = cls.parameters_key(engine, angle_resolution, range_resolution)
+        if path and os.path.exists(path):
+            try:
+                table = cls.load(path)
+                if table.key == key:
+                    logging.info(f"Loaded lidar path lookup table from {path}")
+                    return table
+                logging.info(f"Lidar path lookup table {path} is stale, rebuilding")
+            except Exception as e:
+                logging.warning(f"Error loading lidar path lookup table {path}: {e}")
+
+        table = cls.build(engine, angle_resolution, range_resolution)
+        if path:
+            try:
+                table.save(path)
+                logging.info(f"Saved lidar path lookup table to {path}")
+            except Exception as e:
+                logging.warning(f"Error saving lidar path lookup table {path}: {e}")
+        return table
+
+    def blocked_paths(self, angles: NDArray, distances: NDArray) -> NDArray:
+        """
+        Find the paths blocked by a set of relevant returns.
+
+        Parameters
+        ----------
+        angles : NDArray
+            The robot-frame angles of the returns in [0, 360) deg.
+        distances : NDArray
+            The distances of the returns in m, within the relevant range.
+
+        Returns
+        -------
+        NDArray
+            Boolean mask of the blocked paths, shape (P,).
+        """
+        num_angles, num_ranges = self.table.shape
+        angle_bins = (angles / self.angle_resolution).astype(np.intp) % num_angles
+        range_bins = np.clip(
+            ((distances - self.range_min) / self.range_resolution).astype(np.intp),
+            0,
+            num_ranges - 1,
+        )
+
+        bits = np.bitwise_or.reduce(
+            self.table[angle_bins, range_bins], initial=np.uint64(0)
+        )
+        return (bits & self._path_bits) != 0
+
+
+class PathFeasibilityEngine:
+    """
+    Vectorized check of which straight paths are free of obstacles.
+
+    All steps, the orientation of the scan to the robot zero, the range and
+    blanked angle filters, the polar to Cartesian conversion and the point to
+    path distances, run as NumPy array operations over the whole scan, rather
+    than as Python loops over the points.
+
+    Parameters
+    ----------
+    paths : Sequence[NDArray]
+        The paths, each as a 2 x n array of x and y coordinates. Only the
+        first and the last point of each path are used.
+    half_width_robot : float
+        The half width of the robot in m.
+    relevant_distance_min : float
+        Only consider barriers above this range, in m.
+    relevant_distance_max : float
+        Only consider barriers within this range, in m.
+    sensor_mounting_angle : float
+        The angle of the sensor zero relative to the robot zero, in deg.
+    angles_blanked : list
+        Regions of the scan to disregard as [start, end] pairs, running from
+        -180 to +180 deg.
+
+    Notes
+    -----
+    Once `use_lookup_table` has been called, the blocked paths are taken
+    from a precomputed `PathBlockingTable` instead of computing the point
+    to path distances. The clearance of the paths is then not computed per
+    scan, but only by `clearance` when it is needed.
+    """
+
+    def __init__(
+        self,
+        paths: Sequence[NDArray],
+        half_width_robot: float,
+        relevant_distance_min: float,
+        relevant_distance_max: float,
+        sensor_mounting_angle: float,
+        angles_blanked: Optional[List[List[float]]] = None,
+    ):
+        self.half_width_robot = half_width_robot
+        self.relevant_distance_min = relevant_distance_min
+        self.relevant_distance_max = relevant_distance_max
+        self.sensor_mounting_angle = sensor_mounting_angle
+
+        blanked = np.asarray(angles_blanked or [], dtype=np.float64)
+        self._blanked = blanked.reshape(-1, 2)
+
+        # path segments as start points and direction vectors, shape (P,)
+        self._start_x = np.array([path[0][0] for path in paths], dtype=np.float64)
+        self._start_y = np.array([path[1][0] for path in paths], dtype=np.float64)
+        self._dx = np.array([path[0][-1] for path in paths]) - self._start_x
+        self._dy = np.array([path[1][-1] for path in paths]) - self._start_y
+
+        # squared segment lengths, with zero length segments treated as points
+        length_sq = self._dx**2 + self._dy**2
+        self._inv_length_sq = np.divide(
+            1.0, length_sq, out=np.zeros_like(length_sq), where=length_sq > 0
+        )
+
+        self.lookup_table: Optional[PathBlockingTable] = None
+
+    def use_lookup_table(
+        self,
+        path: Optional[str] = None,
+        angle_resolution: float = 0.5,
+        range_resolution: float = 0.01,
+    ) -> PathBlockingTable:
+        """
+        Load or build the lookup table and use it for the blocked paths.
+
+        Parameters
+        ----------
+        path : str, optional
+            The .npz file the table is cached in.
+        angle_resolution : float
+            The angle bin size in deg, defaults to 0.5.
+        range_resolution : float
+            The range bin size in m, defaults to 0.01.
+
+        Returns
+        -------
+        PathBlockingTable
+            The lookup table.
+        """
+        self.lookup_table = PathBlockingTable.load_or_build(
+            self, path, angle_resolution, range_resolution
+        )
+        return self.lookup_table
+
+    @property
+    def num_paths(self) -> int:
+        """
+        Get the number of paths.
+        """
+        return len(self._start_x)
+
+    def to_points(self, data: NDArray) -> tuple[NDArray, NDArray]:
+        """
+        Convert a scan to robot-frame points.
+
+        Parameters
+        ----------
+        data : NDArray
+            The scan as an n x 2 array of [angle in deg, distance in m].
+
+        Returns
+        -------
+        tuple[NDArray, NDArray]
+            The relevant points as rows of [x, y, angle, distance] sorted by
+            angle, and all points as rows of [angle, distance].
+        """
+        data = np.asarray(data, dtype=np.float64).reshape(-1, 2)
+
+        # orient the sensor zero to the robot zero, angles in [0, 360)
+        angles = np.mod(data[:, 0] + self.sensor_mounting_angle, 360.0)
+        distances = data[:, 1]
+        raw = np.column_stack((np.round(angles, 2), distances))
+
+        relevant = (distances <= self.relevant_distance_max) & (
+            distances >= self.relevant_distance_min
+        )
+
+        # angles in the [-180, +180] range
+        centered = angles - 180.0
+
+        # permanent robot reflections
+        for start, end in self._blanked:
+            relevant &= (centered < start) | (centered > end)
+
+        angles = angles[relevant]
+        centered = centered[relevant]
+        distances = distances[relevant]
+
+        a_rad = np.radians(angles)
+        # x runs backwards to forwards, y runs left to right
+        x = -distances * np.sin(a_rad)
+        y = -distances * np.cos(a_rad)
+
+        # sort into strictly increasing angles to deal with sensor issues
+        # the sensor sometimes reports part of the previous scan and part of
+        # the next scan
+        points = np.column_stack((x, y, centered, distances))
+        points = points[np.argsort(centered, kind="stable")]
+
+        return points, raw
+
+    def distances(self, x: NDArray, y: NDArray) -> NDArray:
+        """
+        Compute the distances of all points to all path segments.
+
+        Parameters
+        ----------
+        x : NDArray
+            The x coordinates of the points, shape (N,).
+        y : NDArray
+            The y coordinates of the points, shape (N,).
+
+        Returns
+        -------
+        NDArray
+            The distances, shape (N, P).
+        """
+        rel_x = x[:, None] - self._start_x[None, :]
+        rel_y = y[:, None] - self._start_y[None, :]
+
+        # projection of the point onto the segment, clamped to the segment
+        t = (rel_x * self._dx + rel_y * self._dy) * self._inv_length_sq
+        np.clip(t, 0.0, 1.0, out=t)
+
+        return np.hypot(rel_x - t * self._dx, rel_y - t * self._dy)
+
+    def points_from_xy(self, x: NDArray, y: NDArray) -> NDArray:
+        """
+        Convert robot-frame coordinates to relevant points.
+
+        This is the inverse of the conversion in `to_points`, for obstacles
+        that do not come straight from a scan, such as occupancy grid cells.
+
+        Parameters
+        ----------
+        x : NDArray
+            The x coordinates of the points, shape (N,).
+        y : NDArray
+            The y coordinates of the points, shape (N,).
+
+        Returns
+        -------
+        NDArray
+            The points within the relevant distance as rows of
+            [x, y, angle, distance], with the angle from -180 to +180 deg.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        distances = np.hypot(x, y)
+        centered = np.mod(np.degrees(np.arctan2(-x, -y)), 360.0) - 180.0
+
+        relevant = (distances <= self.relevant_distance_max) & (
+            distances >= self.relevant_distance_min
+        )
+        return np.column_stack((x, y, centered, distances))[relevant]
+
+    def blocked_paths(self, points: NDArray) -> NDArray:
+        """
+        Find the paths that have an obstacle within the robot's half width.
+
+        Parameters
+        ----------
+        points : NDArray
+            Points as rows of [x, y, angle, distance], as returned by
+            `to_points`.
+
+        Returns
+        -------
+        NDArray
+            Boolean mask of the blocked paths, shape (P,).
+        """
+        if len(points) == 0:
+            return np.zeros(self.num_paths, dtype=bool)
+
+        if self.lookup_table is not None:
+            # back from the [-180, +180] to the [0, 360) range
+            return self.lookup_table.blocked_paths(points[:, 2] + 180.0, points[:, 3])
+
+        distances = self.distances(points[:, 0], points[:, 1])
+        return (distances < self.half_width_robot).any(axis=0)
+
+    def clearance(
+        self, points: NDArray, paths: Optional[Sequence[int]] = None
+    ) -> NDArray:
+        """
+        Compute the distance from paths to the nearest point.
+
+        Parameters
+        ----------
+        points : NDArray
+            Points as rows of [x, y, ...].
+        paths : Sequence[int], optional
+            Indices of the paths to compute, defaults to all paths.
+
+        Returns
+        -------
+        NDArray
+            The clearance of each requested path in m, capped at the
+            relevant distance max.
+        """
+        paths = np.arange(self.num_paths) if paths is None else np.asarray(paths)
+        clearance = np.full(len(paths), self.relevant_distance_max)
+        if len(points) == 0 or len(paths) == 0:
+            return clearance
+
+        rel_x = points[:, 0, None] - self._start_x[None, paths]
+        rel_y = points[:, 1, None] - self._start_y[None, paths]
+        dx, dy = self._dx[paths], self._dy[paths]
+        t = np.clip((rel_x * dx + rel_y * dy) * self._inv_length_sq[paths], 0.0, 1.0)
+        distances = np.hypot(rel_x - t * dx, rel_y - t * dy)
+
+        return np.minimum(distances.min(axis=0), clearance)
+
+    def process(self, data: NDArray, candidate_paths: Sequence[int]) -> ScanResult:
+        """
+        Check which of the candidate paths are free of obstacles.
+
+        Parameters
+        ----------
+        data : NDArray
+            The scan as an n x 2 array of [angle in deg, distance in m].
+        candidate_paths : Sequence[int]
+            Indices of the paths to consider.
+
+        Returns
+        -------
+        ScanResult
+            The relevant points, the raw scan, the possible paths and, unless
+            the lookup table is used, their clearance.
+        """
+        points, raw = self.to_points(data)
+        candidates = np.asarray(candidate_paths, dtype=np.int64)
+
+        clearance: Optional[NDArray] = None
+        if self.lookup_table is not None:
+            # the clearance would need the exact distances the table avoids
+            blocked = self.blocked_paths(points)
+            possible_paths = candidates[~blocked[candidates]]
+        else:
+            clearance = np.zeros(self.num_paths)
+            if len(points) > 0:
+                distances = self.distances(points[:, 0], points[:, 1]).min(axis=0)
+                blocked = distances < self.half_width_robot
+            else:
+                distances = np.full(self.num_paths, self.relevant_distance_max)
+                blocked = np.zeros(self.num_paths, dtype=bool)
+            possible_paths = candidates[~blocked[candidates]]
+            clearance[possible_paths] = np.minimum(
+                distances[possible_paths], self.relevant_distance_max
+            )
+        # formatted lazily, printing the array costs as much as the check
+        logging.debug("blocked paths: %s", np.flatnonzero(blocked))
+
+        return ScanResult(
+            points=points,
+            raw=raw,
+            blocked=blocked,
+            possible_paths=possible_paths,
+            clearance=clearance,
+        )
+
+
+def arc_paths(
+    headings: Sequence[float], length: float = 1.0, num_points: int = 10
+) -> List[NDArray]:
+    """
+    Create constant curvature paths that end at the given headings.
+
+    Parameters
+    ----------
+    headings : Sequence[float]
+        The heading change along each path in deg, positive to the right.
+        A heading of 0 gives a straight path.
+    length : float
+        The arc length of the paths in m, defaults to 1.0.
+    num_points : int
+        The number of points per path, defaults to 10.
+
+    Returns
+    -------
+    List[NDArray]
+        The paths, each a 2 x num_points array of x and y coordinates.
+    """
+    s = np.linspace(0.0, length, num_points)
+    paths = []
+    for heading in headings:
+        curvature = np.radians(heading) / length
+        if abs(curvature) < 1e-9:
+            x, y = np.zeros_like(s), s
+        else:
+            x = (1.0 - np.cos(curvature * s)) / curvature
+            y = np.sin(curvature * s) / curvature
+        paths.append(np.array([x, y]))
+    return paths
+
+
+def bezier_paths(
+    angles: Sequence[float], length: float = 1.0, num_points: int = 10
+) -> List[NDArray]:
+    """
+    Create quadratic Bezier paths that leave straight ahead and end in the
+    given directions.
+
+    Parameters
+    ----------
+    angles : Sequence[float]
+        The direction of the end point of each path in deg, positive to the
+        right.
+    length : float
+        The distance to the end point in m, defaults to 1.0.
+    num_points : int
+        The number of points per path, defaults to 10.
+
+    Returns
+    -------
+    List[NDArray]
+        The paths, each a 2 x num_points array of x and y coordinates.
+    """
+    t = np.linspace(0.0, 1.0, num_points)
+    paths = []
+    for angle in angles:
+        end = length * np.array([np.sin(np.radians(angle)), np.cos(np.radians(angle))])
+        control = np.array([0.0, length / 2])
+        points = (
+            2 * (1 - t)[:, None] * t[:, None] * control[None, :]
+            + (t**2)[:, None] * end[None, :]
+        )
+        paths.append(points.T)
+    return paths
+
+
+class PathClearanceScorer:
+    """
+    Clearance of a dense set of candidate paths, in one batched computation.
+
+    The paths are polylines, such as those of `arc_paths` or `bezier_paths`.
+    All their segments are stacked, the distances of the points to every
+    segment are computed at once and reduced to the clearance of each path,
+    the distance to its nearest point.
+
+    Parameters
+    ----------
+    paths : List[NDArray]
+        The paths, each a 2 x M array of x and y coordinates.
+    max_clearance : float
+        The clearance of a path with no point nearby, in m.
+    """
+
+    def __init__(self, paths: List[NDArray], max_clearance: float):
+        self.paths = paths
+        self.max_clearance = max_clearance
+
+        starts_x, starts_y, ends_x, ends_y, first_segment = [], [], [], [], []
+        for path in paths:
+            first_segment.append(sum(len(x) for x in starts_x))
+            starts_x.append(path[0][:-1])
+            starts_y.append(path[1][:-1])
+            ends_x.append(path[0][1:])
+            ends_y.append(path[1][1:])
+
+        self._start_x = np.concatenate(starts_x)
+        self._start_y = np.concatenate(starts_y)
+        self._dx = np.concatenate(ends_x) - self._start_x
+        self._dy = np.concatenate(ends_y) - self._start_y
+        length_sq = self._dx**2 + self._dy**2
+        self._inv_length_sq = np.divide(
+            1.0, length_sq, out=np.zeros_like(length_sq), where=length_sq > 0
+        )
+        self._first_segment = np.array(first_segment)
+
+        # direction of the end point of each path, positive to the right
+        self.headings = np.array(
+            [np.degrees(np.arctan2(path[0][-1], path[1][-1])) for path in paths]
+        )
+
+    @property
+    def num_paths(self) -> int:
+        """
+        Get the number of paths.
+        """
+        return len(self.paths)
+
+    def clearance(self, points: NDArray) -> NDArray:
+        """
+        Compute the distance from every path to its nearest point.
+
+        Parameters
+        ----------
+        points : NDArray
+            Points as rows of [x, y, ...].
+
+        Returns
+        -------
+        NDArray
+            The clearance of each path in m, capped at `max_clearance`.
+        """
+        clearance = np.full(self.num_paths, self.max_clearance)
+        if len(points) == 0:
+            return clearance
+
+        rel_x = points[:, 0, None] - self._start_x[None, :]
+        rel_y = points[:, 1, None] - self._start_y[None, :]
+        t = (rel_x * self._dx + rel_y * self._dy) * self._inv_length_sq
+        np.clip(t, 0.0, 1.0, out=t)
+        distances = np.hypot(rel_x - t * self._dx, rel_y - t * self._dy)
+
+        # nearest point of each segment, then nearest segment of each path
+        nearest = np.minimum.reduceat(distances.min(axis=0), self._first_segment)
+        return np.minimum(nearest, clearance)
@@ -1,13 +1,11 @@
-import json
 import logging
 import math
 import multiprocessing as mp
-import os
 import threading
 import time
 from dataclasses import dataclass
-from queue import Empty, Full
-from typing import Dict, List, Optional
+from queue import Empty
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import zenoh
@@ -18,7 +16,12 @@ from runtime.logging import LoggingConfig, get_logging_config, setup_logging
 from zenoh_idl import sensor_msgs
 from zenoh_idl.sensor_msgs import LaserScan
 
+from .laserscan_view import LaserScanView, parse_laserscan
+from .occupancy_grid import OccupancyGrid
 from .rplidar_driver import RPDriver
+from .rplidar_paths import PathClearanceScorer, PathFeasibilityEngine, arc_paths
+from .scan_log import ODOM_FIELDS, ScanLogWriter
+from .scan_ring_buffer import ScanRingBuffer
 from .singleton import singleton
 
 
@@ -43,7 +46,7 @@ class RPLidarConfig:
 
 
 def rplidar_processor(
-    data_queue: mp.Queue,
+    scan_buffer: ScanRingBuffer,
     control_queue: mp.Queue,
     serial_port: str,
     rplidar_config: RPLidarConfig,
@@ -55,8 +58,8 @@ def rplidar_processor(
 
     Parameters
     ----------
-    data_queue : mp.Queue
-        Queue for receiving RPLidar data.
+    scan_buffer : ScanRingBuffer
+        Shared memory ring buffer the scans are written to.
     control_queue : mp.Queue
         Queue for sending control commands.
     serial_port : str
@@ -89,8 +92,7 @@ def rplidar_processor(
             lidar.reset()
             time.sleep(0.5)
 
-            scan = lidar.iter_scans_local(
-                scan_type="express",
+            scan = lidar.iter_express_scan_arrays(
                 max_buf_meas=rplidar_config.max_buf_meas,
                 min_len=rplidar_config.min_len,
                 max_distance_mm=rplidar_config.max_distance_mm,
@@ -105,14 +107,7 @@ def rplidar_processor(
                 except Empty:
                     pass
 
-                try:
-                    data_queue.put_nowait(scan_data)
-                except Full:
-                    try:
-                        data_queue.get_nowait()
-                        data_queue.put_nowait(scan_data)
-                    except Empty:
-                        pass
+                scan_buffer.write(scan_data)
 
         except Exception as e:
             logging.error(f"Error in RPLidar processor: {e}")
@@ -123,6 +118,8 @@ def rplidar_processor(
                     pass
             time.sleep(0.5)
 
+    scan_buffer.close()
+
 
 @singleton
 class RPLidarProvider:
@@ -159,6 +156,25 @@ class RPLidarProvider:
         Configuration for the RPLidar sensor
     log_file: bool = False
         Whether to log data to a local file
+    path_lookup_table: bool = False
+        Whether to check the paths with a precomputed angle x range lookup
+        table instead of computing the point to path distances
+    path_lookup_table_file: Optional[str] = None
+        File the lookup table is cached in, so it is only built once
+    use_occupancy_grid: bool = False
+        Whether to check the paths against an occupancy grid fused over
+        the recent scans and the odometry, instead of the current scan only
+    occupancy_grid_resolution: float = 0.05
+        The cell size of the occupancy grid, in m
+    occupancy_grid_scans: int = 5
+        Number of scans an obstacle stays in the occupancy grid after it
+        was last seen
+    candidate_paths: int = 0
+        Number of curved candidate paths scored in addition to the 10
+        straight paths, to choose the clearest heading at a finer angular
+        resolution. 0 disables them
+    candidate_path_length: float = 1.0
+        The length of the curved candidate paths, in m
     """
 
     # Constants
@@ -186,6 +202,13 @@ class RPLidarProvider:
         simple_paths: bool = False,
         rplidar_config: RPLidarConfig = RPLidarConfig(),
         log_file: bool = False,
+        path_lookup_table: bool = False,
+        path_lookup_table_file: Optional[str] = None,
+        use_occupancy_grid: bool = False,
+        occupancy_grid_resolution: float = 0.05,
+        occupancy_grid_scans: int = 5,
+        candidate_paths: int = 0,
+        candidate_path_length: float = 1.0,
     ):
         """
         Robot and sensor configuration
@@ -214,11 +237,22 @@ class RPLidarProvider:
 
         self._raw_scan: Optional[NDArray] = None
         self._valid_paths: Optional[list] = None
+        self._path_clearance: Dict[int, float] = {}
+        # the valid paths and the points to compute their clearance from,
+        # when it was left to `path_clearance`
+        self._pending_clearance: Optional[Tuple[list, NDArray, NDArray]] = None
+        self._obstacles: Optional[NDArray] = None
+        self._scan_timestamp: float = 0.0
         self._lidar_string: str = None
 
         self.angles = None
         self.angles_final = None
 
+        # [angle, distance] buffer of the Zenoh scans, with the angles filled
+        # in once per scan geometry and the ranges copied in per scan
+        self._scan_buffer: Optional[NDArray] = None
+        self._scan_geometry: Optional[tuple] = None
+
         self.odom_rockchip_ts = 0.0
         self.odom_subscriber_ts = 0.0
         self.odom_x = 0.0
@@ -228,17 +262,12 @@ class RPLidarProvider:
         self.odom = OdomProvider()
         logging.info(f"Mapper Odom Provider: {self.odom}")
 
-        self.write_to_local_file = False
+        # binary scan log, written from a background thread
+        self.scan_logger: Optional[ScanLogWriter] = None
         if log_file:
-            self.write_to_local_file = log_file
-
-        self.filename_current = None
-        self.max_file_size_bytes = 1024 * 1024
-
-        # Create timestamped log filename
-        if self.write_to_local_file:
-            self.filename_current = self.update_filename()
-            logging.info(f"RPSCAN Logging to {self.filename_current}")
+            self.scan_logger = ScanLogWriter(
+                sensor_mounting_angle=self.sensor_mounting_angle
+            )
 
         # Initialize paths for path planning
         # Define 9 straight line paths separated by 15 degrees
@@ -251,12 +280,46 @@ class RPLidarProvider:
             pairs = list(zip(path[0], path[1]))
             self.pp.append(pairs)
 
+        self.path_engine = PathFeasibilityEngine(
+            self.paths,
+            half_width_robot=self.half_width_robot,
+            relevant_distance_min=self.relevant_distance_min,
+            relevant_distance_max=self.relevant_distance_max,
+            sensor_mounting_angle=self.sensor_mounting_angle,
+            angles_blanked=self.angles_blanked,
+        )
+        if path_lookup_table:
+            self.path_engine.use_lookup_table(path_lookup_table_file)
+
+        # dense set of arcs whose end points span the forward paths, from
+        # -60 to +60 deg, scored by clearance
+        self.candidate_scorer: Optional[PathClearanceScorer] = None
+        if candidate_paths > 0:
+            self.candidate_scorer = PathClearanceScorer(
+                arc_paths(
+                    # an arc turning by 2a ends in the direction a
+                    np.linspace(-120.0, 120.0, candidate_paths),
+                    length=candidate_path_length,
+                    num_points=self.NUM_BEZIER_POINTS,
+                ),
+                max_clearance=self.relevant_distance_max,
+            )
+
+        # rolling grid of the recent scans, which covers the relevant range
+        self.occupancy_grid: Optional[OccupancyGrid] = None
+        if use_occupancy_grid:
+            self.occupancy_grid = OccupancyGrid(
+                resolution=occupancy_grid_resolution,
+                size=2 * (self.relevant_distance_max + occupancy_grid_resolution),
+                memory_scans=occupancy_grid_scans,
+            )
+
         self.turn_left: List[int] = []
         self.turn_right: List[int] = []
         self.advance: List[int] = []
         self.retreat: bool = False
 
-        self.data_queue = mp.Queue(maxsize=5)
+        self.scan_buffer: Optional[ScanRingBuffer] = None
         self.control_queue = mp.Queue()
         self._rplidar_processor_thread: Optional[mp.Process] = None
 
@@ -295,36 +358,6 @@ class RPLidarProvider:
             except Exception as e:
                 logging.error(f"Error opening Zenoh client: {e}")
 
-    def update_filename(self):
-        unix_ts = time.time()
-        logging.info(f"RPSCAN time: {unix_ts}")
-        unix_ts = str(unix_ts).replace(".", "_")
-        filename = f"dump/lidar_{unix_ts}Z.jsonl"
-        return filename
-
-    def write_str_to_file(self, json_line: str):
-        """
-        Writes a dictionary to a file in JSON lines format. If the file exceeds max_file_size_bytes,
-        creates a new file with a timestamp.
-
-        Parameters:
-        - data: Dictionary to write
-        """
-
-        if not isinstance(json_line, str):
-            raise ValueError("Provided json_line must be a json string.")
-
-        if (
-            os.path.exists(self.filename_current)
-            and os.path.getsize(self.filename_current) > self.max_file_size_bytes
-        ):
-            self.filename_current = self.update_filename()
-            logging.info(f"New rpscan file name: {self.filename_current}")
-
-        with open(self.filename_current, "a", encoding="utf-8") as f:
-            f.write(json_line + "\n")
-            f.flush()
-
     def listen_scan(self, data: zenoh.Sample):
         """
         Zenoh scan handler.
@@ -334,7 +367,13 @@ class RPLidarProvider:
         data : zenoh.Sample
             The Zenoh sample containing the scan data.
         """
-        self.scans = sensor_msgs.LaserScan.deserialize(data.payload.to_bytes())
+        payload = data.payload.to_bytes()
+        try:
+            # read the ranges in place instead of building a float per range
+            self.scans = parse_laserscan(payload)
+        except ValueError as e:
+            logging.warning(f"Falling back to full LaserScan deserialization: {e}")
+            self.scans = sensor_msgs.LaserScan.deserialize(payload)
         logging.debug(f"Zenoh Laserscan data: {self.scans}")
 
         self._zenoh_processor(self.scans)
@@ -354,10 +393,12 @@ class RPLidarProvider:
             not self._rplidar_processor_thread
             or not self._rplidar_processor_thread.is_alive()
         ):
+            if self.scan_buffer is None:
+                self.scan_buffer = ScanRingBuffer()
             self._rplidar_processor_thread = mp.Process(
                 target=rplidar_processor,
                 args=(
-                    self.data_queue,
+                    self.scan_buffer,
                     self.control_queue,
                     self.serial_port,
                     self.rplidar_config,
@@ -377,13 +418,13 @@ class RPLidarProvider:
             self._serial_processor_thread.start()
             logging.info("RPLidar processing thread started")
 
-    def _zenoh_processor(self, scan: Optional[LaserScan]):
+    def _zenoh_processor(self, scan: Optional[Union[LaserScan, LaserScanView]]):
         """
         Preprocess Zenoh LaserScan data.
 
         Parameters
         ----------
-        scan : Optional[LaserScan]
+        scan : Optional[Union[LaserScan, LaserScanView]]
             The Zenoh LaserScan data to preprocess.
             If None, it indicates no data is available.
         """
@@ -396,21 +437,54 @@ class RPLidarProvider:
             # logging.debug(f"_preprocess_zenoh: {scan}")
             # angle_min=-3.1241390705108643, angle_max=3.1415927410125732
 
-            if not self.angles:
-                self.angles = list(
-                    map(
-                        lambda x: 360.0 * (x + math.pi) / (2 * math.pi),
-                        np.arange(scan.angle_min, scan.angle_max, scan.angle_increment),
-                    )
+            # angles now run from 360.0 to 0 degress
+            buffer = self._zenoh_scan_buffer(scan, len(scan.ranges))
+            np.copyto(buffer[:, 1], scan.ranges[: len(buffer)])
+            self._path_processor(buffer)
+
+    def _zenoh_scan_buffer(
+        self, scan: Union[LaserScan, LaserScanView], num_ranges: int
+    ) -> NDArray:
+        """
+        Get the [angle, distance] buffer for a Zenoh scan.
+
+        The angles only depend on the scan geometry, so they are computed
+        once and reused until the geometry changes.
+
+        Parameters
+        ----------
+        scan : Union[LaserScan, LaserScanView]
+            The Zenoh LaserScan data.
+        num_ranges : int
+            The number of ranges in the scan.
+
+        Returns
+        -------
+        NDArray
+            Array of shape (N, 2) with the angles in deg, running from 360.0
+            to 0, in the first column.
+        """
+        geometry = (scan.angle_min, scan.angle_max, scan.angle_increment, num_ranges)
+        if self._scan_buffer is None or geometry != self._scan_geometry:
+            self.angles = list(
+                360.0
+                * (
+                    np.arange(scan.angle_min, scan.angle_max, scan.angle_increment)
+                    + math.pi
                 )
-                self.angles_final = np.flip(self.angles)
+                / (2 * math.pi)
+            )
+            self.angles_final = np.flip(self.angles)
 
-            # angles now run from 360.0 to 0 degress
-            data = list(zip(self.angles_final, scan.ranges))
-            array_ready = np.array(data)
-            self._path_processor(array_ready)
+            # pair the ranges with the angles like zip, up to the shorter one
+            size = min(len(self.angles_final), num_ranges)
+            self._scan_buffer = np.empty((size, 2), dtype=np.float64)
+            self._scan_buffer[:, 0] = self.angles_final[:size]
+            self._scan_geometry = geometry
+
+        return self._scan_buffer
 
-    def _path_processor(self, data: NDArray):
+    def _path_processor(self, data: NDArray, odom: Optional[Dict[str, float]] = None):
         """
         Process the RPLidar data.
         This method processes the raw data from the RPLidar,
@@ -422,125 +496,40 @@ class RPLidarProvider:
         data : NDArray
             The raw data from the RPLidar, expected to be a 2D array
             with angles and distances.
+        odom : Dict[str, float], optional
+            The odom state of the scan, defaults to the current odometry.
         """
-        complexes = []
-        raw = []
-
-        for angle, distance in data:
-
-            d_m = distance
-
-            # first, correctly orient the sensor zero to the robot zero
-            angle = angle + self.sensor_mounting_angle
-            if angle >= 360.0:
-                angle = angle - 360.0
-            elif angle < 0.0:
-                angle = 360.0 + angle
-
-            raw.append([round(angle, 2), d_m])
-
-            # don't worry about distant objects
-            if d_m > self.relevant_distance_max:
-                continue
-
-            # don't worry about too close objects
-            if d_m < self.relevant_distance_min:
-                continue
-
-            # convert the angle from [0 to 360] to [-180 to +180] range
-            angle = angle - 180.0
-
-            for b in self.angles_blanked:
-                if angle >= b[0] and angle <= b[1]:
-                    # this is a permanent robot reflection
-                    # disregard
-                    continue
-
-            # Convert angle to radians for trigonometric calculations
-            # Note: angle is adjusted back to [0, 360] range
-            a_rad = (angle + 180.0) * self.DEGREES_TO_RADIANS
-
-            v1 = d_m * math.cos(a_rad)
-            v2 = d_m * math.sin(a_rad)
-
-            # convert to x and y
-            # x runs backwards to forwards, y runs left to right
-            x = -1 * v2
-            y = -1 * v1
-
-            # the final data ready to use for path planning
-            complexes.append([x, y, angle, d_m])
-
-        array = np.array(complexes)
-        raw_array = np.array(raw)
-
-        # save_timestamp = time.time()
-        if self.write_to_local_file:
-            try:
-                json_line = json.dumps(
-                    {
-                        "odom_rockchip_ts": self.odom_rockchip_ts,
-                        "odom_subscriber_ts": self.odom_subscriber_ts,
-                        "odom_x": self.odom_x,
-                        "odom_y": self.odom_y,
-                        "odom_yaw_m180_p180": self.odom_yaw_m180_p180,
-                        "odom_yaw_0_360": self.odom_yaw_0_360,
-                        "frame": raw_array.tolist(),
-                    }
-                )
-                self.write_str_to_file(json_line)
-                logging.debug(f"rplidar wrote to: {self.filename_current}")
-            except Exception as e:
-                logging.error(f"Error saving rplidar to file: {str(e)}")
-
-        # sort data into strictly increasing angles to deal with sensor issues
-        # the sensor sometimes reports part of the previous scan and part of the next scan
-        # so you end up with multiple slightly different values for some angles at the
-        # junction
-
-        """
-        Determine set of possible paths
-        """
+        # determine set of possible paths
         possible_paths = np.array([0, 1, 2, 3, 4, 5, 6, 7, 8, 9])
         if self.simple_paths:
             # for the turtlebot - it can always turn in place,
             # only question is whether it can advance
             possible_paths = np.array([4])
 
-        if array.ndim > 1:
-            # we have valid LIDAR returns
-
-            sorted_indices = array[:, 2].argsort()
-            array = array[sorted_indices]
-
-            # logging.debug(f"_process array: {array}")
-
-            X = array[:, 0]
-            Y = array[:, 1]
-            # A = array[:, 2]
-            D = array[:, 3]
-
-            # all the possible conflicting points
-            for x, y, d in list(zip(X, Y, D)):
-                for apath in possible_paths:
-                    path_points = self.paths[apath]
-                    start_x, start_y = (
-                        path_points[0][0],
-                        path_points[1][0],
-                    )
-                    end_x, end_y = path_points[0][-1], path_points[1][-1]
-
-                    dist_to_line = self.distance_point_to_line_segment(
-                        x, y, start_x, start_y, end_x, end_y
-                    )
+        # orient, filter and convert the scan, then drop every path that
+        # has an obstacle within the robot's half width, all as array ops
+        result = self.path_engine.process(data, possible_paths)
+        array = result.points
+        possible_paths = result.possible_paths
+
+        clearance = result.clearance
+        obstacles = array
+
+        if self.occupancy_grid is not None:
+            # the grid includes the current scan, so it replaces it as the
+            # set of obstacles
+            obstacles = self._fuse_occupancy_grid(array, odom)
+            blocked = self.path_engine.blocked_paths(obstacles)
+            possible_paths = possible_paths[~blocked[possible_paths]]
+            if result.clearance is not None:
+                clearance = np.zeros_like(result.clearance)
+                clearance[possible_paths] = np.minimum(
+                    result.clearance[possible_paths],
+                    self.path_engine.clearance(obstacles, possible_paths),
+                )
 
-                    if dist_to_line < self.half_width_robot:
-                        # too close - this path will not work
-                        # logging.info(f"removing path: {apath}")
-                        path_to_remove = np.array([apath])
-                        possible_paths = np.setdiff1d(possible_paths, path_to_remove)
-                        logging.debug(f"remaining paths: {possible_paths}")
-                        break  # no need to check other paths
+        if self.scan_logger is not None:
+            self.scan_logger.log(data, self._odom_state())
 
         logging.debug(f"possible_paths RP Lidar: {possible_paths}")
 
@@ -567,11 +556,74 @@ class RPLidarProvider:
         self._raw_scan = array
         self._lidar_string = return_string
         self._valid_paths = ppl
+        if clearance is not None:
+            self._path_clearance = {p: float(clearance[p]) for p in ppl}
+            self._pending_clearance = None
+        else:
+            # with the lookup table, computed on demand to keep the scan fast
+            self._pending_clearance = (ppl, array, obstacles)
+        self._obstacles = obstacles
+        self._scan_timestamp = time.time()
 
         logging.debug(
             f"RPLidar Provider string: {self._lidar_string}\nValid paths: {self._valid_paths}"
         )
 
+    def _odom_state(self) -> Dict[str, float]:
+        """
+        Get the odom state stored with the logged scans.
+        """
+        return {field: getattr(self, field) for field in ODOM_FIELDS}
+
+    def replay_scan(self, data: NDArray, odom: Optional[Dict[str, float]] = None):
+        """
+        Process a recorded scan as if it came from the sensor.
+
+        Parameters
+        ----------
+        data : NDArray
+            The scan as rows of [angle, distance], in deg and m, as logged
+            by `ScanLogWriter`.
+        odom : Dict[str, float], optional
+            The odom state the scan was logged with.
+        """
+        if odom:
+            for field in ODOM_FIELDS:
+                if field in odom:
+                    setattr(self, field, odom[field])
+        self._path_processor(np.asarray(data, dtype=np.float64), odom)
+
+    def _fuse_occupancy_grid(
+        self, points: NDArray, odom: Optional[Dict[str, float]] = None
+    ) -> NDArray:
+        """
+        Fuse a scan into the occupancy grid and get its occupied cells.
+
+        Parameters
+        ----------
+        points : NDArray
+            The relevant points of the scan, as rows of [x, y, angle, distance].
+        odom : Dict[str, float], optional
+            The odom state of the scan, defaults to the current odometry.
+
+        Returns
+        -------
+        NDArray
+            The relevant occupied cells, as rows of [x, y, angle, distance].
+        """
+        pose = None
+        try:
+            o = odom if odom is not None else self.odom.position
+            if o and o["odom_subscriber_ts"]:
+                pose = (o["odom_x"], o["odom_y"], o["odom_yaw_m180_p180"])
+        except Exception as e:
+            logging.error(f"Error reading Odom for the occupancy grid: {e}")
+
+        self.occupancy_grid.update(points, pose)
+
+        occupied = self.occupancy_grid.occupied_points()
+        return self.path_engine.points_from_xy(occupied[:, 0], occupied[:, 1])
+
     def _serial_processor(self):
         """
         Serial data processing worker.
@@ -580,24 +632,19 @@ class RPLidarProvider:
         """
         while self.running:
             try:
-                scan = self.data_queue.get_nowait()
-                scan_array = np.array(scan)
+                scan = self.scan_buffer.read_latest(timeout=0.5)
+                if scan is None:
+                    continue
+                scan_array = np.asarray(scan, dtype=np.float64)
                 logging.debug(f"_serial_processor: {scan_array.ndim}")
 
                 # the driver sends angles in degrees between from 0 to 360
                 # warning - the driver may send two or more readings per angle,
                 # this can be confusing for the code
-                angles = scan_array[:, 0]
-
-                logging.debug(f"_serial_processor: {angles}")
-
                 # distances are in millimeters
-                distances_m = scan_array[:, 1] / 1000
-
-                data = list(zip(angles, distances_m))
-
-                logging.debug(f"_serial_processor: {data}")
-                array_ready = np.array(data)
+                array_ready = np.column_stack(
+                    (scan_array[:, 0], scan_array[:, 1] / 1000)
+                )
                 self._path_processor(array_ready)
 
                 try:
@@ -613,9 +660,8 @@ class RPLidarProvider:
                 except Exception as e:
                     logging.error(f"Error parsing Odom: {e}")
 
-            except Empty:
-                time.sleep(0.1)
-                continue
+            except Exception as e:
+                logging.error(f"Error processing RPLidar scan: {e}")
 
     def stop(self):
         """
@@ -634,6 +680,13 @@ class RPLidarProvider:
             logging.info("Stopping RPLidar serial processor thread")
             self._serial_processor_thread.join(timeout=5)
 
+        if self.scan_buffer:
+            self.scan_buffer.close()
+            self.scan_buffer = None
+
+        if self.scan_logger:
+            self.scan_logger.close()
+
     @property
     def valid_paths(self) -> Optional[list]:
         """
@@ -648,6 +701,131 @@ class RPLidarProvider:
         """
         return self._valid_paths
 
+    @property
+    def path_clearance(self) -> Dict[int, float]:
+        """
+        Get the clearance of the currently valid paths.
+
+        Returns
+        -------
+        Dict[int, float]
+            The distance in m from each valid path to the nearest obstacle,
+            capped at the relevant distance max. With the lookup table, it
+            is computed on the first call after each scan.
+        """
+        pending = self._pending_clearance
+        if pending is None:
+            return self._path_clearance
+
+        paths, points, obstacles = pending
+        clearance = self.path_engine.clearance(points, paths)
+        if obstacles is not points:
+            clearance = np.minimum(
+                clearance, self.path_engine.clearance(obstacles, paths)
+            )
+        path_clearance = {p: float(c) for p, c in zip(paths, clearance)}
+        # unless a newer scan has been processed meanwhile
+        if self._pending_clearance is pending:
+            self._path_clearance = path_clearance
+            self._pending_clearance = None
+        return path_clearance
+
+    @property
+    def obstacles(self) -> Optional[NDArray]:
+        """
+        Get the obstacles the current valid paths were checked against.
+
+        Returns
+        -------
+        Optional[NDArray]
+            The relevant points of the last scan, or the occupied cells of
+            the occupancy grid, as rows of [x, y, angle, distance], or None
+            if no scan was processed yet.
+        """
+        return self._obstacles
+
+    @property
+    def scan_timestamp(self) -> float:
+        """
+        Get the time the last scan was processed.
+
+        Returns
+        -------
+        float
+            The unix time of the last scan, or 0.0 if no scan was processed
+            yet.
+        """
+        return self._scan_timestamp
+
+    def best_path(self, paths: List[int]) -> Optional[int]:
+        """
+        Choose the path with the most clearance.
+
+        Parameters
+        ----------
+        paths : List[int]
+            The paths to choose from, such as `turn_left`.
+
+        Returns
+        -------
+        Optional[int]
+            The path with the most clearance, preferring the path closest to
+            straight ahead among equally clear paths, or None if `paths` is
+            empty.
+        """
+        if not paths:
+            return None
+        clearance = self.path_clearance
+        return max(
+            paths,
+            key=lambda p: (clearance.get(p, 0.0), -abs(self.path_angles[p])),
+        )
+
+    def best_heading(self, paths: List[int]) -> Optional[float]:
+        """
+        Choose the clearest heading within a group of valid paths.
+
+        With curved candidate paths enabled, the heading is chosen among the
+        candidates that are clear of obstacles and end within the sector
+        covered by `paths`. Otherwise it is the angle of `best_path`.
+
+        Parameters
+        ----------
+        paths : List[int]
+            The valid paths spanning the headings to choose from, such as
+            `turn_left`.
+
+        Returns
+        -------
+        Optional[float]
+            The heading in degrees, positive to the right, or None if
+            `paths` is empty.
+        """
+        best = self.best_path(paths)
+        if best is None:
+            return None
+
+        if self.candidate_scorer is None or self._obstacles is None:
+            return float(self.path_angles[best])
+
+        # scored on demand, as headings are only chosen for new commands
+        clearance = self.candidate_scorer.clearance(self._obstacles)
+
+        # up to half the 15 deg spacing of the straight paths beyond them
+        angles = [self.path_angles[p] for p in paths]
+        headings = self.candidate_scorer.headings
+        eligible = (
+            (headings >= min(angles) - 7.5)
+            & (headings <= max(angles) + 7.5)
+            & (clearance >= self.half_width_robot)
+        )
+        if not eligible.any():
+            return float(self.path_angles[best])
+
+        # most clearance first, then closest to straight ahead
+        order = np.lexsort((np.abs(headings), -clearance))
+        return float(headings[order[eligible[order]][0]])
+
     @property
     def raw_scan(self) -> Optional[NDArray]:
         """
@@ -0,0 +1,355 @@
+import logging
+import mmap
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+MAGIC = b"RPSCAN01"
+VERSION = 1
+
+FILE_HEADER_SIZE = 64
+FILE_HEADER_DTYPE = np.dtype(
+    {
+        "names": [
+            "magic",
+            "version",
+            "max_points",
+            "capacity",
+            "count",
+            "sensor_mounting_angle",
+        ],
+        "formats": ["S8", "<u4", "<u4", "<u8", "<u8", "<f8"],
+        "offsets": [0, 8, 12, 16, 24, 32],
+        "itemsize": FILE_HEADER_SIZE,
+    }
+)
+
+# odom fields stored with every scan, as in OdomProvider.position
+ODOM_FIELDS = (
+    "odom_rockchip_ts",
+    "odom_subscriber_ts",
+    "odom_x",
+    "odom_y",
+    "odom_yaw_m180_p180",
+    "odom_yaw_0_360",
+)
+
+
+def record_dtype(max_points: int) -> np.dtype:
+    """
+    Get the dtype of a scan record.
+
+    Parameters
+    ----------
+    max_points : int
+        The number of [angle, distance] rows per record.
+
+    Returns
+    -------
+    np.dtype
+        A fixed size record of the scan time, the odom header, the number
+        of points and the float32 scan.
+    """
+    return np.dtype(
+        [("timestamp", "<f8")]
+        + [(field, "<f8") for field in ODOM_FIELDS]
+        + [("num_points", "<u4"), ("reserved", "<u4")]
+        + [("scan", "<f4", (max_points, 2))]
+    )
+
+
+class ScanLogWriter:
+    """
+    Append-only binary log of lidar scans, written from a background thread.
+
+    Scans are stored as fixed size float32 records with the odom state of
+    the robot, in a preallocated memory-mapped file. The number of records
+    in the file header acts as the index: record i starts at a fixed
+    offset, and it only counts as written once the count covers it. When a
+    file is full, a new one is started. On close, the file is truncated
+    to the records written.
+
+    `log` only copies the scan into a queue, so the caller is not slowed
+    down by disk writes. If the writer falls behind, new scans are dropped.
+
+    Parameters
+    ----------
+    directory : str
+        The directory the log files are written to, defaults to "dump".
+    max_points : int
+        Maximum number of points per scan, defaults to 2048. Longer scans
+        are truncated.
+    records_per_file : int
+        Number of scans per file, defaults to 3000, or 5 minutes at 10 Hz.
+    sensor_mounting_angle : float
+        The mounting angle of the sensor, stored in the file header.
+    queue_size : int
+        Maximum number of scans waiting to be written, defaults to 100.
+    """
+
+    def __init__(
+        self,
+        directory: str = "dump",
+        max_points: int = 2048,
+        records_per_file: int = 3000,
+        sensor_mounting_angle: float = 0.0,
+        queue_size: int = 100,
+    ):
+        self.directory = directory
+        self.max_points = max_points
+        self.records_per_file = records_per_file
+        self.sensor_mounting_angle = sensor_mounting_angle
+        self.dtype = record_dtype(max_points)
+
+        self.filename: Optional[str] = None
+        self.dropped = 0
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._header: Optional[NDArray] = None
+        self._records: Optional[NDArray] = None
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log(self, scan: NDArray, odom: Optional[Dict[str, float]] = None) -> bool:
+        """
+        Queue a scan to be written.
+
+        Parameters
+        ----------
+        scan : NDArray
+            The scan, one row of [angle, distance] per point.
+        odom : Dict[str, float], optional
+            The odom state, with the keys of `ODOM_FIELDS`.
+
+        Returns
+        -------
+        bool
+            True if the scan was queued, False if it was dropped.
+        """
+        scan = np.asarray(scan, dtype=np.float32)
+        if len(scan) > self.max_points:
+            logging.warning(
+                f"Scan of {len(scan)} points truncated to {self.max_points} points"
+            )
+            scan = scan[: self.max_points]
+
+        header = tuple(float((odom or {}).get(field, 0.0)) for field in ODOM_FIELDS)
+        try:
+            self._queue.put_nowait((time.time(), header, scan))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _run(self) -> None:
+        """
+        Write the queued scans until the writer is closed.
+        """
+        while self._running or not self._queue.empty():
+            try:
+                item = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._write(*item)
+            except Exception as e:
+                logging.error(f"Error writing lidar scan log: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _open(self) -> None:
+        """
+        Create and map a new log file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        unix_ts = str(time.time()).replace(".", "_")
+        self.filename = os.path.join(self.directory, f"lidar_{unix_ts}Z.rpscan")
+        suffix = 0
+        while os.path.exists(self.filename):
+            # rolled over within the resolution of the clock
+            suffix += 1
+            self.filename = os.path.join(
+                self.directory, f"lidar_{unix_ts}_{suffix}Z.rpscan"
+            )
+        logging.info(f"RPSCAN Logging to {self.filename}")
+
+        size = FILE_HEADER_SIZE + self.records_per_file * self.dtype.itemsize
+        self._file = open(self.filename, "w+b")
+        self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+
+        self._header = np.ndarray((), FILE_HEADER_DTYPE, self._mmap, 0)
+        self._header["magic"] = MAGIC
+        self._header["version"] = VERSION
+        self._header["max_points"] = self.max_points
+        self._header["capacity"] = self.records_per_file
+        self._header["count"] = 0
+        self._header["sensor_mounting_angle"] = self.sensor_mounting_angle
+        self._records = np.ndarray(
+            (self.records_per_file,), self.dtype, self._mmap, FILE_HEADER_SIZE
+        )
+
+    def _close_file(self) -> None:
+        """
+        Unmap the current log file and truncate it to the records written.
+        """
+        if self._mmap is None:
+            return
+        count = int(self._header["count"])
+        self._header = self._records = None
+        self._mmap.flush()
+        self._mmap.close()
+        self._file.truncate(FILE_HEADER_SIZE + count * self.dtype.itemsize)
+        self._file.close()
+        self._mmap = self._file = None
+
+    def _write(
+        self, timestamp: float, header: Tuple[float, ...], scan: NDArray
+    ) -> None:
+        """
+        Write one record, starting a new file if the current one is full.
+        """
+        if self._mmap is None or self._header["count"] >= self.records_per_file:
+            self._close_file()
+            self._open()
+
+        index = int(self._header["count"])
+        record = self._records[index]
+        record["timestamp"] = timestamp
+        for field, value in zip(ODOM_FIELDS, header):
+            record[field] = value
+        record["num_points"] = len(scan)
+        record["scan"][: len(scan)] = scan
+
+        # publish the record only once it is complete
+        self._header["count"] = index + 1
+
+    def flush(self) -> None:
+        """
+        Wait until the queued scans are written.
+        """
+        self._queue.join()
+
+    def close(self) -> None:
+        """
+        Write the queued scans and close the log file.
+        """
+        self._running = False
+        self._thread.join(timeout=5)
+        self._close_file()
+
+
+class ScanLogReader:
+    """
+    Reader of the binary lidar scan logs of `ScanLogWriter`.
+
+    The file is memory-mapped, so opening a long log is cheap and records
+    are only read when accessed.
+
+    Parameters
+    ----------
+    path : str
+        The .rpscan file to read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = np.ndarray((), FILE_HEADER_DTYPE, self._mmap, 0)
+        if header["magic"] != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a lidar scan log")
+
+        self.max_points = int(header["max_points"])
+        self.sensor_mounting_angle = float(header["sensor_mounting_angle"])
+        self.dtype = record_dtype(self.max_points)
+
+        # a file that was not closed cleanly is still preallocated
+        available = (len(self._mmap) - FILE_HEADER_SIZE) // self.dtype.itemsize
+        count = min(int(header["count"]), available)
+        self._records = np.ndarray((count,), self.dtype, self._mmap, FILE_HEADER_SIZE)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def timestamps(self) -> NDArray:
+        """
+        Get the time at which each scan was logged.
+        """
+        return self._records["timestamp"].copy()
+
+    def __getitem__(self, index: int) -> Tuple[NDArray, Dict[str, float]]:
+        """
+        Read one scan.
+
+        Parameters
+        ----------
+        index : int
+            The index of the scan.
+
+        Returns
+        -------
+        Tuple[NDArray, Dict[str, float]]
+            The scan as [angle, distance] rows, and the odom state and
+            timestamp it was logged with.
+        """
+        record = self._records[index]
+        scan = np.array(record["scan"][: record["num_points"]])
+        odom = {field: float(record[field]) for field in ODOM_FIELDS}
+        odom["timestamp"] = float(record["timestamp"])
+        return scan, odom
+
+    def __iter__(self) -> Iterator[Tuple[NDArray, Dict[str, float]]]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def replay(
+        self,
+        callback: Callable[[NDArray, Dict[str, float]], None],
+        realtime: bool = False,
+    ) -> int:
+        """
+        Feed the logged scans to a callback, such as
+        `RPLidarProvider.replay_scan`.
+
+        Parameters
+        ----------
+        callback : Callable[[NDArray, Dict[str, float]], None]
+            Called with every scan and its odom state.
+        realtime : bool
+            Whether to wait between scans as long as when they were logged,
+            defaults to False.
+
+        Returns
+        -------
+        int
+            The number of scans replayed.
+        """
+        start = time.time()
+        first = None
+        for scan, odom in self:
+            if realtime:
+                first = odom["timestamp"] if first is None else first
+                delay = odom["timestamp"] - first - (time.time() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            callback(scan, odom)
+        return len(self)
+
+    def close(self) -> None:
+        """
+        Unmap the file.
+        """
+        self._records = None
+        self._mmap.close()
@@ -0,0 +1,334 @@
+import json
+import logging
+import math
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+from .laserscan_view import LaserScanView
+from .scan_log import ODOM_FIELDS, ScanLogReader
+
+# a recorded scan, as [angle, distance] rows in deg and m in the sensor
+# frame, with the odom state it was recorded with, if any
+RecordedScan = Tuple[NDArray, Optional[Dict[str, float]]]
+
+
+def load_scans(path: str, sensor_mounting_angle: float = 180.0) -> List[RecordedScan]:
+    """
+    Load recorded lidar scans for replay.
+
+    Parameters
+    ----------
+    path : str
+        A binary scan log (.rpscan), a JSON lines dump of the previous
+        RPLidarProvider file logger (.jsonl), or an integration test scan
+        with a "scan_data" list of [angle, distance in mm] (.json).
+    sensor_mounting_angle : float
+        The mounting angle the JSON lines dump was recorded with. Those
+        dumps store the angles relative to the robot zero, so it is
+        subtracted to recover the sensor angles. Defaults to 180.0.
+
+    Returns
+    -------
+    List[RecordedScan]
+        The scans in recorded order.
+
+    Raises
+    ------
+    ValueError
+        If the file format is not supported.
+    """
+    if path.endswith(".rpscan"):
+        reader = ScanLogReader(path)
+        try:
+            return list(reader)
+        finally:
+            reader.close()
+
+    if path.endswith(".jsonl"):
+        scans = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                frame = np.array(record["frame"], dtype=np.float64).reshape(-1, 2)
+                frame[:, 0] = (frame[:, 0] - sensor_mounting_angle) % 360.0
+                odom = {
+                    field: record[field] for field in ODOM_FIELDS if field in record
+                }
+                scans.append((frame, odom or None))
+        return scans
+
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        scan = np.array(data["scan_data"], dtype=np.float64).reshape(-1, 2)
+        scan[:, 1] /= 1000.0
+        return [(scan, None)]
+
+    raise ValueError(f"Unsupported lidar recording: {path}")
+
+
+def laserscan_from_scan(
+    scan: NDArray, num_ranges: int = 720, range_max: float = 12.0
+) -> LaserScanView:
+    """
+    Resample a recorded scan into a Zenoh LaserScan, to replay it through
+    `RPLidarProvider._zenoh_processor`.
+
+    The ranges are ordered the way the provider maps them back to sensor
+    angles. Each range is the nearest return in its angular bin, and bins
+    without a return are set to infinity.
+
+    Parameters
+    ----------
+    scan : NDArray
+        The scan as [angle, distance] rows, in deg and m.
+    num_ranges : int
+        Number of ranges over the full turn, defaults to 720.
+    range_max : float
+        The maximum range of the scan, defaults to 12.0.
+
+    Returns
+    -------
+    LaserScanView
+        The scan as a LaserScan covering -pi to pi.
+    """
+    angle_increment = 2 * math.pi / num_ranges
+    scan = np.asarray(scan, dtype=np.float64)
+
+    # the provider assigns the angle 360 * (a + pi) / (2 * pi) of the bin
+    # a = angle_min + j * angle_increment to range num_ranges - 1 - j
+    bins = np.rint(np.mod(scan[:, 0], 360.0) / 360.0 * num_ranges).astype(np.int64)
+    bins = num_ranges - 1 - (bins % num_ranges)
+    ranges = np.full(num_ranges, np.inf, dtype=np.float32)
+    np.minimum.at(ranges, bins, scan[:, 1].astype(np.float32))
+
+    return LaserScanView(
+        stamp_sec=0,
+        stamp_nanosec=0,
+        frame_id="laser",
+        angle_min=-math.pi,
+        angle_max=math.pi - angle_increment / 2,
+        angle_increment=angle_increment,
+        range_min=0.0,
+        range_max=range_max,
+        ranges=ranges,
+    )
+
+
+@dataclass
+class ReplayStats:
+    """
+    Timing of a scan replay.
+
+    Parameters
+    ----------
+    latencies : NDArray
+        The processing time of each scan that was processed without an
+        error, in s.
+    elapsed : float
+        The wall time of the replay, in s, including any real-time pacing.
+    allocated_bytes : Optional[NDArray]
+        The peak memory allocated while processing each scan without an
+        error, in bytes, if allocations were traced.
+    failures : int
+        The number of scans whose processing raised an error, defaults to 0.
+    """
+
+    latencies: NDArray
+    elapsed: float
+    allocated_bytes: Optional[NDArray] = None
+    failures: int = 0
+
+    @property
+    def num_scans(self) -> int:
+        """
+        Get the number of scans replayed without an error.
+        """
+        return len(self.latencies)
+
+    @property
+    def scans_per_second(self) -> float:
+        """
+        Get the processing throughput, excluding any real-time pacing.
+        """
+        busy = float(self.latencies.sum())
+        return self.num_scans / busy if busy > 0 else 0.0
+
+    def percentile(self, q: float) -> float:
+        """
+        Get a percentile of the per scan latency, in s.
+
+        Parameters
+        ----------
+        q : float
+            The percentile, between 0 and 100.
+        """
+        return float(np.percentile(self.latencies, q)) if self.num_scans else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get the throughput, the latency distribution in ms and the mean
+        allocations per scan in bytes.
+        """
+        summary = {
+            "scans": self.num_scans,
+            "failures": self.failures,
+            "scans_per_second": self.scans_per_second,
+            "mean_ms": 1000 * float(self.latencies.mean()) if self.num_scans else 0.0,
+            "p50_ms": 1000 * self.percentile(50),
+            "p90_ms": 1000 * self.percentile(90),
+            "p99_ms": 1000 * self.percentile(99),
+            "max_ms": 1000 * float(self.latencies.max()) if self.num_scans else 0.0,
+        }
+        if self.allocated_bytes is not None and len(self.allocated_bytes):
+            summary["allocated_bytes"] = float(self.allocated_bytes.mean())
+        return summary
+
+
+class ScanReplayDriver:
+    """
+    Replays recorded scans through an RPLidarProvider, without hardware.
+
+    The scans are processed synchronously in recorded order on the calling
+    thread, so the provider state after a replay only depends on the
+    recording and the provider configuration.
+
+    Parameters
+    ----------
+    provider : RPLidarProvider
+        The provider to feed. It does not need to be started.
+    scans : List[RecordedScan]
+        The scans to replay, for example from `load_scans`.
+    zenoh : bool
+        Whether to resample the scans into LaserScans and feed them to
+        `_zenoh_processor`, instead of feeding them to `_path_processor`.
+        Defaults to False.
+    num_ranges : int
+        The number of ranges of the resampled LaserScans, defaults to 720.
+    """
+
+    def __init__(
+        self,
+        provider,
+        scans: List[RecordedScan],
+        zenoh: bool = False,
+        num_ranges: int = 720,
+    ):
+        self.provider = provider
+        self.scans = scans
+        self.zenoh = zenoh
+        # resample up front, so the timing only covers the provider
+        self._laserscans = (
+            [laserscan_from_scan(scan, num_ranges) for scan, _ in scans]
+            if zenoh
+            else None
+        )
+
+    def _process(self, index: int) -> None:
+        """
+        Feed one scan to the provider.
+        """
+        scan, odom = self.scans[index]
+        if self._laserscans is not None:
+            if odom:
+                for field in ODOM_FIELDS:
+                    if field in odom:
+                        setattr(self.provider, field, odom[field])
+            self.provider._zenoh_processor(self._laserscans[index])
+        else:
+            self.provider.replay_scan(scan, odom)
+
+    def run(
+        self,
+        realtime: bool = False,
+        rate_hz: float = 10.0,
+        repeat: int = 1,
+        trace_allocations: bool = False,
+    ) -> ReplayStats:
+        """
+        Replay the scans.
+
+        Parameters
+        ----------
+        realtime : bool
+            Whether to pace the scans as they were recorded, or at
+            `rate_hz` if the recording has no timestamps. Defaults to
+            False, which replays at maximum speed.
+        rate_hz : float
+            The scan rate when pacing a recording without timestamps,
+            defaults to 10.0.
+        repeat : int
+            Number of times to replay the scans, defaults to 1.
+        trace_allocations : bool
+            Whether to record the peak memory allocated per scan with
+            tracemalloc. This slows down processing, so the latencies of
+            such a run are not representative. Defaults to False.
+
+        Returns
+        -------
+        ReplayStats
+            The timing of the replay. Scans whose processing raised an error
+            are counted as failures and left out of the timing.
+        """
+        order = list(range(len(self.scans))) * repeat
+        latencies = np.zeros(len(order))
+        failed = np.zeros(len(order), dtype=bool)
+        allocated = np.zeros(len(order)) if trace_allocations else None
+        schedule = self._schedule(rate_hz) if realtime else None
+
+        if trace_allocations:
+            tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            for i, index in enumerate(order):
+                if schedule is not None:
+                    turn, offset = divmod(i, len(self.scans))
+                    due = start + turn * schedule[-1] + schedule[offset]
+                    delay = due - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+
+                if trace_allocations:
+                    tracemalloc.reset_peak()
+                    baseline = tracemalloc.get_traced_memory()[0]
+
+                scan_start = time.perf_counter()
+                try:
+                    self._process(index)
+                except Exception as e:
+                    logging.error(f"Error replaying scan {index}: {e}")
+                    failed[i] = True
+                latencies[i] = time.perf_counter() - scan_start
+
+                if trace_allocations:
+                    allocated[i] = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            if trace_allocations:
+                tracemalloc.stop()
+
+        return ReplayStats(
+            latencies=latencies[~failed],
+            elapsed=time.perf_counter() - start,
+            allocated_bytes=allocated[~failed] if allocated is not None else None,
+            failures=int(failed.sum()),
+        )
+
+    def _schedule(self, rate_hz: float) -> NDArray:
+        """
+        Get the replay time of each scan relative to the first one, plus the
+        duration of one pass of the recording as the last entry.
+        """
+        period = 1.0 / rate_hz
+        timestamps = [odom.get("timestamp") if odom else None for _, odom in self.scans]
+        if len(timestamps) > 1 and all(t is not None for t in timestamps):
+            offsets = np.array(timestamps, dtype=np.float64) - timestamps[0]
+        else:
+            offsets = np.arange(len(self.scans), dtype=np.float64) * period
+        return np.append(offsets, offsets[-1] + period if len(offsets) else 0.0)
@@ -0,0 +1,206 @@
+import logging
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from multiprocessing.context import BaseContext
+from typing import Optional, Tuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+# header layout, in int64 words
+_HEADER_WORDS = 1
+_WRITE_SEQ = 0
+
+
+class ScanRingBuffer:
+    """
+    Single producer ring buffer of lidar scans in shared memory.
+
+    Scans are written into fixed size float32 slots of [angle, distance]
+    rows, so they cross the process boundary without pickling. Every write
+    increments a sequence counter and sets an event, so the reader wakes up
+    as soon as a scan is available. The reader always takes the latest
+    scan; older scans it did not get to are overwritten, like the bounded
+    queue this replaces.
+
+    Each slot also stores the sequence number of the scan in it, which is
+    cleared before and set after the slot is written. The reader checks it
+    after copying a slot, so a scan overwritten during the copy is detected
+    and skipped instead of returned torn.
+
+    The buffer is created by the parent process and attached to in the
+    child process it is passed to, which unpickles it by the shared memory
+    name.
+
+    Parameters
+    ----------
+    num_slots : int
+        Number of scans kept, defaults to 4.
+    max_points : int
+        Maximum number of measurements per scan, defaults to 4096. Longer
+        scans are truncated.
+    context : BaseContext, optional
+        The multiprocessing context of the processes sharing the buffer,
+        defaults to the current start method.
+    """
+
+    def __init__(
+        self,
+        num_slots: int = 4,
+        max_points: int = 4096,
+        context: Optional[BaseContext] = None,
+    ):
+        self.num_slots = num_slots
+        self.max_points = max_points
+        self.event = (context or mp).Event()
+        self._shm = shared_memory.SharedMemory(create=True, size=self._size())
+        self._owner = True
+        self._last_seq = 0
+        self._map()
+        self._header[:] = 0
+        self._slot_seq[:] = 0
+        self._lengths[:] = 0
+
+    def _size(self) -> int:
+        """
+        Get the size of the shared memory block in bytes.
+        """
+        return (
+            8 * (_HEADER_WORDS + self.num_slots)
+            + 4 * self.num_slots
+            + 4 * self.num_slots * self.max_points * 2
+        )
+
+    def _map(self) -> None:
+        """
+        Create the NumPy views over the shared memory block.
+        """
+        buf = self._shm.buf
+        offset = 0
+        self._header = np.ndarray((_HEADER_WORDS,), np.int64, buf, offset)
+        offset += 8 * _HEADER_WORDS
+        self._slot_seq = np.ndarray((self.num_slots,), np.int64, buf, offset)
+        offset += 8 * self.num_slots
+        self._lengths = np.ndarray((self.num_slots,), np.int32, buf, offset)
+        offset += 4 * self.num_slots
+        self._slots = np.ndarray(
+            (self.num_slots, self.max_points, 2), np.float32, buf, offset
+        )
+
+    def __getstate__(self):
+        return {
+            "name": self._shm.name,
+            "num_slots": self.num_slots,
+            "max_points": self.max_points,
+            "event": self.event,
+        }
+
+    def __setstate__(self, state):
+        self.num_slots = state["num_slots"]
+        self.max_points = state["max_points"]
+        self.event = state["event"]
+        self._shm = shared_memory.SharedMemory(name=state["name"])
+        self._owner = False
+        self._last_seq = 0
+        self._map()
+
+    @property
+    def sequence(self) -> int:
+        """
+        Get the sequence number of the latest scan, 0 if none was written.
+        """
+        return int(self._header[_WRITE_SEQ])
+
+    def write(self, scan: NDArray) -> int:
+        """
+        Write a scan and wake up the reader.
+
+        Parameters
+        ----------
+        scan : NDArray
+            The scan, one row of [angle, distance] per measurement.
+
+        Returns
+        -------
+        int
+            The sequence number of the scan.
+        """
+        scan = np.asarray(scan)
+        if len(scan) > self.max_points:
+            logging.warning(
+                f"Scan of {len(scan)} points truncated to {self.max_points} points"
+            )
+            scan = scan[: self.max_points]
+
+        seq = self.sequence + 1
+        slot = seq % self.num_slots
+
+        self._slot_seq[slot] = 0
+        self._slots[slot, : len(scan)] = scan
+        self._lengths[slot] = len(scan)
+        self._slot_seq[slot] = seq
+        self._header[_WRITE_SEQ] = seq
+
+        self.event.set()
+        return seq
+
+    def read_latest(self, timeout: Optional[float] = None) -> Optional[NDArray]:
+        """
+        Wait for a scan newer than the last one read and return a copy of it.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Maximum time to wait in seconds, or None to wait forever.
+
+        Returns
+        -------
+        Optional[NDArray]
+            The scan as a float32 array of [angle, distance] rows, or None
+            if no new scan arrived in time.
+        """
+        result = self._read_new()
+        if result is not None:
+            return result
+
+        if not self.event.wait(timeout):
+            return None
+        # clear before reading, so a scan written from here on sets it again
+        self.event.clear()
+        return self._read_new()
+
+    def _read_new(self) -> Optional[NDArray]:
+        """
+        Return a copy of the latest scan if it was not read yet.
+        """
+        while True:
+            seq = self.sequence
+            if seq == self._last_seq:
+                return None
+
+            scan, valid = self._copy_slot(seq)
+            if valid:
+                self._last_seq = seq
+                return scan
+            # the slot was overwritten while it was copied, try the newer scan
+
+    def _copy_slot(self, seq: int) -> Tuple[NDArray, bool]:
+        """
+        Copy the slot of a scan and check it was not overwritten meanwhile.
+        """
+        slot = seq % self.num_slots
+        length = int(self._lengths[slot])
+        scan = self._slots[slot, :length].copy()
+        return scan, int(self._slot_seq[slot]) == seq
+
+    def close(self) -> None:
+        """
+        Detach from the shared memory, and free it in the creating process.
+        """
+        self._header = self._slot_seq = self._lengths = self._slots = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
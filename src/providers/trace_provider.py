@@ -0,0 +1,362 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .singleton import singleton
+
+# id of the cortex tick the current task is working on, inherited by the
+# tasks it creates
+current_tick_id: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "current_tick_id", default=None
+)
+
+
+@dataclass
+class Span:
+    """
+    A dataclass representing one timed stage of the runtime.
+
+    Parameters
+    ----------
+    name : str
+        The stage name, such as "fuse" or "connect:move".
+    category : str
+        The subsystem, such as "cortex", "action", "connector" or "input".
+    start : float
+        The start time in seconds since the epoch.
+    duration : float
+        The duration in seconds.
+    tick_id : int, optional
+        The id of the cortex tick the stage belongs to.
+    thread_id : int
+        The native id of the thread that ran the stage.
+    args : Dict[str, Any]
+        Additional information shown with the span.
+    """
+
+    name: str
+    category: str
+    start: float
+    duration: float
+    tick_id: Optional[int] = None
+    thread_id: int = 0
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+# idle time closer than this to the start or the end of a span is trimmed
+IDLE_TOLERANCE = 0.001
+
+
+def _trim_idle(
+    start: float, end: float, idle: List[Tuple[float, float]]
+) -> Tuple[float, float]:
+    """
+    Leave the idle intervals at the start and at the end out of a span.
+
+    Parameters
+    ----------
+    start : float
+        The start of the span.
+    end : float
+        The end of the span.
+    idle : List[Tuple[float, float]]
+        The idle intervals within the span, in the order they ended.
+
+    Returns
+    -------
+    Tuple[float, float]
+        The start and the end of the span without its leading and trailing
+        idle time.
+    """
+    for idle_start, idle_end in idle:
+        if idle_start - start > IDLE_TOLERANCE:
+            break
+        start = max(start, idle_end)
+    for idle_start, idle_end in reversed(idle):
+        if end - idle_end > IDLE_TOLERANCE:
+            break
+        end = min(end, idle_start)
+    return start, max(start, end)
+
+
+@singleton
+class TraceProvider:
+    """
+    A singleton provider that records the duration of the runtime stages.
+
+    Spans are kept in an in-memory ring buffer, so tracing can be left on for
+    long runs. The buffer can be exported as a Chrome trace (viewable in
+    chrome://tracing or ui.perfetto.dev) and summarized as p50/p95/p99
+    durations per stage. Tracing is disabled by default, and disabled spans
+    cost a single attribute check.
+    """
+
+    def __init__(self, enabled: bool = False, buffer_size: int = 10000):
+        """
+        Initialize the TraceProvider.
+
+        Parameters
+        ----------
+        enabled : bool
+            Whether spans are recorded, defaults to False.
+        buffer_size : int
+            Maximum number of spans kept, defaults to 10000.
+        """
+        self._lock: threading.Lock = threading.Lock()
+        self.enabled: bool = enabled
+        self._spans: Deque[Span] = deque(maxlen=buffer_size)
+        self._tick_counter: int = 0
+        # the idle intervals of each thread, while it is inside spans
+        self._local = threading.local()
+
+    def configure(self, enabled: bool = True, buffer_size: int = 10000) -> None:
+        """
+        Enable or disable tracing and resize the ring buffer.
+
+        Parameters
+        ----------
+        enabled : bool
+            Whether spans are recorded.
+        buffer_size : int
+            Maximum number of spans kept.
+        """
+        with self._lock:
+            self.enabled = enabled
+            if buffer_size != self._spans.maxlen:
+                self._spans = deque(self._spans, maxlen=buffer_size)
+
+    def start_tick(self) -> int:
+        """
+        Start a new cortex tick.
+
+        The tick id is stored in a context variable, so the spans of the
+        current task and of the tasks it creates are attributed to it.
+
+        Returns
+        -------
+        int
+            The id of the new tick.
+        """
+        with self._lock:
+            self._tick_counter += 1
+            tick_id = self._tick_counter
+        current_tick_id.set(tick_id)
+        return tick_id
+
+    def record(
+        self,
+        name: str,
+        category: str,
+        start: float,
+        end: float,
+        **args: Any,
+    ) -> None:
+        """
+        Record a finished span.
+
+        Parameters
+        ----------
+        name : str
+            The stage name.
+        category : str
+            The subsystem the stage belongs to.
+        start : float
+            The start time in seconds since the epoch.
+        end : float
+            The end time in seconds since the epoch.
+        **args : Any
+            Additional information shown with the span.
+        """
+        if not self.enabled:
+            return
+
+        span = Span(
+            name=name,
+            category=category,
+            start=start,
+            duration=end - start,
+            tick_id=current_tick_id.get(),
+            thread_id=threading.get_native_id(),
+            args=args,
+        )
+        with self._lock:
+            self._spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, category: str = "cortex", **args: Any) -> Iterator[None]:
+        """
+        Time the enclosed block, which may contain awaits.
+
+        Parameters
+        ----------
+        name : str
+            The stage name.
+        category : str
+            The subsystem the stage belongs to, defaults to "cortex".
+        **args : Any
+            Additional information shown with the span.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        local = self._local
+        if not hasattr(local, "idle"):
+            local.idle = []
+            local.depth = 0
+        first_idle = len(local.idle)
+        local.depth += 1
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            end = time.time()
+            local.depth -= 1
+            idle = local.idle[first_idle:]
+            if local.depth == 0:
+                local.idle.clear()
+            start, end = _trim_idle(start, end, idle)
+            self.record(name, category, start, end, **args)
+
+    @contextmanager
+    def idle(self) -> Iterator[None]:
+        """
+        Mark the enclosed block, typically a sleep, as idle time.
+
+        Idle time at the start or at the end of the enclosing spans of the
+        same thread is left out of them, so the span of a connector tick
+        that sleeps before it works only covers the work.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start = time.time()
+        try:
+            yield
+        finally:
+            if getattr(self._local, "depth", 0) > 0:
+                self._local.idle.append((start, time.time()))
+
+    @property
+    def spans(self) -> List[Span]:
+        """
+        Get a copy of the recorded spans, oldest first.
+        """
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        """
+        Remove all recorded spans.
+        """
+        with self._lock:
+            self._spans.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize the recorded spans per stage.
+
+        Returns
+        -------
+        Dict[str, Dict[str, float]]
+            For each stage name, the number of spans and the p50/p95/p99
+            durations in milliseconds.
+        """
+        durations: Dict[str, List[float]] = {}
+        for span in self.spans:
+            durations.setdefault(span.name, []).append(span.duration * 1000)
+
+        return {
+            name: {
+                "count": len(values),
+                **{f"p{p}": float(np.percentile(values, p)) for p in (50, 95, 99)},
+            }
+            for name, values in sorted(durations.items())
+        }
+
+    def chrome_trace(self, spans: Optional[List[Span]] = None) -> Dict[str, Any]:
+        """
+        Convert the recorded spans to the Chrome trace event format.
+
+        Parameters
+        ----------
+        spans : List[Span], optional
+            The spans to convert, defaults to the recorded spans.
+
+        Returns
+        -------
+        Dict[str, Any]
+            The trace. Spans strictly nested within the other spans of their
+            thread are complete ("X") events. Spans that overlap another one
+            without nesting, such as concurrent tasks on the event loop, are
+            async begin and end ("b" and "e") events, which the viewers draw
+            on their own tracks.
+        """
+        pid = os.getpid()
+        if spans is None:
+            spans = self.spans
+        spans = sorted(spans, key=lambda s: (s.thread_id, s.start, -s.duration))
+        events = []
+        open_ends: List[float] = []
+        thread_id: Optional[int] = None
+        for async_id, span in enumerate(spans):
+            args = dict(span.args)
+            if span.tick_id is not None:
+                args["tick"] = span.tick_id
+            event = {
+                "name": span.name,
+                "cat": span.category,
+                "ts": span.start * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": args,
+            }
+
+            if span.thread_id != thread_id:
+                thread_id = span.thread_id
+                open_ends = []
+            end = span.start + span.duration
+            while open_ends and open_ends[-1] <= span.start:
+                open_ends.pop()
+            if open_ends and end > open_ends[-1]:
+                events.append({**event, "ph": "b", "id": async_id})
+                events.append(
+                    {**event, "ph": "e", "id": async_id, "ts": end * 1e6, "args": {}}
+                )
+                continue
+
+            open_ends.append(end)
+            events.append({**event, "ph": "X", "dur": span.duration * 1e6})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(
+        self, path: str, spans: Optional[List[Span]] = None
+    ) -> None:
+        """
+        Write the recorded spans to a Chrome trace JSON file.
+
+        Given a snapshot of the spans, this does not touch the recorder and
+        can run on a worker thread.
+
+        Parameters
+        ----------
+        path : str
+            The file to write.
+        spans : List[Span], optional
+            The spans to write, defaults to the recorded spans.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(spans), f, default=str)
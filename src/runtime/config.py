@@ -35,6 +35,25 @@ class RuntimeConfig:
     backgrounds: List[Background]
 
     silence_rate: Optional[int] = 0
+
+    # Maximum number of concurrent LLM requests; values above 1 enable the
+    # pipelined cortex loop
+    max_in_flight: Optional[int] = 1
+
+    # "fixed" ticks at `hertz`, "event" ticks when the inputs change, at most
+    # every `min_tick_interval` and at least every `max_tick_interval` seconds
+    tick_mode: Optional[str] = "fixed"
+    min_tick_interval: Optional[float] = 0.1
+    max_tick_interval: Optional[float] = 10.0
+
+    # Optional decision cache settings, see runtime.decision_cache.DecisionCache
+    decision_cache: Optional[Dict] = None
+
+    # Optional local memory settings, see providers.memory_index.MemoryIndex
+    memory: Optional[Dict] = None
+
+    # Optional span tracing settings, see providers.trace_provider.TraceProvider
+    tracing: Optional[Dict] = None
     robot_ip: Optional[str] = None
 
     # Optional API key for the runtime configuration
@@ -1,13 +1,21 @@
 import asyncio
 import logging
+import threading
+import time
+import typing as T
 
 from actions.orchestrator import ActionOrchestrator
 from backgrounds.orchestrator import BackgroundOrchestrator
 from fuser import Fuser
+from inputs.base import PRIORITY_PASSIVE, PRIORITY_URGENT
 from inputs.orchestrator import InputOrchestrator
+from llm.output_model import Action, CortexOutputModel
 from providers.io_provider import IOProvider
+from providers.llm_history_manager import deferred_turns
 from providers.sleep_ticker_provider import SleepTickerProvider
+from providers.trace_provider import TraceProvider
 from runtime.config import RuntimeConfig
+from runtime.decision_cache import DecisionCache
 from simulators.orchestrator import SimulatorOrchestrator
 
 
@@ -57,6 +65,45 @@ class CortexRuntime:
         if hasattr(self.config, "silence_rate"):
             self.silence_rate = self.config.silence_rate
 
+        # pipelined mode - more than one LLM request may be in flight
+        self.max_in_flight = getattr(self.config, "max_in_flight", None) or 1
+        self._in_flight: T.Set[asyncio.Task] = set()
+        self._tick_sequence = 0
+        self._dispatched_sequence = 0
+
+        # decision cache - skip the LLM when the inputs did not change
+        self.decision_cache: T.Optional[DecisionCache] = None
+        decision_cache_config = getattr(self.config, "decision_cache", None)
+        if isinstance(decision_cache_config, dict):
+            self.decision_cache = DecisionCache(**decision_cache_config)
+
+        # span tracing of the runtime stages
+        self.trace_provider = TraceProvider()
+        self.trace_summary_interval: T.Optional[float] = None
+        self.trace_export_path: T.Optional[str] = None
+        tracing_config = getattr(self.config, "tracing", None)
+        if isinstance(tracing_config, dict) and tracing_config.get("enabled", True):
+            self.trace_provider.configure(
+                enabled=True, buffer_size=tracing_config.get("buffer_size", 10000)
+            )
+            self.trace_summary_interval = tracing_config.get("summary_interval", 60.0)
+            self.trace_export_path = tracing_config.get("export_path")
+
+        # event-driven mode - ticks are triggered by new input data
+        self.tick_mode = getattr(self.config, "tick_mode", None) or "fixed"
+        self.min_tick_interval = getattr(self.config, "min_tick_interval", None)
+        if self.min_tick_interval is None:
+            self.min_tick_interval = 0.1
+        self.max_tick_interval = getattr(self.config, "max_tick_interval", None)
+        if self.max_tick_interval is None:
+            self.max_tick_interval = 10.0
+        self._input_event: T.Optional[asyncio.Event] = None
+        self._event_loop: T.Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: T.Optional[int] = None
+        self._fusing = False
+        self._pending_input = False
+        self._urgent_input = False
+
     async def run(self) -> None:
         """
         Start the runtime's main execution loop.
@@ -75,13 +122,43 @@ class CortexRuntime:
         action_start = self._start_action_task()
         background_start = self._start_background_task()
 
-        await asyncio.gather(
+        tasks = [
             input_listener_task,
             cortex_loop_task,
             simulator_start,
             action_start,
             background_start,
-        )
+        ]
+        if self.trace_summary_interval:
+            tasks.append(asyncio.create_task(self._run_trace_reporter()))
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            self._close_llm_history()
+
+    def _close_llm_history(self) -> None:
+        """
+        Close the history of the cortex LLM, and of the LLMs it wraps, so
+        that the history log is fully written before the runtime exits.
+
+        Returns
+        -------
+        None
+        """
+        cortex_llm = self.config.cortex_llm
+        llms = [cortex_llm]
+        backends = getattr(cortex_llm, "backends", None)
+        if isinstance(backends, list):
+            llms.extend(backends)
+        for llm in llms:
+            history_manager = getattr(llm, "history_manager", None)
+            if history_manager is None:
+                continue
+            try:
+                history_manager.close()
+            except Exception as e:
+                logging.error(f"Error closing the LLM history: {e}")
 
     async def _start_input_listeners(self) -> asyncio.Task:
         """
@@ -108,23 +185,233 @@ class CortexRuntime:
     async def _start_background_task(self) -> asyncio.Future:
         return self.background_orchestrator.start()
 
+    async def _run_trace_reporter(self) -> None:
+        """
+        Periodically log the trace summary and export the Chrome trace.
+
+        Returns
+        -------
+        None
+        """
+        assert self.trace_summary_interval is not None
+
+        while True:
+            await asyncio.sleep(self.trace_summary_interval)
+            for name, stats in self.trace_provider.summary().items():
+                logging.info(
+                    f"Trace {name}: n={stats['count']} p50={stats['p50']:.1f}ms "
+                    f"p95={stats['p95']:.1f}ms p99={stats['p99']:.1f}ms"
+                )
+            if self.trace_export_path:
+                # serializing the whole buffer takes long enough to stall the
+                # stages being traced, so only the snapshot is taken here
+                spans = self.trace_provider.spans
+                try:
+                    await asyncio.to_thread(
+                        self.trace_provider.export_chrome_trace,
+                        self.trace_export_path,
+                        spans,
+                    )
+                except Exception as e:
+                    logging.error(f"Error exporting the trace: {e}")
+
     async def _run_cortex_loop(self) -> None:
         """
         Execute the main cortex processing loop.
 
         Runs continuously, managing the sleep/wake cycle and triggering
-        tick operations at the configured frequency.
+        tick operations at the configured frequency. When `tick_mode` is
+        "event", the event-driven loop is used instead, and when
+        `max_in_flight` is larger than one, the pipelined loop.
 
         Returns
         -------
         None
         """
+        if self.tick_mode == "event":
+            if self.max_in_flight > 1:
+                logging.warning(
+                    "max_in_flight is not supported with tick_mode event, "
+                    "running one LLM request at a time"
+                )
+            await self._run_event_driven_cortex_loop()
+            return
+
+        if self.max_in_flight > 1:
+            await self._run_pipelined_cortex_loop()
+            return
+
         while True:
             if not self.sleep_ticker_provider.skip_sleep:
                 await self.sleep_ticker_provider.sleep(1 / self.config.hertz)
             await self._tick()
             self.sleep_ticker_provider.skip_sleep = False
 
+    async def _run_pipelined_cortex_loop(self) -> None:
+        """
+        Execute the pipelined cortex processing loop.
+
+        Fuses the next prompt and dispatches it to the LLM while up to
+        `max_in_flight - 1` earlier requests are still pending. Each tick
+        carries a sequence number, and responses that arrive after a newer
+        response has already been dispatched are dropped.
+
+        Returns
+        -------
+        None
+        """
+        logging.info(f"Pipelined cortex loop with max_in_flight={self.max_in_flight}")
+
+        while True:
+            if not self.sleep_ticker_provider.skip_sleep:
+                await self.sleep_ticker_provider.sleep(1 / self.config.hertz)
+            self.sleep_ticker_provider.skip_sleep = False
+
+            # backpressure - wait for a free slot before fusing the next prompt
+            if len(self._in_flight) >= self.max_in_flight:
+                await asyncio.wait(self._in_flight, return_when=asyncio.FIRST_COMPLETED)
+
+            prompt = await self._fuse()
+            if prompt is None:
+                continue
+
+            self._tick_sequence += 1
+            task = asyncio.create_task(
+                self._ask_and_dispatch(prompt, self._tick_sequence)
+            )
+            self._in_flight.add(task)
+            task.add_done_callback(self._on_in_flight_done)
+
+    def _on_in_flight_done(self, task: asyncio.Task) -> None:
+        """
+        Release the slot of a pipelined request and log its error, if any.
+
+        Parameters
+        ----------
+        task : asyncio.Task
+            The finished request.
+        """
+        self._in_flight.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logging.error(
+                f"Error in pipelined LLM request: {type(error).__name__}: {error}",
+                exc_info=error,
+            )
+
+    async def _run_event_driven_cortex_loop(self) -> None:
+        """
+        Execute the event-driven cortex processing loop.
+
+        Instead of ticking at a fixed rate, a tick is triggered by new input
+        data. Normal priority data triggers a tick once `min_tick_interval`
+        has passed since the previous tick, urgent data triggers a tick right
+        away. If nothing changes, a tick still runs every `max_tick_interval`
+        seconds.
+
+        Returns
+        -------
+        None
+        """
+        logging.info(
+            f"Event-driven cortex loop with min_tick_interval={self.min_tick_interval}"
+            f" and max_tick_interval={self.max_tick_interval}"
+        )
+
+        self._event_loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._input_event = asyncio.Event()
+        self.io_provider.add_input_listener(self._on_input)
+
+        try:
+            last_tick = time.monotonic()
+            while True:
+                await self._wait_for_trigger(last_tick)
+                self._pending_input = False
+                self._urgent_input = False
+                self.sleep_ticker_provider.skip_sleep = False
+
+                last_tick = time.monotonic()
+                await self._tick()
+        finally:
+            self.io_provider.remove_input_listener(self._on_input)
+
+    async def _wait_for_trigger(self, last_tick: float) -> None:
+        """
+        Wait until the next tick of the event-driven loop is due.
+
+        Parameters
+        ----------
+        last_tick : float
+            The monotonic time the previous tick started.
+
+        Returns
+        -------
+        None
+        """
+        assert self._input_event is not None
+
+        while True:
+            now = time.monotonic()
+            if self._urgent_input or self.sleep_ticker_provider.skip_sleep is True:
+                return
+
+            next_tick = last_tick + self.max_tick_interval
+            if self._pending_input:
+                next_tick = min(next_tick, last_tick + self.min_tick_interval)
+            if now >= next_tick:
+                return
+
+            self._input_event.clear()
+            try:
+                await asyncio.wait_for(self._input_event.wait(), next_tick - now)
+            except asyncio.TimeoutError:
+                pass
+
+    def _on_input(self, key: str, priority: int) -> None:
+        """
+        Handle an input notification of the IOProvider.
+
+        May be called from any thread. Notifications raised by the fuser
+        while it reads the inputs are ignored, since that data is already
+        part of the prompt being built.
+
+        Parameters
+        ----------
+        key : str
+            The input identifier.
+        priority : int
+            The tick priority of the new data.
+        """
+        if priority <= PRIORITY_PASSIVE or self._event_loop is None:
+            return
+
+        if threading.get_ident() == self._loop_thread_id:
+            if not self._fusing:
+                self._register_input(key, priority)
+        else:
+            self._event_loop.call_soon_threadsafe(self._register_input, key, priority)
+
+    def _register_input(self, key: str, priority: int) -> None:
+        """
+        Record new input data and wake the event-driven loop.
+
+        Parameters
+        ----------
+        key : str
+            The input identifier.
+        priority : int
+            The tick priority of the new data.
+        """
+        logging.debug(f"Input {key} changed with priority {priority}")
+        self._pending_input = True
+        if priority >= PRIORITY_URGENT:
+            self._urgent_input = True
+        if self._input_event is not None:
+            self._input_event.set()
+
     async def _tick(self) -> None:
         """
         Execute a single tick of the cortex processing cycle.
@@ -136,41 +423,218 @@ class CortexRuntime:
         -------
         None
         """
+        prompt = await self._fuse()
+        if prompt is None:
+            return
+
+        await self._ask_and_dispatch(prompt)
+
+    async def _fuse(self) -> T.Optional[str]:
+        """
+        Collect the finished promises and fuse the latest inputs into a prompt.
+
+        Returns
+        -------
+        str or None
+            The fused prompt, or None if there is nothing to send.
+        """
+        # every tick starts with a fuse, the spans of the tick and of the
+        # tasks it creates carry this id
+        self.trace_provider.start_tick()
+
         # collect all the latest inputs
-        finished_promises, _ = await self.action_orchestrator.flush_promises()
+        with self.trace_provider.span("flush_promises"):
+            finished_promises, _ = await self.action_orchestrator.flush_promises()
 
         # combine those inputs into a suitable prompt
-        prompt = self.fuser.fuse(self.config.agent_inputs, finished_promises)
+        self._fusing = True
+        try:
+            with self.trace_provider.span("fuse"):
+                prompt = self.fuser.fuse(self.config.agent_inputs, finished_promises)
+        finally:
+            self._fusing = False
         if prompt is None:
             logging.warning("No prompt to fuse")
-            return
+        return prompt
+
+    async def _ask_and_dispatch(
+        self, prompt: str, sequence: T.Optional[int] = None
+    ) -> None:
+        """
+        Send a prompt to the LLM and dispatch the resulting actions.
+
+        Parameters
+        ----------
+        prompt : str
+            The fused prompt to send to the LLM.
+        sequence : int, optional
+            Tick sequence number used by the pipelined loop. Responses whose
+            sequence is older than the last dispatched one are dropped.
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        If the LLM plugin streams actions, each action is dispatched as soon
+        as it has been generated and only the remaining ones are dispatched
+        once the full response has arrived.
+
+        The turn is added to the LLM history only if the response is
+        dispatched, so a superseded response does not show up in later
+        prompts as actions that were never taken.
+        """
+        # decide up front whether this tick may speak, so that streamed
+        # actions can be filtered before the full response has arrived
+        voice_input = "INPUT: Voice" in prompt
+        speak = voice_input or self.silence_counter >= self.silence_rate
+
+        # voice input always goes to the LLM, a repeated question deserves
+        # a new answer
+        cache_key = None
+        if self.decision_cache is not None and not voice_input:
+            cache_key = self.decision_cache.key(prompt)
+            cached_output = self.decision_cache.get(cache_key)
+            self.io_provider.record_decision_cache_lookup(cached_output is not None)
+            if cached_output is not None:
+                await self._dispatch_cached_decision(cached_output, sequence)
+                return
+
+        streamed: T.List[Action] = []
+        superseded = False
+
+        async def on_action(action: Action) -> None:
+            nonlocal superseded
+            if superseded:
+                return
+            if not streamed and not self._claim_sequence(sequence):
+                superseded = True
+                return
+            streamed.append(action)
+            if speak or action.type.lower() != "speak":
+                await self.action_orchestrator.promise([action])
 
         # if there is a prompt, send to the AIs
-        output = await self.config.cortex_llm.ask(prompt)
+        turns: T.List[T.Callable[[], None]] = []
+        token = deferred_turns.set(turns)
+        try:
+            with self.trace_provider.span("ask"):
+                if getattr(self.config.cortex_llm, "streams_actions", False) is True:
+                    output = await self.config.cortex_llm.ask(
+                        prompt, on_action=on_action
+                    )
+                else:
+                    output = await self.config.cortex_llm.ask(prompt)
+        finally:
+            deferred_turns.reset(token)
         if output is None:
             logging.warning("No output from LLM")
+            for add_turn in turns:
+                add_turn()
             return
 
+        if superseded or (not streamed and not self._claim_sequence(sequence)):
+            logging.info(
+                f"Dropping superseded LLM response {sequence} "
+                f"(already dispatched {self._dispatched_sequence})"
+            )
+            return
+
+        # add the turn to the LLM history, now that it is dispatched
+        for add_turn in turns:
+            add_turn()
+
+        if cache_key is not None:
+            self.decision_cache.put(cache_key, output)
+
+        # remember the turn, so it can be recalled by later prompts
+        if self.fuser.memory is not None:
+            with self.trace_provider.span("remember"):
+                self.fuser.remember(prompt, output.actions)
+
         # Trigger the simulators
-        await self.simulator_orchestrator.promise(output.actions)
+        with self.trace_provider.span("simulate"):
+            await self.simulator_orchestrator.promise(output.actions)
+
+        # actions that were already dispatched while streaming are skipped
+        remaining_actions = output.actions[len(streamed) :]
 
         actions_silent = []
-        for action in output.actions:
+        for action in remaining_actions:
             action_type = action.type.lower()
             if action_type != "speak":
                 actions_silent.append(action)
                 logging.debug(f"appended: {action_type}")
 
         # Trigger actions
-        if "INPUT: Voice" in prompt:
+        if voice_input:
             logging.info("responding due to prior voice input")
             self.silence_counter = 0
-            await self.action_orchestrator.promise(output.actions)
-        elif self.silence_counter >= self.silence_rate:
+            await self.action_orchestrator.promise(remaining_actions)
+        elif speak:
             # speak at desired duty rate
             self.silence_counter = 0
-            await self.action_orchestrator.promise(output.actions)
+            await self.action_orchestrator.promise(remaining_actions)
         else:
             # do not speak
             self.silence_counter += 1
             await self.action_orchestrator.promise(actions_silent)
+
+    async def _dispatch_cached_decision(
+        self, output: CortexOutputModel, sequence: T.Optional[int] = None
+    ) -> None:
+        """
+        Dispatch a decision from the decision cache.
+
+        In "suppress" mode nothing is dispatched and the running actions
+        simply continue. In "reuse" mode the cached actions are dispatched
+        again, except for speech, which would only repeat itself.
+
+        Parameters
+        ----------
+        output : CortexOutputModel
+            The cached LLM output.
+        sequence : int, optional
+            Tick sequence number used by the pipelined loop.
+
+        Returns
+        -------
+        None
+        """
+        assert self.decision_cache is not None
+
+        if self.decision_cache.mode == "suppress":
+            logging.info("Inputs unchanged, skipping the LLM call")
+            return
+
+        if not self._claim_sequence(sequence):
+            return
+
+        logging.info("Inputs unchanged, reusing the previous decision")
+        actions_silent = [
+            action for action in output.actions if action.type.lower() != "speak"
+        ]
+        self.silence_counter += 1
+        await self.action_orchestrator.promise(actions_silent)
+
+    def _claim_sequence(self, sequence: T.Optional[int]) -> bool:
+        """
+        Claim the right to dispatch the response of a tick.
+
+        Parameters
+        ----------
+        sequence : int, optional
+            The tick sequence number, or None outside the pipelined loop.
+
+        Returns
+        -------
+        bool
+            False if a newer response has already been dispatched.
+        """
+        if sequence is None:
+            return True
+        if sequence <= self._dispatched_sequence:
+            return False
+        self._dispatched_sequence = sequence
+        return True
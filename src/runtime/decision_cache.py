@@ -0,0 +1,232 @@
+import hashlib
+import re
+import time
+import typing as T
+from collections import OrderedDict, deque
+
+from llm.output_model import CortexOutputModel
+
+# the inputs block of the fused prompt, see `inputs.base.Sensor`
+INPUT_SECTION_PATTERN = re.compile(
+    r"(INPUT: *)([^\n]*)(\n// START\n)(.*?)(\n// END)", re.DOTALL
+)
+
+TIMESTAMP_PATTERNS = [
+    # ISO 8601 dates with a time
+    re.compile(
+        r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"
+    ),
+    # clock times
+    re.compile(r"\b\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?\b"),
+    # unix timestamps
+    re.compile(r"\b1\d{9}(?:\.\d+)?\b"),
+]
+
+NUMBER_PATTERN = re.compile(r"(?<![A-Za-z_\d.])-?\d+(?:\.\d+)?(?![\d.])")
+
+
+class DecisionCache:
+    """
+    Cache of LLM decisions keyed on a normalized form of the fused prompt.
+
+    When the robot is idle, consecutive prompts only differ in timestamps and
+    sensor noise. Before hashing, the prompt is normalized: timestamps are
+    removed and numbers are rounded to a configurable step, per input if
+    needed. The key also covers the most recent decisions, so a cached
+    decision is only used once the agent has settled.
+
+    Parameters
+    ----------
+    ttl : float
+        Seconds a decision stays valid, defaults to 5.0.
+    mode : str
+        "reuse" dispatches the cached decision again (without speech),
+        "suppress" skips the tick. Defaults to "reuse".
+    ignore_timestamps : bool
+        Whether timestamps are removed before hashing, defaults to True.
+    numeric_step : float
+        Step numbers are rounded to, 0 disables rounding. Defaults to 0.
+    numeric_steps : Dict[str, float]
+        Per input overrides of `numeric_step`, keyed by input name.
+    ignore_inputs : List[str]
+        Names of inputs that are left out of the key entirely.
+    ignore_patterns : List[str]
+        Regular expressions whose matches are removed before hashing.
+    history_length : int
+        Number of recent decisions that are part of the key, defaults to 1.
+        Only the actions other than speech are taken into account.
+    max_entries : int
+        Maximum number of cached decisions, defaults to 128.
+    """
+
+    MODES = ("reuse", "suppress")
+
+    def __init__(
+        self,
+        ttl: float = 5.0,
+        mode: str = "reuse",
+        ignore_timestamps: bool = True,
+        numeric_step: float = 0.0,
+        numeric_steps: T.Optional[T.Dict[str, float]] = None,
+        ignore_inputs: T.Optional[T.List[str]] = None,
+        ignore_patterns: T.Optional[T.List[str]] = None,
+        history_length: int = 1,
+        max_entries: int = 128,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(
+                f"Unknown decision cache mode {mode}, use one of {self.MODES}"
+            )
+
+        self.ttl = ttl
+        self.mode = mode
+        self.ignore_timestamps = ignore_timestamps
+        self.numeric_step = numeric_step
+        self.numeric_steps = numeric_steps or {}
+        self.ignore_inputs = set(ignore_inputs or [])
+        self.ignore_patterns = [re.compile(p) for p in ignore_patterns or []]
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[str, T.Tuple[float, CortexOutputModel]] = (
+            OrderedDict()
+        )
+        self._history: T.Deque[str] = deque(maxlen=history_length)
+
+    def _normalize_text(self, text: str, numeric_step: float) -> str:
+        """
+        Normalize a piece of the prompt.
+
+        Parameters
+        ----------
+        text : str
+            The text to normalize.
+        numeric_step : float
+            Step numbers are rounded to, 0 disables rounding.
+
+        Returns
+        -------
+        str
+            The normalized text.
+        """
+        for pattern in self.ignore_patterns:
+            text = pattern.sub("", text)
+
+        if self.ignore_timestamps:
+            for pattern in TIMESTAMP_PATTERNS:
+                text = pattern.sub("<time>", text)
+
+        if numeric_step > 0:
+
+            def quantize(match: re.Match) -> str:
+                value = round(float(match.group()) / numeric_step) * numeric_step
+                return f"{round(value, 10):g}"
+
+            text = NUMBER_PATTERN.sub(quantize, text)
+
+        return text
+
+    def normalize(self, prompt: str) -> str:
+        """
+        Normalize a fused prompt according to the similarity rules.
+
+        Parameters
+        ----------
+        prompt : str
+            The fused prompt.
+
+        Returns
+        -------
+        str
+            The normalized prompt.
+        """
+
+        def normalize_section(match: re.Match) -> str:
+            name = match.group(2).strip()
+            if name in self.ignore_inputs:
+                return ""
+            step = self.numeric_steps.get(name, self.numeric_step)
+            content = self._normalize_text(match.group(4), step)
+            return f"{match.group(1)}{match.group(2)}{match.group(3)}{content}{match.group(5)}"
+
+        prompt = INPUT_SECTION_PATTERN.sub(normalize_section, prompt)
+
+        # timestamps outside of the input sections, the numbers there are
+        # part of the static prompt and are kept as they are
+        return self._normalize_text(prompt, 0.0)
+
+    def key(self, prompt: str) -> str:
+        """
+        Get the cache key of a fused prompt.
+
+        Parameters
+        ----------
+        prompt : str
+            The fused prompt.
+
+        Returns
+        -------
+        str
+            Hash of the normalized prompt and the recent decisions.
+        """
+        digest = hashlib.sha256(self.normalize(prompt).encode())
+        for decision in self._history:
+            digest.update(b"\0" + decision.encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> T.Optional[CortexOutputModel]:
+        """
+        Look up a cached decision.
+
+        Parameters
+        ----------
+        key : str
+            The cache key.
+
+        Returns
+        -------
+        CortexOutputModel or None
+            The cached decision, or None if there is none or it has expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        created, decision = entry
+        if time.time() - created > self.ttl:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return decision
+
+    def put(self, key: str, decision: CortexOutputModel) -> None:
+        """
+        Cache a decision and add it to the recent decisions.
+
+        Parameters
+        ----------
+        key : str
+            The cache key, computed before the decision was made.
+        decision : CortexOutputModel
+            The LLM output.
+        """
+        self._entries[key] = (time.time(), decision)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        # speech is left out, since its wording varies from call to call
+        self._history.append(
+            "\n".join(
+                f"{action.type}: {action.value}"
+                for action in decision.actions
+                if action.type.lower() != "speak"
+            )
+        )
+
+    def clear(self) -> None:
+        """
+        Remove all cached decisions and the recent decisions.
+        """
+        self._entries.clear()
+        self._history.clear()
@@ -4,7 +4,7 @@ import os
 import threading
 import time
 from dataclasses import asdict, dataclass
-from typing import Dict, List
+from typing import List, Mapping
 
 import uvicorn
 from fastapi import FastAPI, WebSocket
@@ -551,7 +551,7 @@ class WebSim(Simulator):
         except Exception as e:
             logging.error(f"Error in broadcast_state: {e}")
 
-    def get_earliest_time(self, inputs: Dict[str, Input]) -> float:
+    def get_earliest_time(self, inputs: Mapping[str, Input]) -> float:
         """Get earliest timestamp from inputs"""
         earliest_time = float("inf")
         for input_type, input_info in inputs.items():
@@ -596,11 +596,13 @@ class WebSim(Simulator):
         try:
             updated = False
             with self._lock:
-                earliest_time = self.get_earliest_time(self.io_provider.inputs)
+                # one immutable snapshot, so both passes see the same inputs
+                inputs = self.io_provider.inputs
+                earliest_time = self.get_earliest_time(inputs)
                 logging.debug(f"earliest_time: {earliest_time}")
 
                 input_rezeroed = []
-                for input_type, input_info in self.io_provider.inputs.items():
+                for input_type, input_info in inputs.items():
                     timestamp = 0
                     if input_type != "GovernanceEthereum":
                         timestamp = input_info.timestamp - earliest_time
@@ -0,0 +1,157 @@
+"""
+Benchmark of the RPLidar path feasibility check.
+
+Compares the vectorized PathFeasibilityEngine, with and without the
+precomputed path lookup table, with the previous per point Python loops on synthetic scans, and reports the cost per scan relative to
+the 100 ms budget of a 10 Hz express scan. Run it on the robot computer,
+for example a Raspberry Pi, from inside /system_hw_test:
+
+    python rplidar_path_benchmark.py --points 800 --scans 200
+"""
+
+import argparse
+import math
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, "../src")
+
+from providers.rplidar_paths import PathFeasibilityEngine  # noqa: E402
+
+PATH_ANGLES = [-60, -45, -30, -15, 0, 15, 30, 45, 60, 180]
+HALF_WIDTH_ROBOT = 0.20
+RELEVANT_DISTANCE_MIN = 0.08
+RELEVANT_DISTANCE_MAX = 1.1
+SENSOR_MOUNTING_ANGLE = 180.0
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+    "--points",
+    help="points per scan, about 400 for a 4k and 800 for an 8k samples/s lidar at 10 Hz",
+    type=int,
+    default=800,
+)
+parser.add_argument("--scans", help="number of scans to time", type=int, default=200)
+parser.add_argument(
+    "--obstacles",
+    help="share of the points that are within the relevant distance",
+    type=float,
+    default=0.3,
+)
+args = parser.parse_args()
+
+
+def make_paths():
+    paths = []
+    for angle in PATH_ANGLES:
+        end_x = math.sin(math.radians(angle))
+        end_y = math.cos(math.radians(angle))
+        paths.append(
+            np.array([np.linspace(0.0, end_x, 30), np.linspace(0.0, end_y, 30)])
+        )
+    return paths
+
+
+def make_scan(rng, points, obstacles):
+    angles = np.sort(rng.uniform(0.0, 360.0, points))
+    distances = rng.uniform(1.2, 6.0, points)
+    near = rng.random(points) < obstacles
+    distances[near] = rng.uniform(0.1, 1.1, near.sum())
+    return np.column_stack((angles, distances))
+
+
+def distance_point_to_line_segment(px, py, x1, y1, x2, y2):
+    dx = x2 - x1
+    dy = y2 - y1
+    if dx == 0 and dy == 0:
+        return math.sqrt((px - x1) ** 2 + (py - y1) ** 2)
+    t = ((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy)
+    t = max(0, min(1, t))
+    return math.sqrt((px - (x1 + t * dx)) ** 2 + (py - (y1 + t * dy)) ** 2)
+
+
+def loop_processor(paths, data):
+    """The previous implementation, with per point Python loops."""
+    complexes = []
+    for angle, d_m in data:
+        angle = angle + SENSOR_MOUNTING_ANGLE
+        if angle >= 360.0:
+            angle = angle - 360.0
+        if d_m > RELEVANT_DISTANCE_MAX or d_m < RELEVANT_DISTANCE_MIN:
+            continue
+        angle = angle - 180.0
+        a_rad = (angle + 180.0) * math.pi / 180.0
+        complexes.append([-d_m * math.sin(a_rad), -d_m * math.cos(a_rad), angle, d_m])
+
+    possible_paths = np.arange(len(paths))
+    array = np.array(complexes)
+    if array.ndim > 1:
+        array = array[array[:, 2].argsort()]
+        for x, y in zip(array[:, 0], array[:, 1]):
+            for apath in possible_paths:
+                path = paths[apath]
+                dist = distance_point_to_line_segment(
+                    x, y, path[0][0], path[1][0], path[0][-1], path[1][-1]
+                )
+                if dist < HALF_WIDTH_ROBOT:
+                    possible_paths = np.setdiff1d(possible_paths, np.array([apath]))
+                    break
+    return possible_paths
+
+
+def time_per_scan(function, scans):
+    start = time.perf_counter()
+    for scan in scans:
+        function(scan)
+    return (time.perf_counter() - start) / len(scans)
+
+
+rng = np.random.default_rng(0)
+scans = [make_scan(rng, args.points, args.obstacles) for _ in range(args.scans)]
+paths = make_paths()
+engine = PathFeasibilityEngine(
+    paths,
+    half_width_robot=HALF_WIDTH_ROBOT,
+    relevant_distance_min=RELEVANT_DISTANCE_MIN,
+    relevant_distance_max=RELEVANT_DISTANCE_MAX,
+    sensor_mounting_angle=SENSOR_MOUNTING_ANGLE,
+)
+lookup_engine = PathFeasibilityEngine(
+    paths,
+    half_width_robot=HALF_WIDTH_ROBOT,
+    relevant_distance_min=RELEVANT_DISTANCE_MIN,
+    relevant_distance_max=RELEVANT_DISTANCE_MAX,
+    sensor_mounting_angle=SENSOR_MOUNTING_ANGLE,
+)
+start = time.perf_counter()
+lookup_engine.use_lookup_table()
+build_time = time.perf_counter() - start
+candidates = np.arange(len(paths))
+
+# warm up
+engine.process(scans[0], candidates)
+lookup_engine.process(scans[0], candidates)
+loop_processor(paths, scans[0])
+
+vectorized = time_per_scan(lambda scan: engine.process(scan, candidates), scans)
+lookup = time_per_scan(lambda scan: lookup_engine.process(scan, candidates), scans)
+loops = time_per_scan(lambda scan: loop_processor(paths, scan), scans)
+
+budget = 0.1  # 10 Hz
+print(f"{args.points} points per scan, {args.scans} scans")
+print(
+    f"python loops: {loops * 1000:8.3f} ms per scan, "
+    f"{100 * loops / budget:5.1f}% of the 10 Hz budget"
+)
+print(
+    f"vectorized:   {vectorized * 1000:8.3f} ms per scan, "
+    f"{100 * vectorized / budget:5.1f}% of the 10 Hz budget"
+)
+print(
+    f"lookup table: {lookup * 1000:8.3f} ms per scan, "
+    f"{100 * lookup / budget:5.1f}% of the 10 Hz budget "
+    f"(built in {build_time * 1000:.0f} ms)"
+)
+print(f"speedup: {loops / vectorized:.1f}x, {loops / lookup:.1f}x with lookup table")
@@ -0,0 +1,58 @@
+"""
+Replay a lidar recording through the RPLidar provider, without hardware.
+
+Reads a binary scan log (.rpscan), a JSON lines dump (.jsonl) or an
+integration test scan (.json), feeds the scans to the provider and reports
+the throughput and the per scan latency. Run it from inside
+/system_hw_test:
+
+    python rplidar_replay.py ../dump/lidar_1700000000_0Z.rpscan
+    python rplidar_replay.py ../dump/lidar_1700000000_0Z.rpscan --realtime
+"""
+
+import argparse
+import sys
+
+sys.path.insert(0, "../src")
+
+from providers.rplidar_provider import RPLidarProvider  # noqa: E402
+from providers.scan_replay import ScanReplayDriver, load_scans  # noqa: E402
+
+parser = argparse.ArgumentParser()
+parser.add_argument("recording", help="the .rpscan, .jsonl or .json recording")
+parser.add_argument(
+    "--realtime", help="replay at the recorded scan rate", action="store_true"
+)
+parser.add_argument(
+    "--zenoh", help="replay through the Zenoh LaserScan path", action="store_true"
+)
+parser.add_argument("--repeat", help="number of passes", type=int, default=1)
+parser.add_argument(
+    "--sensor_mounting_angle",
+    help="mounting angle the recording was made with",
+    type=float,
+    default=180.0,
+)
+parser.add_argument(
+    "--occupancy_grid", help="fuse the scans into the grid", action="store_true"
+)
+args = parser.parse_args()
+
+provider = RPLidarProvider(
+    sensor_mounting_angle=args.sensor_mounting_angle,
+    use_occupancy_grid=args.occupancy_grid,
+)
+scans = load_scans(args.recording, args.sensor_mounting_angle)
+print(f"Replaying {len(scans)} scans from {args.recording}")
+
+stats = ScanReplayDriver(provider, scans, zenoh=args.zenoh).run(
+    realtime=args.realtime, repeat=args.repeat
+)
+summary = stats.summary()
+print(
+    f"{summary['scans_per_second']:.0f} scans/s, mean {summary['mean_ms']:.3f} ms, "
+    f"p50 {summary['p50_ms']:.3f} ms, p90 {summary['p90_ms']:.3f} ms, "
+    f"p99 {summary['p99_ms']:.3f} ms, max {summary['max_ms']:.3f} ms"
+)
+print(f"Last valid paths: {provider.valid_paths}")
+print(f"Last lidar string: {provider.lidar_string}")
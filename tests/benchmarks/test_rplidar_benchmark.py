@@ -0,0 +1,137 @@
+"""
+Throughput benchmarks of the RPLidar provider, replaying synthetic scans
+through the full per scan pipeline without hardware.
+
+Deselected by default, run them with:
+
+    uv run pytest -m benchmark -s tests/benchmarks
+
+Each benchmark prints the scans per second, the per scan latency
+distribution and the memory allocated per scan. It fails if any scan
+raises an error, if the 99th percentile latency exceeds a fifth of the
+100 ms budget of a 10 Hz scan, which leaves room for robot computers
+several times slower than a development machine, or if the allocations
+per scan exceed 1 MiB.
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from providers.rplidar_provider import RPLidarProvider
+from providers.scan_replay import ScanReplayDriver
+from providers.singleton import singleton
+
+pytestmark = pytest.mark.benchmark
+
+SCAN_BUDGET_S = 0.02
+ALLOCATION_BUDGET_BYTES = 1024 * 1024
+NUM_SCANS = 100
+
+
+def make_scans(points, count=NUM_SCANS, obstacles=0.3, seed=0):
+    """
+    Synthetic scans with a share of the returns within the relevant range.
+    """
+    rng = np.random.default_rng(seed)
+    scans = []
+    for _ in range(count):
+        angles = np.sort(rng.uniform(0.0, 360.0, points))
+        distances = rng.uniform(1.2, 6.0, points)
+        near = rng.random(points) < obstacles
+        distances[near] = rng.uniform(0.1, 1.1, near.sum())
+        scans.append((np.column_stack((angles, distances)), None))
+    return scans
+
+
+def make_provider(**kwargs):
+    singleton.instances = {}
+    # a robot standing still, so the occupancy grid gets a valid pose
+    odom = MagicMock()
+    odom.return_value.position = {
+        "odom_x": 0.0,
+        "odom_y": 0.0,
+        "odom_yaw_m180_p180": 0.0,
+        "odom_subscriber_ts": 1.0,
+    }
+    with patch("providers.rplidar_provider.OdomProvider", odom):
+        provider = RPLidarProvider(**kwargs)
+    singleton.instances = {}
+    return provider
+
+
+def run_benchmark(name, provider, scans, zenoh=False):
+    assert provider.valid_paths is None
+    driver = ScanReplayDriver(provider, scans, zenoh=zenoh)
+    warm_up = driver.run(repeat=1)
+    stats = driver.run(repeat=3)
+    allocations = driver.run(trace_allocations=True)
+
+    # a scan that fails is fast, so the timing only counts if none did
+    assert warm_up.failures == stats.failures == allocations.failures == 0
+    assert provider.valid_paths is not None
+
+    summary = stats.summary()
+    summary["allocated_bytes"] = allocations.summary()["allocated_bytes"]
+    print(
+        f"\n{name}: {summary['scans_per_second']:.0f} scans/s, "
+        f"mean {summary['mean_ms']:.3f} ms, p50 {summary['p50_ms']:.3f} ms, "
+        f"p99 {summary['p99_ms']:.3f} ms, max {summary['max_ms']:.3f} ms, "
+        f"{summary['allocated_bytes'] / 1024:.0f} KiB allocated per scan"
+    )
+
+    assert stats.percentile(99) < SCAN_BUDGET_S
+    assert summary["allocated_bytes"] < ALLOCATION_BUDGET_BYTES
+    return summary
+
+
+@pytest.mark.parametrize("points", [400, 800, 1600])
+def test_path_processor(points):
+    run_benchmark(
+        f"path processor, {points} points", make_provider(), make_scans(points)
+    )
+
+
+def test_path_processor_lookup_table():
+    run_benchmark(
+        "path processor with lookup table, 800 points",
+        make_provider(path_lookup_table=True),
+        make_scans(800),
+    )
+
+
+def test_path_processor_occupancy_grid():
+    run_benchmark(
+        "path processor with occupancy grid, 800 points",
+        make_provider(use_occupancy_grid=True),
+        make_scans(800),
+    )
+
+
+def test_zenoh_processor():
+    run_benchmark(
+        "zenoh processor, 720 ranges",
+        make_provider(),
+        make_scans(1600),
+        zenoh=True,
+    )
+
+
+def test_best_heading():
+    provider = make_provider(candidate_paths=64)
+
+    latencies = []
+    for scan, odom in make_scans(800, count=20):
+        provider.replay_scan(scan, odom)
+        start = time.perf_counter()
+        provider.best_heading([3, 4, 5])
+        latencies.append(time.perf_counter() - start)
+
+    print(
+        f"\nbest heading, 64 candidates: "
+        f"p50 {1000 * np.percentile(latencies, 50):.3f} ms, "
+        f"p99 {1000 * np.percentile(latencies, 99):.3f} ms"
+    )
+    assert np.percentile(latencies, 99) < SCAN_BUDGET_S
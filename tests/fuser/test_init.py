@@ -1,9 +1,11 @@
 from dataclasses import dataclass
-from typing import List
+from types import SimpleNamespace
+from typing import List, Optional
 from unittest.mock import patch
 
 from fuser import Fuser
 from inputs.base import Sensor
+from llm.output_model import Action
 from providers.io_provider import IOProvider
 
 
@@ -26,6 +28,7 @@ class MockConfig:
     system_governance: str = "system governance"
     system_prompt_examples: str = "system prompt examples"
     agent_actions: List[MockAction] = None
+    memory: Optional[dict] = None
 
     def __post_init__(self):
         if self.agent_actions is None:
@@ -84,3 +87,101 @@ def test_fuser_with_inputs_and_actions(mock_describe):
             io_provider.fuser_available_actions
             == "AVAILABLE ACTIONS:\naction description\n\naction description\n\n\n\nWhat will you do? Actions:"
         )
+
+
+@dataclass
+class MockGovernanceSensor(Sensor):
+    def formatted_latest_buffer(self):
+        return "Universal Laws: be kind"
+
+
+@patch("fuser.describe_action")
+def test_fuser_caches_static_sections(mock_describe):
+    mock_describe.return_value = "action description"
+    config = MockConfig(agent_actions=[MockAction("action1"), MockAction("action2")])
+    io_provider = IOProvider()
+
+    with patch("fuser.IOProvider", return_value=io_provider):
+        fuser = Fuser(config)
+        first = fuser.fuse([MockSensor()], [])
+        second = fuser.fuse([MockSensor()], [])
+
+        assert first == second
+        assert mock_describe.call_count == 2
+
+
+@patch("fuser.describe_action")
+def test_fuser_invalidates_cached_sections(mock_describe):
+    mock_describe.return_value = "action description"
+    config = MockConfig(agent_actions=[MockAction("action1")])
+    io_provider = IOProvider()
+
+    with patch("fuser.IOProvider", return_value=io_provider):
+        fuser = Fuser(config)
+        fuser.fuse([MockSensor()], [])
+        assert "LAWS:" in io_provider.fuser_system_prompt
+
+        # laws provided by the governance input replace the local ones
+        fuser.fuse([MockGovernanceSensor()], [])
+        assert "LAWS:" not in io_provider.fuser_system_prompt
+
+        config.system_prompt_base = "new system prompt base"
+        config.agent_actions.append(MockAction("action2"))
+        result = fuser.fuse([MockSensor()], [])
+
+        assert "new system prompt base" in result
+        assert mock_describe.call_count == 3
+
+
+@dataclass
+class MockVoiceSensor(Sensor):
+    text: str = ""
+
+    def formatted_latest_buffer(self):
+        return f"\nINPUT: Voice\n// START\n{self.text}\n// END\n"
+
+
+def test_fuser_recalls_relevant_memories():
+    config = MockConfig(memory={"min_score": 0.3})
+    io_provider = IOProvider()
+
+    with patch("fuser.IOProvider", return_value=io_provider):
+        fuser = Fuser(config)
+        voice = MockVoiceSensor(text="My name is Alice and I like red balls")
+        prompt = fuser.fuse([voice], [])
+        assert "RELEVANT MEMORIES" not in prompt
+
+        fuser.remember(prompt, [Action(type="speak", value="Hello Alice")])
+        assert fuser.memory.texts == [
+            "Voice My name is Alice and I like red balls -> speak: Hello Alice"
+        ]
+
+        voice.text = "Do you remember my name? I am Alice"
+        prompt = fuser.fuse([voice], [])
+        assert "RELEVANT MEMORIES:\n- " in prompt
+        assert "Hello Alice" in prompt
+        assert prompt.index("RELEVANT MEMORIES") < prompt.index("AVAILABLE INPUTS")
+        assert io_provider.fuser_inputs.startswith("RELEVANT MEMORIES")
+
+        voice.text = "battery status"
+        assert "RELEVANT MEMORIES" not in fuser.fuse([voice], [])
+
+
+def test_fuser_remembers_only_its_own_prompts():
+    config = MockConfig(memory={})
+    with patch("fuser.IOProvider", return_value=IOProvider()):
+        fuser = Fuser(config)
+        fuser.remember("unknown prompt", [Action(type="speak", value="hi")])
+        assert len(fuser.memory) == 0
+
+        assert Fuser(MockConfig()).memory is None
+
+
+def test_fuser_memory_skips_turns_in_the_history():
+    config = MockConfig(memory={})
+    config.cortex_llm = SimpleNamespace(_config=SimpleNamespace(history_length=10))
+    with patch("fuser.IOProvider", return_value=IOProvider()):
+        assert Fuser(config).memory.exclude_recent == 5
+
+        config.memory = {"exclude_recent": 0}
+        assert Fuser(config).memory.exclude_recent == 0
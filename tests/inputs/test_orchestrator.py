@@ -1,5 +1,5 @@
 import asyncio
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, patch
 
 import pytest
 
@@ -73,3 +73,56 @@ async def test_input_exception_handling():
     orchestrator = InputOrchestrator([error_input, normal_input])
     with pytest.raises(ValueError):
         await orchestrator.listen()
+
+
+@pytest.mark.asyncio
+async def test_listen_to_input_notifies_with_debounce():
+    """Test that input events are reported to the IOProvider, coalesced by debounce."""
+    mock_input = MockInput()
+    mock_input.max_polls = 5
+    mock_input.priority = 2
+    mock_input.debounce = 1.0
+    orchestrator = InputOrchestrator([mock_input])
+
+    with patch.object(orchestrator.io_provider, "notify_input") as notify_input:
+        await asyncio.wait_for(orchestrator._listen_to_input(mock_input), timeout=5.0)
+        assert notify_input.call_count == 1
+        await asyncio.sleep(0.7)
+        assert notify_input.call_count == 2
+
+    notify_input.assert_called_with("MockInput", 2)
+
+
+@pytest.mark.asyncio
+async def test_listen_to_passive_input_does_not_notify():
+    """Test that passive inputs do not notify the IOProvider."""
+    mock_input = MockInput()
+    mock_input.priority = 0
+    orchestrator = InputOrchestrator([mock_input])
+
+    with patch.object(orchestrator.io_provider, "notify_input") as notify_input:
+        await asyncio.wait_for(orchestrator._listen_to_input(mock_input), timeout=5.0)
+
+    notify_input.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_notification_announces_the_pending_text():
+    """Test that the buffered text is readable when the listeners are notified."""
+    mock_input = MockInput()
+    mock_input.max_polls = 1
+    mock_input.pending_text = lambda: "hello there"
+    orchestrator = InputOrchestrator([mock_input])
+    pending = []
+
+    def listener(key, priority):
+        pending.append(orchestrator.io_provider.pending_input(key))
+
+    orchestrator.io_provider.add_input_listener(listener)
+    try:
+        await asyncio.wait_for(orchestrator._listen_to_input(mock_input), timeout=5.0)
+    finally:
+        orchestrator.io_provider.remove_input_listener(listener)
+        orchestrator.io_provider.set_pending_input("MockInput", None)
+
+    assert pending == ["hello there"]
@@ -106,3 +106,37 @@ async def test_ask_invalid_json(llm):
 
         result = await llm.ask("test prompt")
         assert result is None
+
+
+@pytest.mark.asyncio
+async def test_ask_stream_actions():
+    """Test that streamed actions are passed to the callback as they complete"""
+    from llm.output_model import CortexOutputModel
+
+    config = LLMConfig(api_key="test_key", model="test_model", stream_actions=True)
+    llm = GeminiLLM(CortexOutputModel, config)
+    assert llm.streams_actions
+
+    content = '{"actions": [{"type": "move", "value": "walk"}, {"type": "speak", "value": "hi"}]}'
+
+    async def stream():
+        for i in range(0, len(content), 10):
+            yield MagicMock(
+                choices=[MagicMock(delta=MagicMock(content=content[i : i + 10]))]
+            )
+
+    received = []
+
+    async def on_action(action):
+        received.append(action.type)
+
+    with pytest.MonkeyPatch.context() as m:
+        m.setattr(
+            llm._client.chat.completions,
+            "create",
+            AsyncMock(return_value=stream()),
+        )
+        result = await llm.ask("test prompt", on_action=on_action)
+
+    assert received == ["move", "speak"]
+    assert [action.type for action in result.actions] == ["move", "speak"]
@@ -0,0 +1,129 @@
+import asyncio
+import typing as T
+from collections import deque
+
+import pytest
+from pydantic import BaseModel
+
+from llm import LLM, LLMConfig
+from llm.plugins.hedged_llm import HedgedLLM
+
+
+class DummyOutputModel(BaseModel):
+    test_field: str
+
+
+class FakeLLM(LLM[DummyOutputModel]):
+    def __init__(self, delay: float, result: T.Optional[str] = "success"):
+        super().__init__(DummyOutputModel, LLMConfig())
+        self.delay = delay
+        self.result = result
+        self.calls = 0
+        self.cancelled = False
+
+    async def ask(self, prompt, messages=[], on_action=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.result is None:
+            return None
+        return DummyOutputModel(test_field=self.result)
+
+
+def hedged(*backends: FakeLLM, hedge_delay: float = 0.05) -> HedgedLLM:
+    llm = HedgedLLM(DummyOutputModel, LLMConfig(hedge_delay=hedge_delay))
+    llm.backends = list(backends)
+    llm.latencies = [deque(maxlen=50) for _ in backends]
+    return llm
+
+
+def test_init_loads_backends():
+    config = LLMConfig(
+        api_key="test_key",
+        backends=[
+            {"type": "OpenAILLM", "config": {"model": "gpt-4o-mini"}},
+            {"type": "GeminiLLM"},
+        ],
+    )
+    llm = HedgedLLM(DummyOutputModel, config)
+
+    assert [type(b).__name__ for b in llm.backends] == ["OpenAILLM", "GeminiLLM"]
+    assert all(b._config.api_key == "test_key" for b in llm.backends)
+    assert llm.backends[0]._config.model == "gpt-4o-mini"
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    primary, secondary = FakeLLM(0.0, "primary"), FakeLLM(0.0, "secondary")
+    llm = hedged(primary, secondary)
+
+    result = await llm.ask("test prompt")
+
+    assert result.test_field == "primary"
+    assert secondary.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    primary, secondary = FakeLLM(1.0, "primary"), FakeLLM(0.0, "secondary")
+    llm = hedged(primary, secondary)
+
+    result = await llm.ask("test prompt")
+    await asyncio.sleep(0)
+
+    assert result.test_field == "secondary"
+    assert primary.cancelled
+    # the cancelled request is recorded as a lower bound of its latency
+    assert llm.latencies[0][0] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_falls_back():
+    primary, secondary = FakeLLM(0.0, None), FakeLLM(0.0, "secondary")
+    llm = hedged(primary, secondary, hedge_delay=10)
+
+    result = await llm.ask("test prompt")
+
+    assert result.test_field == "secondary"
+
+
+@pytest.mark.asyncio
+async def test_failing_backend_is_not_primary():
+    failing, working = FakeLLM(0.0, None), FakeLLM(0.1, "working")
+    llm = hedged(failing, working, hedge_delay=10)
+
+    for _ in range(3):
+        result = await llm.ask("test prompt")
+        assert result.test_field == "working"
+
+    # the fast failure does not make the failing backend the fastest
+    assert llm._rank_backends()[0] == 1
+    assert failing.calls == 1
+    assert list(llm.latencies[0]) == [llm.failure_latency]
+
+
+@pytest.mark.asyncio
+async def test_all_backends_fail():
+    llm = hedged(FakeLLM(0.0, None), FakeLLM(0.0, None))
+    assert await llm.ask("test prompt") is None
+
+
+def test_rank_backends_by_median_latency():
+    llm = hedged(FakeLLM(0.0), FakeLLM(0.0), FakeLLM(0.0))
+    llm.latencies[0].extend([1.0, 1.2, 1.1])
+    llm.latencies[1].extend([0.4, 0.5, 0.6])
+
+    # unmeasured backends come first, then the fastest
+    assert llm._rank_backends() == [2, 1, 0]
+
+
+def test_hedge_delay_uses_percentile():
+    llm = hedged(FakeLLM(0.0), hedge_delay=3.0)
+    assert llm._hedge_delay(0) == 3.0
+
+    llm.latencies[0].extend([1.0] * 9 + [2.0])
+    assert llm._hedge_delay(0) == pytest.approx(1.55)
+    assert set(llm.latency_percentiles()["FakeLLM[0]"]) == {"p50", "p95", "p99"}
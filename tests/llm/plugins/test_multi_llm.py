@@ -1,4 +1,4 @@
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -7,6 +7,17 @@ from llm.output_model import CortexOutputModel
 from llm.plugins.multi_llm import MultiLLM
 
 
+def mock_post(status=200, json_data=None, text=""):
+    """Patch the aiohttp session post with a canned response"""
+    response = MagicMock(status=status)
+    response.json = AsyncMock(return_value=json_data)
+    response.text = AsyncMock(return_value=text)
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=response)
+    context.__aexit__ = AsyncMock(return_value=False)
+    return patch("aiohttp.ClientSession.post", return_value=context)
+
+
 @pytest.fixture
 def config():
     return LLMConfig(
@@ -31,8 +42,10 @@ def mock_structured_output_response():
 
 
 @pytest.fixture
-def llm(config):
-    return MultiLLM(CortexOutputModel, config)
+async def llm(config):
+    llm = MultiLLM(CortexOutputModel, config)
+    yield llm
+    await llm.close()
 
 
 def test_init_with_config(llm, config):
@@ -59,9 +72,7 @@ def test_init_empty_key():
 @pytest.mark.asyncio
 async def test_ask_structured_output(llm, mock_response):
     """Test handling of content-only response format"""
-    with patch("requests.post") as mock_post:
-        mock_post.return_value.status_code = 200
-        mock_post.return_value.json.return_value = mock_response
+    with mock_post(200, mock_response):
 
         result = await llm.ask("test prompt")
         assert result is not None
@@ -70,9 +81,7 @@ async def test_ask_structured_output(llm, mock_response):
 @pytest.mark.asyncio
 async def test_ask_api_error(llm):
     """Test handling of API errors"""
-    with patch("requests.post") as mock_post:
-        mock_post.return_value.status_code = 500
-        mock_post.return_value.text = "Internal Server Error"
+    with mock_post(500, text="Internal Server Error"):
 
         result = await llm.ask("test prompt")
         assert result is None
@@ -81,9 +90,7 @@ async def test_ask_api_error(llm):
 @pytest.mark.asyncio
 async def test_ask_invalid_response(llm):
     """Test handling of invalid response format"""
-    with patch("requests.post") as mock_post:
-        mock_post.return_value.status_code = 200
-        mock_post.return_value.json.return_value = {"invalid": "response"}
+    with mock_post(200, {"invalid": "response"}):
 
         result = await llm.ask("test prompt")
         assert result is None
@@ -92,9 +99,7 @@ async def test_ask_invalid_response(llm):
 @pytest.mark.asyncio
 async def test_io_provider_timing(llm, mock_structured_output_response):
     """Test timing metrics collection"""
-    with patch("requests.post") as mock_post:
-        mock_post.return_value.status_code = 200
-        mock_post.return_value.json.return_value = mock_structured_output_response
+    with mock_post(200, mock_structured_output_response):
 
         await llm.ask("test prompt")
         assert llm.io_provider.llm_start_time is not None
@@ -0,0 +1,161 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from llm import LLMConfig
+from llm.output_model import CortexOutputModel
+from llm.plugins.rag_multi_llm import RagMultiLLM
+from providers.io_provider import IOProvider
+
+AGENT_RESPONSE = {"content": '{"actions":[{"type":"speak","value":"Hello!"}]}'}
+
+RAG_RESPONSE = {
+    "success": True,
+    "data": {"content": "The robot dog is named Iris.", "tools": []},
+}
+
+
+def mock_response(status, json_data):
+    response = MagicMock(status=status)
+    response.json = AsyncMock(return_value=json_data)
+    context = MagicMock()
+    context.__aenter__ = AsyncMock(return_value=response)
+    context.__aexit__ = AsyncMock(return_value=False)
+    return context
+
+
+@pytest.fixture
+async def llm():
+    config = LLMConfig(api_key="test_api_key", use_rag=True, rag_timeout=0.1)
+    llm = RagMultiLLM(CortexOutputModel, config)
+    llm.io_provider.add_input("Voice", "What is your name?", None)
+    yield llm
+    llm.io_provider.remove_input("Voice")
+    await llm.close()
+
+
+@pytest.mark.asyncio
+async def test_ask_with_rag_context(llm):
+    """Test that the knowledge base context is added to the agent request"""
+
+    def post(url, **kwargs):
+        if url == llm.rag_endpoint:
+            return mock_response(200, RAG_RESPONSE)
+        return mock_response(200, AGENT_RESPONSE)
+
+    with patch("aiohttp.ClientSession.post", side_effect=post) as mocked_post:
+        result = await llm.ask("test prompt")
+
+    assert result is not None
+    agent_request = mocked_post.call_args_list[-1][1]["json"]
+    assert "KNOWLEDGE BASE CONTEXT" in agent_request["inputs"]
+    assert "The robot dog is named Iris." in agent_request["inputs"]
+
+
+@pytest.mark.asyncio
+async def test_ask_slow_rag_does_not_block(llm):
+    """Test that a slow knowledge base query is bounded by rag_timeout"""
+
+    async def slow_rag(*args, **kwargs):
+        await asyncio.sleep(1)
+        return "late context", ""
+
+    llm._query_rag = slow_rag
+
+    with patch(
+        "aiohttp.ClientSession.post", return_value=mock_response(200, AGENT_RESPONSE)
+    ) as mocked_post:
+        result = await llm.ask("test prompt")
+
+    assert result is not None
+    agent_request = mocked_post.call_args[1]["json"]
+    assert "KNOWLEDGE BASE CONTEXT" not in (agent_request["inputs"] or "")
+
+
+@pytest.fixture
+async def cached_llm():
+    config = LLMConfig(
+        api_key="test_api_key", use_rag=True, rag_timeout=0.1, rag_cache={}
+    )
+    # added before the plugin listens, so it is not prefetched
+    IOProvider().add_input("Voice", "What is your name?", None)
+    llm = RagMultiLLM(CortexOutputModel, config)
+    yield llm
+    llm.io_provider.remove_input("Voice")
+    await llm.close()
+
+
+@pytest.mark.asyncio
+async def test_ask_reuses_cached_rag_context(cached_llm):
+    """Test that a repeated question does not query the knowledge base again"""
+    queries = []
+
+    async def query_rag(session, query, headers):
+        queries.append(query)
+        return "The robot dog is named Iris.", ""
+
+    cached_llm._query_rag = query_rag
+
+    with patch(
+        "aiohttp.ClientSession.post", return_value=mock_response(200, AGENT_RESPONSE)
+    ) as mocked_post:
+        await cached_llm.ask("test prompt")
+        await cached_llm.ask("test prompt")
+
+    assert queries == ["What is your name?"]
+    agent_request = mocked_post.call_args[1]["json"]
+    assert "The robot dog is named Iris." in agent_request["inputs"]
+
+
+@pytest.mark.asyncio
+async def test_new_voice_input_is_prefetched(cached_llm):
+    """Test that new voice input is sent to the knowledge base right away"""
+    queries = []
+
+    async def query_rag(session, query, headers):
+        queries.append(query)
+        return f"Context for {query}", ""
+
+    cached_llm._query_rag = query_rag
+
+    with patch(
+        "aiohttp.ClientSession.post", return_value=mock_response(200, AGENT_RESPONSE)
+    ):
+        await cached_llm.ask("test prompt")
+
+    cached_llm.io_provider.add_input("Voice", "Where are you?", None)
+    await asyncio.sleep(0.01)
+
+    assert queries == ["What is your name?", "Where are you?"]
+    assert cached_llm.rag_cache.get("where are you") == (
+        ("Context for Where are you?", ""),
+        True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_pending_voice_input_is_prefetched_before_the_first_ask(cached_llm):
+    """Test that speech is prefetched when it is notified, before it is fused"""
+    queries = []
+
+    async def query_rag(session, query, headers):
+        queries.append(query)
+        return f"Context for {query}", ""
+
+    cached_llm._query_rag = query_rag
+
+    # the input orchestrator announces the speech, the Voice input still
+    # holds the previous utterance
+    cached_llm.io_provider.set_pending_input("Voice", "Where are you?")
+    cached_llm.io_provider.notify_input("Voice", 2)
+    await asyncio.sleep(0.01)
+
+    assert queries == ["Where are you?"]
+    assert cached_llm.io_provider.inputs["Voice"].input == "What is your name?"
+
+    # fusing the speech clears the pending text
+    cached_llm.io_provider.add_input("Voice", "Where are you?", None)
+    assert cached_llm.io_provider.pending_input("Voice") is None
+    await asyncio.sleep(0.01)
+    assert queries == ["Where are you?"]
@@ -89,3 +89,51 @@ def test_load_llm_not_found():
 
         with pytest.raises(ValueError, match="LLM type NonexistentLLM not found"):
             load_llm("NonexistentLLM")
+
+
+def test_prompt_messages_without_cache(base_llm):
+    messages = base_llm._prompt_messages(
+        "test prompt", [{"role": "user", "content": "h"}]
+    )
+    assert messages == [
+        {"role": "user", "content": "h"},
+        {"role": "user", "content": "test prompt"},
+    ]
+
+
+def test_prompt_messages_with_cache(config):
+    config.prompt_cache = True
+    llm = MockLLM(DummyOutputModel, config)
+    llm.io_provider.set_fuser_prompt_sections("full prompt", "prefix", "suffix")
+
+    messages = llm._prompt_messages("full prompt", [{"role": "user", "content": "h"}])
+    assert messages == [
+        {"role": "system", "content": "prefix"},
+        {"role": "user", "content": "h"},
+        {"role": "user", "content": "suffix"},
+    ]
+
+    # a prompt that was not produced by the latest fuse is sent as is
+    messages = llm._prompt_messages("other prompt", [])
+    assert messages == [{"role": "user", "content": "other prompt"}]
+
+
+def test_record_prompt_cache_usage(base_llm):
+    response = Mock()
+    response.usage.prompt_tokens = 1200
+    response.usage.prompt_tokens_details.cached_tokens = 1024
+
+    base_llm._record_prompt_cache_usage(response)
+    assert base_llm.io_provider.llm_prompt_tokens == 1200
+    assert base_llm.io_provider.llm_cached_tokens == 1024
+
+    deepseek_response = Mock()
+    deepseek_response.usage = Mock(
+        spec=["prompt_tokens", "prompt_cache_hit_tokens"],
+        prompt_tokens=900,
+        prompt_cache_hit_tokens=640,
+    )
+
+    base_llm._record_prompt_cache_usage(deepseek_response)
+    assert base_llm.io_provider.llm_prompt_tokens == 900
+    assert base_llm.io_provider.llm_cached_tokens == 640
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from llm.rag_cache import RagCache, normalize_query
+
+
+class Fetcher:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.queries = []
+
+    async def __call__(self, query):
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        return f"context {len(self.queries)}", ""
+
+
+def test_normalize_query():
+    assert normalize_query("  What's your NAME?! ") == "whats your name"
+    assert normalize_query("what's   your name") == "whats your name"
+
+
+@pytest.mark.asyncio
+async def test_fetch_caches_result():
+    cache = RagCache()
+    fetch = Fetcher()
+
+    assert await cache.fetch("What is your name?", fetch) == ("context 1", "")
+    assert await cache.fetch("what is your name", fetch) == ("context 1", "")
+
+    assert fetch.queries == ["What is your name?"]
+    assert (cache.misses, cache.hits) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetches_are_shared():
+    cache = RagCache()
+    fetch = Fetcher(delay=0.05)
+
+    results = await asyncio.gather(
+        cache.fetch("hello there", fetch), cache.fetch("Hello there!", fetch)
+    )
+
+    assert results == [("context 1", ""), ("context 1", "")]
+    assert len(fetch.queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_result_is_served_while_revalidating():
+    cache = RagCache(ttl=0.1, stale_ttl=0.5)
+    fetch = Fetcher()
+
+    await cache.fetch("hello there", fetch)
+    await asyncio.sleep(0.15)
+
+    # served right away, refreshed in the background
+    assert await cache.fetch("hello there", fetch) == ("context 1", "")
+    assert cache.stale_hits == 1
+    await asyncio.sleep(0.01)
+    assert await cache.fetch("hello there", fetch) == ("context 2", "")
+
+    # expired entries are fetched again
+    await asyncio.sleep(0.6)
+    assert await cache.fetch("hello there", fetch) == ("context 3", "")
+    assert cache.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_empty_results_are_not_cached():
+    cache = RagCache()
+
+    async def failed(query):
+        return "", ""
+
+    await cache.fetch("hello there", failed)
+
+    assert cache.get("hello there") == (None, False)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_fetch_still_caches_the_result():
+    cache = RagCache()
+    fetch = Fetcher(delay=0.05)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(cache.fetch("hello there", fetch), timeout=0.01)
+    await asyncio.sleep(0.1)
+
+    assert cache.get("hello there") == (("context 1", ""), True)
+
+
+@pytest.mark.asyncio
+async def test_prefetch():
+    cache = RagCache()
+    fetch = Fetcher()
+
+    cache.prefetch("hello there", fetch)
+    await asyncio.sleep(0)
+    cache.prefetch("hello there", fetch)
+    cache.prefetch("?!", fetch)
+
+    assert fetch.queries == ["hello there"]
+    assert await cache.fetch("hello there", fetch) == ("context 1", "")
+
+
+def test_lru_eviction():
+    cache = RagCache(max_entries=2)
+    cache.put("first", ("1", ""))
+    cache.put("second", ("2", ""))
+    cache.get("first")
+    cache.put("third", ("3", ""))
+
+    assert cache.get("second") == (None, False)
+    assert cache.get("first")[0] == ("1", "")
+    assert cache.get("third")[0] == ("3", "")
+
+
+def test_similar_queries_share_a_result():
+    cache = RagCache(similarity=0.8)
+    cache.put("what is the name of the robot dog", ("Iris", ""))
+
+    assert cache.get("what is the name of your robot dog")[0] == ("Iris", "")
+    assert cache.get("how is the battery")[0] is None
+    assert RagCache().get("what is the name of your robot dog")[0] is None
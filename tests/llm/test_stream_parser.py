@@ -0,0 +1,50 @@
+from llm.output_model import Action
+from llm.stream_parser import ActionStreamParser
+
+RESPONSE = (
+    '{"actions": [{"type": "move", "value": "walk"}, '
+    '{"type": "speak", "value": "Hello {there}, \\"friend\\" [1]"}, '
+    '{"type": "emotion", "value": "joy"}]}'
+)
+
+
+def test_parse_whole_response():
+    parser = ActionStreamParser()
+    actions = parser.feed(RESPONSE)
+
+    assert actions == [
+        Action(type="move", value="walk"),
+        Action(type="speak", value='Hello {there}, "friend" [1]'),
+        Action(type="emotion", value="joy"),
+    ]
+    assert parser.done
+
+
+def test_parse_character_by_character():
+    parser = ActionStreamParser()
+    completed = []
+    for i, char in enumerate(RESPONSE):
+        actions = parser.feed(char)
+        if actions:
+            completed.append((i, actions[0]))
+
+    # each action is returned as soon as its closing brace arrives
+    assert [action.type for _, action in completed] == ["move", "speak", "emotion"]
+    assert completed[0][0] == RESPONSE.index("}")
+    assert parser.actions == [action for _, action in completed]
+    assert parser.done
+
+
+def test_parse_invalid_action_is_skipped():
+    parser = ActionStreamParser()
+    actions = parser.feed(
+        '{"actions": [{"type": "move"}, {"type": "a", "value": "b"}]}'
+    )
+
+    assert actions == [Action(type="a", value="b")]
+
+
+def test_parse_no_actions_array():
+    parser = ActionStreamParser()
+    assert parser.feed('{"test_field": "success"}') == []
+    assert not parser.done
@@ -0,0 +1,117 @@
+import os
+
+from providers.history_log import (
+    MAGIC,
+    RECORD_HEADER,
+    HistoryLog,
+    HistoryState,
+    read_history_log,
+)
+
+
+def write_history(path, **kwargs):
+    log = HistoryLog(path, **kwargs)
+    log.append_frame(1)
+    for i in range(4):
+        log.append_message(("user", f"message {i}"))
+    log.append_summary(3, ("assistant", "Previously, messages 0 to 2"))
+    log.append_message(("user", "message 4"))
+    log.append_drop(0, 1)
+    log.append_frame(2)
+    log.close()
+
+
+EXPECTED = HistoryState(
+    summary=("assistant", "Previously, messages 0 to 2"),
+    history=[("user", "message 4")],
+    frame_index=2,
+)
+
+
+def test_history_is_restored(tmp_path):
+    path = str(tmp_path / "history" / "iris.omhist")
+    write_history(path)
+
+    log = HistoryLog(path)
+    assert log.loaded == EXPECTED
+    log.close()
+
+
+def test_missing_log_is_empty(tmp_path):
+    state, size = read_history_log(str(tmp_path / "missing.omhist"))
+
+    assert state == HistoryState()
+    assert size == 0
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    path = str(tmp_path / "iris.omhist")
+    write_history(path)
+    size = os.path.getsize(path)
+    with open(path, "ab") as f:
+        f.write(RECORD_HEADER.pack(100, 0, 1) + b"cut off")
+
+    log = HistoryLog(path)
+    assert log.loaded == EXPECTED
+    assert os.path.getsize(path) == size
+
+    # appending continues after the last valid record
+    log.append_message(("user", "message 5"))
+    log.close()
+    state, _ = read_history_log(path)
+    assert state.history == [("user", "message 4"), ("user", "message 5")]
+
+
+def test_corrupted_record_is_ignored(tmp_path):
+    path = str(tmp_path / "iris.omhist")
+    write_history(path)
+    with open(path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b"\xff")
+
+    state, _ = read_history_log(path)
+
+    # the last record, the frame index, is dropped
+    assert state.history == EXPECTED.history
+    assert state.frame_index == 1
+
+
+def test_log_is_compacted(tmp_path):
+    path = str(tmp_path / "iris.omhist")
+    write_history(path, compact_bytes=1)
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    # frame, summary and the remaining message, then the records after the
+    # compaction
+    assert data.startswith(MAGIC)
+    assert b"message 0" not in data
+    log = HistoryLog(path)
+    assert log.loaded == EXPECTED
+    log.close()
+
+
+def test_log_without_summaries_is_compacted(tmp_path):
+    path = str(tmp_path / "iris.omhist")
+    log = HistoryLog(path, compact_bytes=1000)
+    log.append_message(("user", "message 0"))
+    for frame in range(1000):
+        log.append_frame(frame)
+    log.close()
+
+    # a thousand frame records, 21 bytes each, do not pile up
+    assert os.path.getsize(path) < 2000
+    state, _ = read_history_log(path)
+    assert state == HistoryState(history=[("user", "message 0")], frame_index=999)
+
+
+def test_other_files_are_not_overwritten(tmp_path):
+    path = tmp_path / "iris.omhist"
+    path.write_text("not a history log")
+
+    log = HistoryLog(str(path))
+    log.close()
+
+    assert log.loaded == HistoryState()
+    assert (tmp_path / "iris.omhist.invalid").read_text() == "not a history log"
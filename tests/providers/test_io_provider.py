@@ -10,8 +10,9 @@ from providers.io_provider import Input, IOProvider
 def io_provider():
     provider = IOProvider()
     yield provider
-    provider._inputs.clear()
-    provider._input_timestamps.clear()
+    provider._input_store.clear()
+    provider._input_listeners.clear()
+    provider._input_priorities.clear()
     provider._fuser_start_time = None
     provider._fuser_end_time = None
     provider._llm_prompt = None
@@ -79,6 +80,34 @@ def test_clear_llm_prompt(io_provider):
     assert io_provider.llm_prompt is None
 
 
+def test_input_listener_notified_on_change(io_provider):
+    events = []
+    io_provider.add_input_listener(lambda key, priority: events.append((key, priority)))
+    io_provider.set_input_priority("key2", 2)
+
+    io_provider.add_input("key1", "value1", None)
+    io_provider.add_input("key1", "value1", None)
+    io_provider.add_input("key2", "value2", None)
+    io_provider.notify_input("key3", 0)
+
+    assert events == [("key1", 1), ("key2", 2), ("key3", 0)]
+
+
+def test_decision_cache_counters(io_provider):
+    io_provider._decision_cache_hits = 0
+    io_provider._decision_cache_misses = 0
+    assert io_provider.decision_cache_hit_rate is None
+
+    io_provider.record_decision_cache_lookup(True)
+    io_provider.record_decision_cache_lookup(False)
+    io_provider.record_decision_cache_lookup(True)
+    io_provider.record_decision_cache_lookup(True)
+
+    assert io_provider.decision_cache_hits == 3
+    assert io_provider.decision_cache_misses == 1
+    assert io_provider.decision_cache_hit_rate == 0.75
+
+
 def test_singleton_behavior():
     provider1 = IOProvider()
     provider2 = IOProvider()
@@ -102,3 +131,41 @@ def test_thread_safety(io_provider):
         t.join()
 
     assert len(io_provider.inputs) == 10
+
+
+def test_input_snapshot_is_immutable(io_provider):
+    io_provider.add_input("key1", "value1", 1.0)
+    snapshot = io_provider.input_snapshot
+
+    io_provider.add_input("key1", "value2", 2.0)
+    io_provider.add_input("key2", "value3", None)
+
+    assert snapshot.inputs == {"key1": Input(input="value1", timestamp=1.0)}
+    assert io_provider.inputs["key1"] == Input(input="value2", timestamp=2.0)
+    with pytest.raises(TypeError):
+        snapshot.inputs["key3"] = Input(input="value4")
+
+
+def test_changed_since(io_provider):
+    io_provider.add_input("key1", "value1", 1.0)
+    io_provider.add_input("key2", "value2", 1.0)
+    version = io_provider.inputs_version
+
+    assert io_provider.changed_since(version) == {}
+
+    io_provider.add_input("key2", "value3", 2.0)
+    io_provider.remove_input("key1")
+    io_provider.add_input_timestamp("key3", 3.0)
+
+    assert io_provider.inputs_version == version + 3
+    assert io_provider.changed_since(version) == {
+        "key1": None,
+        "key2": Input(input="value3", timestamp=2.0),
+    }
+    assert io_provider.get_input_timestamp("key3") == 3.0
+
+
+def test_add_input_keeps_timestamp(io_provider):
+    io_provider.add_input("key1", "value1", 1.0)
+    io_provider.add_input("key1", "value2", None)
+    assert io_provider.inputs["key1"] == Input(input="value2", timestamp=1.0)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+from pycdr2._support import Endianness
+
+from providers.laserscan_view import parse_laserscan
+from zenoh_idl.sensor_msgs import LaserScan
+from zenoh_idl.std_msgs import Header, Time
+
+
+def make_scan(frame_id="laser", ranges=None):
+    return LaserScan(
+        header=Header(stamp=Time(sec=12, nanosec=345), frame_id=frame_id),
+        angle_min=-3.1241390705108643,
+        angle_max=3.1415927410125732,
+        angle_increment=0.0174532925,
+        time_increment=0.0,
+        scan_time=0.1,
+        range_min=0.15,
+        range_max=12.0,
+        ranges=[1.0, 2.5, float("inf"), 0.3] if ranges is None else ranges,
+        intensities=[10.0, 20.0, 0.0, 5.0],
+    )
+
+
+@pytest.mark.parametrize("frame_id", ["", "a", "laser", "base_scan"])
+@pytest.mark.parametrize("endianness", [Endianness.Little, Endianness.Big])
+def test_matches_pycdr2(frame_id, endianness):
+    scan = make_scan(frame_id)
+    payload = scan.serialize(endianness=endianness)
+
+    view = parse_laserscan(payload)
+    expected = LaserScan.deserialize(payload)
+
+    assert view.stamp_sec == 12
+    assert view.stamp_nanosec == 345
+    assert view.frame_id == frame_id
+    assert view.angle_min == pytest.approx(expected.angle_min)
+    assert view.angle_max == pytest.approx(expected.angle_max)
+    assert view.angle_increment == pytest.approx(expected.angle_increment)
+    assert view.range_min == pytest.approx(expected.range_min)
+    assert view.range_max == pytest.approx(expected.range_max)
+    assert view.ranges.tolist() == pytest.approx(expected.ranges)
+
+
+def test_ranges_view_the_payload():
+    payload = make_scan(ranges=list(np.linspace(0.1, 5.0, 720))).serialize()
+
+    view = parse_laserscan(payload)
+
+    assert view.ranges.dtype == np.float32
+    assert len(view.ranges) == 720
+    assert not view.ranges.flags.owndata
+    assert not view.ranges.flags.writeable
+
+
+def test_empty_ranges():
+    view = parse_laserscan(make_scan(ranges=[]).serialize())
+    assert len(view.ranges) == 0
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [b"", b"\x00\x01", b"\x00\x07\x00\x00" + bytes(64), b"\x00\x01\x00\x00" + bytes(8)],
+)
+def test_malformed_payload(payload):
+    with pytest.raises(ValueError):
+        parse_laserscan(payload)
+
+
+def test_truncated_ranges():
+    payload = make_scan(ranges=[1.0] * 100).serialize()
+    with pytest.raises(ValueError):
+        parse_laserscan(payload[:100])
@@ -1,9 +1,16 @@
 import asyncio
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
-from providers.llm_history_manager import ChatMessage, LLMHistoryManager
+from llm.output_model import Action, CortexOutputModel
+from providers.llm_history_manager import (
+    ChatMessage,
+    LLMHistoryManager,
+    estimate_tokens,
+    truncate_to_tokens,
+)
 
 
 @pytest.fixture
@@ -11,6 +18,7 @@ def llm_config():
     config = MagicMock()
     config.model = "gpt-4o"
     config.history_length = 5
+    config.history_token_budget = 0
     config.agent_name = "Test Robot"
     return config
 
@@ -65,14 +73,18 @@ async def test_summarize_messages_api_error(history_manager):
     assert "Error summarizing state" == result.content
 
 
+def turns(count, start=0):
+    messages = []
+    for i in range(start, start + count):
+        messages.append(ChatMessage(role="user", content=f"Test Robot sensed {i}"))
+        messages.append(ChatMessage(role="user", content=f"Test Robot did {i}"))
+    return messages
+
+
 @pytest.mark.asyncio
 async def test_start_summary_task(history_manager):
-    # Create test messages that we'll modify in-place
-    messages = [
-        ChatMessage(role="assistant", content="Previous summary"),
-        ChatMessage(role="user", content="New input"),
-        ChatMessage(role="user", content="Action taken"),
-    ]
+    for message in turns(3):
+        history_manager.add_message(message)
 
     # Replace summarize_messages with a mock
     history_manager.summarize_messages = AsyncMock()
@@ -81,36 +93,32 @@ async def test_start_summary_task(history_manager):
     )
 
     # Run the summary task
-    await history_manager.start_summary_task(messages)
+    await history_manager.start_summary_task()
 
     # Let the task and callback complete
     await asyncio.sleep(0.1)
 
-    # Verify the task was created
     assert history_manager._summary_task is not None
+    assert history_manager.history == []
+    assert history_manager.summary.content == "New summary"
+    assert history_manager.get_messages() == [
+        {"role": "assistant", "content": "New summary"}
+    ]
 
-    # Let the event loop process the callback
-    await asyncio.sleep(0.1)
 
-    # Because we mocked summarize_messages, the callback should have run
-    # and updated the messages list
-    assert len(messages) == 1
-    assert messages[0].role == "assistant"
-    assert "New summary" == messages[0].content
+@pytest.mark.asyncio
+async def test_start_summary_task_nothing_due(history_manager):
+    history_manager.add_message(ChatMessage(role="user", content="Test message"))
 
+    await history_manager.start_summary_task()
 
-@pytest.mark.asyncio
-async def test_start_summary_task_empty_messages(history_manager):
-    # Test with empty messages
-    await history_manager.start_summary_task([])
     assert history_manager._summary_task is None
 
 
 @pytest.mark.asyncio
 async def test_start_summary_task_error_handling(history_manager):
-    messages = [
-        ChatMessage(role="user", content="Test message"),
-    ]
+    for message in turns(3):
+        history_manager.add_message(message)
 
     # Mock error in summarization
     history_manager.summarize_messages = AsyncMock()
@@ -118,10 +126,223 @@ async def test_start_summary_task_error_handling(history_manager):
         role="system", content="Error: API service unavailable"
     )
 
-    # Run the summary task
-    await history_manager.start_summary_task(messages)
+    await history_manager.start_summary_task()
+    await asyncio.sleep(0.1)
 
-    # Let the task and callback complete
+    # the history is trimmed to the recent messages sent with the prompt
+    assert history_manager.history == turns(3)[1:]
+    assert history_manager.summary is None
+    assert history_manager.dropped_messages == 1
+
+
+@pytest.mark.asyncio
+async def test_history_is_bounded_while_summaries_fail(history_manager):
+    history_manager.summarize_messages = AsyncMock()
+    history_manager.summarize_messages.return_value = ChatMessage(
+        role="system", content="Error: API request timed out"
+    )
+
+    for i in range(20):
+        for message in turns(1, start=i):
+            history_manager.add_message(message)
+        history_manager.request_summary()
+        await asyncio.sleep(0)
+
+    await asyncio.sleep(0.1)
+
+    assert len(history_manager.history) == 5
+    assert history_manager.history[-1].content == "Test Robot did 19"
+
+
+@pytest.mark.asyncio
+async def test_messages_added_during_summary_are_kept(history_manager):
+    release = asyncio.Event()
+    summarized = []
+
+    async def slow_summary(messages, previous=None):
+        await release.wait()
+        summarized.append(list(messages))
+        return ChatMessage(role="assistant", content=f"Summary of {len(messages)}")
+
+    history_manager.summarize_messages = slow_summary
+    for message in turns(3):
+        history_manager.add_message(message)
+    history_manager.request_summary()
+
+    # the next ticks append while the summary is in flight
+    later = turns(3, start=3)
+    for message in later:
+        history_manager.add_message(message)
+        history_manager.request_summary()
+    assert history_manager.get_messages()[-1]["content"] == "Test Robot did 5"
+
+    release.set()
+    await asyncio.sleep(0.1)
+
+    # the coalesced follow-up summarizes exactly the messages added meanwhile
+    assert summarized == [turns(3), later]
+    assert history_manager.summary.content == "Summary of 6"
+    assert history_manager.history == []
+
+
+@pytest.mark.asyncio
+async def test_summaries_are_coalesced(history_manager):
+    calls = []
+
+    async def slow_summary(messages, previous=None):
+        calls.append(len(messages))
+        await asyncio.sleep(0.05)
+        return ChatMessage(role="assistant", content="Summary")
+
+    history_manager.summarize_messages = slow_summary
+    for i in range(10):
+        for message in turns(1, start=i):
+            history_manager.add_message(message)
+        history_manager.request_summary()
+
+    await asyncio.sleep(0.3)
+
+    # one task for the first three turns, one for everything after
+    assert calls == [6, 14]
+
+
+def test_prompt_is_bounded_while_summarizer_is_behind(llm_config, openai_client):
+    manager = LLMHistoryManager(llm_config, openai_client, max_pending=8)
+    for message in turns(10):
+        manager.add_message(message)
+
+    assert len(manager.get_messages()) == llm_config.history_length
+    assert len(manager.history) == 8
+    assert manager.dropped_messages == 12
+    assert manager.history[-1].content == "Test Robot did 9"
+
+
+@pytest.fixture
+def budget_manager(llm_config, openai_client):
+    llm_config.history_token_budget = 200
+    return LLMHistoryManager(llm_config, openai_client)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens(ChatMessage(role="user", content="")) == 4
+    assert estimate_tokens(ChatMessage(role="user", content="a" * 40)) == 14
+
+
+def test_truncate_to_tokens():
+    message = ChatMessage(role="user", content="word " * 100)
+
+    truncated = truncate_to_tokens(message, 20)
+
+    assert estimate_tokens(truncated) <= 20
+    assert truncated.content.endswith("...")
+    assert truncate_to_tokens(truncated, 20) is truncated
+
+
+@pytest.mark.asyncio
+async def test_token_budget_rolls_old_turns_into_summary(budget_manager):
+    for i in range(20):
+        budget_manager.add_message(
+            ChatMessage(role="user", content=f"Test Robot sensed input {i} " * 5)
+        )
+        budget_manager.add_message(
+            ChatMessage(role="user", content=f"Test Robot took action {i}")
+        )
+        assert budget_manager.history_tokens() <= budget_manager.token_budget
+        budget_manager.request_summary()
+        await asyncio.sleep(0)
+
+    await asyncio.sleep(0.1)
+
+    assert budget_manager.summary.content == "Previously, This is a test summary"
+    # the latest turn is kept verbatim
+    assert budget_manager.history[-1].content == "Test Robot took action 19"
+    messages = budget_manager.get_messages()
+    assert messages[0]["content"] == budget_manager.summary.content
+    assert budget_manager.history_tokens() <= budget_manager.token_budget
+
+
+@pytest.mark.asyncio
+async def test_token_budget_summary_is_incremental(budget_manager):
+    budget_manager.summary = ChatMessage(role="assistant", content="Previously, old")
+    budget_manager.add_message(ChatMessage(role="user", content="new turn " * 60))
+    budget_manager.add_message(ChatMessage(role="user", content="newer turn " * 60))
+    for message in turns(2):
+        budget_manager.add_message(message)
+
+    budget_manager.request_summary()
     await asyncio.sleep(0.1)
 
-    assert len(messages) == 0
+    (call,) = budget_manager.client.chat.completions.create.call_args_list
+    prompt = call.kwargs["messages"][1]["content"]
+    assert prompt.startswith("Previously, old\n")
+    assert "new turn" in prompt
+    assert "newer turn" not in prompt
+    assert "Test Robot did 1" not in prompt
+    assert budget_manager.history[-1].content == "Test Robot did 1"
+
+
+def test_token_budget_shortens_verbose_inputs(budget_manager):
+    budget_manager.add_message(ChatMessage(role="user", content="x" * 10000))
+
+    assert budget_manager.history_tokens() <= budget_manager.token_budget
+
+
+@pytest.mark.asyncio
+async def test_history_is_restored_after_restart(llm_config, openai_client, tmp_path):
+    llm_config.history_file = str(tmp_path / "history.omhist")
+    manager = LLMHistoryManager(llm_config, openai_client)
+    for message in turns(3):
+        manager.add_message(message)
+    manager.request_summary()
+    await asyncio.sleep(0.1)
+    for message in turns(1, start=3):
+        manager.add_message(message)
+    manager.advance_frame()
+    manager.advance_frame()
+    manager.close()
+
+    restarted = LLMHistoryManager(llm_config, openai_client)
+
+    assert restarted.summary == manager.summary
+    assert restarted.summary.content == "Previously, This is a test summary"
+    assert restarted.history == turns(1, start=3)
+    assert restarted.frame_index == 2
+    assert restarted.get_messages() == manager.get_messages()
+    restarted.close()
+
+
+class HistoryLLM:
+    def __init__(self, config, client):
+        self._config = config
+        self.history_manager = LLMHistoryManager(config, client)
+        self.io_provider = SimpleNamespace(inputs={})
+        self.sent = []
+
+    @LLMHistoryManager.update_history()
+    async def ask(self, prompt, messages, delay=0.0):
+        self.sent.append(messages)
+        await asyncio.sleep(delay)
+        return CortexOutputModel(actions=[Action(type="speak", value=prompt)])
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_add_whole_turns(llm_config, openai_client):
+    llm_config.history_length = 10
+    llm = HistoryLLM(llm_config, openai_client)
+
+    llm.io_provider.inputs = {"Voice": SimpleNamespace(input="first")}
+    slow = asyncio.create_task(llm.ask("one", delay=0.05))
+    await asyncio.sleep(0)
+    llm.io_provider.inputs = {"Voice": SimpleNamespace(input="second")}
+    await llm.ask("two", delay=0.01)
+    await slow
+
+    # each request sees its own inputs last
+    assert "first" in llm.sent[0][-1]["content"]
+    assert "second" in llm.sent[1][-1]["content"]
+    # the turns are added whole, in the order they completed
+    contents = [message.content for message in llm.history_manager.history]
+    assert len(contents) == 4
+    assert "second" in contents[0] and "said: two" in contents[1]
+    assert "first" in contents[2] and "said: one" in contents[3]
+    assert llm.history_manager.frame_index == 2
@@ -0,0 +1,156 @@
+import numpy as np
+import pytest
+
+from providers.memory_index import MemoryIndex, hashing_embedding, load_embedding
+
+
+def test_hashing_embedding():
+    vectors = hashing_embedding(
+        ["Alice asked about the red ball", "the red ball", "battery low", ""]
+    )
+
+    assert vectors.shape == (4, 256)
+    assert vectors.dtype == np.float32
+    np.testing.assert_allclose(np.linalg.norm(vectors[:3], axis=1), 1.0, rtol=1e-5)
+    assert not vectors[3].any()
+    # similar texts are closer than unrelated ones
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+    # stable across calls
+    np.testing.assert_array_equal(
+        vectors,
+        hashing_embedding(
+            ["Alice asked about the red ball", "the red ball", "battery low", ""]
+        ),
+    )
+
+
+def test_load_embedding():
+    assert load_embedding("providers.memory_index:hashing_embedding") is (
+        hashing_embedding
+    )
+    with pytest.raises(ValueError):
+        load_embedding("hashing_embedding")
+
+
+def test_search_finds_the_most_similar_memories():
+    index = MemoryIndex(min_score=0.0)
+    index.add(
+        [
+            "Voice: my name is Alice -> speak: Nice to meet you, Alice",
+            "Battery: battery at 80 percent -> move: walk forward",
+            "Vision: a red ball on the floor -> speak: I see a red ball",
+        ]
+    )
+
+    memories = index.search("where is the red ball", k=2)
+
+    assert len(index) == 3
+    assert len(memories) == 2
+    assert "red ball" in memories[0].text
+    assert memories[0].score >= memories[1].score
+
+
+def test_search_empty_index():
+    assert MemoryIndex().search("anything") == []
+
+
+def test_recall_stays_within_token_budget():
+    index = MemoryIndex(top_k=10, min_score=0.0, token_budget=40)
+    index.add(["red ball " * 20, "red ball in the garden", "the red ball is mine"])
+
+    memories = index.recall("red ball")
+
+    # the long memory does not fit, the shorter ones do
+    assert sorted(m.text for m in memories) == [
+        "red ball in the garden",
+        "the red ball is mine",
+    ]
+
+
+def test_long_memories_are_shortened():
+    index = MemoryIndex(max_memory_tokens=10)
+    index.add("word " * 100)
+
+    assert len(index.texts[0]) == 40
+    assert index.texts[0].endswith("...")
+
+
+def test_pluggable_embedding():
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return np.ones((len(texts), 4))
+
+    index = MemoryIndex(dim=4, embedding=embed)
+    index.add(["a", "b"])
+    assert index.search("c", k=1)[0].score == pytest.approx(1.0)
+    assert calls == [["a", "b"], ["c"]]
+
+    with pytest.raises(ValueError):
+        MemoryIndex(dim=8, embedding=embed).add("a")
+
+
+def test_approximate_search_matches_exact_search():
+    rng = np.random.default_rng(1)
+    words = [f"w{i}" for i in range(500)]
+    texts = [" ".join(rng.choice(words, 8)) for _ in range(3000)]
+    exact = MemoryIndex(exact_below=10000, min_score=0.0)
+    approximate = MemoryIndex(exact_below=0, min_score=0.0)
+    exact.add(texts)
+    approximate.add(texts)
+    approximate.wait_for_training()
+
+    recalled = 0
+    for text in texts[:50]:
+        query = " ".join(text.split()[:6])
+        best = exact.search(query, k=1)[0].text
+        recalled += best in [m.text for m in approximate.search(query, k=5)]
+
+    assert len(approximate) == 3000
+    assert approximate.vectors.shape == (3000, 256)
+    assert recalled >= 45
+
+
+def test_duplicates_are_not_added():
+    index = MemoryIndex()
+    index.add("Vision: a red ball on the floor -> speak: I see a red ball")
+    index.add("Vision: a red ball on the floor -> speak: I see a red ball")
+    index.add(["Battery: battery at 80 percent", "Battery: battery at 80 percent"])
+
+    assert len(index) == 2
+
+
+def test_recent_memories_are_not_searched():
+    index = MemoryIndex(min_score=0.0, exclude_recent=1)
+    index.add(["the red ball is in the garden", "the red ball is in the kitchen"])
+
+    assert [m.text for m in index.search("red ball")] == [
+        "the red ball is in the garden"
+    ]
+
+
+def test_oldest_memories_are_evicted():
+    index = MemoryIndex(max_memories=16, min_score=0.0)
+    for i in range(20):
+        index.add(f"memory {i} " + " ".join(f"w{i}x{j}" for j in range(4)))
+
+    assert len(index) == 16
+    assert index.evicted == 4
+    assert index.texts[0].startswith("memory 4 ")
+    assert index.search("memory 19 w19x0", k=1)[0].text.startswith("memory 19 ")
+
+
+def test_clustering_runs_in_the_background():
+    rng = np.random.default_rng(2)
+    words = [f"w{i}" for i in range(500)]
+    index = MemoryIndex(exact_below=100, max_memories=400, min_score=0.0)
+    # memories are added and evicted while the clustering runs
+    for _ in range(8):
+        index.add([" ".join(rng.choice(words, 8)) for _ in range(100)])
+    index.wait_for_training()
+
+    assert index._centroids is not None
+    assert sorted(i for lst in index._lists for i in lst) == list(range(len(index)))
+    text = index.texts[-1]
+    assert index.search(text, k=1)[0].text == text
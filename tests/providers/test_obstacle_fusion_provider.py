@@ -0,0 +1,178 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from providers.obstacle_fusion_provider import (
+    HAZARD_BACKUP_LIMIT,
+    HAZARD_BUMP,
+    HAZARD_OBJECT_PROXIMITY,
+    ObstacleFusionProvider,
+    ObstacleSource,
+    hazard_bearing,
+)
+from providers.singleton import singleton
+from zenoh_idl.sensor_msgs import HazardDetection, HazardDetectionVector
+from zenoh_idl.std_msgs import Header, Time
+
+
+@pytest.fixture
+def fusion():
+    singleton.instances = {}
+    with patch("providers.rplidar_provider.OdomProvider", MagicMock()):
+        yield ObstacleFusionProvider()
+    singleton.instances = {}
+
+
+def open_scan(distance=3.0):
+    """A scan without relevant obstacles, so every path is valid."""
+    return np.column_stack((np.arange(0.0, 360.0, 1.0), np.full(360, distance)))
+
+
+def hazards(*detections):
+    return HazardDetectionVector(
+        header=Header(stamp=Time(sec=0, nanosec=0), frame_id="base_link"),
+        detections=[
+            HazardDetection(
+                header=Header(stamp=Time(sec=0, nanosec=0), frame_id=frame_id),
+                type=hazard_type,
+            )
+            for hazard_type, frame_id in detections
+        ],
+    )
+
+
+@pytest.mark.parametrize(
+    "hazard_type, frame_id, bearing",
+    [
+        (HAZARD_BUMP, "bump_front_center", 0.0),
+        (HAZARD_BUMP, "bump_front_left", -45.0),
+        (HAZARD_BUMP, "bump_right", 90.0),
+        (HAZARD_BACKUP_LIMIT, "base_link", 180.0),
+    ],
+)
+def test_hazard_bearing(hazard_type, frame_id, bearing):
+    assert hazard_bearing(hazard_type, frame_id) == bearing
+
+
+def test_no_scan_means_no_clear_path(fusion):
+    assert fusion.clear_paths == ()
+    assert not fusion.is_path_clear(4)
+
+
+def test_lidar_paths(fusion):
+    fusion.lidar._path_processor(open_scan())
+
+    assert fusion.clear_paths == tuple(range(10))
+    assert fusion.is_path_clear(4)
+
+
+def test_bump_blocks_paths_towards_it(fusion):
+    fusion.lidar._path_processor(open_scan())
+    callback = MagicMock()
+    fusion.register_hazard_callback(callback)
+
+    fusion.add_hazards(hazards((HAZARD_BUMP, "bump_front_left")))
+
+    # -60 to +15 deg are within 60 deg of the bump
+    assert fusion.clear_paths == (6, 7, 8, 9)
+    assert fusion.nearest_obstacle(-45.0, tolerance=1.0) == pytest.approx(
+        fusion.lidar.half_width_robot
+    )
+    (events,) = callback.call_args.args
+    assert events[0].bearing == -45.0
+
+
+def test_proximity_and_backup_limit_do_not_block(fusion):
+    fusion.lidar._path_processor(open_scan())
+
+    fusion.add_hazards(
+        hazards(
+            (HAZARD_OBJECT_PROXIMITY, "ir_intensity_front_center_left"),
+            (HAZARD_OBJECT_PROXIMITY, "ir_intensity_front_center_right"),
+            (HAZARD_BACKUP_LIMIT, "base_link"),
+        )
+    )
+
+    assert fusion.is_path_clear(4)
+    assert fusion.is_path_clear(9)
+    assert len(fusion.state.hazards) == 3
+    assert fusion.nearest_obstacle(0.0) is None
+
+
+def test_blocking_hazards_are_configurable(fusion):
+    fusion.lidar._path_processor(open_scan())
+    fusion.blocking_hazards = frozenset({HAZARD_OBJECT_PROXIMITY})
+
+    fusion.add_hazards(
+        hazards((HAZARD_OBJECT_PROXIMITY, "ir_intensity_front_center_left"))
+    )
+
+    assert not fusion.is_path_clear(4)
+
+
+def test_hazards_are_subscribed_once(fusion):
+    with (
+        patch("providers.obstacle_fusion_provider.zenoh.open") as zenoh_open,
+        patch("providers.obstacle_fusion_provider.logging.warning") as warning,
+    ):
+        fusion.subscribe_hazards("robot1")
+        fusion.subscribe_hazards("robot1")
+        warning.assert_not_called()
+        fusion.subscribe_hazards("robot2")
+
+    zenoh_open.return_value.declare_subscriber.assert_called_once()
+    assert "robot1/c3/hazard_detection" in str(
+        zenoh_open.return_value.declare_subscriber.call_args
+    )
+    warning.assert_called_once()
+    assert "robot2" in warning.call_args[0][0]
+
+
+def test_hazards_expire(fusion):
+    fusion.lidar._path_processor(open_scan())
+    fusion.hazard_ttl = 0.0
+
+    fusion.add_hazards(hazards((HAZARD_BUMP, "bump_front_center")))
+
+    assert fusion.is_path_clear(4)
+    assert fusion.state.hazards == []
+
+
+def test_detection_blocks_paths_through_it(fusion):
+    fusion.lidar._path_processor(open_scan())
+
+    fusion.add_detection(bearing=0.0, distance=0.5)
+
+    assert not fusion.is_path_clear(4)
+    assert fusion.is_path_clear(0)
+    assert fusion.is_path_clear(9)
+    assert fusion.nearest_obstacle(0.0) == pytest.approx(0.5)
+    assert ObstacleSource.VISION.value in fusion.state.sources
+
+
+def test_nearest_obstacle_from_lidar(fusion):
+    scan = open_scan()
+    # the sensor is mounted backwards, so its 0 deg is straight ahead
+    scan[0] = [0.0, 0.6]
+    fusion.lidar._path_processor(scan)
+
+    assert fusion.nearest_obstacle(0.0) == pytest.approx(0.6)
+    assert fusion.nearest_obstacle(90.0) is None
+
+
+def test_state_is_cached_until_a_source_changes(fusion):
+    fusion.lidar._path_processor(open_scan())
+
+    state = fusion.state
+    assert fusion.state is state
+
+    fusion.add_detection(bearing=30.0, distance=0.4)
+    assert fusion.state is not state
+
+
+def test_stale_scan(fusion):
+    fusion.lidar._path_processor(open_scan())
+    fusion.max_scan_age = 0.0
+
+    assert fusion.clear_paths == ()
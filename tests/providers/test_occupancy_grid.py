@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from providers.occupancy_grid import OccupancyGrid
+from providers.rplidar_paths import PathFeasibilityEngine
+
+
+def nearest(points, x, y):
+    return points[np.argmin(np.hypot(points[:, 0] - x, points[:, 1] - y))]
+
+
+def test_hit_marks_cell_occupied():
+    grid = OccupancyGrid(resolution=0.05, size=3.0)
+
+    grid.update(np.array([[0.0, 1.0]]))
+    occupied = grid.occupied_points()
+
+    assert len(occupied) == 1
+    assert occupied[0] == pytest.approx([0.0, 1.0], abs=0.05)
+
+
+def test_obstacle_persists_for_memory_scans():
+    grid = OccupancyGrid(memory_scans=5)
+    for _ in range(10):
+        grid.update(np.array([[0.3, 0.6]]))
+
+    # the obstacle drops out of the scans
+    remaining = []
+    for _ in range(6):
+        grid.update(np.empty((0, 2)))
+        remaining.append(len(grid.occupied_points()))
+
+    assert remaining[:4] == [1, 1, 1, 1]
+    assert remaining[-1] == 0
+
+
+def test_free_rays_clear_cells():
+    grid = OccupancyGrid(memory_scans=50)
+    for _ in range(3):
+        grid.update(np.array([[0.0, 0.5]]))
+
+    # the obstacle moved away, the ray to the new return passes through it
+    for _ in range(20):
+        grid.update(np.array([[0.0, 1.2]]))
+
+    occupied = grid.occupied_points()
+    assert len(occupied) == 1
+    assert occupied[0] == pytest.approx([0.0, 1.2], abs=0.05)
+
+
+def test_obstacle_stays_in_place_when_robot_moves():
+    grid = OccupancyGrid(resolution=0.05, size=3.0)
+    grid.update(np.array([[0.0, 1.0]]), pose=(0.0, 0.0, 0.0))
+
+    # drive 0.5 m forwards, along the odom x axis
+    grid.update(np.empty((0, 2)), pose=(0.5, 0.0, 0.0))
+
+    assert nearest(grid.occupied_points(), 0.0, 0.5) == pytest.approx(
+        [0.0, 0.5], abs=0.05
+    )
+
+
+def test_obstacle_rotates_with_robot():
+    grid = OccupancyGrid(resolution=0.05, size=3.0)
+    grid.update(np.array([[0.0, 1.0]]), pose=(0.0, 0.0, 0.0))
+
+    # turn 90 deg to the left, the obstacle is now on the right
+    grid.update(np.empty((0, 2)), pose=(0.0, 0.0, 90.0))
+
+    assert nearest(grid.occupied_points(), 1.0, 0.0) == pytest.approx(
+        [1.0, 0.0], abs=0.05
+    )
+
+
+def test_cells_leaving_the_grid_are_dropped():
+    grid = OccupancyGrid(resolution=0.05, size=3.0)
+    grid.update(np.array([[0.0, 1.0]]), pose=(0.0, 0.0, 0.0))
+
+    grid.update(np.empty((0, 2)), pose=(-5.0, 0.0, 0.0))
+
+    assert len(grid.occupied_points()) == 0
+    assert grid.log_odds.shape == (61, 61)
+
+
+def test_probabilities_and_clear():
+    grid = OccupancyGrid()
+    grid.update(np.array([[0.0, 1.0]]))
+
+    probabilities = grid.probabilities()
+    assert probabilities.max() > 0.5
+    assert probabilities.min() < 0.5
+
+    grid.clear()
+    assert np.all(grid.probabilities() == 0.5)
+
+
+def test_points_from_xy_inverts_to_points():
+    engine = PathFeasibilityEngine(
+        [np.array([[0.0, 0.0], [0.0, 1.0]])],
+        half_width_robot=0.2,
+        relevant_distance_min=0.08,
+        relevant_distance_max=1.1,
+        sensor_mounting_angle=180.0,
+    )
+    data = np.column_stack((np.arange(0.5, 360.0, 7.0), np.full(52, 0.8)))
+    points, _ = engine.to_points(data)
+
+    converted = engine.points_from_xy(points[:, 0], points[:, 1])
+
+    np.testing.assert_allclose(converted, points, atol=1e-9)
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from providers.rplidar_driver import (
+    EXPRESS_PACKET_SIZE,
+    ExpressPacket,
+    ExpressScanDecoder,
+    _process_express_scan,
+    decode_express_packets,
+)
+
+
+def make_packet(rng, start_angle):
+    """Build an express packet with random measurements and a valid checksum."""
+    packet = bytearray(EXPRESS_PACKET_SIZE)
+    raw_angle = int(start_angle * 64) & 0x7FFF
+    packet[2] = raw_angle & 0xFF
+    packet[3] = raw_angle >> 8
+    packet[4:] = rng.integers(0, 256, EXPRESS_PACKET_SIZE - 4, dtype=np.uint8).tobytes()
+
+    checksum = 0
+    for b in packet[2:]:
+        checksum ^= b
+    packet[0] = 0xA0 | (checksum & 0x0F)
+    packet[1] = 0x50 | (checksum >> 4)
+    return bytes(packet)
+
+
+def make_stream(rng, num_packets, step=11.25):
+    return [make_packet(rng, (i * step) % 360) for i in range(num_packets)]
+
+
+def reference_scans(packets, min_len, max_distance_mm):
+    """The per measure decoding of RPDriver.iter_scans_local."""
+    scans = []
+    scan_list = []
+    decoded = [ExpressPacket.from_string(p) for p in packets]
+    for old, new in zip(decoded[:-1], decoded[1:]):
+        for trame in range(1, 33):
+            new_scan, _, angle, distance = _process_express_scan(
+                old, new.start_angle, trame
+            )
+            if new_scan:
+                if len(scan_list) > min_len:
+                    scans.append(scan_list)
+                scan_list = []
+            if distance > 0 and distance < max_distance_mm:
+                scan_list.append((angle, distance))
+    return scans
+
+
+def test_decode_matches_express_packet():
+    rng = np.random.default_rng(0)
+    packets = make_stream(rng, 20)
+
+    valid, start_angle, distance, angle = decode_express_packets(b"".join(packets))
+
+    assert valid.all()
+    for i, packet in enumerate(packets):
+        expected = ExpressPacket.from_string(packet)
+        assert start_angle[i] == pytest.approx(expected.start_angle)
+        assert distance[i].tolist() == list(expected.distance)
+        assert angle[i].tolist() == pytest.approx(list(expected.angle))
+
+
+@pytest.mark.parametrize("chunk", [EXPRESS_PACKET_SIZE, 5 * EXPRESS_PACKET_SIZE, 1000])
+def test_scans_match_per_measure_decoding(chunk):
+    rng = np.random.default_rng(1)
+    packets = make_stream(rng, 200)
+    data = b"".join(packets)
+
+    decoder = ExpressScanDecoder(min_len=5, max_distance_mm=8000)
+    scans = []
+    for i in range(0, len(data), chunk):
+        scans.extend(decoder.feed(data[i : i + chunk]))
+
+    expected = reference_scans(packets, 5, 8000)
+    assert len(scans) == len(expected) > 0
+    for scan, reference in zip(scans, expected):
+        assert scan.shape == (len(reference), 2)
+        np.testing.assert_allclose(scan, np.array(reference))
+
+
+def test_bad_checksum_drops_packet():
+    rng = np.random.default_rng(2)
+    packets = make_stream(rng, 100)
+    corrupted = bytearray(packets[40])
+    corrupted[10] ^= 0xFF
+    packets[40] = bytes(corrupted)
+
+    valid, _, _, _ = decode_express_packets(b"".join(packets))
+    assert not valid[40]
+    assert valid.sum() == 99
+
+    # the measurements of packets 39 and 40 need the corrupted packet
+    decoder = ExpressScanDecoder(min_len=0, max_distance_mm=1e9)
+    scans = decoder.feed(b"".join(packets))
+    decoded = sum(len(s) for s in scans) + sum(len(s) for s in decoder._scan)
+
+    expected = sum(
+        sum(1 for d in ExpressPacket.from_string(p).distance if d > 0)
+        for i, p in enumerate(packets[:-1])
+        if i not in (39, 40)
+    )
+    assert decoded == expected
+
+
+def test_sync_mismatch_raises():
+    rng = np.random.default_rng(3)
+    data = bytearray(b"".join(make_stream(rng, 3)))
+    data[EXPRESS_PACKET_SIZE] = 0x00
+
+    with pytest.raises(ValueError):
+        ExpressScanDecoder().feed(bytes(data))
+
+
+def test_partial_packets_are_kept():
+    rng = np.random.default_rng(4)
+    data = b"".join(make_stream(rng, 100))
+
+    decoder = ExpressScanDecoder(min_len=0, max_distance_mm=1e9)
+    whole = ExpressScanDecoder(min_len=0, max_distance_mm=1e9).feed(data)
+    split = decoder.feed(data[:1001]) + decoder.feed(data[1001:])
+
+    assert len(split) == len(whole)
+    for a, b in zip(split, whole):
+        np.testing.assert_array_equal(a, b)
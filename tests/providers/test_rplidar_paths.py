@@ -0,0 +1,247 @@
+import math
+
+import numpy as np
+import pytest
+
+from providers.rplidar_paths import (
+    PathBlockingTable,
+    PathClearanceScorer,
+    PathFeasibilityEngine,
+    arc_paths,
+    bezier_paths,
+)
+
+PATH_ANGLES = [-60, -45, -30, -15, 0, 15, 30, 45, 60, 180]
+
+
+def make_paths():
+    paths = []
+    for angle in PATH_ANGLES:
+        end_x = math.sin(math.radians(angle))
+        end_y = math.cos(math.radians(angle))
+        paths.append(
+            np.array([np.linspace(0.0, end_x, 30), np.linspace(0.0, end_y, 30)])
+        )
+    return paths
+
+
+def make_engine(**kwargs):
+    config = {
+        "half_width_robot": 0.20,
+        "relevant_distance_min": 0.08,
+        "relevant_distance_max": 1.1,
+        "sensor_mounting_angle": 180.0,
+    }
+    config.update(kwargs)
+    return PathFeasibilityEngine(make_paths(), **config)
+
+
+def scalar_distance(px, py, x1, y1, x2, y2):
+    dx, dy = x2 - x1, y2 - y1
+    if dx == 0 and dy == 0:
+        return math.hypot(px - x1, py - y1)
+    t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+
+def scalar_blocked(engine, paths, data):
+    """Reference implementation with the per point loops of the provider."""
+    blocked = set()
+    for angle, d in data:
+        angle = (angle + engine.sensor_mounting_angle) % 360.0
+        if d > engine.relevant_distance_max or d < engine.relevant_distance_min:
+            continue
+        a_rad = math.radians(angle)
+        x, y = -d * math.sin(a_rad), -d * math.cos(a_rad)
+        for i, path in enumerate(paths):
+            dist = scalar_distance(
+                x, y, path[0][0], path[1][0], path[0][-1], path[1][-1]
+            )
+            if dist < engine.half_width_robot:
+                blocked.add(i)
+    return blocked
+
+
+def test_matches_scalar_reference():
+    rng = np.random.default_rng(0)
+    engine = make_engine()
+    paths = make_paths()
+
+    for _ in range(20):
+        data = np.column_stack((rng.uniform(0, 360, 400), rng.uniform(0.05, 3.0, 400)))
+        result = engine.process(data, range(10))
+        expected = scalar_blocked(engine, paths, data)
+
+        assert set(np.flatnonzero(result.blocked)) == expected
+        assert set(result.possible_paths) == set(range(10)) - expected
+
+
+def test_obstacle_ahead_blocks_forward_paths():
+    engine = make_engine()
+    # with the sensor mounted backwards, its zero points ahead
+    data = np.array([[0.0, 0.5], [90.0, 5.0]])
+
+    result = engine.process(data, range(10))
+
+    assert 4 not in result.possible_paths
+    assert 9 in result.possible_paths
+    assert result.points.shape == (1, 4)
+    assert result.points[0, 1] == pytest.approx(0.5)
+    assert result.raw.shape == (2, 2)
+
+
+def test_angles_blanked_are_ignored():
+    data = np.array([[0.0, 0.5]])
+
+    result = make_engine(angles_blanked=[[-5.0, 5.0]]).process(data, range(10))
+
+    assert len(result.points) == 0
+    assert result.possible_paths.tolist() == list(range(10))
+
+
+def test_candidate_paths_subset():
+    result = make_engine().process(np.array([[0.0, 0.5]]), [4])
+    assert result.possible_paths.tolist() == []
+
+    result = make_engine().process(np.empty((0, 2)), [4])
+    assert result.possible_paths.tolist() == [4]
+
+
+def test_lookup_table_matches_exact_check_away_from_bin_edges():
+    exact = make_engine()
+    engine = make_engine()
+    engine.use_lookup_table()
+
+    rng = np.random.default_rng(1)
+    data = np.column_stack((rng.uniform(0, 360, 2000), rng.uniform(0.1, 1.1, 2000)))
+    points, _ = exact.to_points(data)
+    distances = exact.distances(points[:, 0], points[:, 1])
+
+    for point, distance in zip(points, distances):
+        expected = exact.blocked_paths(point[None, :])
+        blocked = engine.blocked_paths(point[None, :])
+        # a bin is evaluated at its center with a margin of half its
+        # diagonal, together at most ~1.5 cm
+        near_edge = np.abs(distance - exact.half_width_robot) < 0.015
+        assert np.array_equal(blocked[~near_edge], expected[~near_edge])
+
+
+def test_lookup_table_never_clears_blocked_paths():
+    exact = make_engine()
+    engine = make_engine()
+    engine.use_lookup_table()
+
+    rng = np.random.default_rng(3)
+    data = np.column_stack((rng.uniform(0, 360, 20000), rng.uniform(0.08, 1.1, 20000)))
+    points, _ = exact.to_points(data)
+
+    expected = exact.distances(points[:, 0], points[:, 1]) < exact.half_width_robot
+    for point, blocked in zip(points, expected):
+        assert np.all(engine.blocked_paths(point[None, :])[blocked])
+
+
+def test_lookup_table_scan():
+    engine = make_engine()
+    engine.use_lookup_table()
+
+    result = engine.process(np.array([[0.0, 0.5], [90.0, 5.0]]), range(10))
+
+    assert 4 not in result.possible_paths
+    assert 9 in result.possible_paths
+
+
+def test_lookup_table_save_and_load(tmp_path):
+    path = str(tmp_path / "lut" / "paths.npz")
+    engine = make_engine()
+
+    built = PathBlockingTable.load_or_build(engine, path)
+    loaded = PathBlockingTable.load(path)
+
+    assert loaded.key == built.key
+    assert np.array_equal(loaded.table, built.table)
+    assert loaded.angle_resolution == built.angle_resolution
+    assert loaded.range_resolution == built.range_resolution
+    assert loaded.num_paths == 10
+
+
+def test_stale_lookup_table_is_rebuilt(tmp_path):
+    path = str(tmp_path / "paths.npz")
+    PathBlockingTable.load_or_build(make_engine(), path)
+
+    wider = make_engine(half_width_robot=0.3)
+    table = PathBlockingTable.load_or_build(wider, path)
+
+    assert table.key == PathBlockingTable.parameters_key(wider, 0.5, 0.01)
+    assert PathBlockingTable.load(path).key == table.key
+
+
+def test_clearance_of_possible_paths():
+    engine = make_engine()
+    # an obstacle 0.5 m ahead and 0.3 m to the right
+    data = np.array([[math.degrees(math.atan2(-0.3, 0.5)) % 360, math.hypot(0.3, 0.5)]])
+
+    result = engine.process(data, range(10))
+
+    assert result.clearance[4] == pytest.approx(0.3)
+    assert result.clearance[9] == pytest.approx(math.hypot(0.3, 0.5))
+    assert np.all(result.clearance[result.blocked] == 0.0)
+
+
+def test_clearance_with_lookup_table_matches_exact():
+    rng = np.random.default_rng(2)
+    data = np.column_stack((rng.uniform(0, 360, 50), rng.uniform(0.3, 3.0, 50)))
+    engine = make_engine()
+    lookup = make_engine()
+    lookup.use_lookup_table()
+
+    exact = engine.process(data, range(10))
+    result = lookup.process(data, exact.possible_paths)
+
+    # left to be computed on demand
+    assert result.clearance is None
+    np.testing.assert_allclose(
+        lookup.clearance(result.points, exact.possible_paths),
+        exact.clearance[exact.possible_paths],
+    )
+
+
+def test_arc_paths():
+    straight, right, left = arc_paths([0.0, 90.0, -90.0], length=1.0, num_points=50)
+
+    assert straight[:, -1] == pytest.approx([0.0, 1.0])
+    # a quarter circle of radius 2 / pi
+    radius = 2 / math.pi
+    assert right[:, -1] == pytest.approx([radius, radius])
+    assert left[:, -1] == pytest.approx([-radius, radius])
+    # the arc length is the path length
+    assert np.hypot(*np.diff(right, axis=1)).sum() == pytest.approx(1.0, rel=1e-3)
+
+
+def test_bezier_paths_leave_straight_ahead():
+    (path,) = bezier_paths([45.0], length=1.0, num_points=20)
+
+    assert path[:, 0] == pytest.approx([0.0, 0.0])
+    assert path[:, -1] == pytest.approx([math.sqrt(0.5), math.sqrt(0.5)])
+    assert path[0, 1] == pytest.approx(0.0, abs=0.01)
+
+
+def test_clearance_scorer_matches_brute_force():
+    paths = arc_paths(np.linspace(-120, 120, 64), num_points=10)
+    scorer = PathClearanceScorer(paths, max_clearance=1.1)
+    rng = np.random.default_rng(3)
+    points = rng.uniform(-1.0, 1.0, (40, 2))
+
+    clearance = scorer.clearance(points)
+
+    assert clearance.shape == (64,)
+    for path, value in zip(paths, clearance):
+        expected = min(
+            scalar_distance(px, py, x1, y1, x2, y2)
+            for px, py in points
+            for x1, y1, x2, y2 in zip(
+                path[0][:-1], path[1][:-1], path[0][1:], path[1][1:]
+            )
+        )
+        assert value == pytest.approx(min(expected, 1.1))
+    assert scorer.clearance(np.empty((0, 2))).tolist() == [1.1] * 64
+    assert scorer.headings[[0, 32, 63]] == pytest.approx([-60, 0.95, 60], abs=1)
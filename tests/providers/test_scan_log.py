@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from providers.scan_log import FILE_HEADER_SIZE, ScanLogReader, ScanLogWriter
+
+
+def make_scan(n, offset=0.0):
+    return np.column_stack((np.linspace(0.0, 359.0, n), np.full(n, 1.0 + offset)))
+
+
+def odom(x):
+    return {
+        "odom_rockchip_ts": 10.0 + x,
+        "odom_subscriber_ts": 20.0 + x,
+        "odom_x": x,
+        "odom_y": -x,
+        "odom_yaw_m180_p180": 45.0,
+        "odom_yaw_0_360": 45.0,
+    }
+
+
+def test_round_trip(tmp_path):
+    writer = ScanLogWriter(
+        directory=str(tmp_path), max_points=64, sensor_mounting_angle=180.0
+    )
+    scans = [make_scan(n, offset=i) for i, n in enumerate([10, 64, 1])]
+    for i, scan in enumerate(scans):
+        assert writer.log(scan, odom(i))
+    writer.close()
+
+    reader = ScanLogReader(writer.filename)
+    assert len(reader) == 3
+    assert reader.sensor_mounting_angle == 180.0
+    for i, (scan, state) in enumerate(reader):
+        np.testing.assert_allclose(scan, scans[i], rtol=1e-6)
+        assert state["odom_x"] == i
+        assert state["odom_subscriber_ts"] == 20.0 + i
+    assert np.all(np.diff(reader.timestamps) >= 0)
+    reader.close()
+
+
+def test_file_is_truncated_on_close(tmp_path):
+    writer = ScanLogWriter(directory=str(tmp_path), max_points=16, records_per_file=50)
+    writer.log(make_scan(16))
+    writer.close()
+
+    assert (tmp_path / writer.filename.split("/")[-1]).stat().st_size == (
+        FILE_HEADER_SIZE + writer.dtype.itemsize
+    )
+
+
+def test_rolls_over_to_new_file(tmp_path):
+    writer = ScanLogWriter(directory=str(tmp_path), max_points=8, records_per_file=2)
+    for i in range(5):
+        writer.log(make_scan(8, offset=i))
+    writer.close()
+
+    files = sorted(tmp_path.glob("*.rpscan"))
+    assert [len(ScanLogReader(str(f))) for f in files] == [2, 2, 1]
+
+
+def test_long_scans_are_truncated(tmp_path):
+    writer = ScanLogWriter(directory=str(tmp_path), max_points=4)
+    writer.log(make_scan(10))
+    writer.close()
+
+    scan, _ = ScanLogReader(writer.filename)[0]
+    assert len(scan) == 4
+
+
+def test_unflushed_file_is_readable(tmp_path):
+    writer = ScanLogWriter(directory=str(tmp_path), max_points=8, records_per_file=10)
+    writer.log(make_scan(8))
+    writer.flush()
+
+    # still preallocated, only the written record counts
+    reader = ScanLogReader(writer.filename)
+    assert len(reader) == 1
+    reader.close()
+    writer.close()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "lidar.jsonl"
+    path.write_bytes(b"{}" * 64)
+
+    with pytest.raises(ValueError):
+        ScanLogReader(str(path))
+
+
+def test_replay(tmp_path):
+    writer = ScanLogWriter(directory=str(tmp_path), max_points=8)
+    for i in range(3):
+        writer.log(make_scan(8, offset=i), odom(i))
+    writer.close()
+
+    replayed = []
+    count = ScanLogReader(writer.filename).replay(
+        lambda scan, state: replayed.append((scan[0, 1], state["odom_x"]))
+    )
+
+    assert count == 3
+    assert replayed == [(1.0, 0.0), (2.0, 1.0), (3.0, 2.0)]
@@ -0,0 +1,170 @@
+import json
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from providers.rplidar_provider import RPLidarProvider
+from providers.scan_log import ScanLogWriter
+from providers.scan_replay import (
+    ScanReplayDriver,
+    laserscan_from_scan,
+    load_scans,
+)
+from providers.singleton import singleton
+
+SAMPLE_SCAN = (
+    Path(__file__).parent.parent / "integration" / "data" / "lidar" / "sample_scan.json"
+)
+
+
+@pytest.fixture
+def provider():
+    singleton.instances = {}
+    with patch("providers.rplidar_provider.OdomProvider", MagicMock()):
+        yield RPLidarProvider()
+    singleton.instances = {}
+
+
+def make_scans(count=5, points=360, seed=0):
+    rng = np.random.default_rng(seed)
+    scans = []
+    for i in range(count):
+        angles = np.arange(points) * 360.0 / points
+        distances = rng.uniform(0.3, 3.0, points)
+        scans.append((np.column_stack((angles, distances)), None))
+    return scans
+
+
+def test_load_integration_test_scan():
+    scans = load_scans(str(SAMPLE_SCAN))
+
+    assert len(scans) == 1
+    scan, odom = scans[0]
+    assert odom is None
+    assert scan[0].tolist() == [0.0, 0.8]
+
+
+def test_load_binary_log(tmp_path):
+    writer = ScanLogWriter(directory=str(tmp_path), max_points=16)
+    writer.log(np.array([[10.0, 1.5], [20.0, 2.5]]), {"odom_x": 1.0})
+    writer.close()
+
+    (scan, odom), *_ = load_scans(writer.filename)
+
+    np.testing.assert_allclose(scan, [[10.0, 1.5], [20.0, 2.5]])
+    assert odom["odom_x"] == 1.0
+
+
+def test_load_jsonl_dump_recovers_sensor_angles(tmp_path, provider):
+    data = np.array([[10.0, 0.5], [200.0, 0.7]])
+    raw = provider.path_engine.process(data, np.arange(10)).raw
+
+    path = tmp_path / "lidar_1Z.jsonl"
+    path.write_text(json.dumps({"odom_x": 2.0, "frame": raw.tolist()}) + "\n")
+
+    (scan, odom), *_ = load_scans(str(path), provider.sensor_mounting_angle)
+
+    np.testing.assert_allclose(scan, data)
+    assert odom == {"odom_x": 2.0}
+
+
+def test_unsupported_recording():
+    with pytest.raises(ValueError):
+        load_scans("scan.csv")
+
+
+def test_laserscan_maps_back_to_scan_angles(provider):
+    scan = np.array([[0.0, 1.0], [90.0, 2.0], [270.5, 3.0]])
+    laserscan = laserscan_from_scan(scan, num_ranges=720)
+
+    buffer = provider._zenoh_scan_buffer(laserscan, len(laserscan.ranges))
+    np.copyto(buffer[:, 1], laserscan.ranges[: len(buffer)])
+    finite = buffer[np.isfinite(buffer[:, 1])]
+
+    np.testing.assert_allclose(finite[np.argsort(finite[:, 0])], scan, atol=1e-6)
+
+
+@pytest.mark.parametrize("zenoh", [False, True])
+def test_replay_is_deterministic(provider, zenoh):
+    scans = make_scans()
+
+    def replay():
+        ScanReplayDriver(provider, scans, zenoh=zenoh).run()
+        return provider.valid_paths, provider.lidar_string
+
+    assert replay() == replay()
+
+
+def test_replay_matches_direct_processing(provider):
+    scans = make_scans()
+    provider._path_processor(scans[-1][0])
+    expected = provider.valid_paths
+
+    stats = ScanReplayDriver(provider, scans).run()
+
+    assert provider.valid_paths == expected
+    assert stats.num_scans == len(scans)
+
+
+def test_lookup_table_clearance_matches_exact(provider):
+    with patch("providers.rplidar_provider.OdomProvider", MagicMock()):
+        singleton.instances = {}
+        lookup = RPLidarProvider(path_lookup_table=True)
+    # open scans with a few returns near the paths
+    scans = []
+    for i, (scan, odom) in enumerate(make_scans(count=3)):
+        scan[:, 1] = 3.0
+        scan[[40 + i, 150, 200 - i], 1] = [0.5, 0.9, 0.7]
+        scans.append((scan, odom))
+
+    ScanReplayDriver(provider, scans).run()
+    ScanReplayDriver(lookup, scans).run()
+
+    assert lookup._pending_clearance is not None
+    paths = [p for p in provider.valid_paths if p in lookup.valid_paths]
+    assert paths
+    for p in paths:
+        assert lookup.path_clearance[p] == pytest.approx(provider.path_clearance[p])
+    assert lookup._pending_clearance is None
+    assert lookup.best_path(paths) == provider.best_path(paths)
+
+
+def test_stats(provider):
+    stats = ScanReplayDriver(provider, make_scans(count=4)).run(
+        repeat=2, trace_allocations=True
+    )
+    summary = stats.summary()
+
+    assert summary["scans"] == 8
+    assert summary["scans_per_second"] > 0
+    assert summary["p50_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+    assert summary["allocated_bytes"] > 0
+
+
+def test_failed_scans_are_counted(provider):
+    driver = ScanReplayDriver(provider, make_scans(count=4))
+    process = driver._process
+
+    def fail_odd(index):
+        if index % 2:
+            raise RuntimeError("bad scan")
+        process(index)
+
+    driver._process = fail_odd
+    stats = driver.run(trace_allocations=True)
+
+    assert stats.failures == 2
+    assert stats.num_scans == 2
+    assert len(stats.allocated_bytes) == 2
+    assert stats.summary()["failures"] == 2
+
+
+def test_realtime_replay_is_paced(provider):
+    stats = ScanReplayDriver(provider, make_scans(count=3)).run(
+        realtime=True, rate_hz=20.0
+    )
+
+    # three scans at 20 Hz start 0.1 s apart
+    assert stats.elapsed >= 0.1
@@ -0,0 +1,92 @@
+import multiprocessing as mp
+import time
+
+import numpy as np
+import pytest
+
+from providers.scan_ring_buffer import ScanRingBuffer
+
+
+@pytest.fixture
+def ring_buffer():
+    buffer = ScanRingBuffer(num_slots=4, max_points=100)
+    yield buffer
+    buffer.close()
+
+
+def make_scan(n, value=0.0):
+    return np.column_stack((np.linspace(0, 359, n), np.full(n, value)))
+
+
+def write_scans(buffer, count):
+    for i in range(count):
+        buffer.write(make_scan(50, float(i + 1)))
+        time.sleep(0.01)
+
+
+def test_read_returns_written_scan(ring_buffer):
+    scan = make_scan(30, 1.5)
+
+    assert ring_buffer.write(scan) == 1
+    result = ring_buffer.read_latest(timeout=0.1)
+
+    assert result.dtype == np.float32
+    np.testing.assert_allclose(result, scan, rtol=1e-6)
+
+
+def test_read_times_out_without_new_scan(ring_buffer):
+    assert ring_buffer.read_latest(timeout=0.05) is None
+
+    ring_buffer.write(make_scan(10))
+    assert ring_buffer.read_latest(timeout=0.05) is not None
+    assert ring_buffer.read_latest(timeout=0.05) is None
+
+
+def test_reader_gets_latest_scan(ring_buffer):
+    for i in range(10):
+        ring_buffer.write(make_scan(10 + i, float(i)))
+
+    result = ring_buffer.read_latest(timeout=0.1)
+
+    assert ring_buffer.sequence == 10
+    assert len(result) == 19
+    assert result[0, 1] == 9.0
+
+
+def test_long_scans_are_truncated(ring_buffer):
+    ring_buffer.write(make_scan(150))
+    assert len(ring_buffer.read_latest(timeout=0.1)) == 100
+
+
+def test_spawned_process_attaches_by_name():
+    context = mp.get_context("spawn")
+    ring_buffer = ScanRingBuffer(num_slots=4, max_points=100, context=context)
+    try:
+        # the buffer is pickled into the child, which attaches by name
+        writer = context.Process(target=ring_buffer.write, args=(make_scan(20, 3.0),))
+        writer.start()
+        writer.join(timeout=30)
+
+        result = ring_buffer.read_latest(timeout=1.0)
+        assert writer.exitcode == 0
+        assert len(result) == 20
+        assert result[0, 1] == 3.0
+    finally:
+        ring_buffer.close()
+
+
+def test_scans_cross_process_boundary(ring_buffer):
+    writer = mp.get_context("fork").Process(target=write_scans, args=(ring_buffer, 5))
+    writer.start()
+
+    values = []
+    deadline = time.time() + 5
+    while time.time() < deadline and (not values or values[-1] < 5):
+        scan = ring_buffer.read_latest(timeout=0.5)
+        if scan is not None:
+            assert len(scan) == 50
+            values.append(scan[0, 1])
+    writer.join(timeout=5)
+
+    assert values[-1] == 5.0
+    assert values == sorted(values)
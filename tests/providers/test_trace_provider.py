@@ -0,0 +1,142 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from providers.trace_provider import TraceProvider, current_tick_id
+
+
+@pytest.fixture
+def trace_provider():
+    provider = TraceProvider()
+    provider.configure(enabled=True, buffer_size=100)
+    provider.clear()
+    yield provider
+    provider.configure(enabled=False, buffer_size=10000)
+    provider.clear()
+
+
+def test_disabled_spans_are_not_recorded(trace_provider):
+    trace_provider.configure(enabled=False)
+    with trace_provider.span("fuse"):
+        pass
+    trace_provider.record("ask", "cortex", 0.0, 1.0)
+    assert trace_provider.spans == []
+
+
+def test_span_records_duration(trace_provider):
+    with trace_provider.span("fuse", category="cortex", prompt_length=10):
+        pass
+    trace_provider.record("ask", "cortex", 1.0, 1.5)
+
+    fuse, ask = trace_provider.spans
+    assert fuse.name == "fuse"
+    assert fuse.args == {"prompt_length": 10}
+    assert fuse.duration >= 0
+    assert ask.duration == 0.5
+
+
+def test_span_recorded_on_exception(trace_provider):
+    with pytest.raises(ValueError):
+        with trace_provider.span("ask"):
+            raise ValueError("LLM error")
+    assert [span.name for span in trace_provider.spans] == ["ask"]
+
+
+def test_ring_buffer(trace_provider):
+    trace_provider.configure(enabled=True, buffer_size=3)
+    for i in range(5):
+        trace_provider.record(f"stage{i}", "cortex", 0.0, 1.0)
+    assert [span.name for span in trace_provider.spans] == [
+        "stage2",
+        "stage3",
+        "stage4",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_tick_id_inherited_by_tasks(trace_provider):
+    async def tick():
+        tick_id = trace_provider.start_tick()
+
+        async def connect():
+            with trace_provider.span("connect:move", category="action"):
+                await asyncio.sleep(0)
+
+        await asyncio.create_task(connect())
+        return tick_id
+
+    first = await asyncio.create_task(tick())
+    second = await asyncio.create_task(tick())
+
+    assert second == first + 1
+    assert [span.tick_id for span in trace_provider.spans] == [first, second]
+    assert current_tick_id.get() is None
+
+
+def test_summary(trace_provider):
+    trace_provider.configure(enabled=True, buffer_size=1000)
+    for i in range(1, 101):
+        trace_provider.record("ask", "cortex", 0.0, i / 1000)
+    trace_provider.record("fuse", "cortex", 0.0, 0.002)
+
+    summary = trace_provider.summary()
+    assert list(summary) == ["ask", "fuse"]
+    assert summary["ask"]["count"] == 100
+    assert summary["ask"]["p50"] == pytest.approx(50.5)
+    assert summary["ask"]["p99"] == pytest.approx(99.01)
+    assert summary["fuse"]["p95"] == pytest.approx(2.0)
+
+
+def test_export_chrome_trace(trace_provider, tmp_path):
+    trace_provider.start_tick()
+    trace_provider.record("fuse", "cortex", 1.0, 1.25)
+
+    path = tmp_path / "traces" / "trace.json"
+    trace_provider.export_chrome_trace(str(path))
+
+    with open(path) as f:
+        trace = json.load(f)
+
+    (event,) = trace["traceEvents"]
+    assert event["name"] == "fuse"
+    assert event["ph"] == "X"
+    assert event["ts"] == 1e6
+    assert event["dur"] == 0.25e6
+    assert "tick" in event["args"]
+
+
+def test_idle_time_is_left_out_of_spans(trace_provider):
+    with trace_provider.span("tick:move", category="connector"):
+        with trace_provider.idle():
+            time.sleep(0.05)
+        time.sleep(0.01)
+    with trace_provider.span("tick:speak", category="connector"):
+        time.sleep(0.01)
+        with trace_provider.idle():
+            time.sleep(0.05)
+
+    move, speak = trace_provider.spans
+    assert 0.01 <= move.duration < 0.03
+    assert 0.01 <= speak.duration < 0.03
+    assert trace_provider._local.idle == []
+
+
+def test_overlapping_spans_are_exported_as_async_events(trace_provider):
+    trace_provider.record("ask", "cortex", 1.0, 3.0)
+    trace_provider.record("fuse", "cortex", 1.5, 2.0)
+    trace_provider.record("ask", "cortex", 2.5, 4.0)
+
+    events = trace_provider.chrome_trace()["traceEvents"]
+
+    # the nested fuse stays a complete event, the overlapping ask does not
+    assert [(e["name"], e["ph"]) for e in events] == [
+        ("ask", "X"),
+        ("fuse", "X"),
+        ("ask", "b"),
+        ("ask", "e"),
+    ]
+    begin, end = events[2:]
+    assert begin["id"] == end["id"]
+    assert (begin["ts"], end["ts"]) == (2.5e6, 4e6)
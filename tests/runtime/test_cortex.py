@@ -1,16 +1,30 @@
 import asyncio
-from unittest.mock import AsyncMock, Mock, patch
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
 
-from llm.output_model import Action
+from llm.output_model import Action, CortexOutputModel
+from providers.llm_history_manager import LLMHistoryManager
 from runtime.config import RuntimeConfig
 from runtime.cortex import CortexRuntime
+from runtime.decision_cache import DecisionCache
 
 
 @pytest.fixture
 def mock_config():
-    config = Mock(spec=RuntimeConfig, hertz=10.0, silence_rate=0)
+    config = Mock(
+        spec=RuntimeConfig,
+        hertz=10.0,
+        silence_rate=0,
+        max_in_flight=1,
+        tick_mode="fixed",
+        min_tick_interval=0.1,
+        max_tick_interval=10.0,
+        decision_cache=None,
+        tracing=None,
+    )
     config.name = "test_config"
     config.cortex_llm = Mock()
     config.agent_inputs = []
@@ -20,7 +34,7 @@ def mock_config():
 @pytest.fixture
 def mock_dependencies():
     return {
-        "fuser": Mock(),
+        "fuser": Mock(memory=None),
         "action_orchestrator": Mock(),
         "simulator_orchestrator": Mock(),
         "background_orchestrator": Mock(),
@@ -118,6 +132,69 @@ async def test_tick_no_llm_output(runtime):
     mocks["background_orchestrator"].promise.assert_not_called()
 
 
+@pytest.mark.asyncio
+async def test_tick_records_trace_spans(runtime):
+    cortex_runtime, mocks = runtime
+    trace_provider = cortex_runtime.trace_provider
+    trace_provider.configure(enabled=True)
+    trace_provider.clear()
+
+    mocks["action_orchestrator"].flush_promises = AsyncMock(return_value=([], None))
+    mocks["fuser"].fuse.return_value = "test prompt"
+    mock_output = Mock()
+    mock_output.actions = [Action(type="action1", value="val1")]
+    cortex_runtime.config.cortex_llm.ask = AsyncMock(return_value=mock_output)
+    mocks["simulator_orchestrator"].promise = AsyncMock()
+    mocks["action_orchestrator"].promise = AsyncMock()
+
+    try:
+        await cortex_runtime._tick()
+        spans = trace_provider.spans
+    finally:
+        trace_provider.configure(enabled=False)
+        trace_provider.clear()
+
+    assert [span.name for span in spans] == [
+        "flush_promises",
+        "fuse",
+        "ask",
+        "simulate",
+    ]
+    assert len({span.tick_id for span in spans}) == 1
+
+
+@pytest.mark.asyncio
+async def test_trace_export_runs_off_the_event_loop(runtime, tmp_path):
+    cortex_runtime, _ = runtime
+    trace_provider = cortex_runtime.trace_provider
+    trace_provider.configure(enabled=True)
+    trace_provider.clear()
+    trace_provider.record("ask", "cortex", 1.0, 2.0)
+    cortex_runtime.trace_summary_interval = 0.01
+    cortex_runtime.trace_export_path = str(tmp_path / "trace.json")
+
+    export = trace_provider.export_chrome_trace
+    threads = []
+
+    def export_chrome_trace(path, spans=None):
+        threads.append(threading.get_ident())
+        export(path, spans)
+
+    try:
+        with patch.object(trace_provider, "export_chrome_trace", export_chrome_trace):
+            task = asyncio.create_task(cortex_runtime._run_trace_reporter())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+    finally:
+        trace_provider.configure(enabled=False)
+        trace_provider.clear()
+
+    assert threads and threading.get_ident() not in threads
+    assert (tmp_path / "trace.json").exists()
+
+
 @pytest.mark.asyncio
 async def test_run_cortex_loop(runtime):
     cortex_runtime, mocks = runtime
@@ -141,6 +218,255 @@ async def test_run_cortex_loop(runtime):
     assert mocks["sleep_ticker_provider"].sleep.call_count == 3
 
 
+@pytest.mark.asyncio
+async def test_ask_and_dispatch_drops_superseded_response(runtime):
+    cortex_runtime, mocks = runtime
+
+    action = Action(type="action1", value="val1")
+    mock_output = Mock()
+    mock_output.actions = [action]
+    cortex_runtime.config.cortex_llm.ask = AsyncMock(return_value=mock_output)
+    mocks["simulator_orchestrator"].promise = AsyncMock()
+    mocks["action_orchestrator"].promise = AsyncMock()
+
+    await cortex_runtime._ask_and_dispatch("newer prompt", sequence=2)
+    await cortex_runtime._ask_and_dispatch("older prompt", sequence=1)
+
+    assert cortex_runtime._dispatched_sequence == 2
+    mocks["simulator_orchestrator"].promise.assert_called_once_with([action])
+    mocks["action_orchestrator"].promise.assert_called_once_with([action])
+
+
+@pytest.mark.asyncio
+async def test_run_pipelined_cortex_loop_overlaps_requests(runtime):
+    cortex_runtime, mocks = runtime
+    cortex_runtime.max_in_flight = 2
+
+    mocks["sleep_ticker_provider"].skip_sleep = False
+    mocks["sleep_ticker_provider"].sleep = AsyncMock()
+    mocks["action_orchestrator"].flush_promises = AsyncMock(return_value=([], None))
+    mocks["fuser"].fuse.return_value = "test prompt"
+    mocks["simulator_orchestrator"].promise = AsyncMock()
+    mocks["action_orchestrator"].promise = AsyncMock()
+
+    release = asyncio.Event()
+    max_concurrent = 0
+    concurrent = 0
+
+    async def slow_ask(prompt):
+        nonlocal concurrent, max_concurrent
+        concurrent += 1
+        max_concurrent = max(max_concurrent, concurrent)
+        await release.wait()
+        concurrent -= 1
+        return None
+
+    cortex_runtime.config.cortex_llm.ask = AsyncMock(side_effect=slow_ask)
+
+    loop_task = asyncio.create_task(cortex_runtime._run_pipelined_cortex_loop())
+    await asyncio.sleep(0.05)
+
+    # the loop fills the pipeline and then waits for a free slot
+    assert max_concurrent == 2
+    assert len(cortex_runtime._in_flight) == 2
+
+    release.set()
+    await asyncio.sleep(0.05)
+    loop_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await loop_task
+
+    assert cortex_runtime._tick_sequence > 2
+
+
+@pytest.mark.asyncio
+async def test_pipelined_request_errors_are_logged(runtime):
+    cortex_runtime, _ = runtime
+    cortex_runtime._ask_and_dispatch = AsyncMock(side_effect=RuntimeError("boom"))
+
+    task = asyncio.create_task(cortex_runtime._ask_and_dispatch("test prompt", 1))
+    cortex_runtime._in_flight.add(task)
+    task.add_done_callback(cortex_runtime._on_in_flight_done)
+    with patch("runtime.cortex.logging.error") as log_error:
+        await asyncio.wait({task})
+        await asyncio.sleep(0)
+
+    assert not cortex_runtime._in_flight
+    log_error.assert_called_once()
+    assert "boom" in log_error.call_args[0][0]
+
+
+def test_llm_history_is_closed(runtime):
+    cortex_runtime, _ = runtime
+    backend = Mock()
+    cortex_runtime.config.cortex_llm = Mock(backends=[backend])
+
+    cortex_runtime._close_llm_history()
+
+    cortex_runtime.config.cortex_llm.history_manager.close.assert_called_once()
+    backend.history_manager.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_run_event_driven_cortex_loop(runtime):
+    cortex_runtime, mocks = runtime
+    cortex_runtime.tick_mode = "event"
+    cortex_runtime.min_tick_interval = 0.05
+    cortex_runtime.max_tick_interval = 10.0
+    cortex_runtime._tick = AsyncMock()
+    mocks["sleep_ticker_provider"].skip_sleep = False
+
+    loop_task = asyncio.create_task(cortex_runtime._run_cortex_loop())
+    await asyncio.sleep(0.1)
+
+    # nothing changed - no tick before the maximum interval
+    assert cortex_runtime._tick.call_count == 0
+
+    # normal priority input waits for the minimum interval
+    cortex_runtime.io_provider.notify_input("Odometry", 1)
+    await asyncio.sleep(0.01)
+    assert cortex_runtime._tick.call_count == 1
+
+    cortex_runtime.io_provider.notify_input("Odometry", 1)
+    cortex_runtime.io_provider.notify_input("Odometry", 1)
+    await asyncio.sleep(0.01)
+    assert cortex_runtime._tick.call_count == 1
+    await asyncio.sleep(0.1)
+    assert cortex_runtime._tick.call_count == 2
+
+    # urgent input bypasses the minimum interval, passive input is ignored
+    cortex_runtime.io_provider.notify_input("Voice", 2)
+    await asyncio.sleep(0.01)
+    assert cortex_runtime._tick.call_count == 3
+
+    cortex_runtime.io_provider.notify_input("Battery", 0)
+    await asyncio.sleep(0.1)
+    assert cortex_runtime._tick.call_count == 3
+
+    loop_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await loop_task
+
+    assert cortex_runtime._on_input not in cortex_runtime.io_provider._input_listeners
+
+
+@pytest.mark.asyncio
+async def test_event_driven_cortex_loop_max_interval(runtime):
+    cortex_runtime, mocks = runtime
+    cortex_runtime.tick_mode = "event"
+    cortex_runtime.max_tick_interval = 0.05
+    cortex_runtime._tick = AsyncMock()
+    mocks["sleep_ticker_provider"].skip_sleep = False
+
+    loop_task = asyncio.create_task(cortex_runtime._run_cortex_loop())
+    await asyncio.sleep(0.13)
+    loop_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await loop_task
+
+    assert cortex_runtime._tick.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_event_driven_ignores_inputs_read_while_fusing(runtime):
+    cortex_runtime, mocks = runtime
+    cortex_runtime.tick_mode = "event"
+    cortex_runtime._tick = AsyncMock()
+    mocks["sleep_ticker_provider"].skip_sleep = False
+
+    loop_task = asyncio.create_task(cortex_runtime._run_cortex_loop())
+    await asyncio.sleep(0)
+
+    cortex_runtime._fusing = True
+    cortex_runtime.io_provider.notify_input("Odometry", 2)
+    cortex_runtime._fusing = False
+    await asyncio.sleep(0.01)
+
+    loop_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await loop_task
+
+    assert cortex_runtime._tick.call_count == 0
+
+
+@pytest.mark.asyncio
+async def test_ask_and_dispatch_reuses_cached_decision(runtime):
+    cortex_runtime, mocks = runtime
+    cortex_runtime.decision_cache = DecisionCache(history_length=0)
+
+    move = Action(type="move", value="walk")
+    speak = Action(type="speak", value="hello")
+    output = CortexOutputModel(actions=[move, speak])
+    cortex_runtime.config.cortex_llm.ask = AsyncMock(return_value=output)
+    mocks["simulator_orchestrator"].promise = AsyncMock()
+    mocks["action_orchestrator"].promise = AsyncMock()
+
+    hits = cortex_runtime.io_provider.decision_cache_hits
+    await cortex_runtime._ask_and_dispatch("INPUT: Battery at 10:00:01")
+    await cortex_runtime._ask_and_dispatch("INPUT: Battery at 10:00:02")
+
+    cortex_runtime.config.cortex_llm.ask.assert_called_once()
+    assert cortex_runtime.io_provider.decision_cache_hits == hits + 1
+    assert mocks["action_orchestrator"].promise.call_args_list[-1] == (([move],),)
+
+    # voice input bypasses the cache
+    await cortex_runtime._ask_and_dispatch("INPUT: Voice at 10:00:03")
+    await cortex_runtime._ask_and_dispatch("INPUT: Voice at 10:00:04")
+    assert cortex_runtime.config.cortex_llm.ask.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_ask_and_dispatch_suppresses_cached_decision(runtime):
+    cortex_runtime, mocks = runtime
+    cortex_runtime.decision_cache = DecisionCache(mode="suppress", history_length=0)
+
+    output = CortexOutputModel(actions=[Action(type="move", value="walk")])
+    cortex_runtime.config.cortex_llm.ask = AsyncMock(return_value=output)
+    mocks["simulator_orchestrator"].promise = AsyncMock()
+    mocks["action_orchestrator"].promise = AsyncMock()
+
+    await cortex_runtime._ask_and_dispatch("test prompt")
+    await cortex_runtime._ask_and_dispatch("test prompt")
+
+    cortex_runtime.config.cortex_llm.ask.assert_called_once()
+    mocks["action_orchestrator"].promise.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_ask_and_dispatch_streamed_actions(runtime):
+    cortex_runtime, mocks = runtime
+    cortex_runtime.silence_rate = 1
+
+    move = Action(type="move", value="walk")
+    speak = Action(type="speak", value="hello")
+    emotion = Action(type="emotion", value="joy")
+    mock_output = Mock()
+    mock_output.actions = [move, speak, emotion]
+
+    async def streaming_ask(prompt, on_action=None):
+        await on_action(move)
+        await on_action(speak)
+        return mock_output
+
+    cortex_runtime.config.cortex_llm.streams_actions = True
+    cortex_runtime.config.cortex_llm.ask = AsyncMock(side_effect=streaming_ask)
+    mocks["simulator_orchestrator"].promise = AsyncMock()
+    mocks["action_orchestrator"].promise = AsyncMock()
+
+    await cortex_runtime._ask_and_dispatch("test prompt")
+
+    # the streamed speak action is held back by the silence rate, and only
+    # the action that was not streamed is dispatched at the end
+    assert mocks["action_orchestrator"].promise.call_args_list == [
+        (([move],),),
+        (([emotion],),),
+    ]
+    mocks["simulator_orchestrator"].promise.assert_called_once_with(
+        [move, speak, emotion]
+    )
+    assert cortex_runtime.silence_counter == 1
+
+
 @pytest.mark.asyncio
 async def test_start_input_listeners(runtime):
     cortex_runtime, mocks = runtime
@@ -169,3 +495,58 @@ async def test_run_full_runtime(runtime):
 
     cortex_runtime._start_input_listeners.assert_called_once()
     cortex_runtime._run_cortex_loop.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_ask_and_dispatch_remembers_the_turn(runtime):
+    cortex_runtime, mocks = runtime
+    mocks["fuser"].memory = Mock()
+
+    output = CortexOutputModel(actions=[Action(type="speak", value="hello")])
+    cortex_runtime.config.cortex_llm.ask = AsyncMock(return_value=output)
+    mocks["simulator_orchestrator"].promise = AsyncMock()
+    mocks["action_orchestrator"].promise = AsyncMock()
+
+    await cortex_runtime._ask_and_dispatch("INPUT: Voice hi")
+
+    mocks["fuser"].remember.assert_called_once_with("INPUT: Voice hi", output.actions)
+
+
+class HistoryLLM:
+    def __init__(self):
+        self._config = MagicMock(
+            history_length=10, history_token_budget=0, agent_name="Robot"
+        )
+        self.history_manager = LLMHistoryManager(self._config, AsyncMock())
+        self.io_provider = SimpleNamespace(inputs={})
+
+    @LLMHistoryManager.update_history()
+    async def ask(self, prompt, messages, delay=0.0):
+        await asyncio.sleep(delay)
+        return CortexOutputModel(actions=[Action(type="speak", value=prompt)])
+
+
+@pytest.mark.asyncio
+async def test_superseded_response_is_not_added_to_history(runtime):
+    cortex_runtime, mocks = runtime
+    llm = HistoryLLM()
+    delays = {"older": 0.05, "newer": 0.0}
+    cortex_runtime.config.cortex_llm = Mock(history_manager=llm.history_manager)
+    cortex_runtime.config.cortex_llm.ask = lambda prompt: llm.ask(
+        prompt, delay=delays[prompt]
+    )
+    mocks["simulator_orchestrator"].promise = AsyncMock()
+    mocks["action_orchestrator"].promise = AsyncMock()
+
+    llm.io_provider.inputs = {"Voice": SimpleNamespace(input="first")}
+    older = asyncio.create_task(cortex_runtime._ask_and_dispatch("older", 1))
+    await asyncio.sleep(0)
+    llm.io_provider.inputs = {"Voice": SimpleNamespace(input="second")}
+    await cortex_runtime._ask_and_dispatch("newer", 2)
+    await older
+
+    # the older response finished last and was dropped, and so is its turn
+    contents = [message.content for message in llm.history_manager.history]
+    assert len(contents) == 2
+    assert "second" in contents[0] and "said: newer" in contents[1]
+    assert not any("older" in content or "first" in content for content in contents)
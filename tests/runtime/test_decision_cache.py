@@ -0,0 +1,89 @@
+import time
+
+import pytest
+
+from llm.output_model import Action, CortexOutputModel
+from runtime.decision_cache import DecisionCache
+
+
+def make_prompt(battery: str, lidar: str, timestamp: str) -> str:
+    return (
+        "\nBASIC CONTEXT:\nYou are a dog. You like 2 walks a day.\n\n"
+        "AVAILABLE INPUTS:\n"
+        f"\nINPUT: Battery\n// START\nBattery at {battery}% at {timestamp}\n// END\n"
+        f"\nINPUT: RPLidar\n// START\nObstacle at {lidar}m\n// END\n"
+        "AVAILABLE ACTIONS:\n\nmove\n\nWhat will you do? Actions:"
+    )
+
+
+def make_output(*actions) -> CortexOutputModel:
+    return CortexOutputModel(
+        actions=[Action(type=type, value=value) for type, value in actions]
+    )
+
+
+def test_normalize_ignores_timestamps_and_jitter():
+    cache = DecisionCache(numeric_steps={"Battery": 5, "RPLidar": 0.5})
+
+    a = cache.normalize(make_prompt("81", "1.12", "2025-01-02T10:00:01"))
+    b = cache.normalize(make_prompt("79", "0.96", "2025-01-02T10:00:04"))
+    c = cache.normalize(make_prompt("60", "0.96", "2025-01-02T10:00:04"))
+
+    assert a == b
+    assert a != c
+    assert "2 walks" in a
+
+
+def test_normalize_ignore_inputs_and_patterns():
+    cache = DecisionCache(
+        ignore_inputs=["RPLidar"], ignore_patterns=[r"Battery at \d+"]
+    )
+
+    a = cache.normalize(make_prompt("81", "1.12", "10:00:01"))
+    b = cache.normalize(make_prompt("20", "0.30", "10:00:09"))
+
+    assert a == b
+    assert "RPLidar" not in a
+
+
+def test_get_put_with_history():
+    cache = DecisionCache()
+    prompt = make_prompt("80", "1.0", "10:00:00")
+    output = make_output(("move", "stand still"), ("speak", "Hello"))
+
+    key = cache.key(prompt)
+    assert cache.get(key) is None
+    cache.put(key, output)
+
+    # the recent decision is part of the key, so the first repeat is a miss
+    key = cache.key(prompt)
+    assert cache.get(key) is None
+    cache.put(key, make_output(("move", "stand still"), ("speak", "Hi there")))
+
+    # the agent has settled - speech is not part of the history
+    assert cache.get(cache.key(prompt)) is not None
+
+
+def test_ttl_expiry():
+    cache = DecisionCache(ttl=0.01, history_length=0)
+    key = cache.key(make_prompt("80", "1.0", "10:00:00"))
+    cache.put(key, make_output(("move", "stand still")))
+
+    assert cache.get(key) is not None
+    time.sleep(0.02)
+    assert cache.get(key) is None
+
+
+def test_max_entries():
+    cache = DecisionCache(history_length=0, max_entries=2)
+    keys = [cache.key(make_prompt(str(i), "1.0", "10:00:00")) for i in range(3)]
+    for key in keys:
+        cache.put(key, make_output(("move", "stand still")))
+
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) is not None
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        DecisionCache(mode="sometimes")